@@ -0,0 +1,237 @@
+"""
+benchmarks/bench_communication_dna.py — Time to compute every Communication
+DNA metric for one long thread, comparing the old per-message loops with the
+columnar (NumPy) implementation in services/communication_dna.py.
+
+The old path re-parsed every timestamp and re-split every text once per
+metric, and compute_linguistic_intimacy() repeated three of those passes. It
+is reproduced below (_legacy_*) so both sides run on the same synthetic
+threads, and the run fails if the two disagree. The last line per size is the
+cost of folding a small batch of new messages into stored running totals
+(DNAStats) instead of recomputing. From backend/:
+
+    python benchmarks/bench_communication_dna.py --sizes 10000 100000 --repeat 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.communication_dna import (  # noqa: E402
+    ABBREVIATIONS, NICKNAME_SIGNALS, CommunicationDNA, DNAStats, MessageColumns, _count_emojis,
+)
+
+_WORDS = ["hey", "babe", "lol", "omg", "dinner", "tonight", "remember", "pickles", "yesterday",
+          "meeting", "running", "late", "haha", "tbh", "sounds", "great", "mountain", "weekend",
+          "birthday", "okay", "nope", "coffee", "later", "really", "wonderful", "honestly"]
+_EMOJI = ["😂", "🔥", "❤", "🙏🏼", "✨"]
+
+
+def synthetic_thread(n: int, seed: int = 0) -> list[dict]:
+    """A two-person thread: bursts of replies separated by hours-to-days of silence."""
+    rng = random.Random(seed)
+    t = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    messages = []
+    for _ in range(n):
+        t += timedelta(seconds=rng.choice([20, 120, 900, 3 * 3600, 18 * 3600, 3 * 86400]) * rng.random())
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(1, 25))]
+        if rng.random() < 0.15:
+            words.append(rng.choice(_EMOJI))
+        messages.append({
+            "text": " ".join(words),
+            "is_from_me": rng.random() < 0.5,
+            "timestamp": t.isoformat().replace("+00:00", "Z" if rng.random() < 0.5 else "+00:00"),
+        })
+    return messages
+
+
+# ── Old per-message path, kept here for comparison ────────────────────────────
+
+def _parse(ts: str) -> datetime:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+def _legacy_response_time(messages):
+    times = []
+    for prev, curr in zip(messages, messages[1:]):
+        if prev.get("is_from_me") == curr.get("is_from_me"):
+            continue
+        try:
+            delta = (_parse(curr["timestamp"]) - _parse(prev["timestamp"])).total_seconds() / 3600.0
+            if 0 < delta < 72:
+                times.append(delta)
+        except (KeyError, ValueError):
+            continue
+    return sum(times) / len(times) if times else 0.0
+
+
+def _legacy_initiates_ratio(messages):
+    if not messages:
+        return 0.5
+    ordered = sorted(messages, key=lambda m: m.get("timestamp", ""))
+    mine, total = int(bool(ordered[0].get("is_from_me"))), 1
+    for prev, msg in zip(ordered, ordered[1:]):
+        try:
+            if (_parse(msg["timestamp"]) - _parse(prev["timestamp"])).total_seconds() / 3600.0 > 3.0:
+                total += 1
+                mine += bool(msg.get("is_from_me"))
+        except (KeyError, ValueError):
+            continue
+    return mine / total
+
+
+def _legacy_avg_length(messages):
+    lengths = [len((m.get("text") or "").split()) for m in messages]
+    return sum(lengths) / len(lengths) if lengths else 0.0
+
+
+def _legacy_emoji_frequency(messages):
+    return sum(_count_emojis(m.get("text", "") or "") for m in messages) / len(messages) if messages else 0.0
+
+
+def _legacy_peak_hours(messages):
+    counts: Counter = Counter()
+    for msg in messages:
+        try:
+            counts[_parse(msg["timestamp"]).hour] += 1
+        except (KeyError, ValueError):
+            continue
+    return [h for h, _ in counts.most_common(3)]
+
+
+def _legacy_silence_gaps(messages):
+    ordered = sorted(messages, key=lambda m: m.get("timestamp", ""))
+    gaps = []
+    for prev, msg in zip(ordered, ordered[1:]):
+        try:
+            days = (_parse(msg["timestamp"]) - _parse(prev["timestamp"])).total_seconds() / 86400.0
+            if days > 0.5:
+                gaps.append(days)
+        except (KeyError, ValueError):
+            continue
+    return (sum(gaps) / len(gaps), max(gaps)) if gaps else (0.0, 0.0)
+
+
+def _legacy_trend_delta(messages):
+    mid = len(messages) // 2
+    first = sum(len((m.get("text") or "").split()) for m in messages[:mid]) / mid
+    second = sum(len((m.get("text") or "").split()) for m in messages[mid:]) / (len(messages) - mid)
+    return second - first
+
+
+def _legacy_callbacks(messages):
+    presence: Counter = Counter()
+    for m in messages:
+        presence.update({w.strip(".,!?\"'") for w in (m.get("text") or "").lower().split() if len(w) > 5})
+    ceiling = max(2, int(len(messages) * 0.4))
+    return sum(1 for c in presence.values() if 1 < c <= ceiling)
+
+
+def _legacy_metrics(messages) -> dict:
+    words = " ".join(m.get("text", "") or "" for m in messages).lower().split()
+    # compute_linguistic_intimacy() ran these passes a second time
+    _legacy_avg_length(messages), _legacy_response_time(messages), _legacy_initiates_ratio(messages)
+    return {
+        "nickname": any(nick in words for nick in NICKNAME_SIGNALS),
+        "abbreviations": sum(1 for w in words if w.rstrip(".,!?") in ABBREVIATIONS),
+        "response_time": _legacy_response_time(messages),
+        "initiates_ratio": _legacy_initiates_ratio(messages),
+        "avg_length": _legacy_avg_length(messages),
+        "emoji_frequency": _legacy_emoji_frequency(messages),
+        "peak_hours": _legacy_peak_hours(messages),
+        "silence_gaps": _legacy_silence_gaps(messages),
+        "trend_delta": _legacy_trend_delta(messages),
+        "callbacks": _legacy_callbacks(messages),
+    }
+
+
+def _columnar_metrics(messages) -> dict:
+    dna = CommunicationDNA()
+    cols = MessageColumns.from_messages(messages)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(dna.compute_linguistic_intimacy(cols))
+    finally:
+        loop.close()
+    gaps, ok = cols.gaps_us(cols.by_time)
+    silences = gaps[ok & (gaps > 43200 * 10**6)] / 1e6 / 86400.0
+    mid = len(cols) // 2
+    ceiling = max(2, int(len(cols) * 0.4))
+    dna._compute_silence_pattern(cols)
+    dna._compute_intimacy_trend(cols)
+    return {
+        "nickname": cols.has_nickname,
+        "abbreviations": cols.abbreviations,
+        "response_time": dna._compute_avg_response_time(cols),
+        "initiates_ratio": dna._compute_initiates_ratio(cols),
+        "avg_length": dna._compute_avg_message_length(cols),
+        "emoji_frequency": dna._compute_emoji_frequency(cols),
+        "peak_hours": dna._compute_peak_hours(cols),
+        "silence_gaps": (float(silences.mean()), float(silences.max())) if len(silences) else (0.0, 0.0),
+        "trend_delta": float(cols.words[mid:].mean()) - float(cols.words[:mid].mean()),
+        "callbacks": sum(1 for c in cols.callback_presence.values() if 1 < c <= ceiling),
+    }
+
+
+def _same(a: dict, b: dict) -> bool:
+    def close(x, y):
+        if isinstance(x, (tuple, list)):
+            return len(x) == len(y) and all(close(i, j) for i, j in zip(x, y))
+        if isinstance(x, float):
+            return abs(x - y) <= 1e-9 * max(1.0, abs(x))
+        return x == y
+    return all(close(a[k], b[k]) for k in a)
+
+
+def _best_ms(fn, messages, repeat: int) -> tuple[float, dict]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(messages)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--new", type=int, default=200, help="new messages per incremental update")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        messages = synthetic_thread(n)
+        legacy_ms, legacy = _best_ms(_legacy_metrics, messages, args.repeat)
+        columnar_ms, columnar = _best_ms(_columnar_metrics, messages, args.repeat)
+        build_ms, _ = _best_ms(MessageColumns.from_messages, messages, args.repeat)
+        if not _same(legacy, columnar):
+            sys.exit(f"metrics differ for {n} messages:\n  legacy   {legacy}\n  columnar {columnar}")
+        print(f"{n:>8,} messages")
+        print(f"  per-message (old) {legacy_ms:9.1f} ms")
+        print(f"  columnar          {columnar_ms:9.1f} ms   "
+              f"(build {build_ms:.1f} ms + metrics {columnar_ms - build_ms:.1f} ms)   "
+              f"{legacy_ms / columnar_ms:.1f}x")
+
+        history, new = messages[:-args.new], messages[-args.new:]
+        stats = DNAStats()
+        stats.fold(MessageColumns.from_messages(history))
+        stored = json.dumps(stats.to_dict())
+
+        def fold_new(batch):
+            merged = DNAStats.from_dict(json.loads(stored))
+            merged.fold(MessageColumns.from_messages(batch))
+            return merged.metrics()
+
+        fold_ms, _ = _best_ms(fold_new, new, args.repeat)
+        print(f"  +{args.new} new, folded {fold_ms:9.1f} ms   (incl. loading the stored totals)")
+
+
+if __name__ == "__main__":
+    main()
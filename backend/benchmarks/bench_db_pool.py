@@ -0,0 +1,65 @@
+"""
+benchmarks/bench_db_pool.py — Per-query latency of database.get_user_by_id,
+comparing a fresh Supabase client per call (the old get_db()) with the pooled
+long-lived clients.
+
+Runs against a local PostgREST stand-in, so the numbers isolate client
+construction and connection setup from real database work. From backend/:
+
+    python benchmarks/bench_db_pool.py --queries 500 --latency-ms 1
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+
+def _timed(fn, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"  {label:<22} median {statistics.median(ordered):7.3f} ms   "
+          f"p95 {p95:7.3f} ms   total {sum(ordered):8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated server-side latency per request")
+    args = parser.parse_args()
+
+    with FakePostgREST(latency_ms=args.latency_ms) as server:
+        server.tables["users"] = [{"id": "user-1", "name": "Leo", "phone": "+14155550100"}]
+        use_fake_supabase(server.url)
+
+        import database
+
+        def lookup():
+            assert database.get_user_by_id("user-1")["name"] == "Leo"
+
+        lookup()  # warm imports and the first pooled connection
+
+        print(f"get_user_by_id × {args.queries} against {server.url}")
+        with patch.object(database, "get_db", database._new_client):
+            _report("client per call", _timed(lookup, args.queries))
+        _report("pooled client", _timed(lookup, args.queries))
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
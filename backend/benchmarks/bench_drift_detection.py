@@ -0,0 +1,140 @@
+"""
+benchmarks/bench_drift_detection.py — The nightly drift check over many
+users, the old way and through run_drift_detection_for_all_users, against a
+local PostgREST stand-in (benchmarks/fake_postgrest.py).
+
+The old check (reproduced below as _legacy_check) loaded each user's whole
+People Graph with select * — memories included — walked it in Python for
+the closest quiet person, queried moments for a recent drift moment, then
+created the moment with its own person and user lookups. The new one asks
+drifted_people() (schema_migration_v10h) for every user's drifted person
+and saves all the moments with one insert. The stand-in's drifted_people is
+a Python version of the SQL function. Genie conversations are left out of
+both (conversation_due is false) since they are one WhatsApp send per hit
+either way. Reports wall time, requests and moments created. From
+backend/:
+
+    python benchmarks/bench_drift_detection.py --users 500 --people 150 --latency-ms 2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+NOW = datetime.now(timezone.utc)
+
+
+def _seed(server: FakePostgREST, users: int, people: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    server.tables["users"] = [{"id": f"u{u}", "phone": f"+1555{u:07}", "consecutive_dismissals": 0}
+                              for u in range(users)]
+    server.tables["people"], server.tables["moments"] = [], []
+    for u in range(users):
+        for n in range(people):
+            last = NOW - timedelta(days=rng.randrange(120), hours=rng.randrange(24))
+            server.tables["people"].append({
+                "id": str(uuid.uuid4()), "owner_user_id": f"u{u}", "name": f"Person {u}-{n}",
+                "closeness_score": round(rng.random(), 3),
+                "status": "deceased" if rng.random() < 0.01 else "living",
+                "last_meaningful_exchange": last.isoformat(),
+                "memories": [{"description": f"Memory {m} with Person {u}-{n}", "date": "2024-05-01"}
+                             for m in range(rng.randrange(10))],
+            })
+
+
+def _drifted_people_rpc(server: FakePostgREST):
+    """Python stand-in for the drifted_people() SQL function."""
+    def drifted(params: dict) -> list:
+        now = datetime.fromisoformat(params["p_now"])
+        repeat = (now - timedelta(days=params["p_repeat_days"])).isoformat()
+        recent = {(m["owner_user_id"], m["person_id"]) for m in server.tables.get("moments", [])
+                  if m.get("triggered_by") == "drift_detection" and (m.get("created_at") or repeat) >= repeat}
+        phones = {u["id"]: u.get("phone") for u in server.tables["users"]}
+        best: dict[str, dict] = {}
+        for p in server.tables["people"]:
+            score = p.get("closeness_score") or 0
+            days = (params["p_close_days"] if score >= params["p_close_min"]
+                    else params["p_distant_days"] if score < params["p_distant_max"] else params["p_days"])
+            last = datetime.fromisoformat(p["last_meaningful_exchange"])
+            owner = p["owner_user_id"]
+            if (p.get("status") == "deceased" or not phones.get(owner) or now - last <= timedelta(days=days)
+                    or (owner, p["id"]) in recent):
+                continue
+            if owner not in best or score > best[owner]["closeness_score"]:
+                best[owner] = {"owner_user_id": owner, "phone": phones[owner], "person_id": p["id"],
+                               "name": p["name"], "closeness_score": score,
+                               "days_silent": (now - last).days, "conversation_due": False}
+        return list(best.values())
+    return drifted
+
+
+# ── Old per-user check, kept here for comparison ──────────────────────────────
+
+def _legacy_check(db, user: dict) -> int:
+    cutoff = NOW - timedelta(days=21)
+    drifted = None
+    for person in db.get_people_for_user(user["id"]):
+        if person.get("status") == "deceased" or not person.get("last_meaningful_exchange"):
+            continue
+        if datetime.fromisoformat(person["last_meaningful_exchange"]) < cutoff:
+            drifted = person
+            break
+    if not drifted:
+        return 0
+    recent_cutoff = (NOW - timedelta(days=14)).isoformat()
+    if (db.get_db().table("moments").select("id").eq("owner_user_id", user["id"])
+            .eq("person_id", drifted["id"]).eq("triggered_by", "drift_detection")
+            .gte("created_at", recent_cutoff).execute().data):
+        return 0
+    days_silent = (NOW - datetime.fromisoformat(drifted["last_meaningful_exchange"])).days
+    db.create_moment(user_id=user["id"], person_id=drifted["id"],
+                     suggestion=f"It's been {days_silent} days since you and {drifted['name']} last connected.",
+                     triggered_by="drift_detection")
+    return 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--people", type=int, default=150, help="people per user")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated latency per request")
+    args = parser.parse_args()
+
+    with FakePostgREST(latency_ms=args.latency_ms) as server:
+        use_fake_supabase(server.url)
+        server.rpcs["drifted_people"] = _drifted_people_rpc(server)
+
+        import asyncio
+        import database as db
+        from services import drift_detection
+
+        print(f"{args.users:,} users × {args.people} people, {args.latency_ms:.0f} ms per request")
+
+        def legacy() -> int:
+            users = [u for u in db.get_db().table("users").select("id, phone").execute().data if u.get("phone")]
+            return sum(_legacy_check(db, u) for u in users)
+
+        def current() -> int:
+            return asyncio.run(drift_detection.run_drift_detection_for_all_users())["moments"]
+
+        for label, check in (("per user (old)", legacy), ("one query", current)):
+            _seed(server, args.users, args.people)
+            server.reset_counts()
+            start = time.perf_counter()
+            created = check()
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<16} {elapsed * 1000:9.1f} ms   requests {server.request_count:6}   "
+                  f"moments {created:5}")
+            for route, count in sorted(server.requests_by_route.items()):
+                print(f"      {route:<28} {count}")
+
+
+if __name__ == "__main__":
+    main()
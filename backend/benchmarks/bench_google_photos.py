@@ -0,0 +1,122 @@
+"""
+benchmarks/bench_google_photos.py — Read the top Google Photos people albums
+the old way and through google_ingestion.fetch_photos_data, against a local
+fake Photos API (benchmarks/fake_google_photos.py).
+
+The old fetcher (reproduced below as _legacy_fetch) used bare requests calls
+with no session, walked the albums one at a time and read only each album's
+first page of 100 items, so its oldest / newest dates were wrong for any
+larger album. _legacy_fetch_all is the same code made to follow
+nextPageToken, collecting every item and sorting: right answers, but memory
+grows with the album. The new fetcher pages concurrently over one pooled
+client and keeps only the five oldest and newest items per album.
+
+Reports wall time, requests, how many albums got the right oldest and newest
+dates, and peak traced memory (a second, traced run). From backend/:
+
+    python benchmarks/bench_google_photos.py --albums 50 --items 10000 --latency-ms 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_google_photos import FakeGooglePhotos  # noqa: E402
+from benchmarks.fake_postgrest import _DUMMY_SETTINGS  # noqa: E402
+
+for _key, _value in {**_DUMMY_SETTINGS, "SUPABASE_URL": "http://localhost", "SUPABASE_KEY": "bench"}.items():
+    os.environ.setdefault(_key, _value)
+
+
+# ── Old sequential fetcher, kept here for comparison ──────────────────────────
+
+def _legacy_fetch(base_url: str, all_pages: bool = False, top: int = 15) -> dict:
+    import requests
+
+    result = {"people_albums": [], "memories": []}
+    albums = requests.get(f"{base_url}/albums?pageSize=50").json().get("albums", [])
+    albums = [a for a in albums if a.get("mediaItemsCount", "0") != "0"]
+    albums.sort(key=lambda a: int(a.get("mediaItemsCount", "0")), reverse=True)
+    for album in albums[:top]:
+        items, token = [], None
+        while True:
+            body = {"albumId": album["id"], "pageSize": 100, **({"pageToken": token} if token else {})}
+            page = requests.post(f"{base_url}/mediaItems:search", json=body).json()
+            items.extend(page.get("mediaItems", []))
+            token = page.get("nextPageToken")
+            if not all_pages or not token:
+                break
+        dated = [i for i in items if i.get("mediaMetadata", {}).get("creationTime")]
+        dated.sort(key=lambda i: i["mediaMetadata"]["creationTime"])
+        result["people_albums"].append({
+            "person_name": album.get("title", "Unknown"),
+            "oldest_photo_date": dated[0]["mediaMetadata"]["creationTime"] if dated else "",
+            "newest_photo_date": dated[-1]["mediaMetadata"]["creationTime"] if dated else "",
+        })
+    return result
+
+
+def _legacy_fetch_all(base_url: str, top: int = 15) -> dict:
+    return _legacy_fetch(base_url, all_pages=True, top=top)
+
+
+def _correct(server: FakeGooglePhotos, result: dict, expected: dict) -> int:
+    return sum(
+        (album["oldest_photo_date"], album["newest_photo_date"]) == expected[album["person_name"]]
+        for album in result["people_albums"]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--albums", type=int, default=50)
+    parser.add_argument("--items", type=int, default=10_000, help="items in the largest album")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="simulated latency per request")
+    parser.add_argument("--top", type=int, default=15, help="albums read (photos_top_albums)")
+    parser.add_argument("--concurrency", type=int, default=4, help="photos_album_concurrency")
+    args = parser.parse_args()
+
+    from services import google_ingestion
+
+    with FakeGooglePhotos(args.albums, args.items, args.latency_ms) as server:
+        expected = {server.album(i)["title"]: server.expected(server.album(i)["id"]) for i in range(args.top)}
+        print(f"top {args.top} of {args.albums} albums, up to {args.items:,} items each, "
+              f"{args.latency_ms:.0f} ms per request")
+
+        def run_new(concurrency: int):
+            def fetch():
+                with patch.object(google_ingestion.settings, "photos_album_concurrency", concurrency), \
+                     patch.object(google_ingestion.settings, "photos_top_albums", args.top):
+                    return asyncio.run(google_ingestion.fetch_photos_data("bench", base_url=server.url))
+            return fetch
+
+        cases = [
+            ("first page only (old)", lambda: _legacy_fetch(server.url, top=args.top)),
+            ("every page, sorted", lambda: _legacy_fetch_all(server.url, top=args.top)),
+            ("async, 1 at a time", run_new(1)),
+            (f"async, {args.concurrency} at a time", run_new(args.concurrency)),
+        ]
+        for label, fetch in cases:
+            server.reset_counts()
+            start = time.perf_counter()
+            result = fetch()
+            elapsed = time.perf_counter() - start
+            requests_made = server.request_count
+
+            tracemalloc.start()
+            fetch()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"  {label:<24} {elapsed * 1000:9.1f} ms   requests {requests_made:5}   "
+                  f"right dates {_correct(server, result, expected):3}/{args.top}   "
+                  f"peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+benchmarks/bench_google_sync.py — Refresh one user's Gmail aggregates and
+Google Contacts after a handful of changes, with a full re-read (what every
+rebuild used to do) and with google_ingestion's incremental sync, against a
+local fake Gmail / People API (benchmarks/fake_google_api.py) and PostgREST
+stand-in (benchmarks/fake_postgrest.py).
+
+Both sides go through sync_gmail / sync_contacts; the full side passes
+full=True, which re-lists the latest sent mail, fetches every message's
+headers and re-pages all connections. The incremental side reads
+users.history.list and a syncToken delta. Reports wall time and Google /
+Supabase requests for each. From backend/:
+
+    python benchmarks/bench_google_sync.py --contacts 2000 --sent 500 --latency-ms 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_google_api import FakeGoogleAPI  # noqa: E402
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+USER_ID = "user-1"
+
+
+def _change(google: FakeGoogleAPI, n: int) -> None:
+    """A few days of activity: n emails sent, n contacts edited, one added, one deleted."""
+    for i in range(n):
+        google.send_email(f"contact{i:04d}@example.com", "Flight to Lisbon")
+        google.update_contact(f"people/c{i + 100:04d}", birthday=(1990, 4, i % 28 + 1))
+    google.add_contact("Priya Shah", emails=["priya@example.com"])
+    google.delete_contact("people/c0050")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contacts", type=int, default=2000)
+    parser.add_argument("--sent", type=int, default=500)
+    parser.add_argument("--changes", type=int, default=5, help="emails sent and contacts edited between syncs")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="simulated Google latency per request")
+    args = parser.parse_args()
+
+    with FakePostgREST() as supabase, \
+         FakeGoogleAPI(contacts=args.contacts, sent=args.sent, latency_ms=args.latency_ms) as google:
+        use_fake_supabase(supabase.url)
+        supabase.tables["users"] = [{"id": USER_ID, "name": "Leo"}]
+
+        from services import google_ingestion
+
+        async def sync(full: bool) -> tuple[dict, dict]:
+            return await asyncio.gather(
+                google_ingestion.sync_gmail(USER_ID, "bench", full=full, base_url=google.gmail_url),
+                google_ingestion.sync_contacts(USER_ID, "bench", full=full, base_url=google.people_url),
+            )
+
+        print(f"{args.contacts:,} contacts, {args.sent:,} sent emails, {args.changes} emailed and "
+              f"{args.changes} edited between syncs, {args.latency_ms:.0f} ms per Google request")
+        asyncio.run(sync(full=True))        # first sync stores the cursors
+
+        for label, full in (("full re-read", True), ("incremental", False)):
+            _change(google, args.changes)
+            google.reset_counts()
+            supabase.reset_counts()
+            start = time.perf_counter()
+            gmail, contacts = asyncio.run(sync(full=full))
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<14} {elapsed * 1000:9.1f} ms   google requests {google.request_count:5}   "
+                  f"supabase requests {supabase.request_count:3}   "
+                  f"contacts changed {len(contacts['changed']):5}   recipients touched {len(gmail['emails']):4}")
+
+
+if __name__ == "__main__":
+    main()
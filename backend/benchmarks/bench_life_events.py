@@ -0,0 +1,141 @@
+"""
+benchmarks/bench_life_events.py — The nightly life-events check over many
+users, the old way and through run_life_events_check_for_all_users, against
+a local PostgREST stand-in (benchmarks/fake_postgrest.py).
+
+The old check (reproduced below as _legacy_check) loaded each user's whole
+life_events table, re-parsed every date in Python, queried moments once per
+candidate, then created each moment and marked each event one request at a
+time. The new one asks due_life_events() (schema_migration_v10g) for every
+due event across all users, then writes moments in bulk per user and marks
+events acknowledged in one update. The stand-in's due_life_events is a
+Python version of the SQL function, so request counts compare like for
+like. Reports wall time, requests and moments created. From backend/:
+
+    python benchmarks/bench_life_events.py --users 500 --events 20 --latency-ms 2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+
+def _seed(server: FakePostgREST, users: int, events: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    server.tables["users"] = [{"id": f"u{u}", "name": f"User {u}", "consecutive_dismissals": 0}
+                              for u in range(users)]
+    server.tables["people"], server.tables["life_events"], server.tables["moments"] = [], [], []
+    for u in range(users):
+        for n in range(events):
+            person_id = str(uuid.uuid4())
+            born = date(1960, 1, 1) + timedelta(days=rng.randrange(365 * 40))
+            server.tables["people"].append({"id": person_id, "owner_user_id": f"u{u}",
+                                            "name": f"Person {u}-{n}", "status": "active"})
+            server.tables["life_events"].append({
+                "id": str(uuid.uuid4()), "owner_user_id": f"u{u}", "person_id": person_id,
+                "event_type": "birthday" if n % 4 else "anniversary", "title": f"Person {u}-{n}'s Birthday",
+                "date": born.isoformat(), "is_annual": True,
+                "event_month": born.month, "event_day": born.day,
+            })
+
+
+def _due_life_events_rpc(server: FakePostgREST):
+    """Python stand-in for the due_life_events() SQL function."""
+    def due(params: dict) -> list:
+        today = date.fromisoformat(params["p_today"])
+        horizon = max(params["p_birthday_lead"], params["p_other_lead"])
+        days = {((today + timedelta(d)).month, (today + timedelta(d)).day): d for d in range(horizon + 1)}
+        cutoff = (datetime.combine(today, datetime.min.time()) - timedelta(days=7)).isoformat()
+        recent = {(m["owner_user_id"], m["person_id"]) for m in server.tables.get("moments", [])
+                  if m.get("triggered_by") == "life_event" and (m.get("created_at") or "") >= cutoff}
+        rows = []
+        for e in server.tables["life_events"]:
+            away = days.get((e["event_month"], e["event_day"]))
+            lead = params["p_birthday_lead"] if e["event_type"] == "birthday" else params["p_other_lead"]
+            if away is None or away > lead or (e["owner_user_id"], e["person_id"]) in recent:
+                continue
+            rows.append({k: e[k] for k in ("id", "owner_user_id", "person_id", "event_type", "title")}
+                        | {"days_away": away})
+        return rows
+    return due
+
+
+# ── Old per-user check, kept here for comparison ──────────────────────────────
+
+def _legacy_check(db, life_events, user_id: str) -> int:
+    supabase = db.get_db()
+    today = date.today()
+    created = 0
+    events = supabase.table("life_events").select("*").eq("owner_user_id", user_id).execute().data
+    for event in events:
+        event_date = life_events._parse_date(event.get("date", ""))
+        if not event_date:
+            continue
+        lead = life_events.BIRTHDAY_LEAD_DAYS if event["event_type"] == "birthday" else life_events.ANNIVERSARY_LEAD_DAYS
+        try:
+            this_year = event_date.replace(year=today.year)
+        except ValueError:          # Feb 29
+            continue
+        if this_year < today:
+            this_year = this_year.replace(year=today.year + 1)
+        days_away = (this_year - today).days
+        if not 0 <= days_away <= lead:
+            continue
+        cutoff = (datetime.utcnow() - timedelta(days=7)).isoformat()
+        if (supabase.table("moments").select("id").eq("owner_user_id", user_id)
+                .eq("person_id", event["person_id"]).eq("triggered_by", "life_event")
+                .gte("created_at", cutoff).execute().data):
+            continue
+        db.create_moment(user_id=user_id, person_id=event["person_id"],
+                         suggestion=life_events._build_suggestion(event, days_away), triggered_by="life_event")
+        supabase.table("life_events").update({"last_acknowledged_at": datetime.utcnow().isoformat()}) \
+            .eq("id", event["id"]).execute()
+        created += 1
+    return created
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--events", type=int, default=20, help="life events per user")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated latency per request")
+    args = parser.parse_args()
+
+    with FakePostgREST(latency_ms=args.latency_ms) as server:
+        use_fake_supabase(server.url)
+        server.rpcs["due_life_events"] = _due_life_events_rpc(server)
+
+        import asyncio
+        import database as db
+        from services import life_events
+
+        print(f"{args.users:,} users × {args.events} life events, {args.latency_ms:.0f} ms per request")
+
+        def legacy() -> int:
+            users = db.get_db().table("users").select("id").execute().data
+            return sum(_legacy_check(db, life_events, u["id"]) for u in users)
+
+        def current() -> int:
+            return asyncio.run(life_events.run_life_events_check_for_all_users())
+
+        for label, check in (("per user (old)", legacy), ("one query", current)):
+            _seed(server, args.users, args.events)
+            server.reset_counts()
+            start = time.perf_counter()
+            created = check()
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<16} {elapsed * 1000:9.1f} ms   requests {server.request_count:6}   "
+                  f"moments {created:5}")
+            for route, count in sorted(server.requests_by_route.items()):
+                print(f"      {route:<28} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+benchmarks/bench_llm_gateway.py — A burst of Claude calls against an org
+that 429s above a concurrency limit, sent the old way (one AsyncAnthropic
+client per feature, everything fired at once, SDK retries) and through
+services/llm_gateway.py.
+
+Runs against benchmarks/fake_anthropic.py, so no API key is needed. Reports
+wall time, requests actually sent and how many were rejected. From backend/:
+
+    python benchmarks/bench_llm_gateway.py --calls 200 --limit 8 --latency-ms 40
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import anthropic
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_anthropic import FakeAnthropic  # noqa: E402
+from services.llm_gateway import LLMGateway  # noqa: E402
+
+_FEATURES = ["signal_extractor", "work_filter", "communication_dna", "conversation"]
+
+
+def _request(i: int) -> dict:
+    return {"model": "claude-test", "max_tokens": 64, "messages": [{"role": "user", "content": f"q{i}"}]}
+
+
+async def _legacy_burst(server: FakeAnthropic, calls: int) -> int:
+    clients = {f: anthropic.AsyncAnthropic(api_key="test", base_url=server.url) for f in _FEATURES}
+    failed = 0
+
+    async def one(i):
+        nonlocal failed
+        try:
+            await clients[_FEATURES[i % len(_FEATURES)]].messages.create(**_request(i))
+        except anthropic.APIError:
+            failed += 1
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    for c in clients.values():
+        await c.close()
+    return failed
+
+
+async def _gateway_burst(gateway: LLMGateway, calls: int) -> int:
+    results = await asyncio.gather(
+        *(gateway.create(_FEATURES[i % len(_FEATURES)], **_request(i)) for i in range(calls)),
+        return_exceptions=True,
+    )
+    return sum(isinstance(r, Exception) for r in results)
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=8, help="org concurrency before the fake returns 429")
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    with FakeAnthropic(latency_ms=args.latency_ms) as server:
+        server.rate_limit_concurrency = args.limit
+
+        start = time.perf_counter()
+        failed = _run(_legacy_burst(server, args.calls))
+        legacy_s = time.perf_counter() - start
+        print(f"{args.calls} calls, org limit {args.limit} in flight, {args.latency_ms:.0f} ms per call")
+        print(f"  unbounded clients {legacy_s:7.2f} s   sent {server.request_count:5}   "
+              f"429s {server.rejected_count:5}   failed {failed}")
+
+        server.reset_counts()
+        gateway = LLMGateway(
+            api_key="test", model="claude-test", base_url=server.url,
+            max_concurrency=args.limit, feature_concurrency=max(1, args.limit // 2),
+            requests_per_minute=0, retry_base_seconds=0.05,
+        )
+        try:
+            start = time.perf_counter()
+            failed = _run(_gateway_burst(gateway, args.calls))
+            gateway_s = time.perf_counter() - start
+        finally:
+            gateway.close()
+        print(f"  gateway           {gateway_s:7.2f} s   sent {server.request_count:5}   "
+              f"429s {server.rejected_count:5}   failed {failed}")
+
+
+if __name__ == "__main__":
+    main()
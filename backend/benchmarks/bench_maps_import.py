@@ -0,0 +1,166 @@
+"""
+benchmarks/bench_maps_import.py — Import a synthetic five-year Google Takeout
+timeline (monthly Semantic Location History files, 50k place visits by
+default) the old way and through MapsProcessor.import_takeout, against a
+local PostgREST stand-in (benchmarks/fake_postgrest.py).
+
+The old importer (reproduced below as _legacy_process) needed the whole
+timeline loaded as one list, then per visit awaited WorkFilter.classify,
+upserted place_visits and inserted its signals: three or four requests per
+visit. The new one streams the files, keeps per-place totals, classifies
+each distinct place once and writes one upsert plus one insert per signal
+table. Claude is stubbed to answer "personal" for the places the fast path
+leaves ambiguous.
+
+The old path is timed on the first --legacy-visits visits only (it is
+linear in visits). Reports wall time, Supabase requests and peak traced
+memory. From backend/:
+
+    python benchmarks/bench_maps_import.py --visits 50000 --places 1500 --latency-ms 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+USER_ID = "user-1"
+_KINDS = ["Cafe", "Restaurant", "Gym", "Bookstore", "Park", "Bar", "Museum", "Market", "Studio", "Corner Shop"]
+
+
+def write_takeout(directory: str, visits: int, places: int, years: int = 5, seed: int = 0) -> list[str]:
+    """Monthly {"timelineObjects": [...]} files, a placeVisit then an activitySegment each time."""
+    rng = random.Random(seed)
+    catalogue = [
+        (f"{rng.choice(['Blue', 'Golden', 'Mission', 'Harbor', 'Oak'])} {_KINDS[i % len(_KINDS)]} {i}",
+         37.70 + rng.random() / 10, -122.50 + rng.random() / 10)
+        for i in range(places)
+    ]
+    weights = [1 / (i + 1) for i in range(places)]          # a few regulars, a long tail
+    start = datetime(2026 - years, 1, 1, tzinfo=timezone.utc)
+    step = timedelta(days=365 * years) / visits
+    by_month: dict[str, list] = {}
+    for n, (name, lat, lng) in enumerate(rng.choices(catalogue, weights, k=visits)):
+        when = start + step * n
+        leave = when + timedelta(minutes=rng.randint(10, 180))
+        by_month.setdefault(when.strftime("%Y_%m"), []).extend([
+            {"placeVisit": {
+                "location": {"name": name, "address": f"{n % 900} Market St, San Francisco, CA",
+                             "latitudeE7": int((lat + rng.gauss(0, 1e-4)) * 1e7),
+                             "longitudeE7": int((lng + rng.gauss(0, 1e-4)) * 1e7)},
+                "duration": {"startTimestamp": when.isoformat().replace("+00:00", "Z"),
+                             "endTimestamp": leave.isoformat().replace("+00:00", "Z")},
+            }},
+            {"activitySegment": {"activityType": "WALKING", "distance": rng.randint(100, 3000)}},
+        ])
+    paths = []
+    for month, objects in sorted(by_month.items()):
+        path = os.path.join(directory, f"{month}.json")
+        with open(path, "w") as f:
+            json.dump({"timelineObjects": objects}, f)
+        paths.append(path)
+    return paths
+
+
+# ── Old per-visit importer, kept here for comparison ──────────────────────────
+
+async def _legacy_process(processor, maps_processor, timeline: list[dict]) -> int:
+    import uuid
+
+    client = maps_processor.db.get_db()
+    counts: dict[str, int] = {}
+    saved = 0
+    for raw in timeline:
+        entry = maps_processor._normalise(raw)
+        if not entry or not entry.get("place_name"):
+            continue
+        fr = await processor._work_filter.classify(content_type="maps", content=entry, user_id=USER_ID)
+        if not fr.passes:
+            continue
+        name = entry["place_name"]
+        counts[name] = counts.get(name, 0) + 1
+        client.table("place_visits").upsert({
+            "id": str(uuid.uuid4()), "user_id": USER_ID, "place_name": name,
+            "place_type": processor._infer_place_type(name), "visit_count": counts[name],
+            "last_visited": entry.get("visit_time"), "lat": entry.get("lat"), "lng": entry.get("lng"),
+        }, on_conflict="user_id,place_name").execute()
+        saved += 1
+        tally = maps_processor._PlaceTally(name)
+        tally.visits = counts[name]
+        interest, capability = processor._signals_for(USER_ID, tally)
+        if interest:
+            client.table("interest_signals").insert(interest).execute()
+        if capability:
+            client.table("capability_signals").insert(capability).execute()
+    return saved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--visits", type=int, default=50_000)
+    parser.add_argument("--places", type=int, default=1_500, help="distinct places")
+    parser.add_argument("--legacy-visits", type=int, default=2_000, help="visits timed on the old path")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="simulated Supabase latency per request")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, FakePostgREST(latency_ms=args.latency_ms) as server:
+        use_fake_supabase(server.url)
+        paths = write_takeout(directory, args.visits, args.places)
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"{args.visits:,} visits to {args.places:,} places in {len(paths)} monthly files "
+              f"({size / 2**20:.1f} MiB), {args.latency_ms:.0f} ms per Supabase request")
+
+        from core.ingestion.work_filter import FilterResult, Label, WorkFilter
+        from services import maps_processor
+
+        async def personal(self, content_type, contents):
+            return [FilterResult(label=Label.PERSONAL, confidence=0.9, reason="Claude: personal")
+                    for _ in contents]
+
+        with patch.object(WorkFilter, "_claude_classify_batch", personal), \
+             patch.object(WorkFilter, "_log_many", lambda *a, **k: asyncio.sleep(0)):
+            processor = maps_processor.MapsProcessor()
+
+            def legacy():
+                timeline = []
+                for path in paths:          # the old endpoint needed the whole list up front
+                    with open(path) as f:
+                        timeline.extend(json.load(f)["timelineObjects"])
+                return asyncio.run(_legacy_process(processor, maps_processor, timeline[:args.legacy_visits * 2]))
+
+            def streaming():
+                return asyncio.run(processor.import_takeout(USER_ID, paths))
+
+            for label, run, visits in (("per visit (old)", legacy, min(args.visits, args.legacy_visits)),
+                                       ("streaming", streaming, args.visits)):
+                server.tables.clear()
+                server.reset_counts()
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                requests_made = server.request_count
+
+                server.tables.clear()
+                tracemalloc.start()
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(f"  {label:<16} {visits:7,} visits {elapsed * 1000:10.1f} ms   "
+                      f"({elapsed / visits * 1e6:7.1f} µs/visit)   requests {requests_made:6}   "
+                      f"place rows {len(server.tables.get('place_visits', [])):5}   "
+                      f"peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
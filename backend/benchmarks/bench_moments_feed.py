@@ -0,0 +1,122 @@
+"""
+benchmarks/bench_moments_feed.py — The home-screen moments feed for users
+with thousands of accumulated pending moments, the old way and through
+get_moments_for_user(limit=, after=), against a local PostgREST stand-in
+(benchmarks/fake_postgrest.py).
+
+The old feed (reproduced below as _legacy_top) read every pending moment,
+sorted the lot in Python by trigger and kept the first five. The new one
+asks the database for the rows it shows, in priority_rank order
+(schema_migration_v10i), and pages on with a keyset cursor. Reports wall
+time per user, requests and rows sent back, for the first page and for
+paging through --pages pages. From backend/:
+
+    python benchmarks/bench_moments_feed.py --users 20 --moments 5000 --latency-ms 2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+_TRIGGERS = ["google_ingestion", "message_analysis", "voice_note", "drift_detection", "life_event"]
+PAGE = 5
+
+
+def _seed(server: FakePostgREST, users: int, moments: int, priority, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    server.tables["moments"] = []
+    for u in range(users):
+        for n in range(moments):
+            trigger = rng.choices(_TRIGGERS, [50, 25, 10, 10, 5])[0]
+            server.tables["moments"].append({
+                "id": str(uuid.uuid4()), "owner_user_id": f"u{u}", "person_id": str(uuid.uuid4()),
+                "suggestion": f"Suggestion {n} for user {u} — " + "x" * rng.randrange(80, 240),
+                "triggered_by": trigger, "priority_rank": priority(trigger),
+                "status": "pending" if rng.random() < 0.9 else "dismissed",
+                "created_at": (start + timedelta(minutes=rng.randrange(600_000))).isoformat(),
+            })
+
+
+# ── Old feed, kept here for comparison ────────────────────────────────────────
+
+def _legacy_top(db, user_id: str) -> list:
+    rows = (db.get_db().table("moments").select("*").eq("owner_user_id", user_id)
+            .eq("status", "pending").order("created_at", desc=True).execute().data)
+    rows.sort(key=lambda m: db.MOMENT_PRIORITY.get(m.get("triggered_by"), 5))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--moments", type=int, default=5_000, help="moments per user (about 90% pending)")
+    parser.add_argument("--pages", type=int, default=4, help="pages of five read through")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated latency per request")
+    args = parser.parse_args()
+
+    with FakePostgREST(latency_ms=args.latency_ms) as server:
+        use_fake_supabase(server.url)
+        import database as db
+
+        _seed(server, args.users, args.moments, db.moment_priority)
+        users = [f"u{u}" for u in range(args.users)]
+        print(f"{args.users} users × {args.moments:,} moments, {args.latency_ms:.0f} ms per request")
+
+        def legacy_first(user_id):
+            rows = _legacy_top(db, user_id)
+            return rows[:PAGE], len(rows)
+
+        def ranked_first(user_id):
+            page = db.get_moments_for_user(user_id, limit=PAGE)
+            return page, len(page)
+
+        def legacy_pages(user_id):
+            shown, sent = [], 0
+            for n in range(args.pages):             # the old feed could only re-read and slice
+                rows = _legacy_top(db, user_id)
+                shown += rows[PAGE * n:PAGE * (n + 1)]
+                sent += len(rows)
+            return shown, sent
+
+        def ranked_pages(user_id):
+            shown, cursor = [], None
+            for _ in range(args.pages):
+                page = db.get_moments_for_user(user_id, limit=PAGE, after=cursor)
+                if not page:
+                    break
+                shown += page
+                cursor = db.moment_cursor(page[-1])
+            return shown, len(shown)
+
+        for label, feed in (("first page, all rows (old)", legacy_first), ("first page, ranked", ranked_first),
+                            (f"{args.pages} pages, all rows (old)", legacy_pages),
+                            (f"{args.pages} pages, keyset", ranked_pages)):
+            server.reset_counts()
+            sent = 0
+            start = time.perf_counter()
+            for user_id in users:
+                shown, rows = feed(user_id)
+                sent += rows
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<26} {elapsed / len(users) * 1000:8.1f} ms/user   requests {server.request_count:5}   "
+                  f"rows sent {sent:9,}   top {shown[0]['triggered_by'] if shown else '-'}")
+
+        # Both feeds show the same moments in the same order
+        def key(m):
+            return m["priority_rank"], m["created_at"]
+        for user_id in users:
+            old = [key(m) for m in _legacy_top(db, user_id)[:PAGE * args.pages]]
+            new = [key(m) for m in ranked_pages(user_id)[0]]
+            assert old == new, f"feed order differs for {user_id}"
+
+
+if __name__ == "__main__":
+    main()
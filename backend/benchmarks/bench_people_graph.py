@@ -0,0 +1,135 @@
+"""
+benchmarks/bench_people_graph.py — Round trips and wall time to save a
+People Graph from Claude's output, the old way (upsert_person plus
+create_moment per person) and through build_people_graph's bulk path
+(upsert_people_bulk + create_moments_bulk).
+
+The old per-person path did a select-by-name, an update or insert, two
+lookups inside create_moment and the moment insert: about five requests per
+person. It is reproduced below (_legacy_*). Claude is stubbed out; both
+sides write the same synthetic graph into a local PostgREST stand-in where
+half the people already exist. From backend/:
+
+    python benchmarks/bench_people_graph.py --people 100 --latency-ms 2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+USER_ID = "user-1"
+
+
+def synthetic_graph(n: int) -> list[dict]:
+    return [
+        {
+            "name": f"Person {i:03d}",
+            "relationship_type": "Friend",
+            "closeness_score": round(1 - i / n, 3),
+            "topics": ["hiking"],
+            "memories": [{"description": f"memory {i}", "source": "photos"}],
+            "suggested_moments": [{"suggestion": f"Call Person {i:03d}", "urgency": "low", "trigger": "t"}],
+            "insight_line": "",
+        }
+        for i in range(n)
+    ]
+
+
+def _seed(server: FakePostgREST, n: int) -> None:
+    server.tables["users"] = [{"id": USER_ID, "name": "Leo", "consecutive_dismissals": 0}]
+    server.tables["moments"] = []
+    server.tables["people"] = [
+        {"id": str(uuid.uuid4()), "owner_user_id": USER_ID, "name": f"Person {i:03d}", "closeness_score": 0.5}
+        for i in range(0, n, 2)
+    ]
+
+
+# ── Old per-person path, kept here for comparison ─────────────────────────────
+
+def _legacy_upsert_person(db, user_id: str, person_data: dict) -> dict:
+    client = db.get_db()
+    existing = (client.table("people").select("id")
+                .eq("owner_user_id", user_id).eq("name", person_data.get("name", "")).execute())
+    if existing.data:
+        result = client.table("people").update(person_data).eq("id", existing.data[0]["id"]).execute()
+    else:
+        person_data["id"] = str(uuid.uuid4())
+        person_data["owner_user_id"] = user_id
+        result = client.table("people").insert(person_data).execute()
+    return result.data[0]
+
+
+def _legacy_create_moment(db, user_id: str, person_id: str, suggestion: str, triggered_by: str) -> dict:
+    db.get_person_by_id(person_id)
+    db.get_user_by_id(user_id)
+    result = db.get_db().table("moments").insert({
+        "id": str(uuid.uuid4()), "owner_user_id": user_id, "person_id": person_id,
+        "suggestion": suggestion, "triggered_by": triggered_by, "status": "pending",
+    }).execute()
+    return result.data[0]
+
+
+def _legacy_save(db, people: list[dict]) -> int:
+    saved = 0
+    for person in people:
+        row = _legacy_upsert_person(db, USER_ID, {
+            "name": person["name"], "relationship_type": person["relationship_type"],
+            "closeness_score": person["closeness_score"], "topics": person["topics"],
+            "memories": person["memories"], "suggested_moments": person["suggested_moments"],
+        })
+        _legacy_create_moment(db, USER_ID, row["id"], person["suggested_moments"][0]["suggestion"],
+                              "google_ingestion")
+        saved += 1
+    return saved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--people", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="simulated server-side latency per request")
+    args = parser.parse_args()
+
+    people = synthetic_graph(args.people)
+    with FakePostgREST(latency_ms=args.latency_ms) as server:
+        use_fake_supabase(server.url)
+
+        import database as db
+        from core import person_index
+        from services import intelligence
+
+        print(f"Save a {args.people}-person graph ({args.people // 2} already stored), "
+              f"{args.latency_ms:.0f} ms per request")
+
+        _seed(server, args.people)
+        db.get_user_by_id(USER_ID)      # warm the pooled connection
+        server.reset_counts()
+        start = time.perf_counter()
+        saved = _legacy_save(db, people)
+        legacy_s = time.perf_counter() - start
+        print(f"  per person   {legacy_s * 1000:8.1f} ms   requests {server.request_count:5}   "
+              f"people {len(server.tables['people']):4}   moments {len(server.tables['moments']):4}")
+
+        _seed(server, args.people)
+        person_index.invalidate()
+        server.reset_counts()
+        with patch.object(intelligence, "_call_claude", return_value=json.dumps(people)):
+            start = time.perf_counter()
+            saved = intelligence.build_people_graph(USER_ID, {}, stream=False)
+            bulk_s = time.perf_counter() - start
+        print(f"  bulk         {bulk_s * 1000:8.1f} ms   requests {server.request_count:5}   "
+              f"people {len(server.tables['people']):4}   moments {len(server.tables['moments']):4}")
+        assert len(saved) == args.people
+        for route, count in sorted(server.requests_by_route.items()):
+            print(f"      {route:<24} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+benchmarks/bench_people_graph_stream.py — Time to the first People Graph
+insight on the onboarding live feed, waiting for Claude's whole reply versus
+streaming it (build_people_graph stream=False / stream=True).
+
+Claude is benchmarks/fake_anthropic.py generating at a fixed speed, so a
+reply takes as long as its length implies whether it is streamed or not;
+Supabase is benchmarks/fake_postgrest.py. Broadcasts to the ingestion
+session are recorded instead of posted. Reports when the first insight went
+out, when the last one did, and the database requests each mode made.
+From backend/:
+
+    python benchmarks/bench_people_graph_stream.py --people 40 --chars-per-second 4000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_people_graph import USER_ID, _seed, synthetic_graph  # noqa: E402
+from benchmarks.fake_anthropic import FakeAnthropic  # noqa: E402
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+
+def _graph_reply(n: int) -> str:
+    people = synthetic_graph(n)
+    for person in people:
+        person["insight_line"] = f"{person['name']} is the one you call when something big happens."
+    return "```json\n" + json.dumps(people, indent=2) + "\n```"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--people", type=int, default=40)
+    parser.add_argument("--chars-per-second", type=float, default=4000.0,
+                        help="simulated generation speed (Claude is nearer 300)")
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="simulated server-side latency per database request")
+    args = parser.parse_args()
+
+    reply = _graph_reply(args.people)
+    with FakeAnthropic(reply=lambda payload: reply) as claude, \
+            FakePostgREST(latency_ms=args.latency_ms) as server:
+        claude.output_chars_per_second = args.chars_per_second
+        use_fake_supabase(server.url)
+
+        from core import person_index
+        from services import intelligence, llm_gateway
+
+        llm_gateway._gateway = llm_gateway.LLMGateway(
+            api_key="bench", model="claude-bench", base_url=claude.url, requests_per_minute=0,
+        )
+        print(f"{args.people}-person graph, {len(reply):,} chars of JSON at "
+              f"{args.chars_per_second:,.0f} chars/s (~{len(reply) / args.chars_per_second:.1f} s to generate)")
+
+        for stream in (False, True):
+            _seed(server, args.people)
+            person_index.invalidate()
+            server.reset_counts()
+            insights: list[float] = []
+            start = time.perf_counter()
+
+            def record(*_args, insight=None, **_kwargs):
+                if insight:
+                    insights.append(time.perf_counter() - start)
+
+            with patch("services.ingestion_bus.broadcast_sync", side_effect=record):
+                saved = intelligence.build_people_graph(USER_ID, {}, session_id="bench", stream=stream)
+            total_s = time.perf_counter() - start
+            assert len(saved) == args.people and len(insights) == args.people
+            print(f"  {'stream' if stream else 'whole reply':<12} first insight {insights[0] * 1000:8.1f} ms   "
+                  f"last {insights[-1] * 1000:8.1f} ms   total {total_s * 1000:8.1f} ms   "
+                  f"db requests {server.request_count:4}   moments {len(server.tables['moments']):4}")
+
+        llm_gateway.close()
+
+
+if __name__ == "__main__":
+    main()
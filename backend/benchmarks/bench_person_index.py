@@ -0,0 +1,111 @@
+"""
+benchmarks/bench_person_index.py — Resolve a stream of mentions (names as
+written in messages, contact-card names, phone numbers) against one user's
+People Graph, the old way and through core/person_index.py.
+
+The old call sites each scanned the whole graph per mention with substring
+tests (imessage_processor / analyze_imessage_conversation) — reproduced
+below as _legacy_resolve — and matched nothing they didn't contain
+verbatim. The index is built once (included in its time) and answers from
+hash maps, falling back to fuzzy matching among a few prefix-sharing
+candidates. Reports wall time and how many mentions each side resolved.
+From backend/:
+
+    python benchmarks/bench_person_index.py --people 500 --mentions 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.person_index import PersonIndex  # noqa: E402
+
+_FIRST = ["Sarah", "John", "Priya", "Mohammed", "Zoë", "Liam", "Ana", "Chen", "Olivia", "Mateo",
+          "Aisha", "Noah", "Emma", "Kenji", "Fatima", "Lucas", "Maya", "Omar", "Grace", "Tomás"]
+_LAST = ["Chen", "Smith", "Patel", "Okafor", "O'Brien", "García", "Nguyen", "Kim", "Rossi", "Haddad",
+         "Johnson", "Silva", "Müller", "Cohen", "Ivanova", "Takahashi", "Mensah", "Dubois", "Reyes", "Singh"]
+
+
+def synthetic_graph(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    people = []
+    for i in range(n):
+        person = {
+            "id": f"p{i}",
+            "name": f"{rng.choice(_FIRST)} {rng.choice(_LAST)}",
+            "closeness_score": round(1 - i / n, 4),
+        }
+        if rng.random() < 0.6:
+            person["phone"] = f"+1415{rng.randrange(10**7):07d}"
+        people.append(person)
+    return people
+
+
+def synthetic_mentions(people: list[dict], n: int, seed: int = 1) -> list[dict]:
+    """Exact names, first names, lowercase, typos, phones in local format, strangers."""
+    rng = random.Random(seed)
+    mentions = []
+    for _ in range(n):
+        person = rng.choice(people)
+        first, last = person["name"].split(" ", 1)
+        kind = rng.random()
+        if kind < 0.3:
+            mentions.append({"name": person["name"]})
+        elif kind < 0.5:
+            mentions.append({"name": first})
+        elif kind < 0.6:
+            mentions.append({"name": person["name"].lower()})
+        elif kind < 0.75:
+            mentions.append({"name": f"{first[:-1]} {last}"})          # dropped letter
+        elif kind < 0.9 and person.get("phone"):
+            digits = person["phone"][2:]
+            mentions.append({"name": "", "phone": f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"})
+        else:
+            mentions.append({"name": f"Stranger {rng.randrange(10**6)}"})
+    return mentions
+
+
+# ── Old linear scan, kept here for comparison ─────────────────────────────────
+
+def _legacy_resolve(people: list[dict], name: str, identifier: str) -> dict | None:
+    name = name.lower()
+    return next(
+        (p for p in people
+         if (name and (name in p["name"].lower() or p["name"].lower() in name))
+         or (identifier and identifier in (p.get("phone") or ""))),
+        None,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--people", type=int, default=500)
+    parser.add_argument("--mentions", type=int, default=10000)
+    args = parser.parse_args()
+
+    people = synthetic_graph(args.people)
+    mentions = synthetic_mentions(people, args.mentions)
+
+    start = time.perf_counter()
+    legacy = [_legacy_resolve(people, m["name"], m.get("phone", "")) for m in mentions]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = PersonIndex(people)
+    build_s = time.perf_counter() - start
+    indexed = [index.resolve(name=m["name"], phone=m.get("phone")) for m in mentions]
+    index_s = time.perf_counter() - start
+
+    print(f"{args.mentions} mentions against {args.people} people")
+    print(f"  linear scan   {legacy_s * 1000:8.1f} ms   resolved {sum(p is not None for p in legacy):6}")
+    print(f"  PersonIndex   {index_s * 1000:8.1f} ms   resolved {sum(p is not None for p in indexed):6}"
+          f"   (build {build_s * 1000:.1f} ms)")
+    agree = sum(a is not None and b is not None and a["id"] == b["id"] for a, b in zip(legacy, indexed))
+    print(f"  same person where both resolved: {agree}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+benchmarks/bench_world_model_signals.py — Supabase round trips spent on the
+cross-user World Model sections (third_party + prior_perspectives), comparing
+the old per-row loaders with the batched ones in core/world_model.py.
+
+The old path ran one cross_user_permissions query and one used_count UPDATE
+per signal, plus one people query per source user. It is reproduced below
+(_legacy_*) so both sides run against the same local PostgREST stand-in.
+From backend/:
+
+    python benchmarks/bench_world_model_signals.py --signals 50 --sources 20 --latency-ms 2
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_postgrest import FakePostgREST, use_fake_supabase  # noqa: E402
+
+PHONE = "+14155550100"
+PHONE_HASH = hashlib.sha256(PHONE.encode()).hexdigest()
+
+
+def _seed(server: FakePostgREST, n_signals: int, n_sources: int) -> None:
+    now = datetime.now(timezone.utc)
+    sources = [f"source-{i:03d}" for i in range(n_sources)]
+    server.tables["third_party_signals"] = [
+        {
+            "id": f"signal-{i:04d}",
+            "source_user_id": sources[i % n_sources],
+            "about_phone_hash": PHONE_HASH,
+            "signal_type": "positive_regard",
+            "signal_abstract": "Someone close speaks warmly of them",
+            "signal_valence": 0.6,
+            "signal_intensity": 0.5,
+            "confidence": round(0.5 + (i % 50) / 100, 2),
+            "extracted_at": (now - timedelta(days=i % 30)).isoformat(),
+            "expires_at": (now + timedelta(days=60)).isoformat(),
+            "used_count": 0,
+        }
+        for i in range(n_signals)
+    ]
+    server.tables["cross_user_permissions"] = [
+        {"granting_user_id": uid, "beneficiary_phone_hash": PHONE_HASH,
+         "permission_level": i % 4, "revoked_at": None}
+        for i, uid in enumerate(sources) if i % 3
+    ]
+    server.tables["people"] = [
+        {"user_id": uid, "phone_hash": PHONE_HASH, "name": "TJ",
+         "closeness_score": 0.4 + (i % 5) / 10,
+         "memories": [{"description": "Hiked Tamalpais with Maya"}]}
+        for i, uid in enumerate(sources)
+    ]
+
+    def increment_signal_usage(payload: dict) -> None:
+        ids = set(payload["signal_ids"])
+        for row in server.tables["third_party_signals"]:
+            if row["id"] in ids:
+                row["used_count"] += 1
+                row["last_used_at"] = payload["used_at"]
+
+    server.rpcs["increment_signal_usage"] = increment_signal_usage
+
+
+# ── Old per-row path, kept here for comparison ────────────────────────────────
+
+def _legacy_permission_level(db, source_user_id: str) -> int:
+    result = (
+        db.table("cross_user_permissions").select("permission_level, revoked_at")
+        .eq("granting_user_id", source_user_id).eq("beneficiary_phone_hash", PHONE_HASH)
+        .limit(1).execute()
+    )
+    if result.data:
+        return -1 if result.data[0].get("revoked_at") else result.data[0].get("permission_level", 0)
+    return 0
+
+
+def _legacy_sections(db) -> None:
+    now = datetime.now(timezone.utc)
+    rows = (
+        db.table("third_party_signals").select("*")
+        .eq("about_phone_hash", PHONE_HASH).gt("expires_at", now.isoformat())
+        .order("confidence", desc=True).limit(10).execute()
+    ).data
+    for row in rows:
+        if _legacy_permission_level(db, row["source_user_id"]) < 0:
+            continue
+        db.table("third_party_signals").update({
+            "used_count": (row.get("used_count") or 0) + 1,
+            "last_used_at": now.isoformat(),
+        }).eq("about_phone_hash", PHONE_HASH).execute()
+
+    all_rows = db.table("third_party_signals").select("source_user_id") \
+        .eq("about_phone_hash", PHONE_HASH).execute().data
+    for uid in {r["source_user_id"] for r in all_rows}:
+        db.table("people").select("closeness_score, memories, name") \
+            .eq("user_id", uid).eq("phone_hash", PHONE_HASH).limit(1).execute()
+
+
+def _batched_sections(db) -> None:
+    from core.world_model import WorldModelAssembler
+    assembler = WorldModelAssembler()
+    signals = assembler._fetch_third_party_signals(db, "user-1", PHONE)
+    assembler._fetch_prior_perspectives(db, "user-1", PHONE)
+    assembler._record_signal_usage(db, [s["signal_id"] for s in signals])
+
+
+def _measure(server: FakePostgREST, fn, db) -> tuple[int, float, dict]:
+    server.reset_counts()
+    start = time.perf_counter()
+    fn(db)
+    elapsed = (time.perf_counter() - start) * 1000
+    return server.request_count, elapsed, dict(server.requests_by_route)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--signals", type=int, default=50)
+    parser.add_argument("--sources", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="simulated server-side latency per request")
+    args = parser.parse_args()
+
+    with FakePostgREST(latency_ms=args.latency_ms) as server:
+        use_fake_supabase(server.url)
+        _seed(server, args.signals, args.sources)
+
+        import database
+        db = database.get_db()
+        _batched_sections(db)  # warm imports and the pooled connection
+
+        print(f"{args.signals} signals from {args.sources} source users, "
+              f"{args.latency_ms} ms per request")
+        for label, fn in (("per-row (old)", _legacy_sections), ("batched", _batched_sections)):
+            trips, ms, routes = _measure(server, fn, db)
+            print(f"  {label:<14} {trips:4d} round trips   {ms:8.1f} ms")
+            for route, count in sorted(routes.items()):
+                print(f"      {count:4d}  {route}")
+        database.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+benchmarks/fake_anthropic.py — A tiny local stand-in for the Anthropic
+Messages API (POST /v1/messages), for the LLM gateway tests and benchmarks.
+
+Replies come from a callable, each request can be delayed to stand in for
+model latency, and failures can be injected either one by one (fail_next)
+or the way a rate-limited org sees them (rate_limit_concurrency: any request
+beyond that many in flight gets a 429). Requests with "stream": true get
+the reply back as server-sent events; with output_chars_per_second set,
+replies take as long to generate as their length implies, streamed or not.
+Requests, peak concurrency and payloads are recorded.
+
+Usage:
+    with FakeAnthropic(latency_ms=50) as server:
+        server.reply = lambda payload: '{"ok": true}'
+        gateway = LLMGateway(api_key="test", model="claude-test", base_url=server.url)
+        ...
+        print(server.request_count, server.max_in_flight)
+"""
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+_ERROR_TYPES = {429: "rate_limit_error", 529: "overloaded_error", 500: "api_error", 400: "invalid_request_error"}
+
+
+class FakeAnthropic:
+    """In-memory Messages API running on a background thread."""
+
+    def __init__(self, latency_ms: float = 0.0, reply: Optional[Callable[[dict], str]] = None):
+        self.latency_ms = latency_ms
+        self.reply: Callable[[dict], str] = reply or (lambda payload: "ok")
+        self.rate_limit_concurrency: Optional[int] = None
+        self.output_chars_per_second: Optional[float] = None
+        self.stream_chunk_chars = 16
+        self.request_count = 0
+        self.rejected_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.payloads: list[dict] = []
+        self._failures: deque = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, status: int, times: int = 1, retry_after: Optional[float] = None) -> None:
+        """Answer the next `times` requests with an error of this status."""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * times)
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.request_count = 0
+            self.rejected_count = 0
+            self.max_in_flight = 0
+            self.payloads.clear()
+
+    def __enter__(self) -> "FakeAnthropic":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ── Request handling ──────────────────────────────────────────────────────
+
+    def _handle(self, payload: dict) -> tuple[int, dict, dict]:
+        with self._lock:
+            self.request_count += 1
+            self.payloads.append(payload)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failure = self._failures.popleft() if self._failures else None
+            over_limit = (self.rate_limit_concurrency is not None
+                          and self.in_flight > self.rate_limit_concurrency)
+            if failure or over_limit:
+                self.rejected_count += 1
+        try:
+            if failure or over_limit:
+                status, retry_after = failure or (429, None)
+                headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+                return status, {
+                    "type": "error",
+                    "error": {"type": _ERROR_TYPES.get(status, "api_error"), "message": f"fake {status}"},
+                }, headers
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000)
+            text = self.reply(payload)
+            if self.output_chars_per_second and not payload.get("stream"):
+                time.sleep(len(text) / self.output_chars_per_second)
+            prompt_chars = len(json.dumps(payload.get("messages", []))) + len(str(payload.get("system", "")))
+            return 200, {
+                "id": f"msg_{uuid.uuid4().hex[:24]}",
+                "type": "message",
+                "role": "assistant",
+                "model": payload.get("model", "claude-test"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": prompt_chars // 4 + 1, "output_tokens": len(text) // 4 + 1},
+            }, {}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _stream_events(self, message: dict):
+        """The Messages streaming protocol for a finished message, paced like generation."""
+        text = message["content"][0]["text"]
+        output_tokens = message["usage"]["output_tokens"]
+        yield "message_start", {"type": "message_start", "message": {
+            **message, "content": [], "stop_reason": None, "usage": {**message["usage"], "output_tokens": 1},
+        }}
+        yield "content_block_start", {"type": "content_block_start", "index": 0,
+                                      "content_block": {"type": "text", "text": ""}}
+        step = max(1, self.stream_chunk_chars)
+        for i in range(0, len(text), step):
+            if self.output_chars_per_second:
+                time.sleep(step / self.output_chars_per_second)
+            yield "content_block_delta", {"type": "content_block_delta", "index": 0,
+                                          "delta": {"type": "text_delta", "text": text[i:i + step]}}
+        yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+        yield "message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                "usage": {"output_tokens": output_tokens}}
+        yield "message_stop", {"type": "message_stop"}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                if not self.path.startswith("/v1/messages"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                status, body, headers = server._handle(payload)
+                if status == 200 and payload.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for event, data in server._stream_events(body):
+                        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                        self.wfile.flush()
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
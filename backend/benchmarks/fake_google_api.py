@@ -0,0 +1,240 @@
+"""
+benchmarks/fake_google_api.py — A local stand-in for the Gmail API
+(profile, messages, history) and the People API (people.connections.list
+with sync tokens), for the incremental Google sync tests and benchmark.
+
+The mailbox is a list of sent messages, each stamped with the historyId it
+was added at; users.history.list returns messageAdded records after a
+startHistoryId, or 404 once expire_history() has moved the oldest kept
+historyId past it. Contacts carry the version they were last changed at,
+and deletions leave a tombstone, so a syncToken (a version number) lists
+exactly what changed since, with metadata.deleted on removed contacts;
+after expire_sync_tokens() old tokens get the People API's 400
+EXPIRED_SYNC_TOKEN. Pages follow the real APIs' pageToken contract,
+including the People API's ~100-per-page cap. Requests and peak
+concurrency are recorded, and failures can be injected with fail_next.
+
+Usage:
+    with FakeGoogleAPI(contacts=2000, sent=500) as server:
+        await google_ingestion.sync_gmail(user_id, "token", base_url=server.gmail_url)
+        server.send_email("contact0007@example.com", "Flight to Lisbon")
+        server.update_contact("people/c0003", birthday=(1990, 4, 2))
+        await google_ingestion.sync_contacts(user_id, "token", base_url=server.people_url)
+"""
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+_GMAIL = "/gmail/v1/users/me"
+_CONNECTIONS = "/v1/people/me/connections"
+_SUBJECTS = ("Dinner Friday?", "Trip photos", "Re: meeting notes", "Happy birthday!",
+             "Hotel booking for June", "Quick question", "Calendar invite: catch up")
+
+
+class FakeGoogleAPI:
+    """In-memory Gmail + People APIs running on a background thread."""
+
+    def __init__(self, contacts: int = 200, sent: int = 300, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.history_id = 1000
+        self.oldest_history_id = 1000
+        self.contacts_version = 1
+        self.oldest_sync_version = 1
+        self.messages: list[dict] = []           # oldest first
+        self.contacts: dict[str, dict] = {}      # resourceName → {person, version, deleted}
+        self._failures: deque = deque()
+        self._lock = threading.RLock()
+        for n in range(contacts):
+            self.add_contact(f"Contact {n:04d}", emails=[f"contact{n:04d}@example.com"],
+                             phones=[f"+1555{n:07d}"])
+        for n in range(sent):
+            # A skewed spread, so a few people get most of the mail
+            self.send_email(f"contact{(n * n) % max(1, min(contacts, 60)):04d}@example.com",
+                            _SUBJECTS[n % len(_SUBJECTS)])
+        self.oldest_history_id = self.history_id
+
+    @property
+    def gmail_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{_GMAIL}"
+
+    @property
+    def people_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def fail_next(self, status: int, times: int = 1) -> None:
+        with self._lock:
+            self._failures.extend([status] * times)
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.request_count = 0
+            self.max_in_flight = 0
+
+    def __enter__(self) -> "FakeGoogleAPI":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ── Mutations ─────────────────────────────────────────────────────────────
+
+    def send_email(self, to: str, subject: str = "Hello") -> str:
+        with self._lock:
+            self.history_id += 1
+            message_id = f"m{len(self.messages):06d}"
+            self.messages.append({"id": message_id, "to": to, "subject": subject,
+                                  "history_id": self.history_id})
+            return message_id
+
+    def add_contact(self, name: str, emails: tuple = (), phones: tuple = (),
+                    birthday: Optional[tuple] = None) -> str:
+        with self._lock:
+            resource_name = f"people/c{len(self.contacts):04d}"
+            self.contacts[resource_name] = {"person": {"resourceName": resource_name}, "deleted": False}
+            self._write_contact(resource_name, name=name, emails=emails, phones=phones, birthday=birthday)
+            return resource_name
+
+    def update_contact(self, resource_name: str, name: Optional[str] = None, emails: Optional[tuple] = None,
+                       phones: Optional[tuple] = None, birthday: Optional[tuple] = None) -> None:
+        with self._lock:
+            self._write_contact(resource_name, name=name, emails=emails, phones=phones, birthday=birthday)
+
+    def delete_contact(self, resource_name: str) -> None:
+        with self._lock:
+            self.contacts_version += 1
+            entry = self.contacts[resource_name]
+            entry.update(deleted=True, version=self.contacts_version)
+            entry["person"] = {"resourceName": resource_name, "metadata": {"deleted": True}}
+
+    def expire_history(self) -> None:
+        """Drop all history up to now, as Gmail does after about a week."""
+        with self._lock:
+            self.oldest_history_id = self.history_id + 1
+
+    def expire_sync_tokens(self) -> None:
+        """Invalidate every syncToken handed out so far (they last 7 days)."""
+        with self._lock:
+            self.oldest_sync_version = self.contacts_version + 1
+
+    def _write_contact(self, resource_name: str, name=None, emails=None, phones=None, birthday=None) -> None:
+        self.contacts_version += 1
+        entry = self.contacts[resource_name]
+        person = entry["person"]
+        if name is not None:
+            person["names"] = [{"displayName": name}]
+        if emails is not None:
+            person["emailAddresses"] = [{"value": e} for e in emails]
+        if phones is not None:
+            person["phoneNumbers"] = [{"value": p} for p in phones]
+        if birthday is not None:
+            year, month, day = birthday
+            person["birthdays"] = [{"date": {"year": year, "month": month, "day": day}}]
+        entry["version"] = self.contacts_version
+
+    # ── Request handling ──────────────────────────────────────────────────────
+
+    @staticmethod
+    def _page(items: list, query: dict, cap: int) -> tuple[list, dict]:
+        size = min(int(query.get("maxResults") or query.get("pageSize") or cap), cap)
+        start = int(query.get("pageToken") or 0)
+        end = start + size
+        return items[start:end], ({"nextPageToken": str(end)} if end < len(items) else {})
+
+    def _gmail(self, path: str, query: dict) -> tuple[int, dict]:
+        if path == "/profile":
+            return 200, {"emailAddress": "me@example.com", "historyId": str(self.history_id)}
+        if path == "/messages":
+            newest_first = [{"id": m["id"], "threadId": m["id"]} for m in reversed(self.messages)]
+            page, more = self._page(newest_first, query, 500)
+            return 200, {"messages": page, **more}
+        if path.startswith("/messages/"):
+            message = next((m for m in self.messages if m["id"] == path.rsplit("/", 1)[1]), None)
+            if not message:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            headers = [{"name": "To", "value": message["to"]}, {"name": "Subject", "value": message["subject"]}]
+            return 200, {"id": message["id"], "labelIds": ["SENT"], "payload": {"headers": headers}}
+        if path == "/history":
+            start = int(query["startHistoryId"])
+            if start < self.oldest_history_id:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            records = [
+                {"id": str(m["history_id"]),
+                 "messagesAdded": [{"message": {"id": m["id"], "labelIds": ["SENT"]}}]}
+                for m in self.messages if m["history_id"] > start
+            ]
+            page, more = self._page(records, query, 500)
+            return 200, {"history": page, "historyId": str(self.history_id), **more}
+        return 404, {"error": {"code": 404, "message": "not found"}}
+
+    def _connections(self, query: dict) -> tuple[int, dict]:
+        token = query.get("syncToken")
+        if token is not None and int(token) < self.oldest_sync_version:
+            return 400, {"error": {"code": 400, "status": "FAILED_PRECONDITION",
+                                   "message": "Sync token is expired. Clear local cache and retry call "
+                                              "without the sync token.",
+                                   "details": [{"reason": "EXPIRED_SYNC_TOKEN"}]}}
+        since = int(token) if token is not None else None
+        entries = [e for _, e in sorted(self.contacts.items())
+                   if (since is None and not e["deleted"]) or (since is not None and e["version"] > since)]
+        page, more = self._page([json.loads(json.dumps(e["person"])) for e in entries], query, 100)
+        body = {"connections": page, "totalPeople": len(entries), **more}
+        if not more and query.get("requestSyncToken") == "true":
+            body["nextSyncToken"] = str(self.contacts_version)
+        return 200, body
+
+    def _handle(self, path: str, query: dict) -> tuple[int, dict]:
+        with self._lock:
+            self.request_count += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failure = self._failures.popleft() if self._failures else None
+        try:
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000)
+            if failure:
+                return failure, {"error": {"code": failure, "message": f"fake {failure}"}}
+            with self._lock:
+                if path.startswith(_GMAIL):
+                    return self._gmail(path[len(_GMAIL):], query)
+                if path == _CONNECTIONS:
+                    return self._connections(query)
+            return 404, {"error": {"code": 404, "message": "not found"}}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"       # keep-alive, like the real API
+            disable_nagle_algorithm = True      # headers and body go out as two writes
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                status, body = server._handle(url.path, query)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -0,0 +1,157 @@
+"""
+benchmarks/fake_google_photos.py — A local stand-in for the Google Photos
+Library API (GET /v1/albums, POST /v1/mediaItems:search), for the Photos
+ingestion tests and benchmark.
+
+Albums and their items are generated on the fly, not stored, so a server
+holding 50 albums × 10k items costs no memory. Creation times are scattered
+across ten years (some with fractional seconds, as Google sends them), so
+the oldest and newest photos can be on any page. Pages follow the real
+API's pageSize / nextPageToken contract. Each request can be delayed, and
+failures injected with fail_next. Requests and peak concurrency are
+recorded.
+
+Usage:
+    with FakeGooglePhotos(albums=50, items_per_album=10_000, latency_ms=20) as server:
+        data = await google_ingestion.fetch_photos_data("token", base_url=server.url)
+        print(server.request_count, server.max_in_flight, server.expected("album-007"))
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+_EPOCH = datetime(2015, 1, 1, tzinfo=timezone.utc)
+_SPAN_SECONDS = 10 * 365 * 86400
+
+
+class FakeGooglePhotos:
+    """In-memory Photos Library API running on a background thread."""
+
+    def __init__(self, albums: int = 50, items_per_album: int = 10_000, latency_ms: float = 0.0):
+        self.albums = albums
+        self.items_per_album = items_per_album
+        self.latency_ms = latency_ms
+        self.request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures: deque = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def fail_next(self, status: int, times: int = 1) -> None:
+        with self._lock:
+            self._failures.extend([status] * times)
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.request_count = 0
+            self.max_in_flight = 0
+
+    def __enter__(self) -> "FakeGooglePhotos":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ── Data ──────────────────────────────────────────────────────────────────
+
+    def album_size(self, index: int) -> int:
+        """Albums shrink a little with their index, so the ranking is stable."""
+        return max(1, self.items_per_album - index * 7)
+
+    def album(self, index: int) -> dict:
+        return {"id": f"album-{index:03d}", "title": f"Person {index:03d}",
+                "mediaItemsCount": str(self.album_size(index))}
+
+    def item(self, album_index: int, n: int) -> dict:
+        # A multiplicative hash scatters times so min and max land on any page
+        seconds = (n * 2654435761 + album_index * 40503) % _SPAN_SECONDS
+        created = _EPOCH + timedelta(seconds=seconds)
+        stamp = created.strftime("%Y-%m-%dT%H:%M:%S") + (f".{n % 1000:03d}Z" if n % 2 else "Z")
+        return {
+            "id": f"item-{album_index}-{n}",
+            "filename": f"IMG_{n:05d}.jpg",
+            "mediaMetadata": {"creationTime": stamp, "photo": {"cameraMake": "Pixel"}},
+        }
+
+    def expected(self, album_id: str) -> tuple[str, str]:
+        """(oldest, newest) creationTime of an album, by brute force."""
+        index = int(album_id.split("-")[1])
+        stamps = [self.item(index, n)["mediaMetadata"]["creationTime"] for n in range(self.album_size(index))]
+        key = lambda s: datetime.fromisoformat(s.replace("Z", "+00:00"))  # noqa: E731
+        return min(stamps, key=key), max(stamps, key=key)
+
+    # ── Request handling ──────────────────────────────────────────────────────
+
+    def _page(self, total: int, query: dict, make, max_size: int) -> tuple[list, Optional[str]]:
+        size = min(int(query.get("pageSize") or max_size), max_size)
+        start = int(query.get("pageToken") or 0)
+        end = min(total, start + size)
+        return [make(i) for i in range(start, end)], (str(end) if end < total else None)
+
+    def _handle(self, method: str, path: str, query: dict) -> tuple[int, dict]:
+        with self._lock:
+            self.request_count += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failure = self._failures.popleft() if self._failures else None
+        try:
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000)
+            if failure:
+                return failure, {"error": {"code": failure, "message": f"fake {failure}"}}
+            if method == "GET" and path == "/v1/albums":
+                albums, token = self._page(self.albums, query, self.album, 50)
+                return 200, {"albums": albums, **({"nextPageToken": token} if token else {})}
+            if method == "POST" and path == "/v1/mediaItems:search":
+                index = int(str(query.get("albumId", "album-0")).split("-")[1])
+                items, token = self._page(self.album_size(index), query, lambda n: self.item(index, n), 100)
+                return 200, {"mediaItems": items, **({"nextPageToken": token} if token else {})}
+            return 404, {"error": {"code": 404, "message": "not found"}}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"       # keep-alive, like the real API
+            disable_nagle_algorithm = True      # headers and body go out as two writes
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _respond(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                self._respond(*server._handle("GET", url.path, query))
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._respond(*server._handle("POST", urlparse(self.path).path, body))
+
+        return Handler
@@ -0,0 +1,287 @@
+"""
+benchmarks/fake_postgrest.py — A tiny local PostgREST stand-in for benchmarks.
+
+Serves /rest/v1/<table> from in-memory lists with just enough of the PostgREST
+query grammar for our access patterns (eq/neq/gt/gte/lt/lte/in/is/ov filters,
+or=(...) / and(...) trees, order, limit, inserts, on_conflict upserts, updates, deletes and /rpc calls).
+Every request is counted so benchmarks can report round trips, and an optional
+per-request delay stands in for network latency to the real Supabase.
+
+Usage:
+    with FakePostgREST(latency_ms=2) as server:
+        server.tables["users"] = [{"id": "u1", "name": "Leo"}]
+        use_fake_supabase(server.url)   # before importing config / database
+        ...
+        print(server.request_count)
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qsl, urlsplit
+
+# Settings every benchmark needs before config.get_settings() can load.
+_DUMMY_SETTINGS = {
+    "TWILIO_ACCOUNT_SID": "bench",
+    "TWILIO_AUTH_TOKEN": "bench",
+    "TWILIO_WHATSAPP_NUMBER": "whatsapp:+10000000000",
+    "ANTHROPIC_API_KEY": "bench",
+    "OPENAI_API_KEY": "bench",
+    "GOOGLE_CLIENT_ID": "bench",
+    "GOOGLE_CLIENT_SECRET": "bench",
+    "GOOGLE_REDIRECT_URI": "http://localhost/auth/google/callback",
+    "BACKEND_URL": "http://localhost",
+    "JWT_SECRET": "bench",
+    "LEO_PHONE_NUMBER": "+10000000000",
+}
+
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def use_fake_supabase(url: str) -> None:
+    """Point the app's settings at the stand-in. Call before importing config."""
+    for key, value in _DUMMY_SETTINGS.items():
+        os.environ.setdefault(key, value)
+    os.environ["SUPABASE_URL"] = url
+    os.environ["SUPABASE_KEY"] = "bench.bench.bench"   # must look like a JWT
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _compare(value, op: str, arg: str) -> bool:
+    if op == "is":
+        return _as_text(value) == arg
+    if op == "in":
+        options = {a.strip().strip('"') for a in arg.strip("()").split(",")}
+        return _as_text(value) in options
+    if op == "ov":
+        options = {a.strip().strip('"') for a in arg.strip("{}()").split(",")}
+        return bool(options & {_as_text(v) for v in value or []})
+    text = _as_text(value)
+    if op == "eq":
+        return text == arg
+    if op == "neq":
+        return text != arg
+    if value is None:
+        return False
+    try:
+        left, right = float(value), float(arg)
+    except (TypeError, ValueError):
+        left, right = text, arg
+    return {
+        "gt": left > right, "gte": left >= right,
+        "lt": left < right, "lte": left <= right,
+    }.get(op, True)
+
+
+def _split_top(text: str) -> list[str]:
+    """Split a logic tree's items on commas outside parentheses and quotes."""
+    items, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(text):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            items.append(text[start:i])
+            start = i + 1
+    items.append(text[start:])
+    return items
+
+
+def _matches_tree(row: dict, combinator: str, body: str) -> bool:
+    """Evaluate or=(a.op.v,and(b.op.v,...)) against a row."""
+    results = []
+    for item in _split_top(body.strip()[1:-1]):
+        head, _, rest = item.partition("(")
+        if head in ("and", "or") and rest:
+            results.append(_matches_tree(row, head, "(" + rest))
+            continue
+        column, _, expr = item.partition(".")
+        op, _, arg = expr.partition(".")
+        results.append(_compare(row.get(column), op, arg.strip('"')))
+    return any(results) if combinator == "or" else all(results)
+
+
+class FakePostgREST:
+    """In-memory PostgREST stand-in running on a background thread."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.tables: dict[str, list[dict]] = {}
+        self.rpcs: dict[str, Callable[[dict], object]] = {}
+        self.latency_ms = latency_ms
+        self.request_count = 0
+        self.requests_by_route: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.request_count = 0
+            self.requests_by_route.clear()
+
+    def __enter__(self) -> "FakePostgREST":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ── Query evaluation ──────────────────────────────────────────────────────
+
+    def _filtered(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        rows = self.tables.setdefault(table, [])
+        filters = [(k, v) for k, v in params if k not in _RESERVED_PARAMS]
+        out = []
+        for row in rows:
+            ok = True
+            for column, expr in filters:
+                if column in ("or", "and"):
+                    if not _matches_tree(row, column, expr):
+                        ok = False
+                        break
+                    continue
+                negate = expr.startswith("not.")
+                op, _, arg = expr[4:].partition(".") if negate else expr.partition(".")
+                if _compare(row.get(column), op, arg) == negate:
+                    ok = False
+                    break
+            if ok:
+                out.append(row)
+        return out
+
+    def _select(self, table: str, params: list[tuple[str, str]]) -> list[dict]:
+        return self._ordered(self._filtered(table, params), params)
+
+    def _ordered(self, rows: list[dict], params: list[tuple[str, str]]) -> list[dict]:
+        opts = dict(params)
+        for clause in reversed((opts.get("order") or "").split(",")):
+            if not clause:
+                continue
+            column, *mods = clause.split(".")
+            rows = sorted(
+                rows,
+                key=lambda r: (r.get(column) is None, _as_text(r.get(column))),
+                reverse="desc" in mods,
+            )
+        offset = int(opts.get("offset", 0))
+        if "limit" in opts:
+            return rows[offset:offset + int(opts["limit"])]
+        return rows[offset:]
+
+    def _insert(self, table: str, payload, params, prefer: str) -> list[dict]:
+        rows = payload if isinstance(payload, list) else [payload]
+        store = self.tables.setdefault(table, [])
+        conflict = [c for c in (dict(params).get("on_conflict") or "").split(",") if c]
+        merge = "resolution=merge-duplicates" in prefer
+        ignore = "resolution=ignore-duplicates" in prefer
+        if (merge or ignore) and not conflict:
+            conflict = ["id"]
+        written = []
+        for row in rows:
+            row = dict(row)
+            existing = None
+            if conflict:
+                key = tuple(_as_text(row.get(c)) for c in conflict)
+                existing = next(
+                    (r for r in store if tuple(_as_text(r.get(c)) for c in conflict) == key),
+                    None,
+                )
+            if existing is not None:
+                if merge:
+                    existing.update(row)
+                    written.append(existing)
+                continue
+            row.setdefault("id", str(uuid.uuid4()))
+            store.append(row)
+            written.append(row)
+        return written
+
+    # ── HTTP plumbing ─────────────────────────────────────────────────────────
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, like the real PostgREST
+            disable_nagle_algorithm = True  # avoid 40ms delayed-ACK stalls
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self, method: str) -> None:
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000)
+                parts = urlsplit(self.path)
+                params = parse_qsl(parts.query, keep_blank_values=True)
+                route = parts.path.removeprefix("/rest/v1/")
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"null") if length else None
+                prefer = self.headers.get("Prefer") or ""
+                with server._lock:
+                    server.request_count += 1
+                    server.requests_by_route[f"{method} {route}"] += 1
+                    if route.startswith("rpc/"):
+                        fn = server.rpcs.get(route[4:])
+                        if fn is None:
+                            return self._reply(404, {"message": f"no rpc {route}"})
+                        result = fn(payload or dict(params))
+                        if payload and isinstance(result, list):
+                            result = server._ordered(result, params)   # order / offset / limit on the call
+                        return self._reply(200, result)
+                    if method == "GET":
+                        return self._reply(200, server._select(route, params))
+                    if method == "POST":
+                        return self._reply(201, server._insert(route, payload, params, prefer))
+                    matched = server._filtered(route, params)
+                    if method == "PATCH":
+                        for row in matched:
+                            row.update(payload or {})
+                        return self._reply(200, matched)
+                    if method == "DELETE":
+                        ids = {id(r) for r in matched}
+                        server.tables[route] = [r for r in server.tables.get(route, []) if id(r) not in ids]
+                        return self._reply(200, matched)
+                self._reply(405, {"message": method})
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PATCH(self):
+                self._handle("PATCH")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        return Handler
@@ -126,7 +126,7 @@ class MusicProvider:
         if self._has_spotify is not None:
             return self._has_spotify
         try:
-            from db import get_db
+            from database import get_db
             db = get_db()
             row = (
                 db.table("music_connections")
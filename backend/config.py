@@ -15,6 +15,9 @@ class Settings(BaseSettings):
     # ── Supabase ───────────────────────────────────────────────────────────────
     supabase_url: str
     supabase_key: str                    # service_role key — never the anon key
+    supabase_pool_size: int = 4              # long-lived clients per worker process
+    supabase_timeout_seconds: float = 10.0   # per-request PostgREST timeout
+    supabase_client_max_age_seconds: int = 1800  # recycle clients after this long
 
     # ── AI APIs ────────────────────────────────────────────────────────────────
     anthropic_api_key: str
@@ -39,9 +42,89 @@ class Settings(BaseSettings):
     plaid_secret: str = ""                   # Plaid secret key
     plaid_env: str = "sandbox"               # "sandbox" | "production"
 
+    # ── Policy audit log ───────────────────────────────────────────────────────
+    policy_audit_batch_size: int = 100           # decisions per bulk insert
+    policy_audit_flush_seconds: float = 2.0      # max time a decision waits in memory
+    policy_audit_max_queue: int = 10000          # beyond this, oldest spill to disk
+    policy_audit_spill_path: str = "policy_audit_spill.jsonl"  # used while the DB is down
+
+    # ── Scheduler jobs ─────────────────────────────────────────────────────────
+    job_concurrency: int = 8                 # users processed in parallel per job run
+    job_user_timeout_seconds: float = 120.0  # per-user time budget before it's abandoned
+
+    # ── People Graph ───────────────────────────────────────────────────────────
+    person_index_ttl_seconds: float = 600.0   # cached name/phone index per user; local writes update it
+
+    # ── Message batch ──────────────────────────────────────────────────────────
+    message_batch_page_size: int = 200             # unprocessed messages fetched per keyset page
+    message_batch_max_tokens: int = 6000           # estimated prompt tokens per analysis batch
+    message_batch_max_messages: int = 100          # cap per batch however short the messages are
+    message_batch_user_budget_seconds: float = 90.0  # stop draining a user here (keep under job_user_timeout_seconds)
+
+    # ── Durable job queue ──────────────────────────────────────────────────────
+    job_queue_path: str = "job_queue.sqlite3"       # SQLite file shared by the workers on this host
+    job_queue_poll_seconds: float = 1.0             # idle workers re-check for due jobs this often
+    job_queue_visibility_seconds: float = 300.0     # a claimed job reappears if its worker goes silent this long
+    job_queue_max_attempts: int = 5                 # default per job, then it is kept as "dead"
+    job_queue_retry_base_seconds: float = 10.0      # backoff ceiling doubles per attempt from here
+    job_queue_retry_max_seconds: float = 1800.0
+    job_queue_retention_seconds: int = 86400        # finished jobs kept this long for throughput stats
+    job_queue_dead_retention_seconds: int = 604800  # dead jobs (with their payloads) kept this long for retry_dead
+    job_queue_default_concurrency: int = 4          # handlers in flight per queue unless defined otherwise
+    job_queue_conversation_concurrency: int = 8     # WhatsApp sends, voice notes, interest extraction
+    job_queue_ingestion_concurrency: int = 2        # Google ingestion, rebuilds, iMessage imports
+
+    # ── Google ingestion ───────────────────────────────────────────────────────
+    google_api_timeout_seconds: float = 30.0  # per Photos / Gmail / People API request
+    google_api_max_retries: int = 3          # retries on 429 / 5xx / connection errors
+    photos_top_albums: int = 15              # people albums read per user, largest first
+    photos_album_concurrency: int = 4        # albums paged through at once over one pooled client
+    gmail_sent_messages: int = 500           # latest sent emails read on a full Gmail sync
+    gmail_fetch_concurrency: int = 8         # message metadata requests in flight at once
+    gmail_top_contacts: int = 50             # recipients passed to the People Graph build
+
+    # ── Drift detection ────────────────────────────────────────────────────────
+    drift_mode: str = "single"               # "single" (drift_threshold_days for everyone) | "tiered"
+    drift_threshold_days: int = 21           # quiet this long = drifted; the middle tier in tiered mode
+    drift_close_days: int = 7                # tiered: people at or above drift_close_min
+    drift_close_min: float = 0.8
+    drift_distant_days: int = 60             # tiered: people below drift_distant_max
+    drift_distant_max: float = 0.4
+    drift_repeat_days: int = 14              # no second drift moment for a person within this
+
+    # ── Ingestion progress bus ─────────────────────────────────────────────────
+    ingestion_bus_backend: str = "memory"           # "memory" (one worker) | "sqlite" (workers on this host share sessions)
+    ingestion_bus_path: str = "ingestion_bus.sqlite3"  # sqlite backend file
+    ingestion_bus_poll_seconds: float = 0.1         # sqlite: how soon other workers' events reach this one's sockets
+    ingestion_bus_history: int = 50                 # events kept per session for reconnecting clients
+    ingestion_bus_subscriber_queue: int = 64        # events a WebSocket may fall behind before it is dropped
+    ingestion_bus_session_ttl_seconds: float = 3600.0  # idle sessions (and sqlite rows) forgotten after this
+
     # ── Claude model ───────────────────────────────────────────────────────────
     claude_model: str = "claude-sonnet-4-5"
 
+    # ── LLM gateway ────────────────────────────────────────────────────────────
+    anthropic_base_url: str = ""             # e.g. a local fake server; "" = api.anthropic.com
+    llm_max_concurrency: int = 16            # Claude calls in flight across all features
+    llm_feature_concurrency: int = 4         # Claude calls in flight per feature
+    llm_requests_per_minute: int = 300       # token-bucket refill rate; 0 = unlimited
+    llm_request_burst: int = 20              # requests allowed back to back before pacing
+    llm_max_retries: int = 4                 # retries on 429 / 529 / 5xx / connection errors
+    llm_timeout_seconds: float = 120.0       # per attempt
+    llm_cache_size: int = 2000               # cached responses kept in memory (opt-in per call)
+    llm_cache_dir: str = ".llm_cache"        # on-disk cache tier; "" = memory only
+    llm_cache_ttl_seconds: int = 604800      # disk entries older than this are ignored
+
+    # ── WorkFilter ─────────────────────────────────────────────────────────────
+    work_filter_batch_size: int = 20         # ambiguous items packed into one Claude prompt
+    work_filter_concurrency: int = 4         # Claude classification calls in flight at once
+    work_filter_cache_size: int = 50000      # cached verdicts, keyed by content hash
+
+    # ── Third-party signal extraction ──────────────────────────────────────────
+    signal_workers: int = 3                  # "signals" job queue concurrency; imports may use all but one
+    signal_batch_size: int = 8               # messages from one conversation per Claude prompt (one job)
+    signal_max_queue: int = 1000             # waiting batches; beyond this, import batches are dropped
+
     # ── APNs Push Notifications ────────────────────────────────────────────────
     apns_key_id: str = ""          # 10-char key ID from Apple Developer
     apns_team_id: str = ""         # 10-char team ID
@@ -15,18 +15,25 @@ Fast-paths (no Claude call needed):
   - Messages from contacts whose only known context is professional
 
 Claude is only called for genuinely ambiguous cases (< ~10% of traffic).
+classify_many() runs the fast path over a whole batch, packs the leftovers
+into multi-item prompts sent concurrently, and remembers every Claude verdict
+by normalized content hash so repeated messages never reach Claude twice.
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import re
 import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
-import anthropic
-
 from config import get_settings
+from services import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -99,6 +106,69 @@ _WORK_MESSAGE_SIGNALS: list[re.Pattern] = [
 ]
 
 
+# ── Verdict cache ─────────────────────────────────────────────────────────────
+
+
+class _VerdictCache:
+    """
+    Thread-safe LRU of content key → Claude FilterResult, shared by all
+    WorkFilters. With maxsize None the size is read from work_filter_cache_size
+    on the first put, so importing this module never needs the settings.
+    """
+
+    def __init__(self, maxsize: int | None = None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, FilterResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> FilterResult | None:
+        with self._lock:
+            result = self._data.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: FilterResult) -> None:
+        if self.maxsize is None:
+            self.maxsize = get_settings().work_filter_cache_size
+        with self._lock:
+            self._data[key] = result
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+_verdict_cache = _VerdictCache()
+
+
+def _content_key(content_type: str, content: dict) -> str:
+    """
+    Hash of the fields Claude sees, case- and whitespace-normalized, so the
+    same text from the same sender maps to the same verdict.
+    """
+    def norm(value):
+        if isinstance(value, str):
+            return " ".join(value.lower().split())
+        if isinstance(value, (list, tuple)):
+            return [norm(v) for v in value]
+        return value
+
+    payload = json.dumps(
+        {k: norm(v) for k, v in content.items()}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(f"{content_type}\x1f{payload}".encode()).hexdigest()
+
+
 # ── WorkFilter ────────────────────────────────────────────────────────────────
 
 
@@ -111,11 +181,16 @@ class WorkFilter:
         result = await wf.classify(content_type="email", content={...})
         if result.passes:
             ... process as personal data ...
+
+        results = await wf.classify_many("imessage", [{...}, {...}])
     """
 
     def __init__(self):
-        self._client = anthropic.Anthropic(api_key=get_settings().anthropic_api_key)
-        self._model = get_settings().claude_model
+        settings = get_settings()
+        self._client = llm_gateway.async_client("work_filter")
+        self._model = settings.claude_model
+        self._batch_size = settings.work_filter_batch_size
+        self._concurrency = settings.work_filter_concurrency
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -135,16 +210,60 @@ class WorkFilter:
           whatsapp: sender_name, text_snippet, group_name (optional)
           maps:     place_name, address, visit_time, duration_minutes
         """
-        # Fast-path: attempt rule-based classification first
-        fast = self._fast_path(content_type, content)
-        if fast is not None:
-            await self._log(user_id, content_type, fast)
-            return fast
+        return (await self.classify_many(content_type, [content], user_id=user_id))[0]
 
-        # Slow-path: ask Claude
-        result = await self._claude_classify(content_type, content)
-        await self._log(user_id, content_type, result)
-        return result
+    async def classify_many(
+        self,
+        content_type: str,
+        contents: list[dict],
+        user_id: str | None = None,
+    ) -> list[FilterResult]:
+        """
+        Classify a batch of same-typed items. Returns one FilterResult per
+        item, in order.
+
+        The fast path runs over every item first. Whatever is left is looked
+        up in the verdict cache, de-duplicated, and sent to Claude in
+        multi-item prompts (work_filter_batch_size per prompt, at most
+        work_filter_concurrency in flight). All exclusions are logged with a
+        single bulk insert.
+        """
+        results: list[FilterResult | None] = [None] * len(contents)
+        pending: dict[str, list[int]] = {}   # content key → positions awaiting Claude
+
+        for i, content in enumerate(contents):
+            fast = self._fast_path(content_type, content)
+            if fast is not None:
+                results[i] = fast
+                continue
+            key = _content_key(content_type, content)
+            cached = _verdict_cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            keys = list(pending)
+            chunks = [keys[i:i + self._batch_size] for i in range(0, len(keys), self._batch_size)]
+            semaphore = asyncio.Semaphore(self._concurrency)
+
+            async def run(chunk: list[str]) -> list[FilterResult]:
+                async with semaphore:
+                    return await self._claude_classify_batch(
+                        content_type, [contents[pending[k][0]] for k in chunk]
+                    )
+
+            verdicts = await asyncio.gather(*(run(chunk) for chunk in chunks))
+            for chunk, chunk_verdicts in zip(chunks, verdicts):
+                for key, verdict in zip(chunk, chunk_verdicts):
+                    if verdict.reason.startswith("Claude:"):
+                        _verdict_cache.put(key, verdict)  # never cache outage defaults
+                    for i in pending[key]:
+                        results[i] = verdict
+
+        await self._log_many(user_id, content_type, results)
+        return results
 
     def build_safe_preview(self, content_type: str, content: dict) -> str:
         """
@@ -315,11 +434,31 @@ class WorkFilter:
 
     # ── Claude classification ─────────────────────────────────────────────────
 
+    async def _claude_classify_batch(self, content_type: str, contents: list[dict]) -> list[FilterResult]:
+        """One Claude call for several items. Single items use the one-word prompt."""
+        if len(contents) == 1:
+            return [await self._claude_classify(content_type, contents[0])]
+
+        prompt = _build_claude_batch_prompt(content_type, contents)
+        try:
+            msg = await self._client.messages.create(
+                model=self._model,
+                max_tokens=12 * len(contents) + 20,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            raw = msg.content[0].text
+        except Exception as exc:
+            logger.warning("WorkFilter Claude batch call failed: %s — defaulting to ambiguous", exc)
+            return [_unavailable() for _ in contents]
+
+        labels = _parse_batch_reply(raw, len(contents))
+        return [_from_claude_label(label) if label else _unavailable() for label in labels]
+
     async def _claude_classify(self, content_type: str, content: dict) -> FilterResult:
         prompt = _build_claude_prompt(content_type, content)
 
         try:
-            msg = self._client.messages.create(
+            msg = await self._client.messages.create(
                 model=self._model,
                 max_tokens=100,
                 messages=[{"role": "user", "content": prompt}],
@@ -327,54 +466,111 @@ class WorkFilter:
             raw = msg.content[0].text.strip().lower()
         except Exception as exc:
             logger.warning("WorkFilter Claude call failed: %s — defaulting to ambiguous", exc)
-            return FilterResult(
-                label=Label.AMBIGUOUS,
-                confidence=0.50,
-                reason="Claude unavailable, conservative default",
-            )
+            return _unavailable()
 
-        if raw.startswith("personal"):
-            return FilterResult(label=Label.PERSONAL, confidence=0.85, reason="Claude: personal")
-        if raw.startswith("work"):
-            return FilterResult(label=Label.WORK, confidence=0.85, reason="Claude: work")
-        return FilterResult(label=Label.AMBIGUOUS, confidence=0.60, reason="Claude: ambiguous")
+        return _from_claude_label(raw)
 
     # ── Logging ───────────────────────────────────────────────────────────────
 
     async def _log(self, user_id: str | None, content_type: str, result: FilterResult) -> None:
         """Log to work_filter_log table (fire-and-forget, never blocks)."""
-        if result.passes:
-            return  # only log exclusions
-        try:
-            from db import get_db  # lazy import to avoid circular deps
-            db = get_db()
-            db.table("work_filter_log").insert({
+        await self._log_many(user_id, content_type, [result])
+
+    async def _log_many(self, user_id: str | None, content_type: str, results: list[FilterResult]) -> None:
+        """Log every exclusion in one bulk insert to work_filter_log."""
+        rows = [
+            {
                 "user_id": user_id,
                 "content_type": content_type,
-                "label": result.label.value,
-                "confidence": result.confidence,
-                "reason": result.reason,
-            }).execute()
+                "label": r.label.value,
+                "confidence": r.confidence,
+                "reason": r.reason,
+            }
+            for r in results
+            if not r.passes  # only log exclusions
+        ]
+        if not rows:
+            return
+        try:
+            from database import get_db  # lazy import to avoid circular deps
+            db = get_db()
+            await asyncio.to_thread(db.table("work_filter_log").insert(rows).execute)
         except Exception:
             pass  # logging must never fail silently or crash ingestion
 
 
+def _from_claude_label(raw: str) -> FilterResult:
+    raw = raw.strip().lower()
+    if raw.startswith("personal"):
+        return FilterResult(label=Label.PERSONAL, confidence=0.85, reason="Claude: personal")
+    if raw.startswith("work"):
+        return FilterResult(label=Label.WORK, confidence=0.85, reason="Claude: work")
+    return FilterResult(label=Label.AMBIGUOUS, confidence=0.60, reason="Claude: ambiguous")
+
+
+def _unavailable() -> FilterResult:
+    return FilterResult(
+        label=Label.AMBIGUOUS,
+        confidence=0.50,
+        reason="Claude unavailable, conservative default",
+    )
+
+
+_BATCH_LINE = re.compile(r"^\s*\[?(\d+)\]?\s*[:.)-]\s*([a-z]+)", re.I)
+
+
+def _parse_batch_reply(raw: str, count: int) -> list[str | None]:
+    """Map "3: work" lines back to item positions. Missing items come back as None."""
+    labels: list[str | None] = [None] * count
+    for line in raw.splitlines():
+        m = _BATCH_LINE.match(line)
+        if m and 1 <= int(m.group(1)) <= count:
+            labels[int(m.group(1)) - 1] = m.group(2)
+    return labels
+
+
 # ── Prompt builder ────────────────────────────────────────────────────────────
 
+_RULES = [
+    "Rules:",
+    "- personal: clearly about the person's private life (relationships, health, leisure, family)",
+    "- work: clearly professional (work emails, meetings, colleagues in work context)",
+    "- ambiguous: cannot be determined from context alone",
+]
+
+
 def _build_claude_prompt(content_type: str, content: dict) -> str:
     lines = [
         "Classify the following piece of data as personal, work, or ambiguous.",
         "",
-        "Rules:",
-        "- personal: clearly about the person's private life (relationships, health, leisure, family)",
-        "- work: clearly professional (work emails, meetings, colleagues in work context)",
-        "- ambiguous: cannot be determined from context alone",
+        *_RULES,
         "",
         "Reply with EXACTLY one word: personal, work, or ambiguous. No explanation.",
         "",
         f"Type: {content_type}",
+        *_content_lines(content_type, content),
+    ]
+    return "\n".join(lines)
+
+
+def _build_claude_batch_prompt(content_type: str, contents: list[dict]) -> str:
+    lines = [
+        f"Classify each of the following {len(contents)} numbered items as personal, work, or ambiguous.",
+        "",
+        *_RULES,
+        "",
+        "Reply with one line per item in the form \"<number>: <label>\" where label is",
+        "EXACTLY one word: personal, work, or ambiguous. No explanation.",
+        "",
+        f"Type: {content_type}",
     ]
+    for n, content in enumerate(contents, start=1):
+        lines += ["", f"[{n}]", *_content_lines(content_type, content)]
+    return "\n".join(lines)
 
+
+def _content_lines(content_type: str, content: dict) -> list[str]:
+    lines: list[str] = []
     if content_type == "email":
         lines += [
             f"From: {content.get('sender', '')}",
@@ -400,5 +596,4 @@ def _build_claude_prompt(content_type: str, content: dict) -> str:
             f"Address: {content.get('address', '')}",
             f"Duration: {content.get('duration_minutes', '')} minutes",
         ]
-
-    return "\n".join(lines)
+    return lines
@@ -0,0 +1,93 @@
+"""
+core/json_stream.py — Pull complete objects out of a JSON array as it streams.
+
+Claude answers "return a JSON array of …" prompts one token at a time.
+JSONArrayStream takes those pieces in whatever sizes they arrive and hands
+back each top-level object as soon as its closing brace is seen, so callers
+can act on the first element long before the array is finished:
+
+    parser = JSONArrayStream()
+    for text in llm_gateway.stream_sync(feature, system, prompt):
+        for item in parser.feed(text):
+            ...
+
+Anything before the opening bracket (a ```json fence, a stray sentence) and
+anything after the closing one is ignored. Top-level elements that are not
+objects are skipped, as are objects that fail to parse (counted in
+`skipped`), so one malformed element doesn't lose the rest of the array.
+"""
+from __future__ import annotations
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayStream:
+    """Incremental parser for one JSON array of objects. Not thread-safe."""
+
+    def __init__(self):
+        self.started = False        # seen the opening "["
+        self.done = False           # seen the matching "]"
+        self.emitted = 0
+        self.skipped = 0
+        self._depth = 0             # nesting inside the current element; 0 = between elements
+        self._array_element = False  # the current element is a nested array, dropped when it closes
+        self._in_string = False
+        self._escape = False
+        self._parts: list[str] = []  # text of the current element from earlier chunks
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consume the next piece of text; return the objects it completed."""
+        completed = []
+        start = 0 if self._depth else None
+        for i, ch in enumerate(chunk):
+            if self.done:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if not self.started:
+                    self.started = ch == "["
+                elif ch == "{":
+                    self._depth, start, self._array_element = 1, i, False
+                elif ch == "[":
+                    self._depth, start, self._array_element = 1, i, True
+                elif ch == "]":
+                    self.done = True
+                elif ch == '"':
+                    self._in_string = True
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:i + 1])
+                    start = None
+                    text, self._parts = "".join(self._parts), []
+                    if self._array_element:
+                        continue
+                    item = self._parse(text)
+                    if item is not None:
+                        completed.append(item)
+        if self._depth and start is not None:
+            self._parts.append(chunk[start:])
+        return completed
+
+    def _parse(self, text: str) -> dict | None:
+        try:
+            item = json.loads(text)
+        except ValueError as e:
+            self.skipped += 1
+            logger.warning(f"JSONArrayStream: skipping malformed element ({e})")
+            return None
+        self.emitted += 1
+        return item
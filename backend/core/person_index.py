@@ -0,0 +1,300 @@
+"""
+core/person_index.py — Resolve names, aliases and phone numbers to people.
+
+Every pipeline that meets a person in the wild — a WhatsApp sender, an
+iMessage contact, a name Claude pulled out of a message — has to find that
+person in the user's People Graph. PersonIndex loads the graph once and
+answers those lookups from in-memory maps:
+
+  phone_hash   exact; the cross-user matching key (hash_phone)
+  phone        E.164-normalised, so "(415) 555-1234" finds "+14155551234"
+  email        case-insensitive (iMessage handles are often Apple IDs)
+  name, alias  normalised for case, accents, punctuation and spacing
+  tokens       "Sarah" finds "Sarah Chen"; "Mom Cell" finds "Mom"
+  fuzzy        near misses ("Sara Chen", "Jon") among people whose name
+               tokens share the mention's first two letters
+
+Ties go to the closest person, in the order get_people_for_user returns.
+
+Indexes are cached per user for person_index_ttl_seconds. database.py
+writes through: upsert_person swaps in a copy of the cached index that
+includes the row, and other people writes drop it (invalidate). Writes from another process show up
+once the TTL lapses.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Minimum SequenceMatcher ratio for a fuzzy name match
+FUZZY_THRESHOLD = 0.82
+
+_DIGIT_STRIP = str.maketrans("", "", " ()-+.")
+_APOSTROPHES = re.compile(r"['’`]")
+_NON_WORD = re.compile(r"[^\w\s]|_")
+
+
+def hash_phone(phone: str) -> str:
+    """
+    Normalise a phone number (digits only) then SHA-256 hash it.
+    Used to cross-match people across different Genie users without exposing raw numbers.
+
+    Examples:
+        hash_phone("+1 (415) 555-1234") == hash_phone("14155551234")
+    """
+    normalized = phone.translate(_DIGIT_STRIP)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """'  Zoë O'Brien-Smith ' → 'zoe obrien smith'."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _NON_WORD.sub(" ", _APOSTROPHES.sub("", text))
+    return " ".join(text.split())
+
+
+def normalize_phone(phone: Optional[str], default_country_code: str = "1") -> Optional[str]:
+    """
+    E.164 form of a phone number, or None if it doesn't look like one.
+    Ten-digit numbers without a country code are assumed to be in
+    default_country_code (North America, where most users are).
+    """
+    if not phone or "@" in phone:
+        return None
+    raw = phone.strip()
+    digits = re.sub(r"\D", "", raw)
+    if raw.startswith("00"):
+        digits = digits[2:]
+    elif not raw.startswith("+") and len(digits) == 10:
+        digits = default_country_code + digits
+    if not 8 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
+
+class PersonIndex:
+    """
+    One user's People Graph, indexed for resolution. Immutable once built,
+    so it can be shared across threads; with_person() returns an updated copy.
+    """
+
+    def __init__(self, people: Iterable[dict] = ()):
+        self._people: dict[str, dict] = {}
+        self._order: dict[str, int] = {}           # closeness rank; lower wins ties
+        self._names: dict[str, list[str]] = {}      # person id → normalised name + aliases
+        self._tokens: dict[str, frozenset] = {}
+        self._by_name: dict[str, list[str]] = {}
+        self._by_alias: dict[str, list[str]] = {}
+        self._by_token: dict[str, set[str]] = {}
+        self._by_prefix: dict[str, set[str]] = {}
+        self._by_phone: dict[str, list[str]] = {}
+        self._by_phone_hash: dict[str, list[str]] = {}
+        self._by_email: dict[str, list[str]] = {}
+        self._memo: dict[str, Optional[str]] = {}
+        for person in people:
+            self._add(person)
+
+    def __len__(self) -> int:
+        return len(self._people)
+
+    @property
+    def people(self) -> list[dict]:
+        return list(self._people.values())
+
+    def with_person(self, person: dict) -> "PersonIndex":
+        """A copy with person added, or merged over the existing row with the same id."""
+        person_id = person.get("id")
+        if person_id in self._people:
+            merged = {**self._people[person_id], **person}
+            return PersonIndex(merged if pid == person_id else p for pid, p in self._people.items())
+        return PersonIndex([*self._people.values(), person])
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+
+    def get(self, person_id: str) -> Optional[dict]:
+        return self._people.get(person_id)
+
+    def by_name(self, name: str) -> Optional[dict]:
+        """Exact match on the normalised name only — the upsert key."""
+        return self._first(self._by_name.get(normalize_name(name), ()))
+
+    def by_phone(self, phone: str) -> Optional[dict]:
+        e164 = normalize_phone(phone)
+        person = self._first(self._by_phone.get(e164, ())) if e164 else None
+        if person is None:
+            # Stored hashes were taken from whatever format the source had
+            hashes = {hash_phone(phone)} | ({hash_phone(e164)} if e164 else set())
+            person = self._first([i for h in hashes for i in self._by_phone_hash.get(h, ())])
+        return person
+
+    def by_phone_hash(self, phone_hash: str) -> Optional[dict]:
+        return self._first(self._by_phone_hash.get(phone_hash, ()))
+
+    def by_email(self, email: str) -> Optional[dict]:
+        return self._first(self._by_email.get(email.strip().lower(), ()))
+
+    def match_name(self, mention: str, fuzzy: bool = True) -> Optional[dict]:
+        """
+        Best person for a name as written in a message or contact card:
+        exact name, then alias, then token containment either way, then
+        (if fuzzy) the closest near miss. None if nothing is close enough.
+        """
+        needle = normalize_name(mention)
+        if not needle:
+            return None
+        memo_key = needle if fuzzy else "\0" + needle
+        if memo_key in self._memo:
+            return self._people.get(self._memo[memo_key])
+
+        person = (
+            self._first(self._by_name.get(needle, ()))
+            or self._first(self._by_alias.get(needle, ()))
+            or self._token_match(needle)
+            or (self._fuzzy_match(needle) if fuzzy else None)
+        )
+        self._memo[memo_key] = person["id"] if person else None
+        return person
+
+    def resolve(
+        self,
+        name: Optional[str] = None,
+        phone: Optional[str] = None,
+        phone_hash: Optional[str] = None,
+        email: Optional[str] = None,
+        fuzzy: bool = True,
+    ) -> Optional[dict]:
+        """
+        Strongest identifier first: phone hash, phone, email, then name.
+        A phone argument that is really an email address (an iMessage
+        handle) is looked up as one.
+        """
+        if phone and "@" in phone:
+            phone, email = None, email or phone
+        return (
+            (self.by_phone_hash(phone_hash) if phone_hash else None)
+            or (self.by_phone(phone) if phone else None)
+            or (self.by_email(email) if email else None)
+            or (self.match_name(name, fuzzy=fuzzy) if name else None)
+        )
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _add(self, person: dict) -> None:
+        person_id = person.get("id")
+        if not person_id or person_id in self._people:
+            return
+        self._people[person_id] = person
+        self._order[person_id] = len(self._order)
+
+        name = normalize_name(person.get("name"))
+        aliases = {normalize_name(a) for a in person.get("aliases") or [] if isinstance(a, str)} - {"", name}
+        self._names[person_id] = [n for n in (name, *sorted(aliases)) if n]
+        self._tokens[person_id] = frozenset(t for n in self._names[person_id] for t in n.split())
+
+        if name:
+            self._by_name.setdefault(name, []).append(person_id)
+        for alias in aliases:
+            self._by_alias.setdefault(alias, []).append(person_id)
+        for token in self._tokens[person_id]:
+            self._by_token.setdefault(token, set()).add(person_id)
+            self._by_prefix.setdefault(token[:2], set()).add(person_id)
+
+        phone = person.get("phone")
+        e164 = normalize_phone(phone)
+        if e164:
+            self._by_phone.setdefault(e164, []).append(person_id)
+        hashes = {person["phone_hash"]} if person.get("phone_hash") else set()
+        if phone:
+            hashes.add(hash_phone(phone))
+        if e164:
+            hashes.add(hash_phone(e164))
+        for phone_hash in hashes:
+            self._by_phone_hash.setdefault(phone_hash, []).append(person_id)
+        email = (person.get("email") or "").strip().lower()
+        if email:
+            self._by_email.setdefault(email, []).append(person_id)
+
+    def _first(self, person_ids: Iterable[str]) -> Optional[dict]:
+        best = min(person_ids, key=self._order.__getitem__, default=None)
+        return self._people[best] if best is not None else None
+
+    def _token_match(self, needle: str) -> Optional[dict]:
+        wanted = frozenset(needle.split())
+        candidates = set().union(*(self._by_token.get(t, ()) for t in wanted))
+        return self._first(
+            pid for pid in candidates
+            if wanted <= self._tokens[pid] or any(set(n.split()) <= wanted for n in self._names[pid])
+        )
+
+    def _fuzzy_match(self, needle: str) -> Optional[dict]:
+        candidates = set().union(*(self._by_prefix.get(t[:2], ()) for t in needle.split()))
+        # Same trick as difflib.get_close_matches: the needle is seq2 (cached
+        # by SequenceMatcher) and cheap upper bounds skip most full ratios
+        matcher = SequenceMatcher()
+        matcher.set_seq2(needle)
+        single_word = " " not in needle
+        best_id, best_score = None, FUZZY_THRESHOLD
+        for pid in sorted(candidates, key=self._order.__getitem__):
+            for name in self._names[pid]:
+                for text in (name, name.split()[0]) if single_word else (name,):
+                    matcher.set_seq1(text)
+                    if (matcher.real_quick_ratio() > best_score and matcher.quick_ratio() > best_score
+                            and matcher.ratio() > best_score):
+                        best_id, best_score = pid, matcher.ratio()
+        return self._people[best_id] if best_id else None
+
+
+# ── Per-user cache ────────────────────────────────────────────────────────────
+
+_cache: dict[str, tuple[float, PersonIndex]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_index(user_id: str) -> PersonIndex:
+    """The user's PersonIndex, loading the People Graph on a miss or after the TTL."""
+    with _cache_lock:
+        entry = _cache.get(user_id)
+    if entry is not None and time.monotonic() < entry[0]:
+        return entry[1]
+
+    import database as dbm
+    from config import get_settings  # read at call time so settings reloads apply
+    index = PersonIndex(dbm.get_people_for_user(user_id) or [])
+    with _cache_lock:
+        _cache[user_id] = (time.monotonic() + get_settings().person_index_ttl_seconds, index)
+    return index
+
+
+def index_person(user_id: Optional[str], person: Optional[dict]) -> None:
+    """
+    Write-through after a person row is created or updated: a cached index
+    is swapped for a copy that includes the row. Never raises.
+    """
+    if not user_id or not person or not person.get("id"):
+        return
+    try:
+        with _cache_lock:
+            entry = _cache.get(user_id)
+            if entry is not None:
+                _cache[user_id] = (entry[0], entry[1].with_person(person))
+    except Exception as exc:
+        logger.warning("PersonIndex: write-through failed for %s: %s", user_id, exc)
+        invalidate(user_id)
+
+
+def invalidate(user_id: Optional[str] = None) -> None:
+    """Drop one user's cached index (or every index). Safe to call from anywhere."""
+    with _cache_lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
@@ -16,8 +16,12 @@ Sections:
   calendar      — today + next 3 days of personal events
   interests     — top interest signals
 
-The World Model is assembled fresh per conversation turn (lightweight — mostly
-reading from Supabase, one music API call, one signal aggregation). Heavy
+The World Model is assembled per conversation turn (lightweight — mostly
+reading from Supabase, one music API call, one signal aggregation). Section
+loaders run concurrently, with their blocking Supabase/Spotify calls offloaded
+to worker threads, so assembly costs roughly the slowest single section. Each
+section is cached per user with its own TTL (SECTION_TTLS) and dropped early
+when the tables behind it are written (invalidate_world_model). Heavy
 computation (signal extraction, relationship scoring) happens in background jobs.
 
 Bi-directional graph:
@@ -33,15 +37,114 @@ Privacy contract (never violated):
 """
 from __future__ import annotations
 
+import asyncio
+import copy
 import logging
+import threading
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 from config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# How long each section may be served from cache, in seconds. Music reflects
+# what is playing right now; relationships and interests change slowly.
+SECTION_TTLS: dict[str, float] = {
+    "user": 600,
+    "people": 600,
+    "health": 120,
+    "emotional": 300,
+    "music": 60,
+    "moments": 120,
+    "calendar": 300,
+    "interests": 900,
+    "third_party": 300,
+    "prior_perspectives": 1800,
+}
+
+# Which sections each table feeds — writes to a table invalidate these
+TABLE_SECTIONS: dict[str, tuple[str, ...]] = {
+    "users": ("user",),
+    "people": ("people", "moments"),
+    "nutrition_log": ("health",),
+    "training_sessions": ("health",),
+    "health_daily_summary": ("health",),
+    "emotional_states": ("emotional",),
+    "music_connections": ("music",),
+    "moments": ("moments",),
+    "calendar_events": ("calendar",),
+    "interests": ("interests",),
+    "user_interests": ("interests",),
+    "third_party_signals": ("third_party", "prior_perspectives"),
+    "cross_user_permissions": ("third_party",),
+}
+
+_SECTION_DEFAULTS: dict[str, Callable[[], Any]] = {
+    "user": dict, "people": list, "health": dict, "emotional": dict, "music": dict,
+    "moments": list, "calendar": list, "interests": list,
+    "third_party": list, "prior_perspectives": dict,
+}
+
+
+class _SectionCache:
+    """
+    Thread-safe (user_id, section) → value cache with per-section TTLs.
+    Values are deep-copied in and out, so callers can't change what is cached.
+    """
+
+    _MISS = object()
+
+    def __init__(self):
+        self._data: dict[tuple[str, str], tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, section: str) -> Any:
+        with self._lock:
+            entry = self._data.get((user_id, section))
+        if entry is None or time.monotonic() > entry[0]:
+            return self._MISS
+        return copy.deepcopy(entry[1])
+
+    def put(self, user_id: str, section: str, value: Any) -> None:
+        expires = time.monotonic() + SECTION_TTLS.get(section, 60)
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[(user_id, section)] = (expires, value)
+
+    def invalidate(self, user_id: str, sections: Optional[set] = None) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k[0] == user_id and (sections is None or k[1] in sections)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_section_cache = _SectionCache()
+
+
+def invalidate_world_model(user_id: Optional[str], *tables: str) -> None:
+    """
+    Drop cached World Model sections for a user after writing to `tables`.
+    With no tables, every cached section for the user is dropped.
+    Safe to call from anywhere — never raises.
+    """
+    if not user_id:
+        return
+    try:
+        if not tables:
+            _section_cache.invalidate(user_id)
+            return
+        sections = {s for t in tables for s in TABLE_SECTIONS.get(t, ())}
+        if sections:
+            _section_cache.invalidate(user_id, sections)
+    except Exception as exc:
+        logger.warning("WorldModel: cache invalidation failed for %s: %s", user_id, exc)
+
 
 # ── World Model dataclass ─────────────────────────────────────────────────────
 
@@ -169,6 +272,10 @@ def _valence_label(v: float) -> str:
 
 # ── Assembler ─────────────────────────────────────────────────────────────────
 
+# Background writes in flight — held so the tasks aren't garbage-collected early
+_background_tasks: set = set()
+
+
 class WorldModelAssembler:
     """
     Assembles a WorldModel for a given user_id.
@@ -180,307 +287,325 @@ class WorldModelAssembler:
     """
 
     async def assemble(self, user_id: str) -> WorldModel:
-        from db import get_db
+        from database import get_db
         db = get_db()
 
         wm = WorldModel(user_id=user_id)
 
-        # Run all sections — failures are isolated, never crash the conversation
-        await self._load_user(db, wm)
-        await self._load_people(db, wm)
-        await self._load_health(db, wm)
-        await self._load_emotional(db, wm)
-        await self._load_music(wm)
-        await self._load_moments(db, wm)
-        await self._load_calendar(db, wm)
-        await self._load_interests(db, wm)
-        await self._load_third_party_signals(db, wm)
-        await self._load_prior_perspectives(db, wm)
-
-        # Persist snapshot to world_model table for audit/debugging
-        await self._persist(db, wm)
-
-        return wm
-
-    # ── Section loaders ───────────────────────────────────────────────────────
-
-    async def _load_user(self, db, wm: WorldModel) -> None:
-        try:
-            result = db.table("users").select("id, name, created_at, phone").eq("id", wm.user_id).execute()
-            if result.data:
-                wm.user = result.data[0]
-        except Exception as exc:
-            logger.warning("WorldModel: user load failed for %s: %s", wm.user_id, exc)
-
-    async def _load_people(self, db, wm: WorldModel) -> None:
-        try:
-            result = (
-                db.table("people")
-                .select("id, name, relationship_type, closeness_score, last_meaningful_exchange, memories")
-                .eq("user_id", wm.user_id)
-                .order("closeness_score", desc=True)
-                .limit(15)
-                .execute()
+        async def user_then_cross_user() -> None:
+            # Cross-user sections match on the user's phone, so they wait for it
+            wm.user = await self._load(db, user_id, "user", self._fetch_user)
+            phone = wm.user.get("phone", "")
+            wm.third_party_signals, wm.prior_perspectives = await asyncio.gather(
+                self._load(db, user_id, "third_party", self._fetch_third_party_signals, phone),
+                self._load(db, user_id, "prior_perspectives", self._fetch_prior_perspectives, phone),
             )
-            now = datetime.now(timezone.utc)
-            people = []
-            for p in (result.data or []):
-                last = p.get("last_meaningful_exchange")
-                days = None
-                if last:
-                    try:
-                        last_dt = datetime.fromisoformat(last.replace("Z", "+00:00"))
-                        days = (now - last_dt).days
-                    except Exception:
-                        pass
-
-                memories = p.get("memories") or []
-                top_memory = memories[0].get("description", "") if memories else ""
-
-                people.append({
-                    **p,
-                    "days_since_exchange": days,
-                    "top_memory": top_memory,
-                })
-            wm.people = people
-        except Exception as exc:
-            logger.warning("WorldModel: people load failed: %s", exc)
 
-    async def _load_health(self, db, wm: WorldModel) -> None:
-        try:
-            from services.nutrition import get_daily_summary, get_days_logging
-            summary = get_daily_summary(wm.user_id)
-            days = get_days_logging(wm.user_id)
-            habit = db.table("health_daily_summary") \
-                      .select("habit_established") \
-                      .eq("user_id", wm.user_id) \
-                      .order("summary_date", desc=True) \
-                      .limit(1) \
-                      .execute()
-            established = habit.data[0].get("habit_established", False) if habit.data else False
-            wm.health = {
-                "today": summary,
-                "days_logging": days,
-                "habit_established": established,
-            }
-        except Exception as exc:
-            logger.warning("WorldModel: health load failed: %s", exc)
+        # Run all sections concurrently — failures are isolated, never crash the conversation
+        (
+            _,
+            wm.people,
+            wm.health,
+            wm.emotional,
+            wm.music,
+            wm.moments,
+            wm.calendar,
+            wm.interests,
+        ) = await asyncio.gather(
+            user_then_cross_user(),
+            self._load(db, user_id, "people", self._fetch_people),
+            self._load(db, user_id, "health", self._fetch_health),
+            self._load(db, user_id, "emotional", self._fetch_emotional),
+            self._load(db, user_id, "music", self._fetch_music),
+            self._load(db, user_id, "moments", self._fetch_moments),
+            self._load(db, user_id, "calendar", self._fetch_calendar),
+            self._load(db, user_id, "interests", self._fetch_interests),
+        )
+
+        # Persist snapshot and signal usage counters — off the response path
+        signal_ids = [s["signal_id"] for s in wm.third_party_signals if s.get("signal_id")]
+        for job, arg in ((self._persist, wm), (self._record_signal_usage, signal_ids)):
+            task = asyncio.create_task(asyncio.to_thread(job, db, arg))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
 
-    async def _load_emotional(self, db, wm: WorldModel) -> None:
-        try:
-            from services.emotional_state import get_current_emotional_state
-            state = get_current_emotional_state(wm.user_id)
-            wm.emotional = {"state": state} if state else {}
-        except Exception as exc:
-            logger.warning("WorldModel: emotional load failed: %s", exc)
-
-    async def _load_music(self, wm: WorldModel) -> None:
-        try:
-            from capabilities.music.provider import MusicProvider
-            mp = MusicProvider(wm.user_id)
-            ctx = await mp.get_emotional_context()
-            if ctx:
-                wm.music = ctx.to_dict()
-        except Exception as exc:
-            logger.warning("WorldModel: music load failed: %s", exc)
-
-    async def _load_moments(self, db, wm: WorldModel) -> None:
-        try:
-            import database as dbm
-            wm.moments = dbm.get_moments_for_user(wm.user_id)[:5]
-        except Exception as exc:
-            logger.warning("WorldModel: moments load failed: %s", exc)
-
-    async def _load_calendar(self, db, wm: WorldModel) -> None:
-        try:
-            from datetime import timedelta
-            now = datetime.now(timezone.utc)
-            window_end = (now + timedelta(days=4)).isoformat()
-            result = (
-                db.table("calendar_events")
-                .select("title, start_time, calendar_name")
-                .eq("user_id", wm.user_id)
-                .eq("work_filtered", False)
-                .gte("start_time", now.isoformat())
-                .lte("start_time", window_end)
-                .order("start_time")
-                .limit(8)
-                .execute()
-            )
-            wm.calendar = [
-                {"title": r["title"], "date": r["start_time"][:10]}
-                for r in (result.data or [])
-            ]
-        except Exception as exc:
-            logger.warning("WorldModel: calendar load failed: %s", exc)
+        return wm
 
-    async def _load_interests(self, db, wm: WorldModel) -> None:
+    async def _load(self, db, user_id: str, section: str, fetch: Callable, *args) -> Any:
+        """
+        Serve one section from cache, or run its blocking fetch in a worker
+        thread and cache the result. Failures are logged and yield an empty
+        section (which is not cached).
+        """
+        cached = _section_cache.get(user_id, section)
+        if cached is not _SectionCache._MISS:
+            return cached
         try:
-            from services.interests import get_top_interests
-            wm.interests = get_top_interests(wm.user_id, limit=10)
+            value = await asyncio.to_thread(fetch, db, user_id, *args)
         except Exception as exc:
-            logger.warning("WorldModel: interests load failed: %s", exc)
+            logger.warning("WorldModel: %s load failed for %s: %s", section, user_id, exc)
+            return _SECTION_DEFAULTS[section]()
+        _section_cache.put(user_id, section, value)
+        return value
+
+    # ── Section fetchers (blocking — always called via _load) ─────────────────
+
+    def _fetch_user(self, db, user_id: str) -> dict:
+        result = db.table("users").select("id, name, created_at, phone").eq("id", user_id).execute()
+        return result.data[0] if result.data else {}
+
+    def _fetch_people(self, db, user_id: str) -> list:
+        result = (
+            db.table("people")
+            .select("id, name, relationship_type, closeness_score, last_meaningful_exchange, memories")
+            .eq("user_id", user_id)
+            .order("closeness_score", desc=True)
+            .limit(15)
+            .execute()
+        )
+        now = datetime.now(timezone.utc)
+        people = []
+        for p in (result.data or []):
+            last = p.get("last_meaningful_exchange")
+            days = None
+            if last:
+                try:
+                    last_dt = datetime.fromisoformat(last.replace("Z", "+00:00"))
+                    days = (now - last_dt).days
+                except Exception:
+                    pass
 
-    async def _load_third_party_signals(self, db, wm: WorldModel) -> None:
+            memories = p.get("memories") or []
+            top_memory = memories[0].get("description", "") if memories else ""
+
+            people.append({
+                **p,
+                "days_since_exchange": days,
+                "top_memory": top_memory,
+            })
+        return people
+
+    def _fetch_health(self, db, user_id: str) -> dict:
+        from services.nutrition import get_daily_summary, get_days_logging
+        summary = get_daily_summary(user_id)
+        days = get_days_logging(user_id)
+        habit = db.table("health_daily_summary") \
+                  .select("habit_established") \
+                  .eq("user_id", user_id) \
+                  .order("summary_date", desc=True) \
+                  .limit(1) \
+                  .execute()
+        established = habit.data[0].get("habit_established", False) if habit.data else False
+        return {
+            "today": summary,
+            "days_logging": days,
+            "habit_established": established,
+        }
+
+    def _fetch_emotional(self, db, user_id: str) -> dict:
+        from services.emotional_state import get_current_emotional_state
+        state = get_current_emotional_state(user_id)
+        return {"state": state} if state else {}
+
+    def _fetch_music(self, db, user_id: str) -> dict:
+        # MusicProvider mixes async HTTP with blocking token lookups, so it gets
+        # its own event loop on this worker thread rather than sharing ours.
+        from capabilities.music.provider import MusicProvider
+        ctx = asyncio.run(MusicProvider(user_id).get_emotional_context())
+        return ctx.to_dict() if ctx else {}
+
+    def _fetch_moments(self, db, user_id: str) -> list:
+        import database as dbm
+        return dbm.get_moments_for_user(user_id, limit=5)
+
+    def _fetch_calendar(self, db, user_id: str) -> list:
+        from datetime import timedelta
+        now = datetime.now(timezone.utc)
+        window_end = (now + timedelta(days=4)).isoformat()
+        result = (
+            db.table("calendar_events")
+            .select("title, start_time, calendar_name")
+            .eq("user_id", user_id)
+            .eq("work_filtered", False)
+            .gte("start_time", now.isoformat())
+            .lte("start_time", window_end)
+            .order("start_time")
+            .limit(8)
+            .execute()
+        )
+        return [
+            {"title": r["title"], "date": r["start_time"][:10]}
+            for r in (result.data or [])
+        ]
+
+    def _fetch_interests(self, db, user_id: str) -> list:
+        from services.interests import get_top_interests
+        return get_top_interests(user_id, limit=10)
+
+    def _fetch_third_party_signals(self, db, user_id: str, phone: str) -> list:
         """
         Load signals written BY OTHER USERS about this user.
         These are stored in third_party_signals where about_phone_hash matches
         this user's hashed phone number.
+
+        Two round trips regardless of how many signals or source users match:
+        the signals themselves, then every source user's permission grant.
         """
-        try:
-            # Get this user's phone hash for cross-user matching
-            user_row = wm.user or {}
-            phone = user_row.get("phone", "")
-            if not phone:
-                return
+        # Cross-user matching is by hashed phone number
+        if not phone:
+            return []
 
-            import hashlib
-            phone_hash = hashlib.sha256(phone.encode()).hexdigest()
+        import hashlib
+        phone_hash = hashlib.sha256(phone.encode()).hexdigest()
 
-            from datetime import timedelta
-            now = datetime.now(timezone.utc)
+        now = datetime.now(timezone.utc)
 
-            # Also match by direct person_id link (for users already linked)
-            result = (
-                db.table("third_party_signals")
-                .select(
-                    "signal_type, signal_abstract, signal_valence, signal_intensity, "
-                    "confidence, extracted_at, source_user_id"
-                )
-                .eq("about_phone_hash", phone_hash)
-                .gt("expires_at", now.isoformat())
-                .order("confidence", desc=True)
-                .limit(10)
-                .execute()
+        result = (
+            db.table("third_party_signals")
+            .select(
+                "id, signal_type, signal_abstract, signal_valence, signal_intensity, "
+                "confidence, extracted_at, source_user_id"
             )
-
-            signals = []
-            for row in (result.data or []):
-                # Check permission level from source user
-                perm = await self._get_permission_level(db, row["source_user_id"], phone_hash)
-                if perm < 0:
-                    continue  # source user has revoked all sharing
-
-                # Strip source attribution completely before adding to World Model
-                signals.append({
-                    "signal_type": row["signal_type"],
-                    "signal_abstract": row["signal_abstract"],
-                    "signal_valence": row.get("signal_valence", 0),
-                    "signal_intensity": row.get("signal_intensity", 0.5),
-                    "confidence": row.get("confidence", 0.7),
-                    "days_ago": (now - datetime.fromisoformat(
-                        row["extracted_at"].replace("Z", "+00:00")
-                    )).days,
-                    # source_user_id intentionally omitted — never goes to Claude
-                })
-
-                # Increment used_count
-                try:
-                    db.table("third_party_signals").update({
-                        "used_count": (row.get("used_count") or 0) + 1,
-                        "last_used_at": now.isoformat(),
-                    }).eq("about_phone_hash", phone_hash).execute()
-                except Exception:
-                    pass
-
-            wm.third_party_signals = signals
-
-        except Exception as exc:
-            logger.warning("WorldModel: third-party signals load failed: %s", exc)
-
-    async def _get_permission_level(self, db, source_user_id: str, beneficiary_phone_hash: str) -> int:
+            .eq("about_phone_hash", phone_hash)
+            .gt("expires_at", now.isoformat())
+            .order("confidence", desc=True)
+            .limit(10)
+            .execute()
+        )
+        rows = result.data or []
+        if not rows:
+            return []
+
+        levels = self._get_permission_levels(db, {r["source_user_id"] for r in rows}, phone_hash)
+
+        signals = []
+        for row in rows:
+            if levels.get(row["source_user_id"], 0) < 0:
+                continue  # source user has revoked all sharing
+
+            # Strip source attribution completely before adding to World Model
+            signals.append({
+                "signal_id": row["id"],  # for the usage counter only — never rendered
+                "signal_type": row["signal_type"],
+                "signal_abstract": row["signal_abstract"],
+                "signal_valence": row.get("signal_valence", 0),
+                "signal_intensity": row.get("signal_intensity", 0.5),
+                "confidence": row.get("confidence", 0.7),
+                "days_ago": (now - datetime.fromisoformat(
+                    row["extracted_at"].replace("Z", "+00:00")
+                )).days,
+                # source_user_id intentionally omitted — never goes to Claude
+            })
+
+        return signals
+
+    def _get_permission_levels(self, db, source_user_ids: set, beneficiary_phone_hash: str) -> dict:
         """
-        Check the permission level a source user has granted for a beneficiary.
-        Returns the level (0-3) or -1 if revoked/none.
-        Default is 0 (silent use) if no explicit record exists.
+        Resolve the permission level every source user has granted for a
+        beneficiary, in one query. Maps source_user_id → level (0-3), or -1
+        if revoked. Source users with no explicit record are absent — callers
+        default them to 0 (silent use).
         """
+        if not source_user_ids:
+            return {}
         try:
             result = (
                 db.table("cross_user_permissions")
-                .select("permission_level, revoked_at")
-                .eq("granting_user_id", source_user_id)
+                .select("granting_user_id, permission_level, revoked_at")
+                .in_("granting_user_id", sorted(source_user_ids))
                 .eq("beneficiary_phone_hash", beneficiary_phone_hash)
-                .limit(1)
                 .execute()
             )
-            if result.data:
-                row = result.data[0]
-                if row.get("revoked_at"):
-                    return -1  # revoked
-                return row.get("permission_level", 0)
-            return 0  # no explicit record — default silent use
         except Exception:
-            return 0
-
-    async def _load_prior_perspectives(self, db, wm: WorldModel) -> None:
+            return {}
+        levels: dict[str, int] = {}
+        for row in (result.data or []):
+            uid = row["granting_user_id"]
+            if uid in levels:
+                continue  # first record wins, matching the old per-user limit(1)
+            levels[uid] = -1 if row.get("revoked_at") else row.get("permission_level", 0)
+        return levels
+
+    def _record_signal_usage(self, db, signal_ids: list[str]) -> None:
         """
-        Check how many OTHER Genie users have this user in their people graph.
-        Used for onboarding context: if > 0, Genie 'already knows' this person.
+        Bump used_count / last_used_at for the injected signals with a single
+        RPC (schema_migration_v10.sql). Runs in the background, never raises.
         """
+        if not signal_ids:
+            return
         try:
-            user_row = wm.user or {}
-            phone = user_row.get("phone", "")
-            if not phone:
-                return
-
-            import hashlib
-            phone_hash = hashlib.sha256(phone.encode()).hexdigest()
-
-            # Count distinct source users who have signals about this person
-            result = (
-                db.table("third_party_signals")
-                .select("source_user_id, signal_type, signal_valence")
-                .eq("about_phone_hash", phone_hash)
-                .execute()
-            )
-
-            if not result.data:
-                return
-
-            source_users = {r["source_user_id"] for r in result.data}
-            perspective_count = len(source_users)
-
-            if perspective_count == 0:
-                return
-
-            # Aggregate closeness from people table (across all source users)
-            closeness_scores = []
-            known_entities: set[str] = set()
-
-            for src_uid in source_users:
-                people_result = (
-                    db.table("people")
-                    .select("closeness_score, memories, name")
-                    .eq("user_id", src_uid)
-                    .eq("phone_hash", phone_hash)
-                    .limit(1)
-                    .execute()
-                )
-                if people_result.data:
-                    p = people_result.data[0]
-                    if p.get("closeness_score"):
-                        closeness_scores.append(p["closeness_score"])
-                    # Extract entity names from memories (no verbatim content)
-                    for mem in (p.get("memories") or [])[:3]:
-                        desc = mem.get("description", "")
-                        # Extract proper nouns as known entities (crude but safe)
-                        for word in desc.split():
-                            if word and word[0].isupper() and len(word) > 2 and word.isalpha():
-                                known_entities.add(word)
-
-            avg_closeness = sum(closeness_scores) / len(closeness_scores) if closeness_scores else 0.5
-
-            wm.prior_perspectives = {
-                "perspective_count": perspective_count,
-                "aggregate_closeness": avg_closeness,
-                "known_entities": list(known_entities)[:10],
-            }
-
+            db.rpc("increment_signal_usage", {
+                "signal_ids": signal_ids,
+                "used_at": datetime.now(timezone.utc).isoformat(),
+            }).execute()
         except Exception as exc:
-            logger.warning("WorldModel: prior perspectives load failed: %s", exc)
+            logger.warning("WorldModel: signal usage update failed: %s", exc)
 
-    async def _persist(self, db, wm: WorldModel) -> None:
-        """Save World Model snapshot for audit/debugging. Non-blocking."""
+    def _fetch_prior_perspectives(self, db, user_id: str, phone: str) -> dict:
+        """
+        Check how many OTHER Genie users have this user in their people graph.
+        Used for onboarding context: if > 0, Genie 'already knows' this person.
+        """
+        if not phone:
+            return {}
+
+        import hashlib
+        phone_hash = hashlib.sha256(phone.encode()).hexdigest()
+
+        # Count distinct source users who have signals about this person
+        result = (
+            db.table("third_party_signals")
+            .select("source_user_id, signal_type, signal_valence")
+            .eq("about_phone_hash", phone_hash)
+            .execute()
+        )
+
+        if not result.data:
+            return {}
+
+        source_users = {r["source_user_id"] for r in result.data}
+        perspective_count = len(source_users)
+
+        if perspective_count == 0:
+            return {}
+
+        # Every source user's person row for this phone, in one query
+        people_result = (
+            db.table("people")
+            .select("user_id, closeness_score, memories, name")
+            .in_("user_id", sorted(source_users))
+            .eq("phone_hash", phone_hash)
+            .execute()
+        )
+        by_source: dict[str, dict] = {}
+        for p in (people_result.data or []):
+            by_source.setdefault(p["user_id"], p)
+
+        # Aggregate closeness from people table (across all source users)
+        closeness_scores = []
+        known_entities: set[str] = set()
+
+        for p in by_source.values():
+            if p.get("closeness_score"):
+                closeness_scores.append(p["closeness_score"])
+            # Extract entity names from memories (no verbatim content)
+            for mem in (p.get("memories") or [])[:3]:
+                desc = mem.get("description", "")
+                # Extract proper nouns as known entities (crude but safe)
+                for word in desc.split():
+                    if word and word[0].isupper() and len(word) > 2 and word.isalpha():
+                        known_entities.add(word)
+
+        avg_closeness = sum(closeness_scores) / len(closeness_scores) if closeness_scores else 0.5
+
+        return {
+            "perspective_count": perspective_count,
+            "aggregate_closeness": avg_closeness,
+            "known_entities": list(known_entities)[:10],
+        }
+
+    def _persist(self, db, wm: WorldModel) -> None:
+        """Save World Model snapshot for audit/debugging. Runs in the background."""
         try:
             import json
             db.table("world_model").upsert({
@@ -3,18 +3,123 @@ database.py — All Supabase operations in one place.
 Every function that touches the database lives here.
 The rest of the app calls these functions — never calls Supabase directly.
 """
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from config import get_settings
+from datetime import datetime, timezone
 from typing import Optional
+import base64
+import itertools
+import json
+import logging
+import threading
+import time
 import uuid
 from policy_engine import guard
+from core import person_index
+from core.world_model import invalidate_world_model
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# ── Supabase client (one instance, reused everywhere) ─────────────────────────
+# ── Supabase client pool (long-lived, reused everywhere) ──────────────────────
+# Each pooled client keeps its own keep-alive HTTP/2 connection to PostgREST,
+# so a query no longer pays client construction plus a fresh TLS handshake.
+# Slots are filled lazily and handed out round-robin.
+_pool: dict[int, tuple[Client, float]] = {}     # slot → (client, created_at)
+_pool_lock = threading.Lock()
+_pool_cursor = itertools.count()
+# Replaced clients, closed once any request still using them has timed out
+_retired: list[tuple[Client, float]] = []       # (client, retired_at)
+# Clients handed to long-lived holders; outside the pool, closed only by close_db()
+_dedicated: list[Client] = []
+
+
+def _new_client() -> Client:
+    """Build a Supabase client with the configured PostgREST timeout."""
+    options = ClientOptions(postgrest_client_timeout=settings.supabase_timeout_seconds)
+    return create_client(settings.supabase_url, settings.supabase_key, options=options)
+
+
 def get_db() -> Client:
-    """Return the Supabase client. Called at the top of each request handler."""
-    return create_client(settings.supabase_url, settings.supabase_key)
+    """
+    Return a pooled Supabase client. Called at the top of each request handler.
+    Clients older than supabase_client_max_age_seconds are replaced so stale
+    connections and DNS changes are picked up without a restart.
+    """
+    slot = next(_pool_cursor) % max(settings.supabase_pool_size, 1)
+    now = time.monotonic()
+    with _pool_lock:
+        entry = _pool.get(slot)
+        if entry is None or now - entry[1] > settings.supabase_client_max_age_seconds:
+            if entry is not None:
+                _retired.append((entry[0], now))
+            entry = (_new_client(), now)
+            _pool[slot] = entry
+        expired = _take_expired_retired(now)
+    _close_clients(expired)
+    return entry[0]
+
+
+def dedicated_client() -> Client:
+    """
+    A Supabase client the pool never recycles, for objects that keep one for
+    the life of the server (the Policy Engine and its audit writer). Pooled
+    clients are closed after they are replaced, so holding one breaks every
+    later request through it.
+    """
+    client = _new_client()
+    with _pool_lock:
+        _dedicated.append(client)
+    return client
+
+
+def _take_expired_retired(now: float) -> list[Client]:
+    """Pop retired clients past the request timeout. Call with _pool_lock held."""
+    grace = settings.supabase_timeout_seconds
+    expired = [client for client, retired_at in _retired if now - retired_at > grace]
+    if expired:
+        _retired[:] = [(c, t) for c, t in _retired if now - t <= grace]
+    return expired
+
+
+def _close_clients(clients) -> None:
+    """Close clients' HTTP connection pools, ignoring errors."""
+    for client in clients:
+        try:
+            client.postgrest.aclose()
+        except Exception:
+            pass
+
+
+def check_db_health() -> bool:
+    """
+    Ping PostgREST through every pooled client.
+    A client whose ping fails is dropped so the next get_db() reconnects.
+    """
+    with _pool_lock:
+        entries = list(_pool.items())
+    healthy = True
+    for slot, (client, _) in entries:
+        try:
+            client.table("users").select("id").limit(1).execute()
+        except Exception as e:
+            logger.warning(f"Supabase client {slot} failed health check, reconnecting: {e}")
+            healthy = False
+            with _pool_lock:
+                if _pool.get(slot, (None,))[0] is client:
+                    del _pool[slot]
+                    _retired.append((client, time.monotonic()))
+    return healthy
+
+
+def close_db() -> None:
+    """Close every pooled connection. Called once on server shutdown."""
+    with _pool_lock:
+        clients = [client for client, _ in _pool.values()] + [client for client, _ in _retired] + _dedicated
+        _pool.clear()
+        _retired.clear()
+        _dedicated.clear()
+    _close_clients(clients)
 
 
 # ── Users ─────────────────────────────────────────────────────────────────────
@@ -53,6 +158,7 @@ def update_user_google(user_id: str, google_id: str, access_token: str, refresh_
         "google_access_token": access_token,
         "google_refresh_token": refresh_token,
     }).eq("id", user_id).execute()
+    invalidate_world_model(user_id, "users")
     return result.data[0]
 
 
@@ -79,28 +185,86 @@ def get_person_by_id(person_id: str) -> Optional[dict]:
 def upsert_person(user_id: str, person_data: dict) -> dict:
     """
     Create or update a person in the graph.
-    If a person with the same name already exists for this user, update them.
-    Otherwise create a new record.
+    If a person with the same name (case, accents and spacing aside) already
+    exists for this user, update them. Otherwise create a new record.
+    Updates are matched in the cached PersonIndex (which this write keeps
+    current) without a round trip; only a miss is re-checked in the table,
+    in case another worker added the person since the index was loaded.
     """
     db = get_db()
-    # Check if person already exists by name for this user
-    existing = (db.table("people")
-                .select("id")
-                .eq("owner_user_id", user_id)
-                .eq("name", person_data.get("name", ""))
-                .execute())
-
-    if existing.data:
+    name = person_data.get("name", "")
+    existing = person_index.get_index(user_id).by_name(name)
+    if existing is None:
+        found = (db.table("people")
+                 .select("id")
+                 .eq("owner_user_id", user_id)
+                 .eq("name", name)
+                 .execute())
+        existing = found.data[0] if found.data else None
+
+    if existing:
         # Update existing person
-        person_id = existing.data[0]["id"]
+        person_id = existing["id"]
         result = db.table("people").update(person_data).eq("id", person_id).execute()
-        return result.data[0]
     else:
         # Create new person
         person_data["id"] = str(uuid.uuid4())
         person_data["owner_user_id"] = user_id
         result = db.table("people").insert(person_data).execute()
-        return result.data[0]
+    invalidate_world_model(user_id, "people")
+    person_index.index_person(user_id, result.data[0])
+    return result.data[0]
+
+
+def upsert_people_bulk(user_id: str, rows: list[dict]) -> list[dict]:
+    """
+    Create or update many people in one request, keyed on (owner_user_id, name)
+    with a native ON CONFLICT upsert (unique index from schema_migration_v10c).
+
+    A row whose name matches an existing person in the PersonIndex (case,
+    accents and spacing aside) takes that person's stored name so it hits
+    the conflict key. Repeated names collapse to the last row. Rows with
+    different column sets go in separate requests, so a column missing from
+    one row is never written as NULL over an existing value.
+
+    Returns the saved rows (with ids) in the order of `rows`; a repeated
+    name maps to the same saved row. If the upsert is rejected (e.g. the
+    unique index is missing), falls back to upsert_person per row.
+    """
+    if not rows:
+        return []
+    index = person_index.get_index(user_id)
+    keyed: dict[str, dict] = {}
+    order: list[str] = []
+    for row in rows:
+        existing = index.by_name(row.get("name", ""))
+        name = existing["name"] if existing else row.get("name", "")
+        order.append(name)
+        keyed[name] = {**keyed.get(name, {}), **row, "name": name, "owner_user_id": user_id}
+
+    groups: dict[tuple, list[dict]] = {}
+    for row in keyed.values():
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    db = get_db()
+    saved: dict[str, dict] = {}
+    try:
+        for group in groups.values():
+            result = (db.table("people")
+                      .upsert(group, on_conflict="owner_user_id,name")
+                      .execute())
+            saved.update((r["name"], r) for r in result.data or [])
+    except Exception as e:
+        logger.warning(f"Bulk people upsert failed for {user_id}, falling back to row by row: {e}")
+        for name, row in keyed.items():
+            if name not in saved:
+                saved[name] = upsert_person(user_id, {k: v for k, v in row.items() if k != "owner_user_id"})
+        return [saved[name] for name in order]
+
+    invalidate_world_model(user_id, "people")
+    for row in saved.values():
+        person_index.index_person(user_id, row)
+    return [saved[name] for name in order]
 
 
 def mark_relationship_bilateral(owner_user_id: str, subject_user_id: str) -> None:
@@ -120,10 +284,36 @@ def mark_relationship_bilateral(owner_user_id: str, subject_user_id: str) -> Non
      .eq("owner_user_id", owner_user_id)
      .eq("phone", subject.get("phone", ""))
      .execute())
+    invalidate_world_model(owner_user_id, "people")
+    person_index.invalidate(owner_user_id)
 
 
 # ── Moments ───────────────────────────────────────────────────────────────────
 
+# Feed order, stored on each moment as priority_rank when it is saved:
+#   0 life_event (birthday / anniversary) — highest
+#   1 drift_detection — relationship going quiet
+#   2 message_analysis — urgent signal from messages
+#   3 voice_note, 4 google_ingestion — general suggestions
+#   5 anything else; 99 moments about a deceased person (safety net, last)
+MOMENT_PRIORITY = {
+    "life_event": 0,
+    "drift_detection": 1,
+    "message_analysis": 2,
+    "voice_note": 3,
+    "google_ingestion": 4,
+}
+MOMENT_PRIORITY_DEFAULT = 5
+MOMENT_PRIORITY_DECEASED = 99
+
+
+def moment_priority(triggered_by: str, person_is_deceased: bool = False) -> int:
+    """priority_rank for a new moment — lower surfaces first."""
+    if person_is_deceased:
+        return MOMENT_PRIORITY_DECEASED
+    return MOMENT_PRIORITY.get(triggered_by, MOMENT_PRIORITY_DEFAULT)
+
+
 def create_moment(user_id: str, person_id: str, suggestion: str, triggered_by: str) -> dict:
     """Save a new moment suggestion to the database."""
     # Check deceased person and emotional sensitivity before surfacing a moment
@@ -144,54 +334,140 @@ def create_moment(user_id: str, person_id: str, suggestion: str, triggered_by: s
         "person_id": person_id,
         "suggestion": suggestion,
         "triggered_by": triggered_by,
+        "priority_rank": moment_priority(triggered_by, person_is_deceased),
         "status": "pending",
     }).execute()
+    invalidate_world_model(user_id, "moments")
     return result.data[0]
 
 
-def get_moments_for_user(user_id: str) -> list:
+def create_moments_bulk(user_id: str, moments: list[dict], user: Optional[dict] = None) -> list[dict]:
     """
-    Get all pending moments for a user, ranked by priority.
+    Save many moment suggestions with one insert. Each item needs person_id,
+    suggestion and triggered_by. The same policy check as create_moment runs
+    per moment, from one user lookup and one people lookup; blocked moments
+    are skipped (and logged) rather than failing the batch. Callers saving
+    several batches can pass the user row to skip its lookup.
+    """
+    if not moments:
+        return []
+    if user is None:
+        user = get_user_by_id(user_id)
+    return _insert_moments({user_id: moments}, {user_id: user})
 
-    Priority order:
-      1. life_event (birthday / anniversary) — highest
-      2. drift_detection — relationship going quiet
-      3. message_analysis — urgent signal from messages
-      4. google_ingestion / voice_note — general suggestions
 
-    Within each tier, most recent first.
+def create_moments_for_users(moments: list[dict]) -> list[dict]:
+    """
+    create_moments_bulk across many users: each item also carries
+    owner_user_id. One users lookup, one people lookup and one insert for
+    the lot, however many users the moments belong to.
     """
+    if not moments:
+        return []
+    by_user: dict[str, list[dict]] = {}
+    for moment in moments:
+        by_user.setdefault(moment["owner_user_id"], []).append(moment)
+    result = (get_db().table("users").select("id, consecutive_dismissals")
+              .in_("id", list(by_user)).execute())
+    users = {u["id"]: u for u in result.data or []}
+    return _insert_moments(by_user, users)
+
+
+def _insert_moments(by_user: dict[str, list[dict]], users: dict[str, Optional[dict]]) -> list[dict]:
+    """Policy-check and insert moments grouped by owner; shared by the bulk creators."""
     db = get_db()
-    result = (db.table("moments")
-              .select("*, people(name, status)")
-              .eq("owner_user_id", user_id)
-              .eq("status", "pending")
-              .order("created_at", desc=True)
-              .execute())
+    person_ids = list({m["person_id"] for ms in by_user.values() for m in ms if m.get("person_id")})
+    statuses = {}
+    if person_ids:
+        result = db.table("people").select("id, status").in_("id", person_ids).execute()
+        statuses = {p["id"]: p.get("status") for p in result.data or []}
+
+    rows = []
+    for user_id, moments in by_user.items():
+        user = users.get(user_id)
+        for moment in moments:
+            person_is_deceased = statuses.get(moment.get("person_id")) == "deceased"
+            try:
+                guard.check("send_evening_digest", {
+                    "user_id": user_id,
+                    "person_is_deceased": person_is_deceased,
+                    "suggestion_type": "reach_out" if not person_is_deceased else "memorial_acknowledgement",
+                    "consecutive_dismissals": (user.get("consecutive_dismissals") or 0) if user else 0,
+                    "proactive_suggestion_count": 0,
+                })
+            except guard.PolicyViolationError as e:
+                logger.info(f"Moment for person {moment.get('person_id')} blocked by policy: {e}")
+                continue
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "owner_user_id": user_id,
+                "person_id": moment.get("person_id"),
+                "suggestion": moment["suggestion"],
+                "triggered_by": moment["triggered_by"],
+                "priority_rank": moment_priority(moment["triggered_by"], person_is_deceased),
+                "status": "pending",
+            })
+    if not rows:
+        return []
+    result = db.table("moments").insert(rows).execute()
+    for user_id in {r["owner_user_id"] for r in rows}:
+        invalidate_world_model(user_id, "moments")
+    return result.data
 
-    PRIORITY = {
-        "life_event": 0,
-        "drift_detection": 1,
-        "message_analysis": 2,
-        "voice_note": 3,
-        "google_ingestion": 4,
-    }
 
-    def _rank(moment: dict) -> tuple:
-        # Skip moments about deceased people — safety net
-        person = moment.get("people") or {}
-        if isinstance(person, dict) and person.get("status") == "deceased":
-            return (99, 0)
-        trigger = moment.get("triggered_by", "google_ingestion")
-        return (PRIORITY.get(trigger, 5), 0)
+def get_moments_for_user(user_id: str, limit: Optional[int] = None, after: Optional[str] = None) -> list:
+    """
+    Get a user's pending moments, ranked by priority (see MOMENT_PRIORITY),
+    most recent first within each tier.
 
-    return sorted(result.data, key=_rank)
+    The ranking is done by the database on the stored priority_rank
+    (idx_moments_feed, schema_migration_v10i), so limit=N reads N rows
+    however many moments have piled up. For the next page pass
+    after=moment_cursor(last moment of this page).
+    """
+    db = get_db()
+    query = (db.table("moments")
+             .select("*, people(name, status)")
+             .eq("owner_user_id", user_id)
+             .eq("status", "pending"))
+    if after:
+        rank, created_at, moment_id = _decode_moment_cursor(after)
+        query = query.or_(
+            f"priority_rank.gt.{rank},"
+            f"and(priority_rank.eq.{rank},created_at.lt.\"{created_at}\"),"
+            f"and(priority_rank.eq.{rank},created_at.eq.\"{created_at}\",id.lt.{moment_id})"
+        )
+    query = (query.order("priority_rank")
+             .order("created_at", desc=True)
+             .order("id", desc=True))
+    if limit is not None:
+        query = query.limit(limit)
+    return query.execute().data
+
+
+def moment_cursor(moment: dict) -> str:
+    """Opaque keyset cursor for the feed page after this moment."""
+    key = [moment.get("priority_rank", MOMENT_PRIORITY_DEFAULT), moment["created_at"], moment["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _decode_moment_cursor(cursor: str) -> tuple[int, str, str]:
+    """Inverse of moment_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        rank, created_at, moment_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        # Re-serialised from a parsed datetime, so only a timestamp reaches the or_() filter
+        created_at = datetime.fromisoformat(str(created_at).replace("Z", "+00:00")).isoformat()
+        return int(rank), created_at, str(uuid.UUID(str(moment_id)))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid moments cursor: {cursor!r}") from e
 
 
 def update_moment_status(moment_id: str, status: str) -> None:
     """Mark a moment as done, dismissed, etc."""
     db = get_db()
-    db.table("moments").update({"status": status}).eq("id", moment_id).execute()
+    result = db.table("moments").update({"status": status}).eq("id", moment_id).execute()
+    for row in result.data or []:
+        invalidate_world_model(row.get("owner_user_id"), "moments")
 
 
 # ── Messages ──────────────────────────────────────────────────────────────────
@@ -233,12 +509,71 @@ def get_unprocessed_messages(user_id: str, limit: int = 50) -> list:
     return result.data
 
 
+def get_unprocessed_messages_after(user_id: str, after: Optional[tuple] = None, limit: int = 200) -> list:
+    """
+    One page of unprocessed messages, oldest first, keyset-paginated on
+    (timestamp, id). Pass the (timestamp, id) of the last row of the
+    previous page as after; rows left unprocessed behind it are not re-read.
+    """
+    db = get_db()
+    query = (db.table("messages")
+             .select("*, people!messages_from_person_id_fkey(name)")
+             .eq("owner_user_id", user_id)
+             .eq("processed", False))
+    if after is not None:
+        timestamp, message_id = after
+        if timestamp is None:
+            # NULL timestamps sort last; only ids break the tie among them
+            query = query.is_("timestamp", "null").gt("id", message_id)
+        else:
+            query = query.or_(
+                f'timestamp.gt."{timestamp}",and(timestamp.eq."{timestamp}",id.gt.{message_id})'
+            )
+    result = (query
+              .order("timestamp")
+              .order("id")
+              .limit(limit)
+              .execute())
+    return result.data
+
+
+def count_unprocessed_messages(user_id: str) -> int:
+    """How many of a user's messages are still waiting for analysis (backlog depth)."""
+    db = get_db()
+    result = (db.table("messages")
+              .select("id", count="exact", head=True)
+              .eq("owner_user_id", user_id)
+              .eq("processed", False)
+              .execute())
+    return result.count or 0
+
+
+def get_message_bodies(user_id: str, message_ids: list) -> dict:
+    """id → body for a user's stored messages; ids that were deleted are absent."""
+    db = get_db()
+    result = (db.table("messages")
+              .select("id, body")
+              .eq("owner_user_id", user_id)
+              .in_("id", message_ids)
+              .execute())
+    return {r["id"]: r.get("body") or "" for r in result.data or []}
+
+
 def mark_messages_processed(message_ids: list) -> None:
     """Mark a batch of messages as processed after Claude analysis."""
     db = get_db()
     db.table("messages").update({"processed": True}).in_("id", message_ids).execute()
 
 
+def mark_messages_stage_done(message_ids: list, stage: str) -> None:
+    """
+    Record that one analysis stage has run on these messages, for a batch
+    left unprocessed because another stage failed (schema_migration_v10l).
+    """
+    db = get_db()
+    db.rpc("mark_messages_stage_done", {"p_ids": message_ids, "p_stage": stage}).execute()
+
+
 # ── Invites ───────────────────────────────────────────────────────────────────
 
 def create_invite(inviter_user_id: str, invitee_phone: str, invitee_name: str,
@@ -327,6 +662,7 @@ def revoke_all_consent(phone: str) -> None:
         "google_refresh_token": None,
         "whatsapp_consented": False,
     }).eq("id", user_id).execute()
+    invalidate_world_model(user_id)
 
 
 # ── Call Notes ────────────────────────────────────────────────────────────────
@@ -354,3 +690,108 @@ def save_call_note(user_id: str, person_id: str, audio_url: str,
         "extracted_memories": extracted.get("memories", []),
     }).execute()
     return result.data[0]
+
+
+# ── Google sync ───────────────────────────────────────────────────────────────
+# Cursors and synced data behind the incremental Gmail / Contacts sync in
+# services/google_ingestion.py (tables from schema_migration_v10d).
+
+_GOOGLE_CONTACTS_PAGE = 1000    # PostgREST's default max rows per response
+
+def get_google_sync_state(user_id: str) -> dict:
+    """The user's Gmail historyId and Contacts syncToken — {} before the first sync."""
+    db = get_db()
+    result = db.table("google_sync_state").select("*").eq("user_id", user_id).execute()
+    return result.data[0] if result.data else {}
+
+
+def save_google_sync_state(user_id: str, **cursors) -> None:
+    """
+    Store sync cursors (gmail_history_id, contacts_sync_token). Cursors not
+    passed keep their stored value; passing None forces a full read next time.
+    """
+    db = get_db()
+    db.table("google_sync_state").upsert(
+        {"user_id": user_id, **cursors, "updated_at": datetime.now(timezone.utc).isoformat()},
+        on_conflict="user_id",
+    ).execute()
+
+
+def get_google_contacts(user_id: str, emails: Optional[list] = None) -> list:
+    """
+    Synced Google Contacts; with `emails`, only those sharing one of them.
+    Read in resource_name order, one request per _GOOGLE_CONTACTS_PAGE rows.
+    """
+    if emails is not None and not emails:
+        return []
+    db = get_db()
+    rows, offset = [], 0
+    while True:
+        query = (db.table("google_contacts")
+                 .select("resource_name, name, emails, phones, birthday")
+                 .eq("owner_user_id", user_id))
+        if emails is not None:
+            query = query.ov("emails", sorted(emails))
+        page = (query.order("resource_name")
+                .range(offset, offset + _GOOGLE_CONTACTS_PAGE - 1)
+                .execute().data) or []
+        rows += page
+        if len(page) < _GOOGLE_CONTACTS_PAGE:
+            return rows
+        offset += _GOOGLE_CONTACTS_PAGE
+
+
+def upsert_google_contacts(user_id: str, contacts: list[dict]) -> None:
+    """Create or replace synced contacts, keyed on (owner_user_id, resource_name)."""
+    if not contacts:
+        return
+    db = get_db()
+    db.table("google_contacts").upsert(
+        [{**c, "owner_user_id": user_id} for c in contacts],
+        on_conflict="owner_user_id,resource_name",
+    ).execute()
+
+
+def delete_google_contacts(user_id: str, resource_names: Optional[list] = None) -> None:
+    """Delete the given synced contacts, or all of the user's when None."""
+    if resource_names is not None and not resource_names:
+        return
+    db = get_db()
+    query = db.table("google_contacts").delete().eq("owner_user_id", user_id)
+    if resource_names is not None:
+        query = query.in_("resource_name", resource_names)
+    query.execute()
+
+
+def get_gmail_contact_stats(user_id: str, emails: Optional[list] = None,
+                            limit: Optional[int] = None) -> list:
+    """Sent-mail aggregates per recipient, most emailed first."""
+    if emails is not None and not emails:
+        return []
+    db = get_db()
+    query = (db.table("gmail_contact_stats")
+             .select("email, email_count, recent_subjects")
+             .eq("owner_user_id", user_id))
+    if emails is not None:
+        query = query.in_("email", sorted(emails))
+    query = query.order("email_count", desc=True)
+    if limit:
+        query = query.limit(limit)
+    return query.execute().data or []
+
+
+def upsert_gmail_contact_stats(user_id: str, rows: list[dict]) -> None:
+    """Write recipient aggregates (email, email_count, recent_subjects) in one request."""
+    if not rows:
+        return
+    db = get_db()
+    db.table("gmail_contact_stats").upsert(
+        [{**r, "owner_user_id": user_id} for r in rows],
+        on_conflict="owner_user_id,email",
+    ).execute()
+
+
+def delete_gmail_contact_stats(user_id: str) -> None:
+    """Drop all of the user's recipient aggregates, before a full Gmail re-read."""
+    db = get_db()
+    db.table("gmail_contact_stats").delete().eq("owner_user_id", user_id).execute()
@@ -5,8 +5,9 @@ Registers all routers and starts the scheduler for:
 - 30-minute message batch processing
 - 7pm evening digest
 """
+import asyncio
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -22,10 +23,11 @@ from config import get_settings
 import database as db
 from services.whatsapp import send_evening_digest
 from services.intelligence import generate_evening_digest
-import anthropic
-from supabase import create_client
 from policy_engine.engine import PolicyEngine
+from policy_engine.audit import AuditLogWriter
 from policy_engine import guard
+from services.job_runner import run_for_users, job_stats
+from services import ingestion_bus, job_queue, llm_gateway, message_batch, signal_extractor
 
 logging.basicConfig(
     level=logging.INFO,
@@ -93,55 +95,20 @@ scheduler = AsyncIOScheduler()
 
 async def run_message_batch_for_all_users():
     """
-    Every 30 minutes: process unread messages for all users.
-    Gets unprocessed WhatsApp messages → Claude analysis → People Graph updates
-    → emotional state inference → group chat profiles.
+    Every 30 minutes: drain each user's unprocessed messages.
+    Unprocessed WhatsApp messages → Claude analysis → People Graph updates,
+    emotional state inference, group chat profiles and signal queueing,
+    batch by batch until the backlog is empty (services/message_batch.py).
+    Users are processed concurrently via the shared job runner.
     """
     try:
         result = db.get_db().table("users").select("id").eq("whatsapp_consented", True).execute()
         users = result.data
 
-        for user in users:
-            user_id = user["id"]
-            unprocessed = db.get_unprocessed_messages(user_id, limit=50)
-            if not unprocessed:
-                continue
-
-            from services.intelligence import analyze_messages
-            from services.emotional_state import infer_from_messages
-            from services.group_chat import analyze_group_messages
-            from services.signal_extractor import extract_signals_from_message
-            import asyncio
-
-            # 1. Relationship intelligence — update People Graph
-            analyze_messages(user_id, unprocessed)
-
-            # 2. Emotional state — infer user's current mood
-            infer_from_messages(user_id, unprocessed)
-
-            # 3. Group chat profiles — update group dynamics
-            analyze_group_messages(user_id, unprocessed)
-
-            # 4. Third-party signal extraction — mine mentions of people not in this chat
-            user_row = db.get_user_by_id(user_id)
-            user_name = user_row.get("name", "") if user_row else ""
-            for msg in unprocessed:
-                text = msg.get("body") or msg.get("text") or ""
-                sender = msg.get("sender_name", user_name)
-                if text and len(text) > 30:
-                    try:
-                        asyncio.create_task(
-                            extract_signals_from_message(
-                                source_user_id=user_id,
-                                message_text=text,
-                                participants=[user_name, sender],
-                            )
-                        )
-                    except Exception:
-                        pass
-
-            db.mark_messages_processed([m["id"] for m in unprocessed])
-            logger.info(f"Batch processed {len(unprocessed)} messages for user {user_id}")
+        run = await run_for_users("message_batch", users, lambda u: message_batch.process_backlog(u["id"]))
+        if run is not None:
+            summary = message_batch.record_run([r for _, r in run.results], run.duration_seconds)
+            logger.info(f"Message batch: {summary}")
 
     except Exception as e:
         logger.error(f"Message batch error: {e}")
@@ -149,73 +116,16 @@ async def run_message_batch_for_all_users():
 
 async def _run_drift_detection():
     """
-    Daily at 2am UTC: find relationships that have gone quiet.
-    Creates a moment for the closest person the user hasn't connected with in 21+ days.
-    Respects the policy engine — won't fire for deceased persons or during crisis.
+    Daily at 2:15am UTC: find relationships that have gone quiet.
+    One ranked query picks each user's closest person they haven't connected
+    with past the drift threshold (services/drift_detection.py); drift moments
+    are then saved in one insert. Deceased persons are never returned.
     """
     try:
-        from datetime import datetime, timezone, timedelta
-        result = db.get_db().table("users").select("id, phone").execute()
-        users = result.data
-        cutoff = datetime.now(timezone.utc) - timedelta(days=21)
-
-        for user in users:
-            user_id = user["id"]
-            phone = user.get("phone", "")
-            if not phone:
-                continue
-
-            people = db.get_people_for_user(user_id)
-            # Find the highest-closeness person who's gone quiet
-            drifted = None
-            for person in people:
-                # Skip deceased
-                if person.get("status") == "deceased":
-                    continue
-                last = person.get("last_meaningful_exchange")
-                if not last:
-                    continue
-                last_dt = datetime.fromisoformat(last.replace("Z", "+00:00"))
-                if last_dt < cutoff:
-                    drifted = person
-                    break  # already sorted by closeness desc
-
-            if drifted:
-                name = drifted.get("name", "someone close to you")
-                days_silent = (datetime.now(timezone.utc) - datetime.fromisoformat(
-                    drifted["last_meaningful_exchange"].replace("Z", "+00:00")
-                )).days
-                # Don't create duplicate drift moments within 14 days
-                supabase = db.get_db()
-                recent_cutoff = (datetime.now(timezone.utc) - timedelta(days=14)).isoformat()
-                existing = (
-                    supabase.table("moments")
-                    .select("id")
-                    .eq("owner_user_id", user_id)
-                    .eq("person_id", drifted["id"])
-                    .eq("triggered_by", "drift_detection")
-                    .gte("created_at", recent_cutoff)
-                    .execute()
-                )
-                if not existing.data:
-                    # Try to open a proactive Genie conversation first
-                    from services.genie_conversations import start_conversation, should_initiate
-                    started = False
-                    if phone and should_initiate(user_id, drifted["id"]):
-                        conv_id = start_conversation(user_id, drifted["id"], "drift_check", phone)
-                        started = bool(conv_id)
-
-                    # Fall back to a moment in the digest if no conversation was started
-                    if not started:
-                        db.create_moment(
-                            user_id=user_id,
-                            person_id=drifted["id"],
-                            suggestion=f"It's been {days_silent} days since you and {name} last connected. "
-                                       f"A message today — even just checking in — would mean more than you think.",
-                            triggered_by="drift_detection",
-                        )
-                    logger.info(f"Drift handled for {name} ({days_silent}d) — user {user_id} — conversation={started}")
+        from services.drift_detection import run_drift_detection_for_all_users
 
+        result = await run_drift_detection_for_all_users()
+        logger.info(f"Drift detection: {result}")
     except Exception as e:
         logger.error(f"Drift detection error: {e}")
 
@@ -228,48 +138,52 @@ async def _run_life_events_check():
     """
     try:
         from services.life_events import run_life_events_check_for_all_users
-        from services.whatsapp import send_message
 
         result = db.get_db().table("users").select("id, phone, name").execute()
-        users = result.data
-        total_moments = run_life_events_check_for_all_users()
+        users = [u for u in result.data if u.get("phone")]
+        total_moments = await run_life_events_check_for_all_users()
 
         # Send urgent moments immediately (don't wait for evening digest)
-        from services.genie_conversations import start_conversation, should_initiate
-        from routers.messages import set_last_moment
-        for user in users:
-            user_id = user["id"]
-            phone = user.get("phone", "")
-            if not phone:
-                continue
-            pending = db.get_moments_for_user(user_id)
-            urgent = [m for m in pending if m.get("triggered_by") == "life_event"]
-            for moment in urgent[:1]:  # max one urgent push per day
-                suggestion = moment.get("suggestion", "")
-                person_data = moment.get("people") or {}
-                pname = person_data.get("name", "") if isinstance(person_data, dict) else ""
-                person_id = moment.get("person_id")
-                moment_id = moment.get("id")
-
-                # For birthdays 1-2 days away, start a birthday_prep conversation
-                # so Genie can help the user think of something meaningful to say
-                started_conv = False
-                if person_id and should_initiate(user_id, person_id):
-                    conv_id = start_conversation(user_id, person_id, "birthday_prep", phone)
-                    started_conv = bool(conv_id)
-
-                # Fall back to sending the moment directly if conversation wasn't started
-                if not started_conv:
-                    send_message(phone, suggestion, user_id=user_id, moment_id=moment_id)
-                    set_last_moment(user_id, pname, suggestion, "life_event")
-
-                db.update_moment_status(moment_id, "sent")
+        await run_for_users("life_events_delivery", users, _deliver_urgent_life_event)
 
         logger.info(f"Life events check done: {total_moments} moments created")
     except Exception as e:
         logger.error(f"Life events check error: {e}")
 
 
+def _deliver_urgent_life_event(user: dict) -> None:
+    """Push one user's most urgent life-event moment (runs in a job runner worker thread)."""
+    from services.whatsapp import send_message
+    from services.genie_conversations import start_conversation, should_initiate
+    from routers.messages import set_last_moment
+
+    user_id = user["id"]
+    phone = user.get("phone", "")
+    # life_event moments rank first, so the top moment is one if any are pending
+    pending = db.get_moments_for_user(user_id, limit=1)
+    urgent = [m for m in pending if m.get("triggered_by") == "life_event"]
+    for moment in urgent[:1]:  # max one urgent push per day
+        suggestion = moment.get("suggestion", "")
+        person_data = moment.get("people") or {}
+        pname = person_data.get("name", "") if isinstance(person_data, dict) else ""
+        person_id = moment.get("person_id")
+        moment_id = moment.get("id")
+
+        # For birthdays 1-2 days away, start a birthday_prep conversation
+        # so Genie can help the user think of something meaningful to say
+        started_conv = False
+        if person_id and should_initiate(user_id, person_id):
+            conv_id = start_conversation(user_id, person_id, "birthday_prep", phone)
+            started_conv = bool(conv_id)
+
+        # Fall back to sending the moment directly if conversation wasn't started
+        if not started_conv:
+            send_message(phone, suggestion, user_id=user_id, moment_id=moment_id)
+            set_last_moment(user_id, pname, suggestion, "life_event")
+
+        db.update_moment_status(moment_id, "sent")
+
+
 async def send_evening_digests():
     """
     Every evening at 7pm local (UTC-8 for SF): send each user their digest.
@@ -291,7 +205,7 @@ async def send_evening_digests():
                 logger.info(f"Digest skipped for user {user_id}: {reason}")
                 continue
 
-            person_name, insight, suggestion, moment_id = generate_evening_digest(user_id)
+            person_name, insight, suggestion, moment_id = await asyncio.to_thread(generate_evening_digest, user_id)
             if person_name and insight:
                 send_evening_digest(phone, person_name, insight, suggestion)
                 if moment_id:
@@ -428,6 +342,46 @@ async def policy_audit(user_id: str, days: int = 30):
     return {"decisions": policy_engine.get_audit_log(user_id, days=days)}
 
 
+@app.get("/scheduler/jobs")
+async def scheduler_jobs():
+    """Per-job fan-out metrics: last run throughput, p95 per-user latency, overlap skips."""
+    return job_stats()
+
+
+@app.get("/llm/stats")
+async def llm_stats():
+    """Per-feature Claude traffic through the gateway: calls, retries, cache hits, tokens, p50/p95 latency."""
+    return llm_gateway.stats()
+
+
+@app.get("/signals/stats")
+async def signal_stats():
+    """Third-party signal extractor: submitted, filtered, dropped, deferred and duplicate messages; batches and signals stored."""
+    return signal_extractor.stats()
+
+
+@app.get("/messages/batch/stats")
+async def message_batch_stats():
+    """Last message batch run: backlog depth at start, messages processed and left, messages/sec."""
+    return message_batch.stats()
+
+
+@app.get("/jobs/queue")
+async def job_queue_stats():
+    """Durable job queue, per queue: ready/running/dead counts, lag of the oldest due job, throughput, recent dead jobs."""
+    stats = await asyncio.to_thread(job_queue.stats)
+    stats["dead_jobs"] = await asyncio.to_thread(job_queue.get_queue().dead_jobs, 20)
+    return stats
+
+
+@app.post("/jobs/queue/{job_id}/retry")
+async def job_queue_retry(job_id: int):
+    """Put a dead job back on its queue. Admin use only."""
+    if not await asyncio.to_thread(job_queue.get_queue().retry_dead, job_id):
+        raise HTTPException(status_code=404, detail="No dead job with that id")
+    return {"status": "requeued", "job_id": job_id}
+
+
 @app.post("/policy-reload")
 async def policy_reload():
     """Hot-reload all policies from the database without restarting. Admin use only."""
@@ -437,6 +391,14 @@ async def policy_reload():
     return {"status": "reloaded", "compiled": len(policy_engine.compiled_policies)}
 
 
+async def db_pool_health_job():
+    """Every 5 minutes: ping pooled Supabase clients and recycle broken ones."""
+    import asyncio
+    healthy = await asyncio.to_thread(db.check_db_health)
+    if not healthy:
+        logger.warning("Supabase pool health check failed — affected clients recycled")
+
+
 async def rule_engine_job():
     """Every 15 minutes: evaluate all active genie_rules for all users."""
     try:
@@ -477,9 +439,18 @@ async def startup():
 
     # Initialize the Policy Engine — loads and compiles all policies from DB
     try:
-        supabase_client = create_client(settings.supabase_url, settings.supabase_key)
-        claude_client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-        policy_engine = PolicyEngine(supabase=supabase_client, claude=claude_client)
+        # Held for the life of the server, so not a pooled client the pool would close
+        supabase_client = db.dedicated_client()
+        # Same policy text compiles to the same function — serve restarts from the cache
+        claude_client = llm_gateway.client("policy_engine", cache=True)
+        audit_writer = AuditLogWriter(
+            supabase_client,
+            batch_size=settings.policy_audit_batch_size,
+            flush_interval_seconds=settings.policy_audit_flush_seconds,
+            max_queue=settings.policy_audit_max_queue,
+            spill_path=settings.policy_audit_spill_path,
+        )
+        policy_engine = PolicyEngine(supabase=supabase_client, claude=claude_client, audit=audit_writer)
         guard.init(policy_engine)
         logger.info(f"Policy Engine initialized: {len(policy_engine.compiled_policies)} policies compiled")
     except Exception as e:
@@ -557,7 +528,26 @@ async def startup():
         replace_existing=True,
     )
 
+    # Supabase pool health — recycle clients whose connections have gone bad
+    scheduler.add_job(
+        db_pool_health_job,
+        trigger=IntervalTrigger(minutes=5),
+        id="db_pool_health",
+        replace_existing=True,
+    )
+
     scheduler.start()
+
+    # Durable job queue — post-request work (ingestion, sends, extraction).
+    # Jobs left by a previous process are picked up here.
+    job_queue.define_queue("conversation", settings.job_queue_conversation_concurrency)
+    job_queue.define_queue("ingestion", settings.job_queue_ingestion_concurrency)
+    job_queue.define_queue("signals", settings.signal_workers, max_backlog=settings.signal_max_queue)
+    await job_queue.start()
+
+    # Ingestion progress bus — with the sqlite backend this starts relaying
+    # other workers' events, so sockets on this worker see every session
+    ingestion_bus.get_bus()
     logger.info("Personal Genie backend started 🔮")
 
 
@@ -565,3 +555,9 @@ async def startup():
 async def shutdown():
     """Stop background jobs cleanly."""
     scheduler.shutdown()
+    if policy_engine is not None:
+        policy_engine.audit.close()   # flush queued audit decisions before exit
+    await job_queue.stop()
+    ingestion_bus.close()
+    llm_gateway.close()
+    db.close_db()
@@ -0,0 +1,243 @@
+"""
+policy_engine/audit.py — Buffered, batched writer for the policy audit trail.
+
+Every PolicyEngine decision must land in policy_decisions (plus one
+policy_actions_log row per required action), but none of that should sit on
+the caller's thread. The writer queues decisions in memory and a background
+thread flushes them in two bulk inserts whenever the batch fills up or the
+flush interval passes.
+
+Decision ids are generated here rather than by the database so the action
+rows can reference them without waiting for the decision insert to return.
+
+If the database is unreachable, a failed batch is appended to a local JSONL
+spill file and replayed on the next successful flush. If the queue itself
+overflows, the oldest entries are spilled the same way — callers are never
+blocked and audit rows are never silently dropped. A replay first moves the
+spill file aside (under the same lock as every append), so entries spilled
+while it runs land in a fresh file instead of being deleted with the old one.
+Action rows carry ids derived from their decision id, so replaying a batch
+whose actions half-landed writes each action once.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """
+    One instance per PolicyEngine. enqueue() is cheap and thread-safe;
+    the flusher thread does all of the database work.
+    """
+
+    def __init__(
+        self,
+        supabase: Client,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 2.0,
+        max_queue: int = 10_000,
+        spill_path: str = "policy_audit_spill.jsonl",
+        start: bool = True,
+    ):
+        self.db = supabase
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_queue = max_queue
+        self.spill_path = spill_path
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()   # one flush at a time
+        self._spill_lock = threading.Lock()   # spill-file appends vs. moving it aside for replay
+        self._closed = False
+
+        # Metrics — reported on /policy-dashboard
+        self.flushed_decisions = 0
+        self.flush_failures = 0
+        self.spilled_decisions = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+        self._thread: Optional[threading.Thread] = None
+        if start:
+            self._thread = threading.Thread(target=self._run, name="policy-audit", daemon=True)
+            self._thread.start()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def enqueue(self, decision_row: dict, required_actions: list) -> None:
+        """
+        Queue one decision and its required actions for the next bulk flush.
+        Never blocks on the database and never raises.
+        """
+        entry = {
+            "decision": {
+                "id": str(uuid.uuid4()),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                **decision_row,
+            },
+            "actions": list(required_actions or []),
+        }
+        overflow = []
+        with self._cond:
+            self._queue.append(entry)
+            while len(self._queue) > self.max_queue:
+                overflow.append(self._queue.popleft())
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        if overflow:
+            self._spill(overflow)
+
+    def flush(self) -> int:
+        """
+        Write everything currently queued (and any spilled backlog) to the
+        database. Returns the number of decisions written. Safe to call from
+        any thread — used directly by close() and tests.
+        """
+        with self._flush_lock:
+            written = 0
+            if os.path.exists(self.spill_path) or os.path.exists(self._replay_path):
+                written += self._replay_spill()
+            while True:
+                with self._cond:
+                    batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                if not batch:
+                    return written
+                if not self._write_batch(batch):
+                    self._spill(batch)
+                    return written
+                written += len(batch)
+
+    def close(self) -> None:
+        """Stop the flusher thread and write out everything still queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_seconds + 5)
+        self.flush()
+
+    def stats(self) -> dict:
+        """Queue depth and flush latency for the policy dashboard."""
+        return {
+            "queue_depth": len(self._queue),
+            "flushed_decisions": self.flushed_decisions,
+            "flush_failures": self.flush_failures,
+            "spilled_decisions": self.spilled_decisions,
+            "spill_pending": os.path.exists(self.spill_path) or os.path.exists(self._replay_path),
+            "last_flush_ms": round(self.last_flush_ms, 1),
+            "max_flush_ms": round(self.max_flush_ms, 1),
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._queue) < self.batch_size:
+                    self._cond.wait(timeout=self.flush_interval_seconds)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Policy audit: flusher error: {e}")
+
+    def _write_batch(self, batch: list) -> bool:
+        """Two bulk inserts: decisions first, then every required action."""
+        start = time.perf_counter()
+        decisions = [e["decision"] for e in batch]
+        actions = [
+            {
+                # Same id on every replay of this entry, so a retry can't duplicate it
+                "id": str(uuid.uuid5(uuid.UUID(e["decision"]["id"]), f"{i}:{action}")),
+                "decision_id": e["decision"]["id"],
+                "action": action,
+                "executed": False,
+            }
+            for e in batch
+            for i, action in enumerate(e["actions"])
+        ]
+        try:
+            # ignore_duplicates: a replayed batch may already have half-landed
+            self.db.table("policy_decisions").upsert(decisions, ignore_duplicates=True).execute()
+            if actions:
+                self.db.table("policy_actions_log").upsert(actions, ignore_duplicates=True).execute()
+        except Exception as e:
+            self.flush_failures += 1
+            logger.error(f"Policy audit: bulk insert of {len(batch)} decisions failed: {e}")
+            return False
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        self.flushed_decisions += len(batch)
+        return True
+
+    @property
+    def _replay_path(self) -> str:
+        return self.spill_path + ".replay"
+
+    def _spill(self, entries: list) -> None:
+        """Append entries to the local spill file so they survive a DB outage."""
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            self.spilled_decisions += len(entries)
+            logger.warning(f"Policy audit: spilled {len(entries)} decisions to {self.spill_path}")
+        except Exception as e:
+            logger.error(f"Policy audit: could not spill {len(entries)} decisions — lost: {e}")
+
+    def _replay_spill(self) -> int:
+        """
+        Re-insert spilled entries and return how many landed. The spill file
+        is first moved aside, so enqueue() overflowing meanwhile starts a new
+        one; whatever can't be written goes back to the spill file.
+        """
+        with self._spill_lock:
+            try:
+                if os.path.exists(self.spill_path):
+                    if os.path.exists(self._replay_path):
+                        # Left over from an interrupted replay — keep both
+                        with open(self.spill_path, encoding="utf-8") as src, \
+                             open(self._replay_path, "a", encoding="utf-8") as dst:
+                            dst.write(src.read())
+                        os.remove(self.spill_path)
+                    else:
+                        os.replace(self.spill_path, self._replay_path)
+                with open(self._replay_path, encoding="utf-8") as f:
+                    entries = [json.loads(line) for line in f if line.strip()]
+            except Exception as e:
+                logger.error(f"Policy audit: could not read spill file: {e}")
+                return 0
+        for i in range(0, len(entries), self.batch_size):
+            if not self._write_batch(entries[i:i + self.batch_size]):
+                # Keep what hasn't been written yet for the next attempt
+                self._requeue_spill(entries[i:])
+                return i
+        os.remove(self._replay_path)
+        logger.info(f"Policy audit: replayed {len(entries)} spilled decisions")
+        return len(entries)
+
+    def _requeue_spill(self, entries: list) -> None:
+        """Put unwritten replay entries back in front of anything spilled meanwhile."""
+        with self._spill_lock:
+            tmp_path = self.spill_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, default=str) + "\n")
+                if os.path.exists(self.spill_path):
+                    with open(self.spill_path, encoding="utf-8") as newer:
+                        f.write(newer.read())
+            os.replace(tmp_path, self.spill_path)
+            os.remove(self._replay_path)
@@ -13,14 +13,20 @@ Every decision is logged to the audit trail. Every required action
 is tracked. Nothing slips through.
 """
 
+import ast
+import itertools
 import json
 import time
 import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Optional, Callable
 import anthropic
 from supabase import Client
 
+from policy_engine.audit import AuditLogWriter
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,57 +56,284 @@ class PolicyDecision:
     execution_time_ms: int = 0
 
 
+# Map every operation type to the policies that govern it
+OPERATION_POLICY_MAP: dict[str, list[str]] = {
+    "store_message": [
+        "gdpr_consent_requirements",
+        "gdpr_data_minimization",
+        "ccpa_data_disclosure",
+        "safety_minor_protection",
+    ],
+    "store_whatsapp_message": [
+        "gdpr_consent_requirements",
+        "gdpr_data_minimization",
+        "safety_minor_protection",
+    ],
+    "delete_user": [
+        "gdpr_right_to_erasure",
+        "ccpa_opt_out_rights",
+    ],
+    "share_bilateral": [
+        "gdpr_consent_requirements",
+        "business_bilateral_graph",
+        "safety_deceased_persons",
+    ],
+    "infer_emotion": [
+        "gdpr_biometric_data",
+        "safety_emotional_sensitivity",
+    ],
+    "send_agent_message": [
+        "business_agent_diplomacy",
+        "gdpr_consent_requirements",
+        "safety_emotional_sensitivity",
+    ],
+    "store_deceased_data": [
+        "safety_deceased_persons",
+        "gdpr_consent_requirements",
+    ],
+    "process_minor_data": [
+        "safety_minor_protection",
+    ],
+    "build_people_graph": [
+        "gdpr_consent_requirements",
+        "gdpr_data_minimization",
+        "safety_minor_protection",
+        "safety_deceased_persons",
+    ],
+    "send_evening_digest": [
+        "safety_emotional_sensitivity",
+        "safety_deceased_persons",
+    ],
+    "process_voice_note": [
+        "gdpr_consent_requirements",
+        "gdpr_data_minimization",
+    ],
+    "send_invite": [
+        "gdpr_consent_requirements",
+        "business_bilateral_graph",
+    ],
+    "revoke_consent": [
+        "gdpr_right_to_erasure",
+        "ccpa_opt_out_rights",
+    ],
+    "access_user_data": [
+        "security_access_control",
+        "gdpr_consent_requirements",
+    ],
+}
+
+# Emotional states that pull in the emotional sensitivity policy
+SENSITIVE_EMOTIONAL_STATES = ("distressed", "grieving", "anxious", "sad")
+
+# Names whose presence in a policy means its result can change between calls
+# with identical context — such policies are never served from the cache.
+_NON_DETERMINISTIC_NAMES = {"datetime", "date", "time", "random", "uuid", "os"}
+
+_UNCACHED = object()
+
+
+def _route_key(operation: str, context: dict) -> tuple:
+    """
+    Reduce a context to the routing decision:
+    (operation, GDPR bucket, CCPA bucket, deceased flag, sensitive-emotion flag).
+    """
+    jurisdiction = context.get("jurisdiction", "")
+    user_location = context.get("user_location", "") or ""
+    return (
+        operation,
+        jurisdiction == "GDPR" or user_location.startswith("EU") or user_location.startswith("EEA"),
+        jurisdiction == "CCPA" or user_location == "US-CA",
+        bool(context.get("person_is_deceased")),
+        context.get("emotional_state") in SENSITIVE_EMOTIONAL_STATES,
+    )
+
+
+def _context_fields_read(source: str) -> Optional[frozenset]:
+    """
+    Statically work out which context keys a compiled policy reads.
+
+    Only literal context.get("key") and context["key"] accesses are understood.
+    Anything else — passing context around, iterating it, dynamic keys, or
+    touching clocks/randomness — returns None, meaning "don't cache".
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    func = next(
+        (n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == "evaluate"),
+        None,
+    )
+    if func is None or len(func.args.args) < 2:
+        return None
+    ctx_name = func.args.args[1].arg
+
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    fields = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal)):
+            return None
+        if not isinstance(node, ast.Name):
+            continue
+        if node.id in _NON_DETERMINISTIC_NAMES:
+            return None
+        if node.id != ctx_name or node is func.args.args[1]:
+            continue
+        parent = parents.get(node)
+        if isinstance(parent, ast.Subscript) and parent.value is node:
+            key = parent.slice
+        elif (isinstance(parent, ast.Attribute) and parent.attr == "get"
+              and isinstance(parents.get(parent), ast.Call) and parents[parent].args):
+            key = parents[parent].args[0]
+        else:
+            return None
+        if not (isinstance(key, ast.Constant) and isinstance(key.value, str)):
+            return None
+        fields.add(key.value)
+    return frozenset(fields)
+
+
+def _freeze(value):
+    """Hashable form of a context value, for use in a cache key."""
+    if isinstance(value, (dict, list, tuple, set)):
+        return json.dumps(value, sort_keys=True, default=str)
+    hash(value)
+    return value
+
+
+class _DecisionCache:
+    """Small thread-safe LRU of (allowed, reason, required_actions) tuples."""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key, _UNCACHED)
+            if value is _UNCACHED:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+@dataclass
+class _PolicySet:
+    """
+    One loaded generation of policies with everything derived from it.
+    Reloads build a new set and swap it in whole, so evaluate() never sees
+    new routes with old functions, or caches a decision against the wrong set.
+    """
+    # Key: policy name, Value: the callable evaluate(operation, context) -> dict
+    policies: dict[str, Callable] = field(default_factory=dict)
+    # Context keys each compiled policy reads (None = not safe to cache)
+    fields: dict[str, Optional[frozenset]] = field(default_factory=dict)
+    # Routing table — _route_key() → (applicable policy names, context keys they read)
+    routes: dict[tuple, tuple] = field(default_factory=dict)
+    # Recent decisions keyed on exactly the context fields the policies read
+    decisions: _DecisionCache = field(default_factory=_DecisionCache)
+
+
 class PolicyEngine:
     """
     The main engine. One instance created at server startup and reused
     for every request. Policies are compiled once and cached in memory.
     """
 
-    def __init__(self, supabase: Client, claude: anthropic.Anthropic):
+    def __init__(
+        self,
+        supabase: Client,
+        claude: anthropic.Anthropic,
+        audit: Optional[AuditLogWriter] = None,
+    ):
         # The Supabase connection — for loading policies and logging decisions
         self.db = supabase
         # Claude — used to compile policies and parse test scenarios
         self.claude = claude
-        # In-memory cache of compiled policy functions
-        # Key: policy name, Value: the callable evaluate(operation, context) -> dict
-        self.compiled_policies: dict[str, Callable] = {}
+        # Audit trail writer — decisions are queued and bulk-inserted off the caller's thread
+        self.audit = audit or AuditLogWriter(supabase)
+        # Serialises reloads so two of them can't install sets out of order
+        self._reload_lock = threading.Lock()
         # Load and compile all active policies from the database
-        self._load_all_policies()
+        self._active = self._load_all_policies()
+        if self._active is None:
+            logger.warning("Policy Engine starting with zero policies — all operations will be permitted")
+            self._active = _PolicySet()
+
+    @property
+    def compiled_policies(self) -> dict[str, Callable]:
+        """In-memory cache of compiled policy functions for the active set."""
+        return self._active.policies
+
+    @property
+    def _decision_cache(self) -> _DecisionCache:
+        return self._active.decisions
 
-    def _load_all_policies(self):
+    def _load_all_policies(self) -> Optional[_PolicySet]:
         """
         Read every active policy from the database and compile it into
         an enforcement function that runs in under 1ms per check.
-        Called once when the server starts.
+        Returns a new, fully routed policy set without installing it,
+        or None if the database could not be read.
         """
         try:
             result = self.db.table("policies").select("*").eq("active", True).execute()
         except Exception as e:
             logger.error(f"Policy Engine: could not load policies from database: {e}")
-            logger.warning("Policy Engine starting with zero policies — all operations will be permitted")
-            return
+            return None
 
-        compiled_count = 0
+        policy_set = _PolicySet()
         for policy in result.data:
             try:
-                compiled = self._compile_policy(
+                compiled, fields = self._compile_policy(
                     name=policy["name"],
                     content=policy["content"],
                     cached_function=policy.get("compiled_function")
                 )
-                self.compiled_policies[policy["name"]] = compiled
-                compiled_count += 1
+                policy_set.policies[policy["name"]] = compiled
+                policy_set.fields[policy["name"]] = fields
             except Exception as e:
                 logger.error(f"Policy Engine: failed to compile policy '{policy['name']}': {e}")
 
-        logger.info(f"Policy Engine loaded {compiled_count}/{len(result.data)} policies")
+        self._build_routes(policy_set)
+        logger.info(f"Policy Engine loaded {len(policy_set.policies)}/{len(result.data)} policies")
+        return policy_set
+
+    def _build_routes(self, policy_set: _PolicySet):
+        """
+        Precompute the routing table for every known operation and every
+        combination of jurisdiction bucket and context flags, so evaluate()
+        is a dict lookup rather than a rebuild-and-deduplicate per call.
+        """
+        for operation in OPERATION_POLICY_MAP:
+            for flags in itertools.product((False, True), repeat=4):
+                self._route(policy_set, (operation, *flags))
 
     def _compile_policy(
         self,
         name: str,
         content: str,
         cached_function: Optional[str] = None
-    ) -> Callable:
+    ) -> tuple[Callable, Optional[frozenset]]:
         """
         Turn a policy written in plain English into a Python function
         that evaluates whether an operation is allowed.
@@ -110,6 +343,7 @@ class PolicyEngine:
 
         The compiled function always takes (operation, context) and
         returns {"allowed": bool, "reason": str, "required_actions": list}.
+        It is returned with the context keys it reads (see _context_fields_read).
         """
         # Use cached compiled function if available (avoids Claude call on restart)
         if cached_function:
@@ -117,7 +351,7 @@ class PolicyEngine:
                 namespace = {}
                 exec(cached_function, namespace)  # noqa: S102
                 if "evaluate" in namespace:
-                    return namespace["evaluate"]
+                    return namespace["evaluate"], _context_fields_read(cached_function)
             except Exception:
                 pass  # Fall through to recompile
 
@@ -178,7 +412,7 @@ Return only the Python function code. No markdown fences. No explanation. Just c
         except Exception:
             pass  # Non-critical — just means next restart will recompile
 
-        return namespace["evaluate"]
+        return namespace["evaluate"], _context_fields_read(function_code)
 
     def evaluate(self, operation: str, context: dict) -> PolicyDecision:
         """
@@ -204,21 +438,63 @@ Return only the Python function code. No markdown fences. No explanation. Just c
             if not decision.allowed:
                 raise PolicyViolationError(decision.reason)
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
+
+        # Read the active set once — a concurrent reload swaps in a new one
+        # rather than mutating this one, so the whole check stays consistent
+        policy_set = self._active
 
         # Find which policies apply to this specific operation and context
-        applicable = self._find_applicable_policies(operation, context)
+        key = _route_key(operation, context)
+        applicable, fields = self._route(policy_set, key)
+
+        # Serve repeated checks from the decision cache when every applicable
+        # policy is known to depend only on the context fields listed in `fields`
+        cache_key = None
+        if fields is not None:
+            try:
+                cache_key = (key, tuple((f, _freeze(context.get(f))) for f in fields))
+            except TypeError:
+                cache_key = None  # unhashable context value — evaluate normally
 
+        cache = policy_set.decisions
+        outcome = cache.get(cache_key) if cache_key is not None else _UNCACHED
+        if outcome is _UNCACHED:
+            outcome = self._run_policies(policy_set.policies, applicable, operation, context)
+            if cache_key is not None:
+                cache.put(cache_key, outcome)
+        blocking_reason, required_actions = outcome
+
+        execution_ms = int((time.perf_counter() - start_time) * 1000)
+
+        decision = PolicyDecision(
+            allowed=blocking_reason is None,
+            reason=blocking_reason or "All applicable policies passed",
+            required_actions=list(required_actions),
+            applicable_policies=list(applicable),
+            execution_time_ms=execution_ms
+        )
+
+        # Log every decision — this is the complete audit trail
+        self._log_decision(operation, context, decision)
+
+        return decision
+
+    @staticmethod
+    def _run_policies(policies: dict, applicable: tuple, operation: str, context: dict) -> tuple:
+        """
+        Run every applicable compiled policy — stop at the first one that blocks.
+        Returns (blocking_reason or None, deduplicated required actions).
+        """
         all_required_actions = []
         blocking_reason = None
 
-        # Run every applicable policy — stop at the first one that blocks
         for policy_name in applicable:
-            if policy_name not in self.compiled_policies:
+            if policy_name not in policies:
                 continue  # Policy referenced but not compiled — skip, don't block
 
             try:
-                result = self.compiled_policies[policy_name](operation, context)
+                result = policies[policy_name](operation, context)
 
                 if not result.get("allowed", True):
                     blocking_reason = result.get("reason", f"Blocked by policy: {policy_name}")
@@ -234,116 +510,65 @@ Return only the Python function code. No markdown fences. No explanation. Just c
                 logger.error(f"Policy Engine: {blocking_reason}")
                 break
 
-        execution_ms = int((time.time() - start_time) * 1000)
-
-        decision = PolicyDecision(
-            allowed=blocking_reason is None,
-            reason=blocking_reason or "All applicable policies passed",
-            required_actions=list(set(all_required_actions)),  # deduplicate
-            applicable_policies=applicable,
-            execution_time_ms=execution_ms
-        )
-
-        # Log every decision — this is the complete audit trail
-        self._log_decision(operation, context, decision)
+        return blocking_reason, tuple(set(all_required_actions))  # deduplicate
 
-        return decision
+    def _route(self, policy_set: _PolicySet, key: tuple) -> tuple:
+        """
+        Look up (applicable policies, context fields they read) for a route key,
+        computing and memoizing it for operations outside OPERATION_POLICY_MAP.
+        """
+        route = policy_set.routes.get(key)
+        if route is None:
+            applicable = self._applicable_for_route(*key)
+            fields = set()
+            for name in applicable:
+                if name not in policy_set.policies:
+                    continue
+                policy_fields = policy_set.fields.get(name)
+                if policy_fields is None:
+                    fields = None
+                    break
+                fields |= policy_fields
+            route = (applicable, tuple(sorted(fields)) if fields is not None else None)
+            policy_set.routes[key] = route
+        return route
 
     def _find_applicable_policies(self, operation: str, context: dict) -> list:
         """
         Figure out which policies apply to a given operation based on
         the operation type, user jurisdiction, and data types involved.
+        Served from the precomputed routing table.
+        """
+        return list(self._route(self._active, _route_key(operation, context))[0])
+
+    @staticmethod
+    def _applicable_for_route(
+        operation: str, gdpr: bool, ccpa: bool, deceased: bool, sensitive: bool
+    ) -> tuple:
+        """
+        Build the ordered, de-duplicated policy list for one route.
 
         Every operation gets at least the safety and security baseline checks.
         Jurisdiction-specific checks (GDPR, CCPA) are added when relevant.
         """
         applicable = []
 
-        # Map every operation type to the policies that govern it
-        operation_policy_map = {
-            "store_message": [
-                "gdpr_consent_requirements",
-                "gdpr_data_minimization",
-                "ccpa_data_disclosure",
-                "safety_minor_protection",
-            ],
-            "store_whatsapp_message": [
-                "gdpr_consent_requirements",
-                "gdpr_data_minimization",
-                "safety_minor_protection",
-            ],
-            "delete_user": [
-                "gdpr_right_to_erasure",
-                "ccpa_opt_out_rights",
-            ],
-            "share_bilateral": [
-                "gdpr_consent_requirements",
-                "business_bilateral_graph",
-                "safety_deceased_persons",
-            ],
-            "infer_emotion": [
-                "gdpr_biometric_data",
-                "safety_emotional_sensitivity",
-            ],
-            "send_agent_message": [
-                "business_agent_diplomacy",
-                "gdpr_consent_requirements",
-                "safety_emotional_sensitivity",
-            ],
-            "store_deceased_data": [
-                "safety_deceased_persons",
-                "gdpr_consent_requirements",
-            ],
-            "process_minor_data": [
-                "safety_minor_protection",
-            ],
-            "build_people_graph": [
-                "gdpr_consent_requirements",
-                "gdpr_data_minimization",
-                "safety_minor_protection",
-                "safety_deceased_persons",
-            ],
-            "send_evening_digest": [
-                "safety_emotional_sensitivity",
-                "safety_deceased_persons",
-            ],
-            "process_voice_note": [
-                "gdpr_consent_requirements",
-                "gdpr_data_minimization",
-            ],
-            "send_invite": [
-                "gdpr_consent_requirements",
-                "business_bilateral_graph",
-            ],
-            "revoke_consent": [
-                "gdpr_right_to_erasure",
-                "ccpa_opt_out_rights",
-            ],
-            "access_user_data": [
-                "security_access_control",
-                "gdpr_consent_requirements",
-            ],
-        }
-
         # Add jurisdiction-specific policies based on user location
-        jurisdiction = context.get("jurisdiction", "")
-        user_location = context.get("user_location", "")
-
-        if jurisdiction == "GDPR" or user_location.startswith("EU") or user_location.startswith("EEA"):
+        if gdpr:
             applicable.extend([
                 "gdpr_right_to_erasure",
                 "gdpr_consent_requirements",
                 "gdpr_data_retention",
             ])
 
-        if jurisdiction == "CCPA" or user_location == "US-CA":
+        if ccpa:
             applicable.extend([
                 "ccpa_california_rights",
                 "ccpa_opt_out_rights",
             ])
 
         # Add operation-specific policies
-        applicable.extend(operation_policy_map.get(operation, []))
+        applicable.extend(OPERATION_POLICY_MAP.get(operation, []))
 
         # Always check these safety and security baselines on every operation
         applicable.extend([
@@ -352,27 +577,23 @@ Return only the Python function code. No markdown fences. No explanation. Just c
         ])
 
         # Check deceased person policy if relevant
-        if context.get("person_is_deceased"):
+        if deceased:
             applicable.append("safety_deceased_persons")
 
         # Check emotional sensitivity policy if emotional state is available
-        if context.get("emotional_state") in ("distressed", "grieving", "anxious", "sad"):
+        if sensitive:
             applicable.append("safety_emotional_sensitivity")
 
         # Remove duplicates while preserving order
-        seen = set()
-        unique = []
-        for p in applicable:
-            if p not in seen:
-                seen.add(p)
-                unique.append(p)
-        return unique
+        return tuple(dict.fromkeys(applicable))
 
     def _log_decision(self, operation: str, context: dict, decision: PolicyDecision):
         """
-        Write every policy decision to the database.
+        Queue every policy decision for the audit trail.
         This is the complete audit trail — every decision Genie ever made
-        about user data is stored here and can be shown in the Transparency tab.
+        about user data is stored and can be shown in the Transparency tab.
+        The actual inserts happen in bulk on the audit writer's thread, so
+        the caller never waits on the database here.
 
         Sensitive values (tokens, message bodies) are stripped before logging.
         """
@@ -386,26 +607,18 @@ Return only the Python function code. No markdown fences. No explanation. Just c
         }
 
         try:
-            result = self.db.table("policy_decisions").insert({
-                "operation": operation,
-                "context": safe_context,
-                "applicable_policies": decision.applicable_policies,
-                "decision": decision.allowed,
-                "reason": decision.reason,
-                "required_actions": decision.required_actions,
-                "execution_time_ms": decision.execution_time_ms,
-            }).execute()
-
-            # If there are required actions, log each one individually
-            if decision.required_actions and result.data:
-                decision_id = result.data[0]["id"]
-                for action in decision.required_actions:
-                    self.db.table("policy_actions_log").insert({
-                        "decision_id": decision_id,
-                        "action": action,
-                        "executed": False,
-                    }).execute()
-
+            self.audit.enqueue(
+                {
+                    "operation": operation,
+                    "context": safe_context,
+                    "applicable_policies": decision.applicable_policies,
+                    "decision": decision.allowed,
+                    "reason": decision.reason,
+                    "required_actions": decision.required_actions,
+                    "execution_time_ms": decision.execution_time_ms,
+                },
+                decision.required_actions,
+            )
         except Exception as e:
             # Logging failure must never block the actual operation
             logger.error(f"Policy Engine: failed to log decision: {e}")
@@ -533,9 +746,18 @@ Return only valid JSON. No explanation. No markdown.""",
         """
         Hot-reload all policies from the database without restarting the server.
         Call this after adding or editing any policy so changes take effect immediately.
+
+        The new set is compiled and routed before anything is replaced; it is
+        then installed together with a fresh decision cache in one assignment.
+        Checks running meanwhile finish against the set they started with.
+        If the database can't be read, the current policies stay in force.
         """
-        self.compiled_policies = {}
-        self._load_all_policies()
+        with self._reload_lock:
+            policy_set = self._load_all_policies()
+            if policy_set is None:
+                logger.warning("Policy Engine reload failed — keeping the current policies")
+                return
+            self._active = policy_set
         logger.info("Policy Engine reloaded successfully")
 
     def get_audit_log(self, user_id: str, days: int = 30) -> list:
@@ -573,6 +795,8 @@ Return only valid JSON. No explanation. No markdown.""",
         return {
             "total_policies": len(policies),
             "compiled_policies": len(self.compiled_policies),
+            "audit_log": self.audit.stats(),
+            "decision_cache": self._decision_cache.stats(),
             "active_policies": [p["name"] for p in policies if p.get("active")],
             "last_test_results": {
                 p["name"]: p.get("test_results")
@@ -6,13 +6,13 @@ Takes a pasted iMessage conversation + contact info → Claude → relationship
 from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
-import anthropic
 import json
-import os
+
+from services import llm_gateway
 
 router = APIRouter(prefix="/analyze", tags=["analyze"])
 
-client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY", ""))
+client = llm_gateway.async_client("analyze")
 
 
 class RelationshipRequest(BaseModel):
@@ -58,7 +58,7 @@ Rules:
 - if the conversation is too short or unclear, still return valid JSON with your best inference
 - return ONLY the JSON object, no other text"""
 
-    message = client.messages.create(
+    message = await client.messages.create(
         model="claude-opus-4-6",
         max_tokens=1024,
         messages=[{"role": "user", "content": prompt}],
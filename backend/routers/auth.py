@@ -8,6 +8,7 @@ routers/auth.py — Auth endpoints:
 5. POST /auth/app/verify-otp  — iOS app: verify OTP, return user_id + token
 6. GET  /auth/app/me          — iOS app: fetch current user profile
 """
+import asyncio
 import base64
 import hashlib
 import hmac
@@ -16,12 +17,13 @@ import random
 import string
 import time
 import logging
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from google_auth_oauthlib.flow import Flow
 import database as db
 from services.whatsapp import send_welcome_message, send_first_magic_moment
-from services.google_ingestion import run_full_ingestion
+from services.google_ingestion import run_full_ingestion, get_valid_google_tokens
+from services import job_queue
 from services.intelligence import build_people_graph, get_first_magic_moment
 from config import get_settings
 
@@ -75,7 +77,7 @@ class StartRequest(BaseModel):
 
 
 @router.post("/start")
-async def start(body: StartRequest, background_tasks: BackgroundTasks):
+async def start(body: StartRequest):
     """
     Entry point: user enters phone number on personalgenie.ai.
 
@@ -102,8 +104,8 @@ async def start(body: StartRequest, background_tasks: BackgroundTasks):
     connect_url = f"{settings.backend_url}/auth/connect/{user_id}"
 
     # Send WhatsApp welcome message with the short connect link
-    background_tasks.add_task(
-        send_welcome_message,
+    job_queue.enqueue(
+        "auth.welcome_message",
         phone=phone,
         name=body.name or "there",
         google_auth_url=connect_url,
@@ -169,7 +171,7 @@ async def connect_google(user_id: str):
 
 
 @router.get("/google/callback")
-async def google_callback(code: str, state: str, background_tasks: BackgroundTasks):
+async def google_callback(code: str, state: str):
     """
     Google redirects here after the user signs in.
 
@@ -223,14 +225,13 @@ async def google_callback(code: str, state: str, background_tasks: BackgroundTas
         if google_name and not user_name:
             db.get_db().table("users").update({"name": google_name}).eq("id", user_id).execute()
 
-        # Kick off ingestion in background — don't make user wait
-        background_tasks.add_task(
-            _run_ingestion_and_notify,
+        # Kick off ingestion in background — don't make user wait.
+        # The job reads the tokens just stored; they never go into the queue.
+        job_queue.enqueue(
+            "auth.ingest_and_notify",
             user_id=user_id,
             phone=phone,
             user_name=google_name or user_name,
-            access_token=credentials.token,
-            refresh_token=credentials.refresh_token or "",
         )
 
     except Exception as e:
@@ -241,38 +242,48 @@ async def google_callback(code: str, state: str, background_tasks: BackgroundTas
     return _success_html(user_name or "there")
 
 
-async def _run_ingestion_and_notify(
-    user_id: str, phone: str, user_name: str,
-    access_token: str, refresh_token: str
-):
+@job_queue.handler("auth.welcome_message", queue="conversation", priority=job_queue.PRIORITY_HIGH, max_attempts=3)
+def _send_welcome(phone: str, name: str, google_auth_url: str) -> None:
+    send_welcome_message(phone=phone, name=name, google_auth_url=google_auth_url)
+
+
+@job_queue.handler("auth.ingest_and_notify", queue="ingestion", max_attempts=3)
+async def _run_ingestion_and_notify(user_id: str, phone: str, user_name: str):
     """
-    Background task: run full Google ingestion → build People Graph → send magic moment.
+    Job: run full Google ingestion → build People Graph → send magic moment.
     This is what runs after Google OAuth completes.
-    Takes ~30-60 seconds.
+    Takes ~30-60 seconds. Failures are retried by the job queue.
     """
     try:
         logger.info(f"Starting ingestion pipeline for user {user_id}")
 
+        tokens = get_valid_google_tokens(user_id)
+        if not tokens:
+            logger.error(f"Ingestion pipeline skipped for user {user_id}: no valid Google tokens")
+            return
+        access_token, refresh_token = tokens
+
         # Step 1: Fetch all Google data in parallel
         ingestion_data = await run_full_ingestion(user_id, access_token, refresh_token)
 
         # Step 2: Send to Claude → build People Graph → save to Supabase
-        build_people_graph(user_id, ingestion_data)
+        await asyncio.to_thread(build_people_graph, user_id, ingestion_data)
 
         # Step 3: Extract life events from contacts and People Graph
         from services.life_events import extract_from_contacts, extract_life_events_for_user
         contacts = ingestion_data.get("contacts", {}).get("contacts", [])
-        extract_from_contacts(user_id, contacts)
-        extract_life_events_for_user(user_id)
+        await asyncio.to_thread(extract_from_contacts, user_id, contacts)
+        await asyncio.to_thread(extract_life_events_for_user, user_id)
 
         # Step 4: Generate and send the first magic moment via WhatsApp
-        magic_moment = get_first_magic_moment(user_id, user_name)
-        send_first_magic_moment(phone, magic_moment)
+        magic_moment = await asyncio.to_thread(get_first_magic_moment, user_id, user_name)
+        await asyncio.to_thread(send_first_magic_moment, phone, magic_moment)
 
         logger.info(f"Ingestion pipeline complete for user {user_id}")
 
     except Exception as e:
         logger.error(f"Ingestion pipeline failed for user {user_id}: {e}")
+        raise
 
 
 # ── iOS app auth (OTP via WhatsApp) ──────────────────────────────────────────
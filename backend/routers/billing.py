@@ -124,7 +124,7 @@ def _get_or_create_stripe_customer(user_id: str, stripe) -> str:
     Return the Stripe customer ID for a user, creating one if it doesn't exist.
     Stores/reads from the subscriptions table.
     """
-    from db import get_db
+    from database import get_db
     supabase = get_db()
 
     result = (
@@ -197,7 +197,7 @@ def get_user_plan(user_id: str) -> str:
     Can be imported by other modules for paywall checks.
     """
     try:
-        from db import get_db
+        from database import get_db
         supabase = get_db()
         result = (
             supabase.table("subscriptions")
@@ -279,7 +279,7 @@ async def get_subscription(user_id: str, request: Request):
     _get_user_id(request)  # auth check
 
     try:
-        from db import get_db
+        from database import get_db
         supabase = get_db()
         result = (
             supabase.table("subscriptions")
@@ -366,7 +366,7 @@ async def stripe_webhook(request: Request):
     event_type = event.get("type", "")
     data = event.get("data", {}).get("object", {})
 
-    from db import get_db
+    from database import get_db
     supabase = get_db()
 
     try:
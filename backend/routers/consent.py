@@ -8,13 +8,16 @@ Handles:
 - IGNORE → dismiss the digest
 - All other messages → forward to the WhatsApp conversation agent
 """
+import asyncio
 import logging
 from typing import Optional
-from fastapi import APIRouter, Form, Response, BackgroundTasks
+from fastapi import APIRouter, Form, Response
 from twilio.twiml.messaging_response import MessagingResponse
 import database as db
+from core import person_index
 from services.whatsapp import send_message
 from config import get_settings
+from services import job_queue
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -23,7 +26,6 @@ router = APIRouter(prefix="/consent", tags=["consent"])
 
 @router.post("/webhook")
 async def twilio_webhook(
-    background_tasks: BackgroundTasks,
     From: str = Form(...),                          # Twilio sends sender as "whatsapp:+1XXXXXXXXXX"
     Body: str = Form(default=""),                   # Message text (empty for pure voice notes)
     To: str = Form(...),                            # Our number
@@ -59,8 +61,7 @@ async def twilio_webhook(
         person_name = message[5:].strip().title()
         user = db.get_user_by_phone(phone)
         if user:
-            people = db.get_people_for_user(user["id"])
-            person = next((p for p in people if person_name.lower() in p["name"].lower()), None)
+            person = person_index.get_index(user["id"]).match_name(person_name)
             if person:
                 memories = person.get("memories", [])
                 moments = person.get("suggested_moments", [])
@@ -83,7 +84,7 @@ async def twilio_webhook(
     if cmd in ("GREAT", "DONE", "SKIP", "WRONG"):
         user = db.get_user_by_phone(phone)
         if user:
-            moments = db.get_moments_for_user(user["id"])
+            moments = db.get_moments_for_user(user["id"], limit=1)
             latest = moments[0] if moments else None
             if latest:
                 if cmd in ("GREAT", "DONE"):
@@ -140,9 +141,8 @@ async def twilio_webhook(
                 # doesn't trigger another processing run
                 _health_session_active[user_id] = False
 
-                from services.training import process_session_voice_note
-                background_tasks.add_task(
-                    process_session_voice_note,
+                job_queue.enqueue(
+                    "training.voice_note",
                     user_id=user_id,
                     phone=phone,
                     media_url=MediaUrl0,
@@ -157,17 +157,18 @@ async def twilio_webhook(
                 logger.info(f"Voice note from {phone} but no active session — ignoring media")
 
         # Persist the message so the 30-min batch can analyse it later
+        message_id = None
         if message:
             try:
                 from datetime import datetime, timezone
-                db.save_message(
+                message_id = db.save_message(
                     user_id=user_id,
                     person_id=None,
                     platform="whatsapp",
                     body=message,
                     timestamp=datetime.now(timezone.utc).isoformat(),
                     sender_consented=user.get("whatsapp_consented", False),
-                )
+                ).get("id")
             except Exception as e:
                 logger.warning(f"Could not save message for batch analysis: {e}")
 
@@ -180,13 +181,13 @@ async def twilio_webhook(
         active_conv = get_active_conversation(user_id)
         if active_conv:
             # Route reply to the conversation — Genie extracts insight and responds
-            insight = continue_conversation(user_id, message, phone)
+            insight = await asyncio.to_thread(continue_conversation, user_id, message, phone)
             if insight:
                 logger.info(f"Genie conversation continued for user {user_id}: {insight[:50]}")
             # twiml response is handled inside continue_conversation (sends directly)
         else:
             from routers.messages import handle_conversation
-            reply = await handle_conversation(user_id, phone, message)
+            reply = await handle_conversation(user_id, phone, message, message_id=message_id)
             twiml.message(reply)
     else:
         # Unknown number — they might have come here before registering
@@ -195,3 +196,14 @@ async def twilio_webhook(
         )
 
     return Response(content=str(twiml), media_type="application/xml")
+
+
+@job_queue.handler("training.voice_note", queue="conversation", priority=job_queue.PRIORITY_HIGH, max_attempts=2)
+def _process_voice_note(
+    user_id: str, phone: str, media_url: str, media_content_type: str = "audio/ogg",
+) -> str:
+    """Job: transcribe and log a training-session voice note, then reply on WhatsApp."""
+    from services.training import process_session_voice_note
+    return process_session_voice_note(
+        user_id=user_id, phone=phone, media_url=media_url, media_content_type=media_content_type,
+    )
@@ -13,6 +13,7 @@ Two flows for the POC:
 These endpoints are also called internally from the WhatsApp message router
 when food or session intent is detected in an incoming message.
 """
+import asyncio
 import logging
 from typing import Optional
 from fastapi import APIRouter, HTTPException
@@ -63,7 +64,7 @@ async def log_food(req: FoodLogRequest):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    parsed = parse_food_input(req.raw_input, req.input_type)
+    parsed = await asyncio.to_thread(parse_food_input, req.raw_input, req.input_type)
     daily = store_food_log(req.user_id, req.raw_input, parsed, req.input_type, req.user_tz_offset)
     days = get_days_logging(req.user_id)
     ack = build_acknowledgment(parsed, daily, days)
@@ -8,8 +8,10 @@ Flow:
   1. iOS calls POST /ingestion/session → gets session_id
   2. iOS opens WebSocket at GET /ws/ingestion/{session_id}
   3. iOS triggers ingestion (Google, iMessage, etc.)
-  4. Ingestion services call POST /ingestion/progress/{session_id} to broadcast updates
-  5. iOS receives events in Genie's voice — never technical
+  4. Ingestion services publish updates on services/ingestion_bus.py; producers
+     outside the process (the Mac companion) POST /ingestion/progress/{session_id}
+  5. iOS receives events in Genie's voice — never technical. Each carries a
+     `seq`; reconnecting with ?since=<seq> replays what was missed
 
 WhatsApp milestones fire at 0%, 20%, 80%, and 100%.
 """
@@ -18,26 +20,20 @@ from __future__ import annotations
 import asyncio
 import logging
 import uuid
-from typing import Any
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from pydantic import BaseModel
 
 from config import get_settings
 import database as db
+from services import ingestion_bus, job_queue
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 router = APIRouter(tags=["ingestion"])
 
-# ── In-memory session store ────────────────────────────────────────────────────
-# Maps session_id → list of connected WebSocket clients.
-# Intentionally in-memory: sessions are ephemeral (one onboarding, then gone).
-_sessions: dict[str, list[WebSocket]] = {}
-
-# Snapshot of the most-recent progress event per session (for GET /ingestion/status)
-_snapshots: dict[str, dict] = {}
+# Sessions, their recent events and their WebSockets live in services/ingestion_bus.py.
 
 # WhatsApp milestone thresholds (progress %)
 _WHATSAPP_MILESTONES: dict[int, str] = {
@@ -59,6 +55,7 @@ class ProgressEvent(BaseModel):
     message: str      # Genie's voice — never technical
     insight: str | None = None
     people_found: int = 0
+    seq: int = 0      # position in the session; reconnect with ?since=seq
 
 
 class ProgressPushRequest(BaseModel):
@@ -88,15 +85,16 @@ def _milestone_bucket(progress: int) -> int | None:
     return None
 
 
-async def _send_whatsapp_milestone(
+def _queue_whatsapp_milestone(
     session_id: str,
     progress: int,
     user_id: str | None,
     top_insight: str | None,
 ) -> None:
     """
-    Send a WhatsApp message for a milestone if it hasn't been sent yet.
-    Runs in fire-and-forget fashion — never blocks ingestion.
+    Queue a WhatsApp message for a milestone if it hasn't been sent yet.
+    Never blocks ingestion. The dedupe key keeps a milestone to one send per
+    session even across restarts and retries.
     """
     if not user_id:
         return
@@ -117,18 +115,36 @@ async def _send_whatsapp_milestone(
         message = f"{message} {top_insight}"
 
     try:
-        user = db.get_user_by_id(user_id)
-        if not user:
-            return
-        phone = user.get("phone", "")
-        if not phone:
-            return
-
-        from services.whatsapp import send_message
-        send_message(phone, message, user_id=user_id)
-        logger.info(f"WhatsApp milestone {bucket}% sent to user {user_id}")
+        job_queue.enqueue(
+            "ingestion.whatsapp_milestone",
+            dedupe_key=f"milestone:{session_id}:{bucket}",
+            user_id=user_id,
+            message=message,
+            bucket=bucket,
+        )
     except Exception as exc:
-        logger.warning(f"WhatsApp milestone send failed (session={session_id}): {exc}")
+        logger.warning(f"WhatsApp milestone could not be queued (session={session_id}): {exc}")
+
+
+def _on_progress(session_id: str, event: dict, user_id: str | None, top_insight: str | None) -> None:
+    """Bus listener: every event published in this process may cross a milestone."""
+    _queue_whatsapp_milestone(session_id, event.get("progress", 0), user_id, top_insight)
+
+
+ingestion_bus.add_listener(_on_progress)
+
+
+@job_queue.handler("ingestion.whatsapp_milestone", queue="conversation", priority=job_queue.PRIORITY_HIGH, max_attempts=3)
+def _send_whatsapp_milestone(user_id: str, message: str, bucket: int) -> None:
+    """Job: send one milestone message. Errors propagate so the queue retries."""
+    user = db.get_user_by_id(user_id)
+    phone = user.get("phone", "") if user else ""
+    if not phone:
+        return
+
+    from services.whatsapp import send_message
+    send_message(phone, message, user_id=user_id)
+    logger.info(f"WhatsApp milestone {bucket}% sent to user {user_id}")
 
 
 # ── REST: create session ───────────────────────────────────────────────────────
@@ -140,8 +156,7 @@ async def create_session() -> dict:
     iOS calls this first, gets session_id, then opens the WebSocket.
     """
     session_id = str(uuid.uuid4())
-    _sessions[session_id] = []
-    _snapshots[session_id] = {}
+    ingestion_bus.get_bus().open(session_id)
     _sent_milestones[session_id] = set()
     logger.info(f"Ingestion session created: {session_id}")
     return {"session_id": session_id}
@@ -159,13 +174,7 @@ async def link_user_session(body: LinkUserRequest) -> dict:
     This allows ingestion services (google_ingestion, intelligence) to broadcast
     live learnings to the correct WebSocket connection by looking up the user's session.
     """
-    from services.ingestion_bus import register as bus_register
-    bus_register(body.user_id, body.session_id)
-    # Ensure the session exists in the local registry too
-    if body.session_id not in _sessions:
-        _sessions[body.session_id] = []
-        _snapshots[body.session_id] = {}
-        _sent_milestones[body.session_id] = set()
+    ingestion_bus.register(body.user_id, body.session_id)
     logger.info(f"Linked user {body.user_id} → session {body.session_id[:8]}…")
     return {"status": "linked", "user_id": body.user_id, "session_id": body.session_id}
 
@@ -175,48 +184,25 @@ async def link_user_session(body: LinkUserRequest) -> dict:
 @router.post("/ingestion/progress/{session_id}")
 async def push_progress(session_id: str, body: ProgressPushRequest) -> dict:
     """
-    Ingestion services call this to broadcast progress to all iOS clients
-    currently watching this session via WebSocket.
+    For producers outside this process (the Mac companion): publish a
+    progress event to every iOS client watching this session. In-process
+    services call ingestion_bus.broadcast_sync / broadcast_async instead.
     Also sends WhatsApp milestone messages at 0/20/80/100%.
     """
-    if session_id not in _sessions:
-        # Session may have been cleaned up; create it lazily
-        _sessions[session_id] = []
-        _snapshots[session_id] = {}
-        _sent_milestones[session_id] = set()
-
-    event: dict[str, Any] = {
+    event = ingestion_bus.publish(session_id, {
         "source": body.source,
         "stage": body.stage,
         "progress": body.progress,
         "message": body.message,
         "insight": body.insight,
         "people_found": body.people_found,
-    }
+    }, user_id=body.user_id, top_insight=body.top_insight)
 
-    # Persist latest snapshot for GET /ingestion/status
-    _snapshots[session_id] = event
-
-    # Broadcast to all connected WebSocket clients
-    dead: list[WebSocket] = []
-    for ws in list(_sessions.get(session_id, [])):
-        try:
-            await ws.send_json(event)
-        except Exception:
-            dead.append(ws)
-
-    # Clean up disconnected sockets
-    for ws in dead:
-        _sessions[session_id].remove(ws)
-
-    # Fire WhatsApp milestone (non-blocking)
-    asyncio.create_task(
-        _send_whatsapp_milestone(
-            session_id, body.progress, body.user_id, body.top_insight
-        )
-    )
-
-    return {"broadcast_to": len(_sessions.get(session_id, [])), "session_id": session_id}
+    return {
+        "broadcast_to": ingestion_bus.get_bus().subscriber_count(session_id),
+        "session_id": session_id,
+        "seq": event["seq"],
+    }
 
 
 # ── REST: status snapshot ─────────────────────────────────────────────────────
@@ -227,56 +213,72 @@ async def get_status(session_id: str) -> dict:
     Return the most recent progress snapshot for a session.
     Useful if the iOS app reconnects mid-ingestion and wants the current state.
     """
-    if session_id not in _snapshots or not _snapshots[session_id]:
+    latest = ingestion_bus.get_bus().latest(session_id)
+    if not latest:
         raise HTTPException(status_code=404, detail="Session not found or no progress yet")
-    return _snapshots[session_id]
+    return latest
+
+
+@router.get("/ingestion/bus/stats")
+async def bus_stats() -> dict:
+    """Sessions, sockets, events published and sockets dropped for falling behind (this worker)."""
+    return ingestion_bus.get_bus().stats()
 
 
 # ── WebSocket: live progress stream ───────────────────────────────────────────
 
+async def _forward_events(websocket: WebSocket, subscriber: ingestion_bus.Subscriber) -> None:
+    """Send this socket its events until the bus drops it for falling behind."""
+    while (event := await subscriber.get()) is not None:
+        await websocket.send_json(event)
+
+
+async def _answer_pings(websocket: WebSocket) -> None:
+    """We only send, but reading is how disconnects (and iOS pings) arrive."""
+    while True:
+        if await websocket.receive_text() == "ping":
+            await websocket.send_text("pong")
+
+
 @router.websocket("/ws/ingestion/{session_id}")
 async def ingestion_websocket(websocket: WebSocket, session_id: str) -> None:
     """
     iOS opens this WebSocket after receiving session_id from POST /ingestion/session.
     Receives ProgressEvent JSON objects as ingestion services push updates.
 
-    If the session doesn't exist yet, it's created lazily here — the WebSocket
-    connection may arrive before or after the first progress push.
+    On connect the latest event is sent straight away; ?since=<seq> sends
+    every buffered event after that one instead. The session is created
+    lazily if the socket arrives before any progress. A socket that can't
+    keep up is closed with 1013 (try again later); reconnecting with
+    ?since= catches it up.
     """
     await websocket.accept()
-
-    # Register this connection
-    if session_id not in _sessions:
-        _sessions[session_id] = []
-        _snapshots[session_id] = {}
-        _sent_milestones[session_id] = set()
-
-    _sessions[session_id].append(websocket)
-    logger.info(f"WebSocket connected for session {session_id} — {len(_sessions[session_id])} client(s)")
-
-    # If there's already a snapshot (client reconnected), send it immediately
-    if _snapshots.get(session_id):
-        try:
-            await websocket.send_json(_snapshots[session_id])
-        except Exception:
-            pass
-
+    since = websocket.query_params.get("since", "")
+    subscriber = ingestion_bus.subscribe(session_id, since=int(since) if since.isdigit() else None)
+    logger.info(f"WebSocket connected for session {session_id} — "
+                f"{ingestion_bus.get_bus().subscriber_count(session_id)} client(s)")
+
+    tasks = {
+        asyncio.create_task(_forward_events(websocket, subscriber)),
+        asyncio.create_task(_answer_pings(websocket)),
+    }
     try:
-        # Keep the connection alive — we only send, but we need to handle disconnects
-        while True:
-            # Wait for any message (ping/pong or explicit close from iOS)
-            data = await websocket.receive_text()
-            if data == "ping":
-                await websocket.send_text("pong")
-
-    except WebSocketDisconnect:
-        pass
-    except Exception as exc:
-        logger.warning(f"WebSocket error for session {session_id}: {exc}")
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                logger.warning(f"WebSocket error for session {session_id}: {exc}")
     finally:
-        # Unregister on disconnect
-        if session_id in _sessions and websocket in _sessions[session_id]:
-            _sessions[session_id].remove(websocket)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        ingestion_bus.unsubscribe(subscriber)
+        if subscriber.dropped:
+            logger.warning(f"WebSocket for session {session_id} fell behind — dropped")
+            try:
+                await websocket.close(code=1013)
+            except Exception:
+                pass
         logger.info(f"WebSocket disconnected from session {session_id}")
 
 
@@ -284,22 +286,27 @@ class TriggerRequest(BaseModel):
     user_id: str
 
 @router.post("/ingestion/trigger")
-async def trigger_ingestion(body: TriggerRequest, background_tasks: BackgroundTasks):
+async def trigger_ingestion(body: TriggerRequest):
     """Manually re-trigger Google ingestion + people graph rebuild for a user."""
     user = db.get_user_by_id(body.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    access_token = user.get("google_access_token")
-    refresh_token = user.get("google_refresh_token")
-    if not access_token:
+    if not user.get("google_access_token"):
         raise HTTPException(status_code=400, detail="No Google tokens found — user must re-authorize")
 
-    async def _run():
-        from services.google_ingestion import run_full_ingestion
-        from services.intelligence import build_people_graph
-        ingestion_data = await run_full_ingestion(body.user_id, access_token, refresh_token)
-        build_people_graph(body.user_id, ingestion_data)
-        logger.info(f"Manual ingestion complete for user {body.user_id}")
-
-    background_tasks.add_task(_run)
+    job_queue.enqueue("ingestion.manual", user_id=body.user_id)
     return {"status": "ingestion started", "user_id": body.user_id}
+
+
+@job_queue.handler("ingestion.manual", queue="ingestion", priority=job_queue.PRIORITY_BACKFILL, max_attempts=3)
+async def _run_manual_ingestion(user_id: str) -> None:
+    """Job: Google ingestion + People Graph build. Tokens are read at run time, never queued."""
+    from services.google_ingestion import run_full_ingestion, get_valid_google_tokens
+    from services.intelligence import build_people_graph
+    tokens = get_valid_google_tokens(user_id)
+    if not tokens:
+        logger.error(f"Manual ingestion skipped for user {user_id}: no valid Google tokens")
+        return
+    ingestion_data = await run_full_ingestion(user_id, *tokens)
+    await asyncio.to_thread(build_people_graph, user_id, ingestion_data)
+    logger.info(f"Manual ingestion complete for user {user_id}")
@@ -9,6 +9,7 @@ GET /invites/{token} — Invitee taps the link.
   Shows a consent + Google sign-in page.
   When they sign in, their own Genie is born.
 """
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import HTMLResponse
@@ -81,7 +82,8 @@ async def send_invite_to_person(body: InviteRequest):
         personal_hook = memories[0].get("description", "")
 
     # Claude writes the invite message in Leo's voice
-    claude_message = generate_invite_message(
+    claude_message = await asyncio.to_thread(
+        generate_invite_message,
         inviter_name=inviter_name,
         invitee_name=invitee_name,
         pre_built_graph=pre_built_graph,
@@ -8,11 +8,11 @@ and full conversation history.
 Also runs the 30-minute batch processor that analyzes new messages
 and updates the People Graph.
 """
+import asyncio
 import logging
 from typing import List, Optional
-from fastapi import APIRouter, BackgroundTasks, Request
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
-from anthropic import Anthropic
 import database as db
 from services.intelligence import analyze_messages, analyze_imessage_conversation
 from services.nutrition import (
@@ -26,18 +26,27 @@ from services.nutrition import (
 )
 from fastapi import HTTPException
 from config import get_settings
+from services import job_queue, llm_gateway
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 router = APIRouter(prefix="/messages", tags=["messages"])
 
-_anthropic = Anthropic(api_key=settings.anthropic_api_key)
+_anthropic = llm_gateway.async_client("conversation")
 
 # In-memory conversation history per user — last 20 turns
 # Also tracks the last moment Genie surfaced so replies are contextual
 _conversation_history: dict = {}    # user_id -> list of {role, content}
 _last_moment_sent: dict = {}         # user_id -> {person_name, suggestion, triggered_by}
 _health_session_active: dict = {}    # user_id -> bool — True when awaiting training session voice note
+_background_tasks: set = set()       # in-process work on text that is never stored
+
+
+def _in_background(coro) -> None:
+    """Run coro after the reply; its inputs stay in memory, so it is lost on restart."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
 
 def set_health_session_active(user_id: str, active: bool) -> None:
@@ -57,9 +66,12 @@ def set_last_moment(user_id: str, person_name: str, suggestion: str, triggered_b
     }
 
 
-async def handle_conversation(user_id: str, phone: str, user_message: str) -> str:
+async def handle_conversation(user_id: str, phone: str, user_message: str,
+                              message_id: Optional[str] = None) -> str:
     """
     Handle an incoming WhatsApp message and generate Genie's reply.
+    message_id is the stored messages row, if there is one; background work
+    on it is queued by id, so the text is never written to the job queue.
 
     Routing order (checked before the main Claude conversation):
     1. Learning question answer — if Genie is waiting for a reply, capture it
@@ -94,7 +106,7 @@ async def handle_conversation(user_id: str, phone: str, user_message: str) -> st
     if is_food_intent(user_message):
         try:
             tz_offset = 0
-            parsed = parse_food_input(user_message, "text")
+            parsed = await asyncio.to_thread(parse_food_input, user_message, "text")
             daily = store_food_log(user_id, user_message, parsed, "text", tz_offset)
             days = get_days_logging(user_id)
             ack = build_acknowledgment(parsed, daily, days)
@@ -124,8 +136,6 @@ async def handle_conversation(user_id: str, phone: str, user_message: str) -> st
 
     # ── Relationship conversation agent ──────────────────────────────────────
     from services.emotional_state import get_tone_modifier
-    from services.interests import extract_from_message
-    import asyncio
 
     user = db.get_user_by_id(user_id)
     user_name = user.get("name", "there") if user else "there"
@@ -140,7 +150,6 @@ async def handle_conversation(user_id: str, phone: str, user_message: str) -> st
         logger.warning("World Model assembly failed, falling back to basic context: %s", _wm_err)
         # Fallback: build basic context manually
         people = db.get_people_for_user(user_id)
-        moments = db.get_moments_for_user(user_id)
         people_lines = []
         for p in people[:10]:
             memories = p.get("memories", [])
@@ -151,23 +160,23 @@ async def handle_conversation(user_id: str, phone: str, user_message: str) -> st
             people_lines.append(line)
         world_model_context = "Relationships:\n" + ("\n".join(people_lines) or "Still learning...")
 
-    # ── Extract third-party signals from this message (fire-and-forget) ──────
+    # ── Extract third-party signals from this message (non-blocking) ──────
     try:
-        from services.signal_extractor import extract_signals_from_message
+        from services.signal_extractor import submit_signals, extract_signals, CONVERSATION
         # participants = just this user (we're extracting signals about third parties)
-        asyncio.create_task(
-            extract_signals_from_message(
-                source_user_id=user_id,
-                message_text=user_message,
-                participants=[user_name],
-            )
-        )
+        if message_id:
+            submit_signals(user_id, [{"id": message_id, "body": user_message}], [user_name], lane=CONVERSATION)
+        else:
+            _in_background(extract_signals(user_id, [user_message], [user_name]))
     except Exception:
         pass
 
     # Extract interests from this message (non-blocking)
     try:
-        extract_from_message(user_id, user_message)
+        if message_id:
+            job_queue.enqueue("interests.extract_message", user_id=user_id, message_id=message_id)
+        else:
+            _in_background(asyncio.to_thread(_extract_interests, user_id, message=user_message))
     except Exception:
         pass
 
@@ -192,7 +201,7 @@ async def handle_conversation(user_id: str, phone: str, user_message: str) -> st
             f"this is what they're referring to."
         )
     else:
-        moments = db.get_moments_for_user(user_id)
+        moments = db.get_moments_for_user(user_id, limit=1)
         top_moment = moments[0] if moments else None
         if top_moment:
             person_data = top_moment.get("people") or {}
@@ -233,7 +242,7 @@ Rules:
         history = history[-20:]
 
     try:
-        response = _anthropic.messages.create(
+        response = await _anthropic.messages.create(
             model=settings.claude_model,
             max_tokens=300,
             system=system_prompt,
@@ -271,7 +280,7 @@ class IMessageImportRequest(BaseModel):
 
 
 @router.post("/import/imessage")
-async def import_imessage(payload: IMessageImportRequest, background_tasks: BackgroundTasks):
+async def import_imessage(payload: IMessageImportRequest):
     """
     Receive iMessage conversations exported from the local Mac script and
     analyze each one in the background to enrich the People Graph.
@@ -279,12 +288,9 @@ async def import_imessage(payload: IMessageImportRequest, background_tasks: Back
     The Mac script (tools/imessage_export.py) reads ~/Library/Messages/chat.db,
     resolves contact names via Contacts.app, and POSTs here.
     """
-    # Kick off analysis for each conversation — non-blocking
-    background_tasks.add_task(
-        _process_imessage_import,
-        user_id=payload.user_id,
-        conversations=[c.dict() for c in payload.conversations],
-    )
+    # Analyse every conversation in the background. Not on the job queue:
+    # the messages are never stored, and a job payload would write them to disk
+    _in_background(_process_imessage_import(payload.user_id, [c.dict() for c in payload.conversations]))
     return {
         "status": "queued",
         "conversations": len(payload.conversations),
@@ -292,17 +298,18 @@ async def import_imessage(payload: IMessageImportRequest, background_tasks: Back
     }
 
 
+# Still registered so imports queued before they moved off the job queue drain
+@job_queue.handler("imessage.import", queue="ingestion", priority=job_queue.PRIORITY_BACKFILL)
 async def _process_imessage_import(user_id: str, conversations: list) -> None:
     """
-    Background task: run Claude analysis on each iMessage conversation.
-    Runs sequentially to avoid hammering the Anthropic API.
+    Run Claude analysis on each iMessage conversation.
+    Runs sequentially, off the event loop; the LLM gateway paces the Claude calls.
     """
-    import asyncio
-
     results = []
     for conv in conversations:
         try:
-            result = analyze_imessage_conversation(
+            result = await asyncio.to_thread(
+                analyze_imessage_conversation,
                 user_id=user_id,
                 contact_name=conv["contact_name"],
                 contact_identifier=conv["contact_identifier"],
@@ -313,15 +320,23 @@ async def _process_imessage_import(user_id: str, conversations: list) -> None:
             logger.error(f"iMessage analysis failed for {conv['contact_name']}: {e}")
             results.append({"contact": conv["contact_name"], "status": "error", "error": str(e)})
 
-        # Small pause between Claude calls to stay within rate limits
-        await asyncio.sleep(1)
-
     logger.info(
         f"iMessage import complete for user {user_id}: "
         f"{sum(1 for r in results if r['status'] == 'ok')}/{len(results)} conversations analysed"
     )
 
 
+@job_queue.handler("interests.extract_message", queue="conversation")
+def _extract_interests(user_id: str, message_id: Optional[str] = None, message: Optional[str] = None) -> list:
+    """Job: pull interests out of one stored message, loaded by id (message: text never stored)."""
+    from services.interests import extract_from_message
+    if message_id:
+        message = db.get_message_bodies(user_id, [message_id]).get(message_id)
+    if not message:
+        return []
+    return extract_from_message(user_id, message)
+
+
 class IosChatRequest(BaseModel):
     user_id: str
     message: str
@@ -359,7 +374,7 @@ async def process_message_batch(user_id: str):
     if not messages:
         return {"status": "no_messages"}
 
-    extracted = analyze_messages(user_id, messages)
+    extracted = await asyncio.to_thread(analyze_messages, user_id, messages)
     db.mark_messages_processed([m["id"] for m in messages])
 
     return {"status": "processed", "count": len(messages), "extracted": extracted}
@@ -1,10 +1,13 @@
 """
 routers/people.py — People Graph API for the iOS app.
 """
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Header
 from typing import Optional
 import database as db
+from core import person_index
+from core.world_model import invalidate_world_model
 from policy_engine.guard import check, PolicyViolationError
+from services import job_queue
 
 router = APIRouter(prefix="/people", tags=["people"])
 
@@ -85,58 +88,105 @@ async def update_person(user_id: str, person_id: str, updates: dict,
     except PolicyViolationError as e:
         raise HTTPException(status_code=403, detail=str(e))
     db.get_db().table("people").update(updates).eq("id", person_id).execute()
+    invalidate_world_model(user_id, "people")
+    person_index.invalidate(user_id)
     return {"status": "updated"}
 
 
 @router.post("/{user_id}/rebuild")
-async def rebuild_graph(user_id: str, background_tasks: BackgroundTasks):
-    """Re-run the People Graph build using stored Google tokens. Clears existing graph first."""
+async def rebuild_graph(user_id: str, full: bool = False):
+    """
+    Refresh the People Graph from Google using stored tokens. By default only
+    contacts changed since the last sync (edited, added, or emailed since)
+    are re-read and rebuilt; full=true clears the graph and rebuilds it from
+    a complete re-read of Gmail and Contacts.
+
+    Contacts deleted in Google are dropped from the synced contacts either
+    way, but only full=true removes them from the People Graph: a person is
+    matched by name and may also come from Gmail, iMessage or WhatsApp, so
+    a deleted contact alone isn't taken as a reason to remove them.
+    """
     user = db.get_db().table("users").select("*").eq("id", user_id).execute()
     if not user.data:
         raise HTTPException(status_code=404, detail="User not found")
     user_data = user.data[0]
-    access_token = user_data.get("google_access_token")
-    refresh_token = user_data.get("google_refresh_token")
-    if not access_token:
+    if not user_data.get("google_access_token"):
         raise HTTPException(status_code=400, detail="No Google tokens — user must re-authenticate")
 
-    background_tasks.add_task(_do_rebuild, user_id, access_token, refresh_token)
-    return {"status": "rebuilding", "user_id": user_id}
+    job_queue.enqueue("people.rebuild", user_id=user_id, full=full)
+    return {"status": "rebuilding", "user_id": user_id, "full": full}
 
 
-async def _do_rebuild(user_id: str, access_token: str, refresh_token: str):
+@job_queue.handler("people.rebuild", queue="ingestion", priority=job_queue.PRIORITY_BACKFILL, max_attempts=3)
+async def _do_rebuild(user_id: str, full: bool = False):
+    import asyncio
     import logging
-    from services.google_ingestion import run_full_ingestion, get_valid_google_tokens
+    from services.google_ingestion import run_full_ingestion, run_incremental_ingestion, get_valid_google_tokens
     from services.intelligence import build_people_graph
     from services.life_events import extract_from_contacts, extract_life_events_for_user
     logger = logging.getLogger(__name__)
     try:
-        # Always refresh tokens before a rebuild — stored token may be stale
+        # Always refresh tokens before a rebuild — stored token may be stale.
+        # Read here rather than carried in the job so tokens never sit in the queue.
         tokens = get_valid_google_tokens(user_id)
-        if tokens:
-            access_token, refresh_token = tokens
-
-        # Clear moments first (FK constraint), then people, then life events
-        db.get_db().table("moments").delete().eq("owner_user_id", user_id).execute()
-        db.get_db().table("life_events").delete().eq("owner_user_id", user_id).execute()
-        db.get_db().table("people").delete().eq("owner_user_id", user_id).execute()
-        logger.info(f"Cleared graph for user {user_id}, rebuilding...")
-
-        ingestion_data = await run_full_ingestion(user_id, access_token, refresh_token)
-        people = build_people_graph(user_id, ingestion_data)
+        if not tokens:
+            user = db.get_user_by_id(user_id) or {}
+            tokens = user.get("google_access_token"), user.get("google_refresh_token")
+        access_token, refresh_token = tokens
+        if not access_token:
+            logger.error(f"Rebuild skipped for user {user_id}: no Google tokens")
+            return
+
+        if full:
+            # Clear moments first (FK constraint), then people, then life events
+            db.get_db().table("moments").delete().eq("owner_user_id", user_id).execute()
+            invalidate_world_model(user_id, "moments")
+            db.get_db().table("life_events").delete().eq("owner_user_id", user_id).execute()
+            db.get_db().table("people").delete().eq("owner_user_id", user_id).execute()
+            invalidate_world_model(user_id, "people")
+            person_index.invalidate(user_id)
+            logger.info(f"Cleared graph for user {user_id}, rebuilding...")
+            ingestion_data = await run_full_ingestion(user_id, access_token, refresh_token, full=True)
+        else:
+            ingestion_data = await run_incremental_ingestion(user_id, access_token, refresh_token)
+            if ingestion_data["deleted_contacts"]:
+                # Left in the graph until a full rebuild — see rebuild_graph
+                logger.info(f"Rebuild for user {user_id}: {len(ingestion_data['deleted_contacts'])} "
+                            f"contacts deleted in Google stay in the graph until ?full=true")
+            if not (ingestion_data["contacts"]["contacts"] or ingestion_data["gmail"]["frequent_contacts"]):
+                logger.info(f"Rebuild for user {user_id}: nothing changed in Google since the last sync")
+                return
+
+        # People are upserted by name, so a partial build refreshes just those people
+        people = await asyncio.to_thread(build_people_graph, user_id, ingestion_data)
 
         # Re-extract life events after rebuild
         contacts = ingestion_data.get("contacts", {}).get("contacts", [])
-        extract_from_contacts(user_id, contacts)
-        extract_life_events_for_user(user_id)
+        await asyncio.to_thread(extract_from_contacts, user_id, contacts)
+        await asyncio.to_thread(extract_life_events_for_user, user_id)
 
-        logger.info(f"Rebuilt graph: {len(people)} people for user {user_id}")
+        logger.info(f"Rebuilt graph ({'full' if full else 'changed contacts'}): "
+                    f"{len(people)} people for user {user_id}")
     except Exception as e:
         logger.error(f"Rebuild failed for user {user_id}: {e}")
+        raise
+
+
+MOMENTS_PAGE_MAX = 50
 
 
 @router.get("/{user_id}/moments")
-async def get_moments(user_id: str, x_user_id: str | None = None):
-    """Get pending moments for the iOS app home screen."""
-    moments = db.get_moments_for_user(user_id)
-    return {"moments": moments[:5]}  # top 5 for the app
+async def get_moments(user_id: str, x_user_id: str | None = None, limit: int = 5, cursor: Optional[str] = None):
+    """
+    Get pending moments for the iOS app home screen, best first — top 5 by
+    default. Pass next_cursor back as cursor for the following page; it is
+    null on the last one.
+    """
+    limit = max(1, min(limit, MOMENTS_PAGE_MAX))
+    try:
+        moments = db.get_moments_for_user(user_id, limit=limit + 1, after=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page = moments[:limit]
+    next_cursor = db.moment_cursor(page[-1]) if len(moments) > limit else None
+    return {"moments": page, "next_cursor": next_cursor}
@@ -14,6 +14,7 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
 from routers.auth import verify_app_token
+from core.world_model import invalidate_world_model
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/permissions", tags=["permissions"])
@@ -72,7 +73,7 @@ async def grant_permission(request: Request, body: GrantRequest):
     phone_hash = _hash_phone(body.beneficiary_phone)
 
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
 
         # Check if beneficiary is already a Genie user
@@ -98,6 +99,7 @@ async def grant_permission(request: Request, body: GrantRequest):
         # If beneficiary is a user, mark their World Model stale
         if beneficiary_user_id:
             db.table("world_model").update({"is_stale": True}).eq("user_id", beneficiary_user_id).execute()
+            invalidate_world_model(beneficiary_user_id, "cross_user_permissions")
 
     except Exception as exc:
         logger.error("Failed to grant permission: %s", exc)
@@ -123,7 +125,7 @@ async def revoke_permission(request: Request, body: RevokeRequest):
     phone_hash = _hash_phone(body.beneficiary_phone)
 
     try:
-        from db import get_db
+        from database import get_db
         from datetime import datetime, timezone
         db = get_db()
 
@@ -131,6 +133,11 @@ async def revoke_permission(request: Request, body: RevokeRequest):
             "revoked_at": datetime.now(timezone.utc).isoformat(),
         }).eq("granting_user_id", user_id).eq("beneficiary_phone_hash", phone_hash).execute()
 
+        # Revocation must take effect on the beneficiary's very next conversation
+        beneficiary = db.table("users").select("id").eq("phone", body.beneficiary_phone).execute()
+        if beneficiary.data:
+            invalidate_world_model(beneficiary.data[0]["id"], "cross_user_permissions")
+
     except Exception as exc:
         logger.error("Failed to revoke permission: %s", exc)
         raise HTTPException(status_code=500, detail="Could not revoke permission")
@@ -148,7 +155,7 @@ async def list_outbound_permissions(request: Request):
     user_id = _get_user_id(request)
 
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
 
         result = (
@@ -187,7 +194,7 @@ async def signal_counts(request: Request):
     user_id = _get_user_id(request)
 
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
 
         result = (
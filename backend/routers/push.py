@@ -167,7 +167,7 @@ async def send_push_to_user(
     Automatically deactivates tokens that APNs reports as Gone (410).
     Can be imported and awaited by rule_engine.py and nightly_conversations.py.
     """
-    from db import get_db
+    from database import get_db
     supabase = get_db()
 
     result = (
@@ -228,7 +228,7 @@ async def register_token(request: Request, body: RegisterTokenRequest):
         raise HTTPException(status_code=400, detail="device_token is required")
 
     try:
-        from db import get_db
+        from database import get_db
         supabase = get_db()
         supabase.table("push_tokens").upsert(
             {
@@ -257,7 +257,7 @@ async def deactivate_token(user_id: str, request: Request):
     _get_user_id(request)  # auth check
 
     try:
-        from db import get_db
+        from database import get_db
         supabase = get_db()
         supabase.table("push_tokens").update({"is_active": False}).eq("user_id", user_id).execute()
     except Exception as exc:
@@ -292,7 +292,7 @@ async def list_tokens(user_id: str, request: Request):
     _get_user_id(request)  # auth check
 
     try:
-        from db import get_db
+        from database import get_db
         supabase = get_db()
         result = (
             supabase.table("push_tokens")
@@ -73,8 +73,8 @@ async def _parse_rule_with_claude(natural_language: str) -> dict:
     action_type, action_config.
     """
     settings = get_settings()
-    import anthropic
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+    from services import llm_gateway
+    client = llm_gateway.async_client("rules")
 
     trigger_list = ", ".join(TRIGGER_TYPES)
     action_list  = ", ".join(ACTION_TYPES)
@@ -109,7 +109,7 @@ Examples:
   action_type: "notify_ios", action_config: {{"message": "It's been 2 weeks since you connected with Alice."}}
 """
 
-    msg = client.messages.create(
+    msg = await client.messages.create(
         model=settings.claude_model,
         max_tokens=400,
         messages=[{"role": "user", "content": prompt}],
@@ -132,7 +132,7 @@ Examples:
 async def list_rules(user_id: str, request: Request):
     _get_user_id(request)  # auth check
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
         result = (
             db.table("genie_rules")
@@ -173,7 +173,7 @@ async def create_rule(request: Request, body: CreateRuleRequest):
     }
 
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
         db.table("genie_rules").insert(rule_row).execute()
     except Exception as exc:
@@ -191,7 +191,7 @@ async def create_rule(request: Request, body: CreateRuleRequest):
 async def delete_rule(rule_id: str, request: Request, body: DeleteRuleRequest):
     _get_user_id(request)
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
         db.table("genie_rules").update({"is_active": False}).eq("id", rule_id).eq("user_id", body.user_id).execute()
     except Exception as exc:
@@ -26,6 +26,7 @@ from pydantic import BaseModel
 from config import get_settings
 from services.spotify_client import SpotifyClient, REQUIRED_SCOPES, SPOTIFY_ACCOUNTS
 from routers.auth import verify_app_token
+from core.world_model import invalidate_world_model
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/spotify", tags=["spotify"])
@@ -145,7 +146,7 @@ async def spotify_callback(
 
     # Save to DB
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
         db.table("music_connections").upsert({
             "user_id": user_id,
@@ -157,6 +158,7 @@ async def spotify_callback(
             "provider_user_id": spotify_user_id,
             "display_name": display_name,
         }).execute()
+        invalidate_world_model(user_id, "music_connections")
     except Exception as exc:
         logger.error("Could not save Spotify connection for %s: %s", user_id, exc)
         raise HTTPException(status_code=500, detail="Could not save connection")
@@ -176,7 +178,7 @@ async def spotify_connected():
 async def spotify_status(request: Request):
     user_id = _get_user_id(request)
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
         row = (
             db.table("music_connections")
@@ -203,9 +205,10 @@ async def spotify_status(request: Request):
 async def spotify_disconnect(request: Request):
     user_id = _get_user_id(request)
     try:
-        from db import get_db
+        from database import get_db
         db = get_db()
         db.table("music_connections").delete().eq("user_id", user_id).eq("provider", "spotify").execute()
+        invalidate_world_model(user_id, "music_connections")
     except Exception as exc:
         logger.warning("Could not delete Spotify connection for %s: %s", user_id, exc)
     return {"status": "disconnected"}
@@ -5,6 +5,7 @@ POST /voice/upload — accepts audio from the iOS app,
 transcribes it with Whisper, extracts relationship intelligence with Claude,
 updates Supabase, and sends a WhatsApp confirmation.
 """
+import asyncio
 import logging
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 import database as db
@@ -70,12 +71,13 @@ async def upload_voice_note(
     logger.info(f"Processing voice note: {len(audio_bytes)} bytes about {person_name}")
 
     # Step 1: Transcribe with Whisper
-    transcript = transcribe_audio(audio_bytes, filename=audio.filename or "voice_note.m4a")
+    transcript = await asyncio.to_thread(transcribe_audio, audio_bytes, filename=audio.filename or "voice_note.m4a")
     if not transcript:
         raise HTTPException(status_code=500, detail="Transcription failed")
 
     # Step 2: Extract relationship intelligence with Claude
-    extracted = process_voice_note(
+    extracted = await asyncio.to_thread(
+        process_voice_note,
         user_id=user_id,
         person_name=person_name,
         transcript=transcript,
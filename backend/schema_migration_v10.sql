@@ -0,0 +1,26 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10
+-- Batched third-party signal usage counters
+-- 2026-10-16
+-- World Model assembly records which signals it injected with one
+-- RPC per assembly instead of one UPDATE per signal.
+-- ============================================================
+
+-- ------------------------------------------------------------
+-- increment_signal_usage
+-- Bumps used_count by one and stamps last_used_at for each id.
+-- Called in the background after a World Model is assembled.
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION increment_signal_usage(signal_ids UUID[], used_at TIMESTAMPTZ)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+  UPDATE third_party_signals
+     SET used_count   = COALESCE(used_count, 0) + 1,
+         last_used_at = used_at
+   WHERE id = ANY(signal_ids);
+$$;
+
+-- Permission lookups for a beneficiary now fetch every granting user at once
+CREATE INDEX IF NOT EXISTS idx_cup_beneficiary_granting
+  ON cross_user_permissions(beneficiary_phone_hash, granting_user_id);
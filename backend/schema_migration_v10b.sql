@@ -0,0 +1,17 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10b
+-- Person resolution columns
+-- 2026-10-16
+-- core/person_index.py resolves mentions by name, alias, phone
+-- and phone_hash. phone_hash has been written by the iMessage
+-- pipeline; aliases is new (nicknames, maiden names, "Mom").
+-- ============================================================
+
+ALTER TABLE people
+  ADD COLUMN IF NOT EXISTS phone_hash TEXT,
+  ADD COLUMN IF NOT EXISTS aliases TEXT[] DEFAULT '{}';
+
+-- Cross-user matching looks people up by phone hash
+CREATE INDEX IF NOT EXISTS idx_people_owner_phone_hash
+  ON people(owner_user_id, phone_hash)
+  WHERE phone_hash IS NOT NULL;
@@ -0,0 +1,28 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10c
+-- Bulk people upsert key
+-- 2026-10-16
+-- database.upsert_people_bulk() saves a whole People Graph with
+-- one INSERT ... ON CONFLICT (owner_user_id, name) DO UPDATE,
+-- which needs a unique index on exactly those columns.
+-- ============================================================
+
+-- Existing duplicate names (written before upserts were keyed)
+-- would make the index fail. Skip it and say which owners need
+-- merging; until then upsert_people_bulk falls back to one
+-- upsert per person.
+DO $$
+DECLARE
+  dupes INTEGER;
+BEGIN
+  SELECT COUNT(*) INTO dupes FROM (
+    SELECT owner_user_id, name FROM people
+     GROUP BY owner_user_id, name HAVING COUNT(*) > 1
+  ) d;
+  IF dupes = 0 THEN
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_people_owner_name
+      ON people(owner_user_id, name);
+  ELSE
+    RAISE NOTICE 'idx_people_owner_name not created: % duplicate (owner_user_id, name) pairs', dupes;
+  END IF;
+END $$;
@@ -0,0 +1,81 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10d
+-- Incremental Gmail + Google Contacts sync
+-- 2026-10-16
+-- services/google_ingestion.py keeps each user's Gmail historyId
+-- and People API syncToken, the contacts it has read and running
+-- per-recipient sent-mail counts, so a rebuild fetches only what
+-- changed since the last sync instead of re-reading everything.
+-- ============================================================
+
+-- ------------------------------------------------------------
+-- google_sync_state
+-- One row per user. A NULL cursor means the next sync of that
+-- source is a full read (first run, expired cursor, full rebuild).
+-- ------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS google_sync_state (
+    user_id             UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    gmail_history_id    TEXT,
+    -- users.history.list startHistoryId for the next Gmail sync
+    contacts_sync_token TEXT,
+    -- people.connections.list syncToken for the next Contacts sync
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- ------------------------------------------------------------
+-- google_contacts
+-- The user's Google Contacts as last synced, keyed on the People
+-- API resourceName. Emails are lowercased so sent-mail counts can
+-- be matched back to contacts with an array overlap.
+-- ------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS google_contacts (
+    owner_user_id       UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    resource_name       TEXT NOT NULL,
+    -- e.g. "people/c1234567890"
+    name                TEXT NOT NULL,
+    emails              TEXT[] NOT NULL DEFAULT '{}',
+    phones              TEXT[] NOT NULL DEFAULT '{}',
+    birthday            TEXT,
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (owner_user_id, resource_name)
+);
+
+-- ------------------------------------------------------------
+-- gmail_contact_stats
+-- Sent-mail aggregates per recipient, added to on every sync.
+-- recent_subjects is newest first, capped at 10.
+-- ------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS gmail_contact_stats (
+    owner_user_id       UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    email               TEXT NOT NULL,
+    email_count         INTEGER NOT NULL DEFAULT 0,
+    recent_subjects     TEXT[] NOT NULL DEFAULT '{}',
+    updated_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (owner_user_id, email)
+);
+
+-- ------------------------------------------------------------
+-- Row Level Security
+-- ------------------------------------------------------------
+ALTER TABLE google_sync_state ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can manage own google_sync_state"
+    ON google_sync_state FOR ALL
+    USING (auth.uid() = user_id);
+
+ALTER TABLE google_contacts ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can manage own google_contacts"
+    ON google_contacts FOR ALL
+    USING (auth.uid() = owner_user_id);
+
+ALTER TABLE gmail_contact_stats ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Users can manage own gmail_contact_stats"
+    ON gmail_contact_stats FOR ALL
+    USING (auth.uid() = owner_user_id);
+
+-- ------------------------------------------------------------
+-- Indexes
+-- ------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_google_contacts_emails
+    ON google_contacts USING GIN (emails);
+CREATE INDEX IF NOT EXISTS idx_gmail_contact_stats_top
+    ON gmail_contact_stats(owner_user_id, email_count DESC);
@@ -0,0 +1,46 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10e
+-- Per-place Maps aggregates
+-- 2026-10-16
+-- services/maps_processor.py now folds a whole Takeout timeline
+-- into one row per place and writes them with a single
+-- INSERT ... ON CONFLICT (user_id, place_name) DO UPDATE, so the
+-- table needs that unique key and columns for the new totals.
+-- ============================================================
+
+-- ------------------------------------------------------------
+-- place_visits
+-- One row per (user, place). visit_count, dwell_minutes and the
+-- first / last visit are totals over the last import; lat / lng
+-- are the centroid of the visits that had coordinates.
+-- ------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS place_visits (
+    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    place_name      TEXT NOT NULL,
+    place_type      TEXT,
+    visit_count     INTEGER NOT NULL DEFAULT 0,
+    last_visited    TIMESTAMPTZ,
+    lat             DOUBLE PRECISION,
+    lng             DOUBLE PRECISION,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE place_visits
+  ADD COLUMN IF NOT EXISTS address TEXT,
+  ADD COLUMN IF NOT EXISTS dwell_minutes INTEGER NOT NULL DEFAULT 0,
+  -- total minutes spent there across all visits
+  ADD COLUMN IF NOT EXISTS first_visited TIMESTAMPTZ,
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_place_visits_user_place
+    ON place_visits(user_id, place_name);
+
+-- ------------------------------------------------------------
+-- Row Level Security
+-- ------------------------------------------------------------
+ALTER TABLE place_visits ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Users can manage own place_visits" ON place_visits;
+CREATE POLICY "Users can manage own place_visits"
+    ON place_visits FOR ALL
+    USING (auth.uid() = user_id);
@@ -0,0 +1,66 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10f
+-- Idempotent calendar sync
+-- 2026-10-16
+-- services/icalendar_processor.py used to upsert every synced
+-- event under a fresh uuid4, so each re-sync inserted another
+-- copy. Events are now keyed on (user_id, source_uid,
+-- recurrence_id) with a content hash, so a re-sync only writes
+-- what changed and deletes what disappeared.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS calendar_events (
+    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    title           TEXT NOT NULL DEFAULT '',
+    description     TEXT,
+    start_time      TIMESTAMPTZ,
+    end_time        TIMESTAMPTZ,
+    calendar_name   TEXT,
+    work_filtered   BOOLEAN NOT NULL DEFAULT FALSE,
+    attendees       JSONB NOT NULL DEFAULT '[]',
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE calendar_events
+  ADD COLUMN IF NOT EXISTS source_uid TEXT,
+  -- EKEvent calendarItemExternalIdentifier / iCalendar UID, or
+  -- "derived:<sha1>" of calendar, title and start for older app builds
+  ADD COLUMN IF NOT EXISTS recurrence_id TEXT NOT NULL DEFAULT '',
+  -- '' for single events; the occurrence start for a recurring instance
+  ADD COLUMN IF NOT EXISTS content_hash TEXT;
+  -- sha256 of the synced fields; equal hash = nothing to do
+
+-- Rows written before this migration have no key. Give each a
+-- "legacy:" key from an md5 of calendar, title and start, with
+-- a ":<n>" suffix on the extra copies a re-sync inserted, so the
+-- unique index below holds and no row is lost. These keys never
+-- match what the app sends, so the next sync of that calendar
+-- replaces them with keyed rows; users who don't sync again keep
+-- them as they are. The only writer (ICalendarProcessor._event_row)
+-- always sets source_uid, so nothing inserts NULL after this.
+WITH keyed AS (
+  SELECT id, user_id, created_at,
+         'legacy:' || md5(concat_ws(chr(31), calendar_name, title, start_time::TEXT)) AS uid
+    FROM calendar_events
+   WHERE source_uid IS NULL
+),
+legacy AS (
+  SELECT id, uid,
+         row_number() OVER (PARTITION BY user_id, uid ORDER BY created_at, id) AS copy
+    FROM keyed
+)
+UPDATE calendar_events c
+   SET source_uid = CASE WHEN l.copy = 1 THEN l.uid ELSE l.uid || ':' || l.copy END
+  FROM legacy l
+ WHERE c.id = l.id;
+
+ALTER TABLE calendar_events ALTER COLUMN source_uid SET NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_calendar_events_source
+    ON calendar_events(user_id, source_uid, recurrence_id);
+
+-- Upcoming personal events (World Model, rule engine)
+CREATE INDEX IF NOT EXISTS idx_calendar_events_upcoming
+    ON calendar_events(user_id, start_time)
+    WHERE work_filtered = FALSE;
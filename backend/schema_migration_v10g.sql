@@ -0,0 +1,97 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10g
+-- Day-of-year life-event index
+-- 2026-10-16
+-- The nightly life-events check used to load every user's
+-- life_events, re-parse each date in Python and query moments
+-- once per candidate. Events now carry their month and day as
+-- generated columns, and due_life_events() returns every event
+-- in the lead window across all users in one indexed query,
+-- minus those that already have a recent moment.
+-- ============================================================
+
+-- ------------------------------------------------------------
+-- life_events: month / day of the event date
+-- Generated, so every writer (People Graph build, contacts,
+-- iMessage and calendar ingestion) gets them without changes.
+-- ------------------------------------------------------------
+ALTER TABLE life_events
+  ADD COLUMN IF NOT EXISTS event_month SMALLINT
+    GENERATED ALWAYS AS (EXTRACT(MONTH FROM date)::SMALLINT) STORED,
+  ADD COLUMN IF NOT EXISTS event_day SMALLINT
+    GENERATED ALWAYS AS (EXTRACT(DAY FROM date)::SMALLINT) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_life_events_annual_month_day
+  ON life_events(event_month, event_day)
+  WHERE is_annual AND person_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_life_events_one_off_date
+  ON life_events(date)
+  WHERE NOT is_annual AND person_id IS NOT NULL;
+
+-- The anti-join below probes this for every due event
+CREATE INDEX IF NOT EXISTS idx_moments_owner_person_trigger
+  ON moments(owner_user_id, person_id, triggered_by, created_at DESC);
+
+-- ------------------------------------------------------------
+-- due_life_events
+-- Every event falling within its lead window (birthdays
+-- p_birthday_lead days ahead, everything else p_other_lead)
+-- whose person has no life_event moment in the last 7 days.
+-- Annual events match on month/day; Feb 29 falls on Mar 1 in
+-- other years. p_user_id limits it to one user.
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION due_life_events(
+  p_today          DATE,
+  p_birthday_lead  INT,
+  p_other_lead     INT,
+  p_user_id        UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  id             UUID,
+  owner_user_id  UUID,
+  person_id      UUID,
+  event_type     TEXT,
+  title          TEXT,
+  days_away      INT
+)
+LANGUAGE sql STABLE
+AS $$
+  WITH window_days AS (
+    SELECT d::DATE AS day,
+           (d::DATE - p_today) AS days_away,
+           EXTRACT(MONTH FROM d)::SMALLINT AS month,
+           EXTRACT(DAY FROM d)::SMALLINT AS dom
+      FROM generate_series(p_today, p_today + GREATEST(p_birthday_lead, p_other_lead), INTERVAL '1 day') d
+  ),
+  candidates AS (
+    SELECT e.id, e.owner_user_id, e.person_id, e.event_type, e.title, w.days_away
+      FROM window_days w
+      JOIN life_events e
+        ON e.is_annual
+       AND e.person_id IS NOT NULL
+       AND (
+             (e.event_month = w.month AND e.event_day = w.dom)
+          OR (e.event_month = 2 AND e.event_day = 29 AND w.month = 3 AND w.dom = 1
+              AND EXTRACT(DAY FROM make_date(EXTRACT(YEAR FROM w.day)::INT, 3, 1) - 1) = 28)
+           )
+    UNION ALL
+    SELECT e.id, e.owner_user_id, e.person_id, e.event_type, e.title, (e.date - p_today)
+      FROM life_events e
+     WHERE NOT e.is_annual
+       AND e.person_id IS NOT NULL
+       AND e.date BETWEEN p_today AND p_today + GREATEST(p_birthday_lead, p_other_lead)
+  )
+  SELECT c.id, c.owner_user_id, c.person_id, c.event_type, c.title, c.days_away
+    FROM candidates c
+   WHERE c.days_away <= CASE WHEN c.event_type = 'birthday' THEN p_birthday_lead ELSE p_other_lead END
+     AND (p_user_id IS NULL OR c.owner_user_id = p_user_id)
+     AND NOT EXISTS (
+           SELECT 1 FROM moments m
+            WHERE m.owner_user_id = c.owner_user_id
+              AND m.person_id = c.person_id
+              AND m.triggered_by = 'life_event'
+              AND m.created_at >= p_today - 7
+         )
+   ORDER BY c.owner_user_id, c.days_away;
+$$;
@@ -0,0 +1,87 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10h
+-- Set-based drift detection
+-- 2026-10-16
+-- The nightly drift job used to load every user's whole People
+-- Graph (memories and all), walk it in Python for the closest
+-- quiet person, then query moments once per hit. drifted_people()
+-- now returns that person for every user in one ranked query,
+-- minus anyone with a recent drift moment.
+-- ============================================================
+
+-- Quiet-person candidates per user, closest first. Partial so
+-- deceased people and people never heard from stay out of it.
+CREATE INDEX IF NOT EXISTS idx_people_drift
+  ON people(owner_user_id, closeness_score DESC, last_meaningful_exchange)
+  WHERE status IS DISTINCT FROM 'deceased' AND last_meaningful_exchange IS NOT NULL;
+
+-- The conversation_due probe below
+CREATE INDEX IF NOT EXISTS idx_genie_conversations_owner_person
+  ON genie_conversations(owner_user_id, person_id, created_at DESC);
+
+-- ------------------------------------------------------------
+-- drifted_people
+-- Per user with a phone: the highest-closeness living person
+-- whose last_meaningful_exchange is older than their threshold
+-- and who has no drift_detection moment in the last
+-- p_repeat_days. The threshold is p_days, except people at or
+-- above p_close_min use p_close_days and people below
+-- p_distant_max use p_distant_days — pass p_days for all three
+-- for a single threshold. conversation_due is false when a Genie
+-- conversation about the person started within
+-- p_conversation_gap_days. p_user_id limits it to one user.
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION drifted_people(
+  p_now                    TIMESTAMPTZ,
+  p_days                   INT,
+  p_close_days             INT,
+  p_close_min              REAL,
+  p_distant_days           INT,
+  p_distant_max            REAL,
+  p_repeat_days            INT,
+  p_conversation_gap_days  INT,
+  p_user_id                UUID DEFAULT NULL
+)
+RETURNS TABLE (
+  owner_user_id     UUID,
+  phone             TEXT,
+  person_id         UUID,
+  name              TEXT,
+  closeness_score   REAL,
+  days_silent       INT,
+  conversation_due  BOOLEAN
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT DISTINCT ON (p.owner_user_id)
+         p.owner_user_id,
+         u.phone,
+         p.id,
+         p.name,
+         p.closeness_score,
+         EXTRACT(DAY FROM (p_now AT TIME ZONE 'UTC') - p.last_meaningful_exchange)::INT,
+         NOT EXISTS (
+           SELECT 1 FROM genie_conversations g
+            WHERE g.owner_user_id = p.owner_user_id
+              AND g.person_id = p.id
+              AND g.created_at >= (p_now AT TIME ZONE 'UTC') - make_interval(days => p_conversation_gap_days)
+         )
+    FROM people p
+    JOIN users u ON u.id = p.owner_user_id
+   WHERE u.phone IS NOT NULL AND u.phone <> ''
+     AND p.status IS DISTINCT FROM 'deceased'
+     AND p.last_meaningful_exchange IS NOT NULL
+     AND (p_user_id IS NULL OR p.owner_user_id = p_user_id)
+     AND p.last_meaningful_exchange < (p_now AT TIME ZONE 'UTC') - make_interval(days =>
+           CASE WHEN p.closeness_score >= p_close_min THEN p_close_days
+                WHEN p.closeness_score < p_distant_max THEN p_distant_days
+                ELSE p_days END)
+     AND NOT EXISTS (
+           SELECT 1 FROM moments m
+            WHERE m.owner_user_id = p.owner_user_id
+              AND m.person_id = p.id
+              AND m.triggered_by = 'drift_detection'
+              AND m.created_at >= p_now - make_interval(days => p_repeat_days)
+         )
+   ORDER BY p.owner_user_id, p.closeness_score DESC NULLS LAST, p.last_meaningful_exchange;
+$$;
@@ -0,0 +1,64 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10i
+-- Ranked moments feed
+-- 2026-10-16
+-- get_moments_for_user used to read every pending moment with
+-- its person and sort them in Python by trigger, only for the
+-- callers to keep the first one to five. Moments now store their
+-- rank when saved (database.moment_priority), and the feed is an
+-- index scan with limit and keyset pagination.
+-- ============================================================
+
+-- 0 life_event, 1 drift_detection, 2 message_analysis,
+-- 3 voice_note, 4 google_ingestion, 5 other, 99 deceased person
+ALTER TABLE moments
+  ADD COLUMN IF NOT EXISTS priority_rank SMALLINT NOT NULL DEFAULT 5;
+
+-- Backfill from the same rules
+UPDATE moments
+   SET priority_rank = CASE triggered_by
+         WHEN 'life_event' THEN 0
+         WHEN 'drift_detection' THEN 1
+         WHEN 'message_analysis' THEN 2
+         WHEN 'voice_note' THEN 3
+         WHEN 'google_ingestion' THEN 4
+         ELSE 5
+       END;
+
+UPDATE moments m
+   SET priority_rank = 99
+  FROM people p
+ WHERE p.id = m.person_id
+   AND p.status = 'deceased';
+
+-- The feed: a user's pending moments in rank order, newest first
+-- within a rank; id breaks created_at ties for the keyset cursor
+CREATE INDEX IF NOT EXISTS idx_moments_feed
+  ON moments(owner_user_id, priority_rank, created_at DESC, id DESC)
+  WHERE status = 'pending';
+
+-- ------------------------------------------------------------
+-- A person marked deceased after their moments were saved:
+-- move those still pending to the end of the feed, as the old
+-- read-time check did.
+-- ------------------------------------------------------------
+CREATE OR REPLACE FUNCTION demote_moments_for_deceased()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE moments
+     SET priority_rank = 99
+   WHERE person_id = NEW.id
+     AND status = 'pending'
+     AND priority_rank <> 99;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_people_deceased_moments ON people;
+CREATE TRIGGER trg_people_deceased_moments
+  AFTER UPDATE OF status ON people
+  FOR EACH ROW
+  WHEN (NEW.status = 'deceased' AND OLD.status IS DISTINCT FROM 'deceased')
+  EXECUTE FUNCTION demote_moments_for_deceased();
@@ -0,0 +1,23 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10j
+-- Food-logging day counts for the rule engine
+-- 2026-10-16
+-- The habit_at_risk preload read every logged day of every
+-- habit user (up to 200 users per request), so PostgREST's
+-- max-rows cap cut it short and days_logging came out low.
+-- food_logging_days() counts in SQL: one row per user.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION food_logging_days(p_user_ids UUID[])
+RETURNS TABLE (
+  user_id  UUID,
+  days     BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT h.user_id, COUNT(DISTINCT h.summary_date)
+    FROM health_daily_summary h
+   WHERE h.user_id = ANY(p_user_ids)
+     AND h.total_calories > 0
+   GROUP BY h.user_id;
+$$;
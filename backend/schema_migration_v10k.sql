@@ -0,0 +1,27 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10k
+-- Drop plaintext callback words from stored DNA profiles
+-- 2026-10-16
+-- DNAStats used to keep up to 20,000 words from each thread in
+-- people.communication_dna_json -> stats.callback_presence.
+-- It now stores keyed hashes kept for 90 days at most, and
+-- discards the plaintext form when a profile is next folded.
+-- This clears it from profiles that won't be touched again.
+-- ============================================================
+
+DO $$
+BEGIN
+  IF (SELECT data_type FROM information_schema.columns
+       WHERE table_name = 'people' AND column_name = 'communication_dna_json') = 'jsonb' THEN
+    UPDATE people
+       SET communication_dna_json = communication_dna_json #- '{stats,callback_presence}'
+     WHERE communication_dna_json -> 'stats' ? 'callback_presence'
+       AND NOT communication_dna_json -> 'stats' ? 'callback_generation';
+  ELSE
+    UPDATE people
+       SET communication_dna_json = (communication_dna_json::jsonb #- '{stats,callback_presence}')::text
+     WHERE communication_dna_json LIKE '%"callback_presence"%'
+       AND communication_dna_json NOT LIKE '%"callback_generation"%';
+  END IF;
+END;
+$$;
@@ -0,0 +1,23 @@
+-- ============================================================
+-- PersonalGenie — Schema Migration v10l
+-- Per-stage progress on unprocessed messages
+-- 2026-10-16
+-- The message batch runs several analysis stages per batch and
+-- leaves the batch unprocessed when any one of them fails. The
+-- retry used to re-run every stage, applying the ones that had
+-- succeeded a second time. Those stages are now recorded on the
+-- messages and skipped when the batch is retried.
+-- ============================================================
+
+ALTER TABLE messages
+  ADD COLUMN IF NOT EXISTS stages_done TEXT[] NOT NULL DEFAULT '{}';
+
+CREATE OR REPLACE FUNCTION mark_messages_stage_done(p_ids UUID[], p_stage TEXT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+  UPDATE messages
+     SET stages_done = array_append(stages_done, p_stage)
+   WHERE id = ANY(p_ids)
+     AND NOT (p_stage = ANY(stages_done));
+$$;
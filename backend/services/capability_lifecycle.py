@@ -16,6 +16,7 @@ from typing import Optional
 
 import database as db
 from services.intelligence import _call_claude
+from services.job_runner import run_for_users
 
 logger = logging.getLogger(__name__)
 
@@ -98,8 +99,6 @@ class CapabilityLifecycleEngine:
         Run lifecycle evaluation for all consented users.
         Returns summary: {users_evaluated, areas_advanced, offers_sent}
         """
-        users_evaluated = 0
-        total_advanced = 0
         total_offers = 0
 
         try:
@@ -109,17 +108,15 @@ class CapabilityLifecycleEngine:
             logger.error(f"CapabilityLifecycle: could not load users: {e}")
             return {"users_evaluated": 0, "areas_advanced": 0, "offers_sent": 0}
 
-        for user in users:
-            user_id = user.get("id")
-            phone = user.get("phone", "")
-            if not user_id or not phone:
-                continue
-            users_evaluated += 1
-            try:
-                advanced = await self.evaluate_for_user(user_id, phone)
-                total_advanced += len(advanced)
-            except Exception as e:
-                logger.error(f"CapabilityLifecycle: error for user {user_id}: {e}")
+        eligible = [u for u in users if u.get("id") and u.get("phone")]
+        run = await run_for_users(
+            "capability_lifecycle", eligible, lambda u: self.evaluate_for_user(u["id"], u["phone"])
+        )
+        if run is None:
+            return {"users_evaluated": 0, "areas_advanced": 0, "offers_sent": 0, "skipped": True}
+
+        users_evaluated = len(eligible)
+        total_advanced = sum(len(advanced) for _, advanced in run.results)
 
         logger.info(
             f"CapabilityLifecycle: evaluated {users_evaluated} users, "
@@ -10,36 +10,52 @@ Storage: people.communication_dna_json (TEXT/JSONB column).
 Linguistic Intimacy Score (0.0–1.0) is computed from observable signals
 without calling Claude. Claude is used only for tone and topic extraction.
 Results are cached — DNA is not recomputed if messages haven't changed.
+
+All of the metrics read one columnar view of the thread (MessageColumns):
+timestamps, sender flags, word counts and emoji counts are pulled out of the
+message dicts in a single pass, then every metric is a NumPy expression over
+those arrays instead of its own loop re-parsing the same timestamps.
+
+The persisted running totals never hold message text: the callback words
+they track are stored as keyed hashes, and only for messages folded in the
+last 90 days (the raw-content retention window in policies/seed.py).
 """
 from __future__ import annotations
 
+import hashlib
+import hmac
 import json
 import logging
 import re
 import uuid
 from collections import Counter
-from datetime import datetime, timezone
-from typing import Optional
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
 # ── Intimacy scoring weights ──────────────────────────────────────────────────
 
+# Unicode ranges for common emoji
+_EMOJI_RE = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"
+    "\U0001F300-\U0001F5FF"
+    "\U0001F680-\U0001F9FF"
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]+",
+    flags=re.UNICODE,
+)
+
+
 def _count_emojis(text: str) -> int:
     """Count emoji characters in a string."""
-    # Unicode ranges for common emoji
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"
-        "\U0001F300-\U0001F5FF"
-        "\U0001F680-\U0001F9FF"
-        "\U00002702-\U000027B0"
-        "\U000024C2-\U0001F251"
-        "]+",
-        flags=re.UNICODE,
-    )
-    return len(emoji_pattern.findall(text))
+    return len(_EMOJI_RE.findall(text))
 
 
 ABBREVIATIONS = {
@@ -53,6 +69,454 @@ NICKNAME_SIGNALS = {
     "bestie", "love", "darling", "dear", "sweetie",
 }
 
+_CALLBACK_STOPWORDS = {"about", "think", "going", "where", "there", "would", "could", "should", "really"}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_US_PER_HOUR = 3600 * 10**6
+_US_PER_DAY = 86400 * 10**6
+
+
+# ── Columnar thread view ──────────────────────────────────────────────────────
+
+@dataclass
+class MessageColumns:
+    """
+    One thread as parallel NumPy arrays, built in a single pass over the
+    message dicts. Timestamps are integer microseconds so gaps come out exactly
+    as timedelta arithmetic would; `valid` marks the ones that parsed.
+    """
+    epoch_us: np.ndarray        # int64, 0 where the timestamp is missing/unparsable
+    valid: np.ndarray           # bool
+    hour: np.ndarray            # int8 wall-clock hour in the timestamp's own offset, -1 if invalid
+    sender: np.ndarray          # int8: 1 from me, 0 from them, -1 unknown
+    by_time: np.ndarray         # indices ordering the thread by timestamp string
+    words: np.ndarray           # int64 words per message
+    emojis: np.ndarray          # int64 emoji runs per message
+    has_nickname: bool = False
+    abbreviations: int = 0
+    callback_presence: Counter = field(default_factory=Counter)   # long word -> messages containing it
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @classmethod
+    def of(cls, messages: Union[list[dict], "MessageColumns"]) -> "MessageColumns":
+        return messages if isinstance(messages, cls) else cls.from_messages(messages)
+
+    @classmethod
+    def from_messages(cls, messages: list[dict]) -> "MessageColumns":
+        n = len(messages)
+        epoch_us = np.zeros(n, dtype=np.int64)
+        valid = np.zeros(n, dtype=bool)
+        hour = np.full(n, -1, dtype=np.int8)
+        sender = np.empty(n, dtype=np.int8)
+        sort_keys = []
+        texts = []
+
+        for i, m in enumerate(messages):
+            ts = m.get("timestamp")
+            sort_keys.append(ts if isinstance(ts, str) else "")
+            try:
+                dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+                hour[i] = dt.hour
+                if dt.tzinfo is None:
+                    dt = dt.replace(tzinfo=timezone.utc)
+                epoch_us[i] = (dt - _EPOCH) // _MICROSECOND
+                valid[i] = True
+            except (AttributeError, TypeError, ValueError):
+                pass
+            from_me = m.get("is_from_me")
+            sender[i] = -1 if from_me is None else int(bool(from_me))
+            texts.append(m.get("text") or "")
+
+        # Same (lexicographic, stable) order the thread-level metrics always used
+        by_time = np.argsort(np.array(sort_keys, dtype=str), kind="stable") if n else np.empty(0, dtype=np.intp)
+        return cls(epoch_us=epoch_us, valid=valid, hour=hour, sender=sender, by_time=by_time, **_text_columns(texts))
+
+    def gaps_us(self, order: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Gaps between neighbouring messages (in `order`), and which of them had two valid timestamps."""
+        epoch, valid = self.epoch_us, self.valid
+        if order is not None:
+            epoch, valid = epoch[order], valid[order]
+        return np.diff(epoch), valid[1:] & valid[:-1]
+
+
+Messages = Union[list[dict], MessageColumns]
+
+
+def _text_columns(texts: list[str]) -> dict:
+    """
+    Word counts, emoji counts and token statistics for every message at once.
+    The thread is joined and split as one string; per-message figures are
+    recovered from token / match positions instead of looping over tokens.
+    """
+    n = len(texts)
+    words = np.fromiter(map(len, map(str.split, texts)), dtype=np.int64, count=n)
+    # Newlines are neither emoji nor part of a token, so nothing spans two messages
+    joined = "\n".join(texts)
+
+    starts = np.cumsum([0] + [len(t) + 1 for t in texts[:-1]]) if n else np.zeros(0, dtype=np.int64)
+    match_at = np.fromiter((m.start() for m in _EMOJI_RE.finditer(joined)), dtype=np.int64)
+    emojis = np.bincount(np.searchsorted(starts, match_at, side="right") - 1, minlength=n)
+
+    tokens = joined.lower().split()
+    vocab = {tok: i for i, tok in enumerate(dict.fromkeys(tokens))}
+    token_ids = np.fromiter(map(vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    is_abbreviation = np.fromiter((t.rstrip(".,!?") in ABBREVIATIONS for t in vocab), dtype=bool, count=len(vocab))
+
+    # Long tokens, punctuation stripped, counted once per message that contains them
+    stripped: dict[str, int] = {}
+    to_stripped = np.fromiter(
+        (stripped.setdefault(t.strip(".,!?\"'"), len(stripped)) if len(t) > 5 else -1 for t in vocab),
+        dtype=np.int64, count=len(vocab),
+    )
+    long_ids = to_stripped[token_ids]
+    keep = long_ids >= 0
+    owner = np.repeat(np.arange(n, dtype=np.int64), words)[keep]
+    pairs = np.sort(owner * max(len(stripped), 1) + long_ids[keep])
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))] if len(pairs) else pairs
+    presence = np.bincount(pairs % max(len(stripped), 1), minlength=len(stripped))
+
+    return {
+        "words": words,
+        "emojis": emojis,
+        "has_nickname": not NICKNAME_SIGNALS.isdisjoint(vocab),
+        "abbreviations": int(is_abbreviation[token_ids].sum()),
+        "callback_presence": Counter(dict(zip(stripped, presence.tolist()))),
+    }
+
+
+# ── Shared scoring rules ──────────────────────────────────────────────────────
+# Used both for a full pass over a thread (MessageColumns) and for profiles
+# rebuilt from persisted running aggregates (DNAStats), so the two can't drift.
+
+def _intimacy_score(
+    *,
+    messages: int,
+    words: int,
+    emojis: int,
+    abbreviations: int,
+    has_nickname: bool,
+    avg_rt: float,
+    init_ratio: float,
+    callbacks: float,
+) -> float:
+    if not messages:
+        return 0.0
+
+    score = 0.0
+
+    # Nickname usage
+    if has_nickname:
+        score += 0.10
+
+    # Abbreviation density
+    if words and abbreviations / words > 0.02:
+        score += 0.10
+
+    # Emoji density
+    if emojis / messages > 0.1:
+        score += 0.10
+
+    # Message length (longer = more invested, up to 0.2)
+    avg_len = words / messages
+    score += min(0.20, (avg_len / 100.0) * 0.20)
+
+    # Response time < 1 hour average
+    if 0 < avg_rt < 1.0:
+        score += 0.20
+    elif 1.0 <= avg_rt < 3.0:
+        score += 0.10
+
+    # Initiation balance close to 50/50
+    if 0.35 <= init_ratio <= 0.65:
+        score += 0.10
+
+    # Recurring callbacks (inside references)
+    score += callbacks
+
+    return min(1.0, max(0.0, score))
+
+
+def _callback_score(presence: dict[str, int], total: int) -> float:
+    """0.2 when at least three "rare" words recur in 2–40% of messages, else 0.0."""
+    if total < 4:
+        return 0.0
+    ceiling = max(2, int(total * 0.4))
+    callbacks = [
+        w for w, count in presence.items()
+        if 1 < count <= ceiling and w not in _CALLBACK_STOPWORDS
+    ]
+    return 0.20 if len(callbacks) >= 3 else 0.0
+
+
+def _rank_hours(counts: np.ndarray, first_seen: np.ndarray) -> list[int]:
+    """Top 3 hours by volume; ties go to the hour seen first in the thread."""
+    ranked = np.lexsort((first_seen, -counts))
+    return [int(h) for h in ranked[:3] if counts[h]]
+
+
+def _describe_silence(count: int, avg_gap: float, max_gap: float) -> str:
+    if not count:
+        return "frequent contact, rarely silent"
+    if avg_gap < 1:
+        return "talks almost daily"
+    elif avg_gap < 3:
+        return f"typical gap {avg_gap:.0f}-{max_gap:.0f} days"
+    elif avg_gap < 7:
+        return f"gaps of {avg_gap:.0f}-{max_gap:.0f} days are normal"
+    else:
+        return f"long silences ({avg_gap:.0f}+ days) are normal for this relationship"
+
+
+def _trend_label(messages: int, delta: float) -> str:
+    if messages < 10:
+        return "stable"
+    if delta > 5:
+        return "increasing"
+    elif delta < -5:
+        return "declining"
+    return "stable"
+
+
+# ── Running aggregates ────────────────────────────────────────────────────────
+
+_SILENCE_BINS = 12              # log2 bins of silences, from 0.5 days up
+_MAX_TREND_BUCKETS = 128
+_MAX_CALLBACK_WORDS = 2_000     # per generation; rarest words are pruned beyond this
+_CALLBACK_GENERATION = timedelta(days=45)   # words are kept for this generation and the next: 90 days
+_CLAUDE_DRIFT_THRESHOLD = 0.15  # re-run tone/topics once any tracked metric moves this much
+_DRIFT_KEYS = (
+    "linguistic_intimacy", "avg_response_time_hours", "initiates_ratio",
+    "message_length_avg", "emoji_frequency",
+)
+
+
+@dataclass
+class DNAStats:
+    """
+    Mergeable sufficient statistics for one relationship's DNA profile.
+
+    A new batch of messages is folded in with fold() in O(batch) time; the
+    profile metrics are then read back from the totals. Batches are assumed
+    to arrive in chronological order — response times, thread starts and
+    silences across the batch boundary are measured against the last message
+    already folded. Persisted as profile["stats"].
+    """
+    message_count: int = 0
+    word_count: int = 0
+    emoji_count: int = 0
+    abbreviation_count: int = 0
+    nickname_seen: bool = False
+    response_hours_sum: float = 0.0
+    response_count: int = 0
+    initiations: int = 0
+    initiations_by_me: int = 0
+    timed_messages: int = 0                     # messages with a parsable timestamp
+    hour_counts: list = field(default_factory=lambda: [0] * 24)
+    hour_first_seen: list = field(default_factory=lambda: [-1] * 24)   # ordinal among timed messages
+    silence_count: int = 0
+    silence_days_sum: float = 0.0
+    silence_days_max: float = 0.0
+    silence_histogram: list = field(default_factory=lambda: [0] * _SILENCE_BINS)
+    callback_presence: dict = field(default_factory=dict)        # word hash -> messages, current generation
+    callback_previous: dict = field(default_factory=dict)        # the generation before it
+    callback_generation: Optional[int] = None   # 45-day periods since the epoch
+    trend_bucket_size: int = 16
+    trend_buckets: list = field(default_factory=list)   # [messages, words] per window, oldest first
+    last_message: Optional[dict] = None         # last folded message, arrival order
+    last_by_time: Optional[dict] = None         # last folded message, timestamp order
+    claude_baseline: Optional[dict] = None      # tracked metrics when tone/topics last ran
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional["DNAStats"]:
+        if not data:
+            return None
+        known = {f for f in cls.__dataclass_fields__}
+        fields = {k: v for k, v in data.items() if k in known}
+        if "callback_generation" not in data:
+            # Saved before callback words were hashed — drop the plaintext
+            fields.pop("callback_presence", None)
+        return cls(**fields)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def fold(self, cols: MessageColumns, now: Optional[datetime] = None) -> None:
+        """Add one batch of messages to the running totals."""
+        n = len(cols)
+        if not n:
+            return
+
+        self.message_count += n
+        self.word_count += int(cols.words.sum())
+        self.emoji_count += int(cols.emojis.sum())
+        self.abbreviation_count += cols.abbreviations
+        self.nickname_seen = self.nickname_seen or cols.has_nickname
+
+        # Response times: sender switches in arrival order, continuing from the last message
+        epoch, valid, sender = cols.epoch_us, cols.valid, cols.sender
+        if self.last_message:
+            epoch = np.concatenate(([self.last_message["epoch_us"]], epoch))
+            valid = np.concatenate(([self.last_message["valid"]], valid))
+            sender = np.concatenate(([self.last_message["sender"]], sender))
+        gaps, ok = np.diff(epoch), valid[1:] & valid[:-1]
+        replies = ok & (sender[1:] != sender[:-1]) & (gaps > 0) & (gaps < 72 * _US_PER_HOUR)
+        self.response_hours_sum += float((gaps[replies] / 1e6 / 3600.0).sum())
+        self.response_count += int(replies.sum())
+        self.last_message = {"epoch_us": int(cols.epoch_us[-1]), "valid": bool(cols.valid[-1]),
+                             "sender": int(cols.sender[-1])}
+
+        # Thread starts and silences: timestamp order, continuing from the latest message
+        order = cols.by_time
+        epoch, valid, from_me = cols.epoch_us[order], cols.valid[order], cols.sender[order] == 1
+        if self.last_by_time:
+            gaps = np.diff(np.concatenate(([self.last_by_time["epoch_us"]], epoch)))
+            ok = np.concatenate(([self.last_by_time["valid"]], valid[:-1])) & valid
+            starts = ok & (gaps > 3 * _US_PER_HOUR)
+        else:
+            gaps, ok = np.diff(epoch), valid[1:] & valid[:-1]
+            starts = np.concatenate(([True], ok & (gaps > 3 * _US_PER_HOUR)))
+        self.initiations += int(starts.sum())
+        self.initiations_by_me += int((starts & from_me).sum())
+        self.last_by_time = {"epoch_us": int(epoch[-1]), "valid": bool(valid[-1])}
+
+        silences = gaps[ok & (gaps > _US_PER_DAY // 2)] / 1e6 / 86400.0
+        if len(silences):
+            self.silence_count += len(silences)
+            self.silence_days_sum += float(silences.sum())
+            self.silence_days_max = max(self.silence_days_max, float(silences.max()))
+            bins = np.minimum(np.floor(np.log2(silences / 0.5)).astype(np.intp), _SILENCE_BINS - 1)
+            self.silence_histogram = (np.array(self.silence_histogram)
+                                      + np.bincount(bins, minlength=_SILENCE_BINS)).tolist()
+
+        # Hour histogram, with first-seen ordinals so ties rank as in a full pass
+        hours = cols.hour[cols.valid].astype(np.intp)
+        if len(hours):
+            first_seen = np.full(24, np.iinfo(np.int64).max)
+            np.minimum.at(first_seen, hours, np.arange(len(hours)) + self.timed_messages)
+            previous = np.array(self.hour_first_seen)
+            self.hour_first_seen = np.where(previous >= 0, previous,
+                                            np.where(first_seen < np.iinfo(np.int64).max, first_seen, -1)).tolist()
+            self.hour_counts = (np.array(self.hour_counts) + np.bincount(hours, minlength=24)).tolist()
+            self.timed_messages += len(hours)
+
+        self._fold_callbacks(cols.callback_presence, now or datetime.now(timezone.utc))
+        self._fold_trend(cols.words)
+
+    def _fold_callbacks(self, words: Counter, now: datetime) -> None:
+        """
+        Add the batch's callback words, hashed, to the current generation.
+        Generations are fixed 45-day periods; a word is counted during the
+        period it was folded in and the one after, then dropped.
+        """
+        generation = _callback_generation(now)
+        if self.callback_generation != generation:
+            self.callback_previous = self.callback_presence if self.callback_generation == generation - 1 else {}
+            self.callback_presence = {}
+            self.callback_generation = generation
+
+        key = _callback_key()
+        presence = self.callback_presence
+        for word, count in words.items():
+            if word in _CALLBACK_STOPWORDS:
+                continue
+            digest = hmac.new(key, word.encode(), hashlib.sha256).hexdigest()[:16]
+            presence[digest] = presence.get(digest, 0) + count
+        if len(presence) > _MAX_CALLBACK_WORDS:
+            self.callback_presence = dict(Counter(presence).most_common(_MAX_CALLBACK_WORDS))
+
+    def _callback_counts(self, now: datetime) -> Counter:
+        """Callback word counts still inside the retention window at `now`."""
+        age = _callback_generation(now) - (self.callback_generation or 0)
+        if age == 0:
+            return Counter(self.callback_previous) + Counter(self.callback_presence)
+        return Counter(self.callback_presence) if age == 1 else Counter()
+
+    def _fold_trend(self, words: np.ndarray) -> None:
+        """Append per-message word counts to fixed-size windows, doubling the window as history grows."""
+        size, buckets = self.trend_bucket_size, self.trend_buckets
+        start = 0
+        if buckets and buckets[-1][0] < size:
+            start = min(size - buckets[-1][0], len(words))
+            buckets[-1] = [buckets[-1][0] + start, buckets[-1][1] + int(words[:start].sum())]
+        rest = words[start:]
+        if len(rest):
+            edges = np.arange(0, len(rest), size)
+            sums = np.add.reduceat(rest, edges)
+            counts = np.diff(np.append(edges, len(rest)))
+            buckets.extend([int(c), int(s)] for c, s in zip(counts, sums))
+        while len(buckets) > _MAX_TREND_BUCKETS:
+            buckets[:] = [
+                [sum(b[0] for b in pair), sum(b[1] for b in pair)]
+                for pair in (buckets[i:i + 2] for i in range(0, len(buckets), 2))
+            ]
+            self.trend_bucket_size *= 2
+
+    def _trend_delta(self) -> float:
+        """Average words per message, second half of history minus first half."""
+        mid = self.message_count // 2
+        if not mid:
+            return 0.0
+        first_words, seen = 0.0, 0
+        for count, words in self.trend_buckets:
+            if seen + count <= mid:
+                first_words += words
+                seen += count
+                continue
+            first_words += words * (mid - seen) / count   # straddling window, pro rata
+            break
+        second = (self.word_count - first_words) / (self.message_count - mid)
+        return second - first_words / mid
+
+    def metrics(self, now: Optional[datetime] = None) -> dict:
+        """Profile metrics from the running totals (unrounded)."""
+        n = self.message_count
+        avg_rt = self.response_hours_sum / self.response_count if self.response_count else 0.0
+        init_ratio = self.initiations_by_me / self.initiations if self.initiations else 0.5
+        avg_gap = self.silence_days_sum / self.silence_count if self.silence_count else 0.0
+        first_seen = np.array(self.hour_first_seen)
+        return {
+            "linguistic_intimacy": _intimacy_score(
+                messages=n, words=self.word_count, emojis=self.emoji_count,
+                abbreviations=self.abbreviation_count, has_nickname=self.nickname_seen,
+                avg_rt=avg_rt, init_ratio=init_ratio,
+                callbacks=_callback_score(self._callback_counts(now or datetime.now(timezone.utc)), n),
+            ),
+            "avg_response_time": avg_rt,
+            "initiates_ratio": init_ratio,
+            "avg_message_length": self.word_count / n if n else 0.0,
+            "emoji_frequency": self.emoji_count / n if n else 0.0,
+            "peak_hours": _rank_hours(np.array(self.hour_counts),
+                                      np.where(first_seen >= 0, first_seen, np.iinfo(np.int64).max)),
+            "silence_pattern": _describe_silence(self.silence_count, avg_gap, self.silence_days_max),
+            "intimacy_trend": _trend_label(n, self._trend_delta()),
+        }
+
+
+def _callback_generation(now: datetime) -> int:
+    return (now - _EPOCH) // _CALLBACK_GENERATION
+
+
+def _callback_key() -> bytes:
+    """HMAC key for stored callback words, so the hashes can't be reversed with a word list."""
+    from config import get_settings
+    return get_settings().jwt_secret.encode()
+
+
+def _metric_drift(profile: dict, baseline: Optional[dict]) -> float:
+    """
+    Largest change in a tracked metric since the baseline: absolute for the
+    0–1 scores, relative for hours / words / emoji rates above 1.
+    """
+    if not baseline:
+        return float("inf")
+    return max(
+        abs(profile[k] - baseline.get(k, 0.0)) / max(1.0, abs(baseline.get(k, 0.0)))
+        for k in _DRIFT_KEYS
+    )
+
 
 class CommunicationDNA:
     """
@@ -80,39 +544,33 @@ class CommunicationDNA:
         if not messages:
             return self._empty_profile()
 
-        intimacy_score = await self.compute_linguistic_intimacy(messages)
-        avg_response_time = self._compute_avg_response_time(messages)
-        initiates_ratio = self._compute_initiates_ratio(messages)
-        avg_message_length = self._compute_avg_message_length(messages)
-        emoji_frequency = self._compute_emoji_frequency(messages)
-        peak_hours = self._compute_peak_hours(messages)
-        silence_pattern = self._compute_silence_pattern(messages)
-        intimacy_trend = self._compute_intimacy_trend(messages)
+        columns = MessageColumns.from_messages(messages)
+        metrics = {
+            "linguistic_intimacy": await self.compute_linguistic_intimacy(columns),
+            "avg_response_time": self._compute_avg_response_time(columns),
+            "initiates_ratio": self._compute_initiates_ratio(columns),
+            "avg_message_length": self._compute_avg_message_length(columns),
+            "emoji_frequency": self._compute_emoji_frequency(columns),
+            "peak_hours": self._compute_peak_hours(columns),
+            "silence_pattern": self._compute_silence_pattern(columns),
+            "intimacy_trend": self._compute_intimacy_trend(columns),
+        }
 
         # Use Claude for tone and topic extraction (requires API call)
         tone, topics, language_shifts = await self._analyze_with_claude(messages)
+        profile = self._build_profile(metrics, tone, topics, language_shifts, len(messages))
 
-        profile = {
-            "linguistic_intimacy": round(intimacy_score, 2),
-            "avg_response_time_hours": round(avg_response_time, 1),
-            "initiates_ratio": round(initiates_ratio, 2),
-            "message_length_avg": round(avg_message_length, 0),
-            "emoji_frequency": round(emoji_frequency, 2),
-            "typical_tone": tone,
-            "topics_recurring": topics,
-            "silence_patterns": silence_pattern,
-            "peak_communication_hours": peak_hours,
-            "language_shifts": language_shifts,
-            "intimacy_trend": intimacy_trend,
-            "computed_at": datetime.now(timezone.utc).isoformat(),
-            "message_count": len(messages),
-        }
+        # Running totals, so later batches can be folded in without the full history
+        stats = DNAStats()
+        stats.fold(columns)
+        stats.claude_baseline = {k: profile[k] for k in _DRIFT_KEYS}
+        profile["stats"] = stats.to_dict()
 
         # Save to people.communication_dna_json
         await self._save_profile(user_id, person_id, profile)
         return profile
 
-    async def compute_linguistic_intimacy(self, messages: list[dict]) -> float:
+    async def compute_linguistic_intimacy(self, messages: Messages) -> float:
         """
         Compute a linguistic intimacy score (0.0–1.0) from message signals.
 
@@ -125,236 +583,148 @@ class CommunicationDNA:
           +0.1  initiation balance close to 50/50 (within 15%)
           +0.2  recurring callbacks / inside references (heuristic: repeated rare tokens)
         """
-        if not messages:
+        cols = MessageColumns.of(messages)
+        if not len(cols):
             return 0.0
-
-        score = 0.0
-        all_text = " ".join(m.get("text", "") or "" for m in messages).lower()
-        words = all_text.split()
-
-        # Nickname usage
-        if any(nick in words for nick in NICKNAME_SIGNALS):
-            score += 0.10
-
-        # Abbreviation density
-        abbrev_count = sum(1 for w in words if w.rstrip(".,!?") in ABBREVIATIONS)
-        if words and abbrev_count / max(len(words), 1) > 0.02:
-            score += 0.10
-
-        # Emoji density
-        total_emojis = sum(_count_emojis(m.get("text", "") or "") for m in messages)
-        if total_emojis / max(len(messages), 1) > 0.1:
-            score += 0.10
-
-        # Message length (longer = more invested, up to 0.2)
-        avg_len = self._compute_avg_message_length(messages)
-        score += min(0.20, (avg_len / 100.0) * 0.20)
-
-        # Response time < 1 hour average
-        avg_rt = self._compute_avg_response_time(messages)
-        if 0 < avg_rt < 1.0:
-            score += 0.20
-        elif 1.0 <= avg_rt < 3.0:
-            score += 0.10
-
-        # Initiation balance close to 50/50
-        init_ratio = self._compute_initiates_ratio(messages)
-        if 0.35 <= init_ratio <= 0.65:
-            score += 0.10
-
-        # Recurring callbacks (inside references):
-        # Heuristic — rare multi-character tokens repeated across multiple messages
-        score += self._score_callbacks(messages)
-
-        return min(1.0, max(0.0, score))
+        return _intimacy_score(
+            messages=len(cols),
+            words=int(cols.words.sum()),
+            emojis=int(cols.emojis.sum()),
+            abbreviations=cols.abbreviations,
+            has_nickname=cols.has_nickname,
+            avg_rt=self._compute_avg_response_time(cols),
+            init_ratio=self._compute_initiates_ratio(cols),
+            # Recurring callbacks (inside references):
+            # Heuristic — rare multi-character tokens repeated across multiple messages
+            callbacks=self._score_callbacks(cols),
+        )
 
     async def update_person_dna(
         self,
         user_id: str,
         person_id: str,
         new_messages: list[dict],
-    ) -> None:
+    ) -> Optional[dict]:
         """
-        Update Communication DNA with new messages.
-        Merges new messages with existing profile cache; recomputes if new > 10% growth.
+        Fold new messages into the stored profile's running totals.
+
+        Costs O(len(new_messages)) — earlier history is never re-read, yet the
+        metrics cover all of it. Tone and topics (the Claude pass) are only
+        refreshed once the deterministic metrics have drifted by more than
+        _CLAUDE_DRIFT_THRESHOLD since they were last computed. Profiles saved
+        without running totals are rebuilt from new_messages.
         """
-        existing = await self._load_profile(person_id)
-        existing_count = existing.get("message_count", 0) if existing else 0
-        new_count = len(new_messages)
+        if not new_messages:
+            return None
 
-        # Recompute if: no existing profile, or new messages are >10% of existing baseline
-        if not existing or new_count > max(5, existing_count * 0.1):
-            await self.analyze_relationship(user_id, person_id, new_messages)
+        existing = await self._load_profile(person_id)
+        stats = DNAStats.from_dict(existing.get("stats")) if existing else None
+        if stats is None:
+            return await self.analyze_relationship(user_id, person_id, new_messages)
+
+        stats.fold(MessageColumns.from_messages(new_messages))
+        metrics = stats.metrics()
+        profile = self._build_profile(
+            metrics,
+            existing.get("typical_tone", "warm"),
+            existing.get("topics_recurring", []),
+            existing.get("language_shifts", "stable tone throughout"),
+            stats.message_count,
+        )
+
+        drift = _metric_drift(profile, stats.claude_baseline)
+        if drift > _CLAUDE_DRIFT_THRESHOLD:
+            tone, topics, language_shifts = await self._analyze_with_claude(new_messages)
+            profile.update(typical_tone=tone, topics_recurring=topics, language_shifts=language_shifts)
+            stats.claude_baseline = {k: profile[k] for k in _DRIFT_KEYS}
         else:
             logger.debug(
-                "Skipping DNA recompute for person %s — %d new msgs vs %d existing",
-                person_id, new_count, existing_count,
+                "Keeping DNA tone/topics for person %s — drift %.3f after %d new msgs",
+                person_id, drift, len(new_messages),
             )
 
+        profile["stats"] = stats.to_dict()
+        await self._save_profile(user_id, person_id, profile)
+        return profile
+
     # ── Private computation helpers ───────────────────────────────────────────
 
-    def _compute_avg_response_time(self, messages: list[dict]) -> float:
+    def _compute_avg_response_time(self, messages: Messages) -> float:
         """
         Compute average response time in hours between consecutive messages
         where the sender switches (i.e., the other person replies).
         Returns 0 if insufficient data.
         """
-        response_times = []
-        for i in range(1, len(messages)):
-            prev = messages[i - 1]
-            curr = messages[i]
-            # Only measure when sender switches
-            if prev.get("is_from_me") == curr.get("is_from_me"):
-                continue
-            try:
-                t_prev = datetime.fromisoformat(prev["timestamp"].replace("Z", "+00:00"))
-                t_curr = datetime.fromisoformat(curr["timestamp"].replace("Z", "+00:00"))
-                delta_hours = (t_curr - t_prev).total_seconds() / 3600.0
-                if 0 < delta_hours < 72:  # ignore gaps > 3 days (silence, not response time)
-                    response_times.append(delta_hours)
-            except (KeyError, ValueError):
-                continue
-
-        return sum(response_times) / len(response_times) if response_times else 0.0
-
-    def _compute_initiates_ratio(self, messages: list[dict]) -> float:
+        cols = MessageColumns.of(messages)
+        gaps, ok = cols.gaps_us()
+        hours = gaps / 1e6 / 3600.0
+        # Only measure when sender switches; ignore gaps > 3 days (silence, not response time)
+        replies = ok & (cols.sender[1:] != cols.sender[:-1]) & (gaps > 0) & (gaps < 72 * _US_PER_HOUR)
+        return float(hours[replies].mean()) if replies.any() else 0.0
+
+    def _compute_initiates_ratio(self, messages: Messages) -> float:
         """
         Fraction of conversation threads initiated by the user (is_from_me=True).
         A "thread start" = first message after a gap of >3 hours.
         """
-        if not messages:
+        cols = MessageColumns.of(messages)
+        if not len(cols):
             return 0.5
 
-        initiations_by_me = 0
-        total_initiations = 0
+        gaps, ok = cols.gaps_us(cols.by_time)
+        starts = np.concatenate(([True], ok & (gaps > 3 * _US_PER_HOUR)))
+        by_me = cols.sender[cols.by_time] == 1
+        return int((starts & by_me).sum()) / int(starts.sum())
 
-        sorted_msgs = sorted(messages, key=lambda m: m.get("timestamp", ""))
-        for i, msg in enumerate(sorted_msgs):
-            if i == 0:
-                total_initiations += 1
-                if msg.get("is_from_me"):
-                    initiations_by_me += 1
-                continue
-            try:
-                t_prev = datetime.fromisoformat(sorted_msgs[i-1]["timestamp"].replace("Z", "+00:00"))
-                t_curr = datetime.fromisoformat(msg["timestamp"].replace("Z", "+00:00"))
-                gap_hours = (t_curr - t_prev).total_seconds() / 3600.0
-                if gap_hours > 3.0:
-                    total_initiations += 1
-                    if msg.get("is_from_me"):
-                        initiations_by_me += 1
-            except (KeyError, ValueError):
-                continue
-
-        if total_initiations == 0:
-            return 0.5
-        return initiations_by_me / total_initiations
-
-    def _compute_avg_message_length(self, messages: list[dict]) -> float:
+    def _compute_avg_message_length(self, messages: Messages) -> float:
         """Average word count per message."""
-        if not messages:
-            return 0.0
-        lengths = [len((m.get("text") or "").split()) for m in messages]
-        return sum(lengths) / len(lengths)
+        cols = MessageColumns.of(messages)
+        return float(cols.words.mean()) if len(cols) else 0.0
 
-    def _compute_emoji_frequency(self, messages: list[dict]) -> float:
+    def _compute_emoji_frequency(self, messages: Messages) -> float:
         """Average number of emojis per message."""
-        if not messages:
-            return 0.0
-        total = sum(_count_emojis(m.get("text", "") or "") for m in messages)
-        return total / len(messages)
-
-    def _compute_peak_hours(self, messages: list[dict]) -> list[int]:
-        """Return the top 3 UTC hours with highest message volume."""
-        hour_counts: Counter = Counter()
-        for msg in messages:
-            try:
-                ts = datetime.fromisoformat(msg["timestamp"].replace("Z", "+00:00"))
-                hour_counts[ts.hour] += 1
-            except (KeyError, ValueError):
-                continue
-        return [h for h, _ in hour_counts.most_common(3)]
-
-    def _compute_silence_pattern(self, messages: list[dict]) -> str:
+        cols = MessageColumns.of(messages)
+        return float(cols.emojis.mean()) if len(cols) else 0.0
+
+    def _compute_peak_hours(self, messages: Messages) -> list[int]:
+        """Return the top 3 hours with highest message volume."""
+        cols = MessageColumns.of(messages)
+        hours = cols.hour[cols.valid].astype(np.intp)
+        if not len(hours):
+            return []
+        first_seen = np.full(24, len(hours))
+        np.minimum.at(first_seen, hours, np.arange(len(hours)))
+        return _rank_hours(np.bincount(hours, minlength=24), first_seen)
+
+    def _compute_silence_pattern(self, messages: Messages) -> str:
         """Describe the typical silence gap pattern in plain English."""
-        gaps = []
-        sorted_msgs = sorted(messages, key=lambda m: m.get("timestamp", ""))
-        for i in range(1, len(sorted_msgs)):
-            try:
-                t1 = datetime.fromisoformat(sorted_msgs[i-1]["timestamp"].replace("Z", "+00:00"))
-                t2 = datetime.fromisoformat(sorted_msgs[i]["timestamp"].replace("Z", "+00:00"))
-                gap_days = (t2 - t1).total_seconds() / 86400.0
-                if gap_days > 0.5:
-                    gaps.append(gap_days)
-            except (KeyError, ValueError):
-                continue
-
-        if not gaps:
-            return "frequent contact, rarely silent"
-
-        avg_gap = sum(gaps) / len(gaps)
-        max_gap = max(gaps)
-
-        if avg_gap < 1:
-            return "talks almost daily"
-        elif avg_gap < 3:
-            return f"typical gap {avg_gap:.0f}-{max_gap:.0f} days"
-        elif avg_gap < 7:
-            return f"gaps of {avg_gap:.0f}-{max_gap:.0f} days are normal"
-        else:
-            return f"long silences ({avg_gap:.0f}+ days) are normal for this relationship"
-
-    def _compute_intimacy_trend(self, messages: list[dict]) -> str:
+        cols = MessageColumns.of(messages)
+        gaps, ok = cols.gaps_us(cols.by_time)
+        silences = gaps[ok & (gaps > _US_PER_DAY // 2)] / 1e6 / 86400.0
+        if not len(silences):
+            return _describe_silence(0, 0.0, 0.0)
+        return _describe_silence(len(silences), float(silences.mean()), float(silences.max()))
+
+    def _compute_intimacy_trend(self, messages: Messages) -> str:
         """
         Compare intimacy in the first half vs second half of message history.
         Returns "increasing", "stable", or "declining".
         """
-        if len(messages) < 10:
+        cols = MessageColumns.of(messages)
+        if len(cols) < 10:
             return "stable"
 
-        mid = len(messages) // 2
-        first_half = messages[:mid]
-        second_half = messages[mid:]
-
         # Use message length as a simple proxy for intimacy trend
-        avg_first = sum(len((m.get("text") or "").split()) for m in first_half) / len(first_half)
-        avg_second = sum(len((m.get("text") or "").split()) for m in second_half) / len(second_half)
-
-        delta = avg_second - avg_first
-        if delta > 5:
-            return "increasing"
-        elif delta < -5:
-            return "declining"
-        return "stable"
+        mid = len(cols) // 2
+        return _trend_label(len(cols), float(cols.words[mid:].mean()) - float(cols.words[:mid].mean()))
 
-    def _score_callbacks(self, messages: list[dict]) -> float:
+    def _score_callbacks(self, messages: Messages) -> float:
         """
         Heuristic: repeated rare tokens across messages suggest inside references.
         Returns 0.0 or 0.2.
         """
-        all_words: list[list[str]] = []
-        for m in messages:
-            text = (m.get("text") or "").lower()
-            words = [w.strip(".,!?\"'") for w in text.split() if len(w) > 5]
-            all_words.append(set(words))
-
-        if len(all_words) < 4:
-            return 0.0
-
-        # Count how many messages each word appears in
-        word_presence: Counter = Counter()
-        for word_set in all_words:
-            for w in word_set:
-                word_presence[w] += 1
-
-        # "Rare" words that appear in 2–40% of messages = possible inside references
-        total = len(all_words)
-        callbacks = [
-            w for w, count in word_presence.items()
-            if 1 < count <= max(2, int(total * 0.4))
-            and w not in {"about", "think", "going", "where", "there", "would", "could", "should", "really"}
-        ]
-        return 0.20 if len(callbacks) >= 3 else 0.0
+        cols = MessageColumns.of(messages)
+        return _callback_score(cols.callback_presence, len(cols))
 
     async def _analyze_with_claude(
         self, messages: list[dict]
@@ -365,7 +735,7 @@ class CommunicationDNA:
         Falls back to defaults if Claude is unavailable.
         """
         try:
-            from services.intelligence import _call_claude
+            from services import llm_gateway
 
             # Sample up to 40 messages to keep the prompt manageable
             sample = messages[:40] if len(messages) > 40 else messages
@@ -383,7 +753,7 @@ class CommunicationDNA:
 }
 No explanation. Valid JSON only."""
 
-            response = _call_claude(system, formatted)
+            response = await llm_gateway.complete("communication_dna", system, formatted, max_tokens=8192)
             # Strip markdown fences
             response = re.sub(r"```json|```", "", response).strip()
             data = json.loads(response)
@@ -399,10 +769,12 @@ No explanation. Valid JSON only."""
     async def _save_profile(self, user_id: str, person_id: str, profile: dict) -> None:
         try:
             import database as db_mod
+            from core.world_model import invalidate_world_model
             db = db_mod.get_db()
             db.table("people").update({
                 "communication_dna_json": json.dumps(profile),
             }).eq("id", person_id).eq("owner_user_id", user_id).execute()
+            invalidate_world_model(user_id, "people")
         except Exception as exc:
             logger.warning("Could not save communication DNA for person %s: %s", person_id, exc)
 
@@ -423,6 +795,25 @@ No explanation. Valid JSON only."""
             pass
         return None
 
+    def _build_profile(
+        self, metrics: dict, tone: str, topics: list[str], language_shifts: str, message_count: int,
+    ) -> dict:
+        return {
+            "linguistic_intimacy": round(metrics["linguistic_intimacy"], 2),
+            "avg_response_time_hours": round(metrics["avg_response_time"], 1),
+            "initiates_ratio": round(metrics["initiates_ratio"], 2),
+            "message_length_avg": round(metrics["avg_message_length"], 0),
+            "emoji_frequency": round(metrics["emoji_frequency"], 2),
+            "typical_tone": tone,
+            "topics_recurring": topics,
+            "silence_patterns": metrics["silence_pattern"],
+            "peak_communication_hours": metrics["peak_hours"],
+            "language_shifts": language_shifts,
+            "intimacy_trend": metrics["intimacy_trend"],
+            "computed_at": datetime.now(timezone.utc).isoformat(),
+            "message_count": message_count,
+        }
+
     def _empty_profile(self) -> dict:
         return {
             "linguistic_intimacy": 0.0,
@@ -0,0 +1,138 @@
+"""
+services/drift_detection.py — Relationships that have gone quiet.
+
+Runs nightly from the scheduler. For each user, the closest living person
+they haven't had a meaningful exchange with in a while gets either a
+proactive Genie conversation or a moment in the evening digest.
+
+Plain English: Genie notices when someone who matters starts slipping
+away, before it becomes a gap that's hard to close.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+import database as db
+from config import get_settings
+from services.job_runner import run_for_users
+
+logger = logging.getLogger(__name__)
+
+_PAGE = 1000        # PostgREST's default max rows per response
+
+
+def drifted_people(now: Optional[datetime] = None, user_id: Optional[str] = None) -> list:
+    """
+    The closest quiet person per user (users with a phone only), minus
+    people with a drift moment in the last drift_repeat_days — across all
+    users, or one.
+
+    One call to drifted_people() (schema_migration_v10h), a DISTINCT ON
+    over the partial people index, so the cost follows the number of
+    users rather than the size of their graphs. In "tiered" drift_mode
+    close people count as drifted after drift_close_days and distant ones
+    after drift_distant_days; in "single" mode everyone uses
+    drift_threshold_days. Read in owner_user_id order (one row per user),
+    one request per _PAGE rows.
+    Rows: owner_user_id, phone, person_id, name, closeness_score,
+    days_silent, conversation_due.
+    """
+    from services.genie_conversations import MIN_DAYS_BETWEEN_CONVERSATIONS
+
+    settings = get_settings()
+    now = now or datetime.now(timezone.utc)
+    days = settings.drift_threshold_days
+    tiered = settings.drift_mode == "tiered"
+    params = {
+        "p_now": now.isoformat(),
+        "p_days": days,
+        "p_close_days": settings.drift_close_days if tiered else days,
+        "p_close_min": settings.drift_close_min,
+        "p_distant_days": settings.drift_distant_days if tiered else days,
+        "p_distant_max": settings.drift_distant_max,
+        "p_repeat_days": settings.drift_repeat_days,
+        "p_conversation_gap_days": MIN_DAYS_BETWEEN_CONVERSATIONS,
+    }
+    if user_id:
+        params["p_user_id"] = user_id
+    rows, offset = [], 0
+    while True:
+        page = (
+            db.get_db().rpc("drifted_people", params)
+            .order("owner_user_id")
+            .range(offset, offset + _PAGE - 1)
+            .execute()
+        ).data or []
+        rows += page
+        if len(page) < _PAGE:
+            return rows
+        offset += _PAGE
+
+
+async def handle_drifted(rows: list) -> dict:
+    """
+    Act on drifted_people() rows: open a Genie conversation where one is
+    due, and save a digest moment for everyone else with one insert.
+    Conversations start through run_for_users, so they share the worker
+    pool, per-user timeout and overlap guard of the other nightly jobs; a
+    failed, timed-out or skipped one falls back to the moment.
+    Returns {"conversations": n, "moments": n}.
+    """
+    from services.genie_conversations import start_conversation
+
+    due = [{"id": row["owner_user_id"], **row} for row in rows
+           if row.get("conversation_due") and row.get("phone")]
+    started: set[tuple[str, str]] = set()
+    if due:
+        run = await run_for_users(
+            "drift_conversations", due,
+            lambda u: start_conversation(u["id"], u["person_id"], "drift_check", u["phone"]),
+        )
+        if run is not None:
+            started = {(u["id"], u["person_id"]) for u, conversation_id in run.results if conversation_id}
+
+    moments = []
+    for row in rows:
+        conversation = (row["owner_user_id"], row["person_id"]) in started
+        if not conversation:
+            moments.append({
+                "owner_user_id": row["owner_user_id"],
+                "person_id": row["person_id"],
+                "suggestion": _build_suggestion(row),
+                "triggered_by": "drift_detection",
+            })
+        logger.info(f"Drift handled for {row.get('name')} ({row.get('days_silent')}d) — "
+                    f"user {row['owner_user_id']} — conversation={conversation}")
+
+    saved = []
+    if moments:
+        try:
+            saved = await asyncio.to_thread(db.create_moments_for_users, moments)
+        except Exception as e:
+            logger.error(f"Could not save {len(moments)} drift moments: {e}")
+    return {"conversations": len(started), "moments": len(saved)}
+
+
+async def run_drift_detection_for_all_users() -> dict:
+    """
+    Called by the daily scheduler (2:15am UTC).
+    One paged query finds every user's drifted person, conversations fan
+    out across the job runner, then moments are written in a single
+    insert. Returns {"drifted": n, "conversations": n, "moments": n}.
+    """
+    try:
+        rows = await asyncio.to_thread(drifted_people)
+    except Exception as e:
+        logger.error(f"Could not load drifted people: {e}")
+        return {"drifted": 0, "conversations": 0, "moments": 0}
+
+    result = await handle_drifted(rows)
+    logger.info(f"Drift detection complete: {len(rows)} drifted, {result}")
+    return {"drifted": len(rows), **result}
+
+
+def _build_suggestion(row: dict) -> str:
+    """The digest line for a drifted person."""
+    name = row.get("name") or "someone close to you"
+    return (f"It's been {row.get('days_silent')} days since you and {name} last connected. "
+            f"A message today — even just checking in — would mean more than you think.")
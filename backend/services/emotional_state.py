@@ -15,6 +15,7 @@ import uuid
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 import database as db
+from core.world_model import invalidate_world_model
 from services.intelligence import _call_claude
 
 logger = logging.getLogger(__name__)
@@ -76,7 +77,7 @@ intervention_threshold guide:
 Return only valid JSON. No explanation."""
 
     try:
-        response = _call_claude(system_prompt, f"User messages:\n{sample}")
+        response = _call_claude(system_prompt, f"User messages:\n{sample}", feature="emotional_state")
         if "```" in response:
             response = response.split("```")[1]
             if response.startswith("json"):
@@ -95,6 +96,7 @@ Return only valid JSON. No explanation."""
             "recommended_action": state.get("recommended_action"),
             "acted_on": False,
         }).execute()
+        invalidate_world_model(user_id, "emotional_states")
 
         logger.info(
             f"Emotional state for user {user_id}: "
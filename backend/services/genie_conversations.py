@@ -106,7 +106,7 @@ Write ONE warm, specific opening question. Rules:
 - Never say "I noticed" or "based on your data"."""
 
     try:
-        opening = _call_claude(system_prompt, f"Conversation type: {conversation_type}")
+        opening = _call_claude(system_prompt, f"Conversation type: {conversation_type}", feature="genie_conversations")
         opening = opening.strip().strip('"')
     except Exception as e:
         logger.error(f"Could not generate conversation opening: {e}")
@@ -203,7 +203,7 @@ Return JSON:
 Return only valid JSON."""
 
     try:
-        response = _call_claude(system_prompt, f"Reply: {user_reply}")
+        response = _call_claude(system_prompt, f"Reply: {user_reply}", feature="genie_conversations")
         if "```" in response:
             response = response.split("```")[1]
             if response.startswith("json"):
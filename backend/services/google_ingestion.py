@@ -1,17 +1,22 @@
 """
 services/google_ingestion.py — Google Photos, Gmail, and Contacts ingestion.
 
-Runs in parallel background threads after Google OAuth completes.
+Runs after Google OAuth completes and on every People Graph rebuild.
 Pulls the user's data and feeds it to Claude for People Graph synthesis.
+Gmail and Contacts are synced incrementally: the Gmail historyId and the
+People API syncToken are stored per user, so after the first read only
+what changed is fetched.
 
 Plain English: after someone connects Google, this code quietly reads
 their photos, emails and contacts to understand who matters in their life.
 """
 import asyncio
+import bisect
 import logging
-from typing import Optional, Tuple
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+
+import httpx
 from config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -99,276 +104,524 @@ def get_valid_google_tokens(user_id: str) -> Optional[tuple]:
     return access_token, refresh_token
 
 
-def _get_credentials(access_token: str, refresh_token: str) -> Credentials:
-    """Build a Google credentials object from stored OAuth tokens."""
-    return Credentials(
-        token=access_token,
-        refresh_token=refresh_token,
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=settings.google_client_id,
-        client_secret=settings.google_client_secret,
-        scopes=[
-            "https://www.googleapis.com/auth/photoslibrary.readonly",
-            "https://www.googleapis.com/auth/gmail.readonly",
-            "https://www.googleapis.com/auth/contacts.readonly",
-        ]
+# ── Google REST client ────────────────────────────────────────────────────────
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def _google_client(base_url: str, access_token: str, connections: int) -> httpx.AsyncClient:
+    """One pooled client per API per ingestion run, sized to its concurrency."""
+    connections = max(1, connections)
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=settings.google_api_timeout_seconds,
+        limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
     )
 
 
+async def _google_request(client: httpx.AsyncClient, method: str, path: str, **kwargs) -> dict:
+    """One Google API call; 429 / 5xx / connection errors are retried with backoff."""
+    attempt = 0
+    while True:
+        backoff = 0.5 * 2 ** attempt
+        try:
+            resp = await client.request(method, path, **kwargs)
+        except httpx.TransportError:
+            if attempt >= settings.google_api_max_retries:
+                raise
+            delay = backoff
+        else:
+            if resp.status_code not in _RETRY_STATUS or attempt >= settings.google_api_max_retries:
+                resp.raise_for_status()
+                return resp.json()
+            try:
+                delay = max(backoff, float(resp.headers.get("retry-after") or 0))
+            except ValueError:
+                delay = backoff
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def _google_pages(client: httpx.AsyncClient, path: str, **params) -> AsyncIterator[dict]:
+    """Yield each page of a GET list call, following nextPageToken."""
+    token = None
+    while True:
+        page = await _google_request(client, "GET", path,
+                                     params={**params, **({"pageToken": token} if token else {})})
+        yield page
+        token = page.get("nextPageToken")
+        if not token:
+            return
+
+
+class _CursorExpired(Exception):
+    """A stored historyId / syncToken is too old to sync from; read the source in full."""
+
+
 # ── Google Photos ─────────────────────────────────────────────────────────────
 
-def fetch_photos_data(access_token: str, refresh_token: str) -> dict:
+PHOTOS_API = "https://photoslibrary.googleapis.com/v1"
+_KEY_PHOTOS = 5                     # oldest and newest photos kept per album
+
+
+def _photo_time(value: str) -> Optional[datetime]:
+    """creationTime as a datetime — strings don't sort once fractional seconds vary."""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+
+class _AlbumScan:
+    """
+    The oldest and newest photos seen so far in one album. Items are fed one
+    at a time as pages arrive, and only `keep` of each end are held, so
+    memory doesn't grow with the album.
+    """
+
+    def __init__(self, keep: int = _KEY_PHOTOS):
+        self.keep = keep
+        self.dated = 0
+        self.oldest: list[tuple] = []       # ascending (time, n, photo)
+        self.newest: list[tuple] = []       # ascending; the last `keep` seen
+
+    def add(self, item: dict) -> None:
+        metadata = item.get("mediaMetadata") or {}
+        when = _photo_time(metadata.get("creationTime"))
+        if when is None:
+            return
+        self.dated += 1
+        to_oldest = len(self.oldest) < self.keep or when < self.oldest[-1][0]
+        to_newest = len(self.newest) < self.keep or when >= self.newest[0][0]
+        if not (to_oldest or to_newest):
+            return
+        entry = (when, self.dated, {
+            "date": metadata.get("creationTime", ""),
+            "filename": item.get("filename", ""),
+            "description": item.get("description", ""),
+            "location": metadata.get("photo", {}).get("cameraMake", ""),
+        })
+        if to_oldest:
+            bisect.insort(self.oldest, entry)
+            del self.oldest[self.keep:]
+        if to_newest:
+            bisect.insort(self.newest, entry)
+            del self.newest[:-self.keep]
+
+    def summary(self, album: dict) -> dict:
+        return {
+            "person_name": album.get("title", "Unknown"),
+            "photo_count": int(album.get("mediaItemsCount", "0")),
+            "oldest_photo_date": self.oldest[0][2]["date"] if self.oldest else "",
+            "newest_photo_date": self.newest[-1][2]["date"] if self.newest else "",
+            "key_photos": [photo for _, _, photo in self.oldest + self.newest],
+        }
+
+
+async def _photos_pages(client: httpx.AsyncClient, method: str, path: str, key: str,
+                        page_size: int, **query) -> AsyncIterator[dict]:
+    """Yield every `key` item across all pages, following nextPageToken."""
+    token = None
+    while True:
+        page = {"pageSize": page_size, **query, **({"pageToken": token} if token else {})}
+        if method == "GET":
+            data = await _google_request(client, method, path, params=page)
+        else:
+            data = await _google_request(client, method, path, json=page)
+        for item in data.get(key, []):
+            yield item
+        token = data.get("nextPageToken")
+        if not token:
+            return
+
+
+async def fetch_photos_data(access_token: str, refresh_token: str = "", base_url: str = PHOTOS_API) -> dict:
     """
-    Fetch the top 15 people albums from Google Photos, ranked by photo count.
-    For each person, get their 5 most recent and 5 oldest photos with metadata.
+    Fetch the top people albums (photos_top_albums) from Google Photos,
+    ranked by photo count. For each person, get their 5 most recent and 5
+    oldest photos with metadata, reading every page of the album. Albums are
+    paged through photos_album_concurrency at a time over one pooled client.
     Also fetch Google Photos Memories and Highlights.
 
     Returns a dict with people albums and memories.
     """
-    import requests
-
-    headers = {"Authorization": f"Bearer {access_token}"}
-    base_url = "https://photoslibrary.googleapis.com/v1"
-
     result = {"people_albums": [], "memories": []}
+    concurrency = max(1, settings.photos_album_concurrency)
 
-    try:
-        # List all albums
-        albums_resp = requests.get(f"{base_url}/albums?pageSize=50", headers=headers)
-        if albums_resp.status_code != 200:
-            logger.warning(f"Photos API error: {albums_resp.status_code} — {albums_resp.text[:300]}")
+    async with _google_client(base_url, access_token, concurrency) as client:
+        try:
+            albums = [a async for a in _photos_pages(client, "GET", "/albums", "albums", 50)]
+        except Exception as e:
+            logger.warning(f"Photos API error listing albums: {e}")
             return result
 
-        albums = albums_resp.json().get("albums", [])
-
-        # Sort by photo count, take top 15
-        albums_with_counts = [
-            a for a in albums if a.get("mediaItemsCount", "0") != "0"
-        ]
-        albums_with_counts.sort(
-            key=lambda a: int(a.get("mediaItemsCount", "0")), reverse=True
-        )
-        top_albums = albums_with_counts[:15]
-
-        for album in top_albums:
-            album_id = album["id"]
-            album_title = album.get("title", "Unknown")
-            photo_count = int(album.get("mediaItemsCount", "0"))
-
-            # Fetch media items for this album
-            media_resp = requests.post(
-                f"{base_url}/mediaItems:search",
-                headers=headers,
-                json={"albumId": album_id, "pageSize": 100}
-            )
+        # Sort by photo count, take the largest
+        albums_with_counts = [a for a in albums if a.get("mediaItemsCount", "0") != "0"]
+        albums_with_counts.sort(key=lambda a: int(a.get("mediaItemsCount", "0")), reverse=True)
+        top_albums = albums_with_counts[:settings.photos_top_albums]
 
-            if media_resp.status_code != 200:
-                continue
+        gate = asyncio.Semaphore(concurrency)
 
-            items = media_resp.json().get("mediaItems", [])
+        async def scan(album: dict) -> _AlbumScan:
+            async with gate:
+                album_scan = _AlbumScan()
+                async for item in _photos_pages(client, "POST", "/mediaItems:search", "mediaItems", 100,
+                                                albumId=album["id"]):
+                    album_scan.add(item)
+                return album_scan
 
-            # Sort by creation time to get oldest and newest
-            items_with_dates = [
-                i for i in items if i.get("mediaMetadata", {}).get("creationTime")
-            ]
-            items_with_dates.sort(
-                key=lambda i: i["mediaMetadata"]["creationTime"]
-            )
-
-            oldest_5 = items_with_dates[:5]
-            newest_5 = items_with_dates[-5:]
-            key_photos = oldest_5 + newest_5
-
-            photos_data = []
-            for photo in key_photos:
-                metadata = photo.get("mediaMetadata", {})
-                photos_data.append({
-                    "date": metadata.get("creationTime", ""),
-                    "filename": photo.get("filename", ""),
-                    "description": photo.get("description", ""),
-                    "location": metadata.get("photo", {}).get("cameraMake", ""),
-                })
-
-            result["people_albums"].append({
-                "person_name": album_title,
-                "photo_count": photo_count,
-                "oldest_photo_date": items_with_dates[0]["mediaMetadata"]["creationTime"] if items_with_dates else "",
-                "newest_photo_date": items_with_dates[-1]["mediaMetadata"]["creationTime"] if items_with_dates else "",
-                "key_photos": photos_data,
-            })
-
-    except Exception as e:
-        logger.error(f"Error fetching Google Photos: {e}")
+        scans = await asyncio.gather(*(scan(a) for a in top_albums), return_exceptions=True)
 
+    for album, album_scan in zip(top_albums, scans):
+        if isinstance(album_scan, Exception):
+            logger.warning(f"Photos API error reading album {album.get('title', album['id'])}: {album_scan}")
+            continue
+        result["people_albums"].append(album_scan.summary(album))
     return result
 
 
 # ── Gmail ─────────────────────────────────────────────────────────────────────
 
-def fetch_gmail_data(access_token: str, refresh_token: str) -> dict:
-    """
-    Find the top 20 most frequent email contacts.
-    For each one extract: subject line patterns, recurring topics,
-    thread depth (how deep conversations go), travel/calendar mentions.
+GMAIL_API = "https://gmail.googleapis.com/gmail/v1/users/me"
+_RECENT_SUBJECTS = 10               # subjects kept per recipient, newest first
+_TRAVEL_WORDS = ("flight", "hotel", "trip", "travel", "booking", "reservation")
+_CALENDAR_WORDS = ("invite", "meeting", "calendar", "schedule")
+
+
+def _recipient(to: str) -> str:
+    """Normalize a To header: "Sarah <Sarah@x.com>" → "sarah@x.com"."""
+    return to.split("<")[-1].replace(">", "").strip().lower()
 
-    Returns a list of contact summaries with relationship signals.
+
+class _SentTally:
+    """
+    Per-recipient counts and subjects for a batch of sent messages, fed
+    newest first. merged() adds the batch onto the stored aggregates, so a
+    delta sync never needs the messages it has already counted.
     """
-    creds = _get_credentials(access_token, refresh_token)
 
-    result = {"frequent_contacts": []}
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self.subjects: dict[str, list] = {}
+
+    def add(self, message: dict) -> None:
+        headers = {h["name"]: h["value"] for h in message.get("payload", {}).get("headers", [])}
+        to = headers.get("To", "")
+        subject = headers.get("Subject", "")
+        if not to or "@" not in to:
+            return
+        email = _recipient(to)
+        self.counts[email] = self.counts.get(email, 0) + 1
+        subjects = self.subjects.setdefault(email, [])
+        if subject and len(subjects) < _RECENT_SUBJECTS:
+            subjects.append(subject)
+
+    def merged(self, stored: list[dict]) -> list[dict]:
+        """gmail_contact_stats rows for every recipient in this batch."""
+        previous = {row["email"]: row for row in stored}
+        rows = []
+        for email, count in self.counts.items():
+            old = previous.get(email, {})
+            rows.append({
+                "email": email,
+                "email_count": old.get("email_count", 0) + count,
+                "recent_subjects": (self.subjects[email] + list(old.get("recent_subjects") or []))[:_RECENT_SUBJECTS],
+            })
+        return rows
 
-    try:
-        service = build("gmail", "v1", credentials=creds)
 
-        # Get the last 500 sent emails to find who we communicate with most
-        sent = service.users().messages().list(
-            userId="me",
-            labelIds=["SENT"],
-            maxResults=500
-        ).execute()
+def _email_summary(row: dict) -> dict:
+    """A gmail_contact_stats row in the shape build_people_graph reads."""
+    subjects = list(row.get("recent_subjects") or [])
+    text = " ".join(subjects).lower()
+    return {
+        "email": row["email"],
+        "email_count": row["email_count"],
+        "recent_subjects": subjects,
+        "has_travel": any(word in text for word in _TRAVEL_WORDS),
+        "has_calendar": any(word in text for word in _CALENDAR_WORDS),
+    }
 
-        messages = sent.get("messages", [])
 
-        # Count emails per recipient
-        contact_counts: dict = {}
-        contact_subjects: dict = {}
+async def _gmail_sent_ids(client: httpx.AsyncClient) -> tuple[str, list[str]]:
+    """Full read: the mailbox historyId, then the latest gmail_sent_messages SENT ids."""
+    # historyId first, so anything sent while we list is picked up next sync
+    profile = await _google_request(client, "GET", "/profile")
+    limit = settings.gmail_sent_messages
+    ids: list[str] = []
+    async for page in _google_pages(client, "/messages", labelIds="SENT", maxResults=min(500, limit)):
+        ids.extend(m["id"] for m in page.get("messages", []))
+        if len(ids) >= limit:
+            break
+    return str(profile["historyId"]), ids[:limit]
 
-        for msg_ref in messages[:500]:  # process up to 500 for better coverage
-            try:
-                msg = service.users().messages().get(
-                    userId="me",
-                    id=msg_ref["id"],
-                    format="metadata",
-                    metadataHeaders=["To", "Subject"]
-                ).execute()
-
-                headers = {h["name"]: h["value"] for h in msg.get("payload", {}).get("headers", [])}
-                to = headers.get("To", "")
-                subject = headers.get("Subject", "")
-
-                if to and "@" in to:
-                    # Normalize the email address
-                    email = to.split("<")[-1].replace(">", "").strip()
-                    contact_counts[email] = contact_counts.get(email, 0) + 1
-                    if email not in contact_subjects:
-                        contact_subjects[email] = []
-                    if subject:
-                        contact_subjects[email].append(subject)
-
-            except Exception:
-                continue
-
-        # Take top 50 contacts by email count
-        top_contacts = sorted(contact_counts.items(), key=lambda x: x[1], reverse=True)[:50]
-
-        for email, count in top_contacts:
-            subjects = contact_subjects.get(email, [])[:10]  # last 10 subjects
-            result["frequent_contacts"].append({
-                "email": email,
-                "email_count": count,
-                "recent_subjects": subjects,
-                "has_travel": any(
-                    word in " ".join(subjects).lower()
-                    for word in ["flight", "hotel", "trip", "travel", "booking", "reservation"]
-                ),
-                "has_calendar": any(
-                    word in " ".join(subjects).lower()
-                    for word in ["invite", "meeting", "calendar", "schedule"]
-                ),
-            })
 
+async def _gmail_sent_since(client: httpx.AsyncClient, history_id: str) -> tuple[str, list[str]]:
+    """Delta read: ids of messages sent since history_id (newest first), and the new historyId."""
+    ids: list[str] = []
+    latest = history_id
+    try:
+        async for page in _google_pages(client, "/history", startHistoryId=history_id,
+                                        historyTypes="messageAdded", labelId="SENT", maxResults=500):
+            latest = str(page.get("historyId") or latest)
+            for record in page.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message = added.get("message", {})
+                    if "SENT" in message.get("labelIds", ["SENT"]):
+                        ids.append(message["id"])
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:       # historyId older than Gmail keeps
+            raise _CursorExpired(history_id) from e
+        raise
+    return latest, list(dict.fromkeys(reversed(ids)))
+
+
+async def _gmail_headers(client: httpx.AsyncClient, ids: list[str]) -> list[dict]:
+    """To / Subject metadata for each id, in order, gmail_fetch_concurrency at a time.
+    Messages deleted since they were listed are skipped."""
+    gate = asyncio.Semaphore(max(1, settings.gmail_fetch_concurrency))
+    params = [("format", "metadata"), ("metadataHeaders", "To"), ("metadataHeaders", "Subject")]
+
+    async def get(message_id: str) -> dict:
+        async with gate:
+            return await _google_request(client, "GET", f"/messages/{message_id}", params=params)
+
+    results = await asyncio.gather(*(get(i) for i in ids), return_exceptions=True)
+    return [r for r in results if not isinstance(r, Exception)]
+
+
+def _save_gmail_sync(user_id: str, tally: _SentTally, full: bool, history_id: str) -> list[dict]:
+    """Fold a tally into gmail_contact_stats and move the cursor. Returns the rows written."""
+    import database as db
+
+    if full:
+        # Drop the cursor before the aggregates, so a failure part-way
+        # means another full read rather than deltas on a partial base
+        db.save_google_sync_state(user_id, gmail_history_id=None)
+        db.delete_gmail_contact_stats(user_id)
+        rows = tally.merged([])
+    else:
+        rows = tally.merged(db.get_gmail_contact_stats(user_id, list(tally.counts)))
+    db.upsert_gmail_contact_stats(user_id, rows)
+    db.save_google_sync_state(user_id, gmail_history_id=history_id)
+    return rows
+
+
+async def _sync_state(user_id: str) -> dict:
+    """Stored sync cursors, or {} (a full read) if google_sync_state can't be read."""
+    import database as db
+
+    try:
+        return await asyncio.to_thread(db.get_google_sync_state, user_id)
     except Exception as e:
-        logger.error(f"Error fetching Gmail: {e}")
+        logger.error(f"Could not read Google sync state for user {user_id} — reading everything: {e}")
+        return {}
 
-    return result
+
+async def sync_gmail(user_id: str, access_token: str, full: bool = False, base_url: str = GMAIL_API) -> dict:
+    """
+    Bring the user's sent-mail aggregates (who they email, how often, about
+    what) up to date. With a stored historyId only messages sent since are
+    read, via users.history.list, and added onto the stored counts. The
+    first sync, full=True, or a historyId Gmail no longer keeps re-reads the
+    latest gmail_sent_messages sent emails and rebuilds the aggregates.
+
+    Returns {"full": bool, "emails": recipients whose aggregates changed,
+    "rows": their gmail_contact_stats rows}. On an API error nothing is
+    stored and both lists are empty. If the database can't be read or
+    written the mail is still read (all of it, without a cursor) and
+    returned, just not stored.
+    """
+    import database as db
+
+    state = {} if full else await _sync_state(user_id)
+    history_id = state.get("gmail_history_id")
+    async with _google_client(base_url, access_token, settings.gmail_fetch_concurrency) as client:
+        try:
+            if history_id:
+                try:
+                    new_history_id, ids = await _gmail_sent_since(client, history_id)
+                except _CursorExpired:
+                    logger.info(f"Gmail historyId expired for user {user_id} — re-reading sent mail")
+                    history_id = None
+            if not history_id:
+                new_history_id, ids = await _gmail_sent_ids(client)
+            tally = _SentTally()
+            for message in await _gmail_headers(client, ids):
+                tally.add(message)
+        except Exception as e:
+            logger.error(f"Error syncing Gmail for user {user_id}: {e}")
+            return {"full": not history_id, "emails": [], "rows": []}
+
+    try:
+        rows = await asyncio.to_thread(_save_gmail_sync, user_id, tally, not history_id, new_history_id)
+    except Exception as e:
+        logger.error(f"Could not store Gmail sync for user {user_id}, cursor left as it was: {e}")
+        rows = tally.merged([])
+    logger.info(f"Gmail sync for user {user_id}: {len(ids)} sent messages, {len(rows)} recipients "
+                f"({'full' if not history_id else 'delta'})")
+    return {"full": not history_id, "emails": [row["email"] for row in rows], "rows": rows}
 
 
 # ── Google Contacts ───────────────────────────────────────────────────────────
 
-def fetch_contacts_data(access_token: str, refresh_token: str) -> dict:
+PEOPLE_API = "https://people.googleapis.com/v1"
+_PERSON_FIELDS = "names,emailAddresses,phoneNumbers,birthdays,organizations"
+
+
+def _parse_contact(person: dict) -> Optional[dict]:
+    """A People API person as a google_contacts row, or None if it has no usable name."""
+    names = person.get("names", [])
+    emails = [e["value"].strip().lower() for e in person.get("emailAddresses", []) if e.get("value")]
+    phones = [p["value"] for p in person.get("phoneNumbers", []) if p.get("value")]
+
+    if names:
+        name = names[0].get("displayName", "")
+    elif phones:
+        name = phones[0]  # no display name — phone as placeholder
+    elif emails:
+        name = emails[0]
+    else:
+        return None
+    if not name:
+        return None
+
+    # Extract birthday if available
+    birthday = None
+    for bd in person.get("birthdays", []):
+        date = bd.get("date", {})
+        if date.get("month") and date.get("day"):
+            birthday = f"{date.get('month', '')}/{date.get('day', '')}"
+            if date.get("year"):
+                birthday = f"{date['year']}-{birthday}"
+
+    return {
+        "resource_name": person["resourceName"],
+        "name": name,
+        "emails": emails,
+        "phones": phones,
+        "birthday": birthday,
+    }
+
+
+def _contact_summary(row: dict) -> dict:
+    """A google_contacts row in the shape build_people_graph reads."""
+    return {
+        "name": row["name"],
+        "emails": list(row.get("emails") or []),
+        "phones": list(row.get("phones") or []),
+        "birthday": row.get("birthday"),
+    }
+
+
+async def _connections(client: httpx.AsyncClient, sync_token: Optional[str]) -> tuple[list[dict], Optional[str]]:
     """
-    Pull all Google Contacts with birthdays, phone numbers, and emails.
-    Paginates through all pages (Google caps each page at 100 by default).
-    Cross-reference later with Photos people albums to enrich records.
+    Every connection (or, with a syncToken, every one changed since), and the
+    token for next time. Google returns at most ~100 per page even when
+    pageSize=1000, so nextPageToken is followed to the end.
     """
-    creds = _get_credentials(access_token, refresh_token)
+    persons: list[dict] = []
+    next_token = None
+    cursor = {"syncToken": sync_token} if sync_token else {}
+    try:
+        async for page in _google_pages(client, "/people/me/connections", personFields=_PERSON_FIELDS,
+                                        pageSize=1000, requestSyncToken=True, **cursor):
+            persons.extend(page.get("connections", []))
+            next_token = page.get("nextSyncToken") or next_token
+    except httpx.HTTPStatusError as e:
+        # Expired tokens come back as 410, or 400 EXPIRED_SYNC_TOKEN
+        if sync_token and (e.response.status_code == 410 or "EXPIRED_SYNC_TOKEN" in e.response.text):
+            raise _CursorExpired(sync_token) from e
+        raise
+    return persons, next_token
+
+
+def _save_contacts_sync(user_id: str, changed: list[dict], deleted: list[str], full: bool,
+                        sync_token: Optional[str]) -> None:
+    """Apply a contacts sync to google_contacts and move the cursor."""
+    import database as db
 
-    result = {"contacts": []}
+    if full:
+        db.save_google_sync_state(user_id, contacts_sync_token=None)
+        db.delete_google_contacts(user_id)
+    db.upsert_google_contacts(user_id, changed)
+    db.delete_google_contacts(user_id, deleted)
+    db.save_google_sync_state(user_id, contacts_sync_token=sync_token)
 
-    try:
-        service = build("people", "v1", credentials=creds)
-
-        # Paginate through ALL contacts — Google returns max ~100 per page
-        # even when pageSize=1000, so we must follow nextPageToken
-        all_persons = []
-        page_token = None
-        while True:
-            kwargs = dict(
-                resourceName="people/me",
-                pageSize=1000,
-                personFields="names,emailAddresses,phoneNumbers,birthdays,organizations"
-            )
-            if page_token:
-                kwargs["pageToken"] = page_token
-
-            connections = service.people().connections().list(**kwargs).execute()
-            all_persons.extend(connections.get("connections", []))
-
-            page_token = connections.get("nextPageToken")
-            if not page_token:
-                break
-
-        logger.info(f"Fetched {len(all_persons)} total contacts across all pages")
-
-        for person in all_persons:
-            names = person.get("names", [])
-            emails = [e["value"] for e in person.get("emailAddresses", [])]
-            phones = [p["value"] for p in person.get("phoneNumbers", [])]
-
-            if names:
-                name = names[0].get("displayName", "")
-            elif phones:
-                name = phones[0]  # no display name — phone as placeholder
-            elif emails:
-                name = emails[0]
-            else:
-                continue
-
-            if not name:
-                continue
-
-            # Extract birthday if available
-            birthday = None
-            for bd in person.get("birthdays", []):
-                date = bd.get("date", {})
-                if date.get("month") and date.get("day"):
-                    birthday = f"{date.get('month', '')}/{date.get('day', '')}"
-                    if date.get("year"):
-                        birthday = f"{date['year']}-{birthday}"
-
-            result["contacts"].append({
-                "name": name,
-                "emails": emails,
-                "phones": phones,
-                "birthday": birthday,
-            })
 
+async def sync_contacts(user_id: str, access_token: str, full: bool = False, base_url: str = PEOPLE_API) -> dict:
+    """
+    Bring the user's stored Google Contacts (birthdays, phone numbers,
+    emails) up to date. With a stored syncToken only contacts added, edited
+    or deleted since are read; the first sync, full=True, or an expired
+    token reads them all and replaces what is stored.
+
+    Returns {"full": bool, "changed": [rows added or edited], "deleted":
+    [resource names removed]}. On an API error nothing is stored and both
+    lists are empty. If the database can't be read or written the contacts
+    are still read (all of them, without a cursor) and returned, just not
+    stored.
+    """
+    state = {} if full else await _sync_state(user_id)
+    sync_token = state.get("contacts_sync_token")
+    async with _google_client(base_url, access_token, 1) as client:
+        try:
+            if sync_token:
+                try:
+                    persons, next_token = await _connections(client, sync_token)
+                except _CursorExpired:
+                    logger.info(f"Contacts syncToken expired for user {user_id} — re-reading contacts")
+                    sync_token = None
+            if not sync_token:
+                persons, next_token = await _connections(client, None)
+        except Exception as e:
+            logger.error(f"Error syncing Contacts for user {user_id}: {e}")
+            return {"full": not sync_token, "changed": [], "deleted": []}
+
+    changed: dict[str, dict] = {}
+    deleted: dict[str, None] = {}
+    for person in persons:
+        resource_name = person.get("resourceName")
+        if not resource_name:
+            continue
+        contact = None if person.get("metadata", {}).get("deleted") else _parse_contact(person)
+        if contact:
+            changed[resource_name] = contact
+            deleted.pop(resource_name, None)
+        else:
+            # Deleted, or edited down to nothing we can name them by
+            deleted[resource_name] = None
+            changed.pop(resource_name, None)
+
+    full_read = not sync_token
+    try:
+        await asyncio.to_thread(_save_contacts_sync, user_id, list(changed.values()),
+                                [] if full_read else list(deleted), full_read, next_token)
     except Exception as e:
-        logger.error(f"Error fetching Contacts: {e}")
-
-    return result
+        logger.error(f"Could not store Contacts sync for user {user_id}, cursor left as it was: {e}")
+    logger.info(f"Contacts sync for user {user_id}: {len(changed)} changed, {len(deleted)} deleted "
+                f"({'full' if full_read else 'delta'})")
+    return {"full": full_read, "changed": list(changed.values()), "deleted": [] if full_read else list(deleted)}
 
 
 # ── Full ingestion pipeline ───────────────────────────────────────────────────
 
-async def run_full_ingestion(user_id: str, access_token: str, refresh_token: str) -> dict:
+async def run_full_ingestion(user_id: str, access_token: str, refresh_token: str,
+                             full: bool = False) -> dict:
     """
     Run Photos + Gmail + Contacts ingestion in parallel.
     Broadcasts real-time progress to the iOS app via WebSocket if the user
     has an active onboarding session registered in the ingestion bus.
 
+    Gmail and Contacts fetch only what changed since the last sync (or
+    everything, the first time or with full=True); the datasets returned
+    are the user's complete synced contacts and top gmail_top_contacts
+    recipients either way.
+
     Returns all three datasets merged — ready to send to Claude.
     """
+    import database as db
     from services.ingestion_bus import get_session, broadcast_async
 
     session_id = get_session(user_id)
@@ -385,22 +638,26 @@ async def run_full_ingestion(user_id: str, access_token: str, refresh_token: str
 
     await _emit(3, "Opening your Google account…", stage="starting")
 
-    loop = asyncio.get_event_loop()
-
     # ── Contacts (fastest, broadcast first) ────────────────────────────────────
     await _emit(8, "Reading your contacts…", source="contacts")
-    contacts_future = loop.run_in_executor(None, fetch_contacts_data, access_token, refresh_token)
+    contacts_future = asyncio.ensure_future(sync_contacts(user_id, access_token, full=full))
 
     # ── Gmail (parallel with contacts) ─────────────────────────────────────────
     await _emit(15, "Scanning your sent emails to see who you talk to most…", source="gmail")
-    gmail_future = loop.run_in_executor(None, fetch_gmail_data, access_token, refresh_token)
+    gmail_future = asyncio.ensure_future(sync_gmail(user_id, access_token, full=full))
 
     # ── Photos ──────────────────────────────────────────────────────────────────
     await _emit(22, "Looking through your photo albums…", source="photos")
-    photos_future = loop.run_in_executor(None, fetch_photos_data, access_token, refresh_token)
+    photos_future = asyncio.ensure_future(fetch_photos_data(access_token, refresh_token))
 
     # Wait for contacts first — smallest dataset
-    contacts_data = await contacts_future
+    contacts_sync = await contacts_future
+    try:
+        rows = await asyncio.to_thread(db.get_google_contacts, user_id)
+    except Exception as e:
+        logger.error(f"Could not read stored contacts for user {user_id}, using this sync's: {e}")
+        rows = contacts_sync["changed"]
+    contacts_data = {"contacts": [_contact_summary(r) for r in rows]}
     n_contacts = len(contacts_data.get("contacts", []))
     await _emit(
         35,
@@ -412,7 +669,13 @@ async def run_full_ingestion(user_id: str, access_token: str, refresh_token: str
     )
 
     # Wait for Gmail
-    gmail_data = await gmail_future
+    gmail_sync = await gmail_future
+    try:
+        rows = await asyncio.to_thread(db.get_gmail_contact_stats, user_id, None, settings.gmail_top_contacts)
+    except Exception as e:
+        logger.error(f"Could not read stored Gmail aggregates for user {user_id}, using this sync's: {e}")
+        rows = sorted(gmail_sync["rows"], key=lambda r: -r["email_count"])[:settings.gmail_top_contacts]
+    gmail_data = {"frequent_contacts": [_email_summary(r) for r in rows]}
     n_email = len(gmail_data.get("frequent_contacts", []))
     await _emit(
         50,
@@ -454,3 +717,48 @@ async def run_full_ingestion(user_id: str, access_token: str, refresh_token: str
         "gmail":    gmail_data,
         "contacts": contacts_data,
     }
+
+
+async def run_incremental_ingestion(user_id: str, access_token: str, refresh_token: str = "") -> dict:
+    """
+    Sync Gmail + Contacts and return only what a People Graph refresh needs:
+    contacts added or edited since the last sync, contacts among the top
+    gmail_top_contacts recipients who were emailed since, and the Gmail
+    aggregates of both. Photos are not re-read.
+
+    Same shape as run_full_ingestion, plus "deleted_contacts" (resource
+    names removed from Google). Empty contacts and frequent_contacts mean
+    nothing changed and the graph can be left alone.
+    """
+    import database as db
+
+    contacts_sync, gmail_sync = await asyncio.gather(
+        sync_contacts(user_id, access_token),
+        sync_gmail(user_id, access_token),
+    )
+
+    def _changes() -> tuple[list, list]:
+        top = db.get_gmail_contact_stats(user_id, limit=settings.gmail_top_contacts)
+        emailed = {row["email"] for row in top} & set(gmail_sync["emails"])
+        changed = {c["resource_name"]: c for c in contacts_sync["changed"]}
+        for row in db.get_google_contacts(user_id, sorted(emailed)):
+            changed.setdefault(row["resource_name"], row)
+        emails = emailed | {e for c in changed.values() for e in c.get("emails") or []}
+        return list(changed.values()), db.get_gmail_contact_stats(user_id, sorted(emails))
+
+    try:
+        contacts, stats = await asyncio.to_thread(_changes)
+    except Exception as e:
+        logger.error(f"Could not read stored Google data for user {user_id}, using this sync's: {e}")
+        contacts, stats = contacts_sync["changed"], gmail_sync["rows"]
+    logger.info(
+        f"Incremental Google sync for user {user_id}: {len(contacts)} contacts to refresh, "
+        f"{len(contacts_sync['deleted'])} deleted, {len(gmail_sync['emails'])} recipients emailed"
+    )
+    return {
+        "user_id":  user_id,
+        "photos":   {"people_albums": [], "memories": []},
+        "gmail":    {"frequent_contacts": [_email_summary(r) for r in stats]},
+        "contacts": {"contacts": [_contact_summary(c) for c in contacts]},
+        "deleted_contacts": contacts_sync["deleted"],
+    }
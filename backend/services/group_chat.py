@@ -98,7 +98,7 @@ Rules:
 - Return only valid JSON."""
 
     try:
-        response = _call_claude(system_prompt, f"Group chat ({len(messages)} messages):\n{messages_text}")
+        response = _call_claude(system_prompt, f"Group chat ({len(messages)} messages):\n{messages_text}", feature="group_chat")
         if "```" in response:
             response = response.split("```")[1]
             if response.startswith("json"):
@@ -3,16 +3,25 @@ services/icalendar_processor.py — iCalendar events → life signals pipeline.
 
 The iOS app sends calendar events through POST /calendar/sync.
 This processor:
-  1. Runs WorkFilter on every event
-  2. Saves personal events to the `calendar_events` table
-  3. Extracts life signals: birthdays → life_events, travel → interests,
-     health appointments → health signals, large social gatherings → social signals
-
-All life signal extraction is fire-and-forget — it never blocks the sync response.
-Work events are counted and discarded; their content never reaches the signal layer.
+  1. Keys every event on (user_id, source_uid, recurrence_id) and hashes
+     its content; events whose hash matches the stored row are skipped
+  2. Runs WorkFilter on the new and changed events, in one batch
+  3. Writes them to the `calendar_events` table with one bulk upsert, and
+     deletes stored events missing from the sync (set difference)
+  4. Extracts life signals from newly personal events: birthdays →
+     life_events, travel → interests, health appointments → health
+     signals, large social gatherings → social signals — one bulk insert
+     per table
+
+Re-syncing an unchanged calendar is one read of the stored keys and hashes
+and nothing else. Work events keep only their key and hash (title,
+description and attendees blanked, work_filtered = true) so they are not
+re-classified on every sync; their content never reaches the signal layer.
 """
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import re
 import uuid
@@ -32,6 +41,7 @@ except ImportError:
 from config import get_settings
 from core.ingestion.work_filter import WorkFilter, Label
 import database as db
+from core.world_model import invalidate_world_model
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -52,6 +62,8 @@ _GYM_RE = re.compile(r"\b(gym|yoga|run|hike|workout|crossfit|climbing|pilates|sw
 # ── Schemas ───────────────────────────────────────────────────────────────────
 
 class CalendarEvent(BaseModel):
+    uid: str = ""            # EKEvent calendarItemExternalIdentifier / iCalendar UID
+    recurrence_id: str = ""  # occurrence start, for one instance of a recurring event
     title: str
     description: str = ""
     start_time: str          # ISO-8601
@@ -66,6 +78,38 @@ class CalendarSyncRequest(BaseModel):
     selected_calendars: list[str] | None = None
 
 
+# ── Event identity ────────────────────────────────────────────────────────────
+
+_PAGE = 1000         # PostgREST's default max rows per response
+_DELETE_CHUNK = 200  # ids per DELETE ... IN (...), to keep URLs short
+
+
+def _event_key(event: dict) -> tuple[str, str]:
+    """
+    (source_uid, recurrence_id) for an event. Events sent without a uid
+    (older app builds) get one derived from calendar, title and start, so
+    a re-sync still matches; editing one of those reads as delete + add.
+    """
+    uid = event.get("uid") or ""
+    if not uid:
+        basis = "\x1f".join([event.get("calendar_name", ""), event.get("title", ""), event.get("start_time", "")])
+        uid = "derived:" + hashlib.sha1(basis.encode()).hexdigest()
+    return uid, event.get("recurrence_id") or ""
+
+
+def _content_hash(event: dict) -> str:
+    """Hash of every stored field, so any edit on the device shows up as a change."""
+    payload = json.dumps({
+        "title": event.get("title", ""),
+        "description": (event.get("description") or "")[:1000],
+        "start_time": event.get("start_time") or "",
+        "end_time": event.get("end_time") or "",
+        "calendar_name": event.get("calendar_name", ""),
+        "attendees": sorted(event.get("attendees") or []),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 # ── ICalendarProcessor ────────────────────────────────────────────────────────
 
 class ICalendarProcessor:
@@ -85,12 +129,16 @@ class ICalendarProcessor:
         selected_calendars: list[str] | None = None,
     ) -> dict:
         """
-        Process a list of raw calendar events.
+        Sync the user's calendar to `events`, the full set of events the app
+        shares (after selected_calendars is applied). Stored events not in
+        it are deleted, including those on calendars no longer selected.
 
         Returns:
           {
-            "processed": int,       # events saved as personal
+            "processed": int,       # new or changed events saved as personal
             "filtered": int,        # events dropped (work or not in selected_calendars)
+            "unchanged": int,       # events skipped, same content as stored
+            "deleted": int,         # stored events no longer in the calendar
             "life_events_found": int,
             "signals_extracted": int,
           }
@@ -98,200 +146,216 @@ class ICalendarProcessor:
         stats = {
             "processed": 0,
             "filtered": 0,
+            "unchanged": 0,
+            "deleted": 0,
             "life_events_found": 0,
             "signals_extracted": 0,
         }
 
+        # ── Calendar selection filter, then one entry per key (last wins) ──
+        incoming: dict[tuple[str, str], dict] = {}
         for event in events:
-            title = event.get("title", "")
-            cal_name = event.get("calendar_name", "")
+            if selected_calendars is not None and event.get("calendar_name", "") not in selected_calendars:
+                stats["filtered"] += 1
+                continue
+            incoming[_event_key(event)] = event
 
-            # ── Calendar selection filter ──────────────────────────────────
-            if selected_calendars is not None:
-                if cal_name not in selected_calendars:
+        # ── Diff against what is stored ────────────────────────────────────
+        try:
+            stored = self._load_synced(user_id)
+        except Exception as exc:
+            logger.warning(f"Could not read synced calendar events for user {user_id}: {exc}")
+            return stats
+
+        changed: list[tuple[tuple[str, str], dict, str]] = []
+        for key, event in incoming.items():
+            content_hash = _content_hash(event)
+            previous = stored.get(key)
+            if previous and previous.get("content_hash") == content_hash:
+                stats["unchanged"] += 1
+                if previous.get("work_filtered"):
                     stats["filtered"] += 1
-                    continue
-
-            # ── WorkFilter ─────────────────────────────────────────────────
-            classify_content = {
-                "title": title,
+                continue
+            changed.append((key, event, content_hash))
+        removed = [row["id"] for key, row in stored.items() if key not in incoming]
+
+        # ── WorkFilter, changed events only, one batch ─────────────────────
+        verdicts = await self._work_filter.classify_many(
+            "calendar",
+            [{
+                "title": event.get("title", ""),
                 "description": (event.get("description") or "")[:200],
-                "calendar_name": cal_name,
+                "calendar_name": event.get("calendar_name", ""),
                 "attendees": event.get("attendees", []),
-            }
-
-            fr = await self._work_filter.classify(
-                content_type="calendar",
-                content=classify_content,
-                user_id=user_id,
-            )
+            } for _, event, _ in changed],
+            user_id=user_id,
+        ) if changed else []
 
+        rows, fresh = [], []
+        for (key, event, content_hash), fr in zip(changed, verdicts):
+            rows.append(self._event_row(user_id, key, event, content_hash, work_filtered=not fr.passes))
             if not fr.passes:
                 stats["filtered"] += 1
                 continue
+            previous = stored.get(key)
+            if previous is None or previous.get("work_filtered"):
+                fresh.append(event)     # edits of known personal events don't re-signal
 
-            # ── Save to calendar_events ────────────────────────────────────
-            try:
-                self._save_event(user_id, event, work_filtered=False)
-                stats["processed"] += 1
-            except Exception as exc:
-                logger.warning(f"Failed to save calendar event '{title}': {exc}")
-                continue
-
-            # ── Life signal extraction (fire-and-forget) ───────────────────
-            try:
-                life_result = await self._extract_life_signals(user_id, event)
-                stats["life_events_found"] += life_result.get("life_events", 0)
-                stats["signals_extracted"] += life_result.get("signals", 0)
-            except Exception as exc:
-                logger.warning(f"Life signal extraction failed for '{title}': {exc}")
+        # ── Save to calendar_events ────────────────────────────────────────
+        try:
+            self._save_events(rows, removed)
+        except Exception as exc:
+            logger.warning(f"Failed to save {len(rows)} calendar events for user {user_id}: {exc}")
+            return stats
+        stats["processed"] = sum(1 for r in rows if not r["work_filtered"])
+        stats["deleted"] = len(removed)
+        if rows or removed:
+            invalidate_world_model(user_id, "calendar_events")
+
+        # ── Life signal extraction (best-effort) ───────────────────────────
+        try:
+            life_result = self._write_life_signals(user_id, fresh)
+            stats["life_events_found"] = life_result["life_events"]
+            stats["signals_extracted"] = life_result["signals"]
+        except Exception as exc:
+            logger.warning(f"Life signal extraction failed for user {user_id}: {exc}")
 
+        logger.info(
+            f"Calendar sync for user {user_id}: {len(incoming)} events, {len(changed)} changed, "
+            f"{stats['unchanged']} unchanged, {len(removed)} deleted"
+        )
         return stats
 
     # ── Private helpers ───────────────────────────────────────────────────────
 
-    def _save_event(self, user_id: str, event: dict, work_filtered: bool) -> None:
-        """Upsert a calendar event record to the calendar_events table."""
-        db.get_db().table("calendar_events").upsert({
-            "id": str(uuid.uuid4()),
+    def _load_synced(self, user_id: str) -> dict[tuple[str, str], dict]:
+        """Key → {id, content_hash, work_filtered} for every stored event; one request per _PAGE rows."""
+        stored: dict[tuple[str, str], dict] = {}
+        offset = 0
+        while True:
+            result = (
+                db.get_db().table("calendar_events")
+                .select("id, source_uid, recurrence_id, content_hash, work_filtered")
+                .eq("user_id", user_id)
+                .order("id")
+                .range(offset, offset + _PAGE - 1)
+                .execute()
+            )
+            page = result.data or []
+            for row in page:
+                stored[(row.get("source_uid") or "", row.get("recurrence_id") or "")] = row
+            if len(page) < _PAGE:
+                return stored
+            offset += _PAGE
+
+    def _event_row(self, user_id: str, key: tuple[str, str], event: dict, content_hash: str,
+                   work_filtered: bool) -> dict:
+        """A calendar_events row. Work events keep their key, times and hash, not their content."""
+        return {
             "user_id": user_id,
-            "title": event.get("title", ""),
-            "description": (event.get("description") or "")[:1000],
+            "source_uid": key[0],
+            "recurrence_id": key[1],
+            "content_hash": content_hash,
+            "title": "" if work_filtered else event.get("title", ""),
+            "description": "" if work_filtered else (event.get("description") or "")[:1000],
             "start_time": event.get("start_time"),
             "end_time": event.get("end_time") or None,
             "calendar_name": event.get("calendar_name", ""),
             "work_filtered": work_filtered,
-            "attendees": event.get("attendees", []),
-        }).execute()
+            "attendees": [] if work_filtered else event.get("attendees", []),
+        }
 
-    async def _extract_life_signals(self, user_id: str, event: dict) -> dict:
+    def _save_events(self, rows: list[dict], removed_ids: list[str]) -> None:
+        """One upsert keyed on (user_id, source_uid, recurrence_id), then the deletions."""
+        if rows:
+            db.get_db().table("calendar_events").upsert(
+                rows, on_conflict="user_id,source_uid,recurrence_id",
+            ).execute()
+        for i in range(0, len(removed_ids), _DELETE_CHUNK):
+            db.get_db().table("calendar_events").delete().in_("id", removed_ids[i:i + _DELETE_CHUNK]).execute()
+
+    def _life_signals(self, user_id: str, event: dict) -> dict[str, list[dict]]:
         """
-        Extract life signals from a personal calendar event.
-        Returns {"life_events": int, "signals": int} for stats tracking.
+        Life signals from one personal calendar event, as rows per table
+        (life_events, interest_signals, capability_signals).
         """
         title = event.get("title", "")
         start_time = event.get("start_time", "")
         attendees = event.get("attendees", [])
-        counts = {"life_events": 0, "signals": 0}
+        out: dict[str, list[dict]] = {"life_events": [], "interest_signals": [], "capability_signals": []}
+
+        def interest(category: str, note: str) -> None:
+            out["interest_signals"].append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "category": category,
+                "source": "calendar",
+                "note": note[:500],
+            })
+
+        def capability(delta: float) -> None:
+            out["capability_signals"].append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "capability_area": "physical",
+                "delta": delta,
+                "source": f"calendar: {title[:80]}"[:500],
+            })
 
         # ── Birthday / anniversary → life_events table ────────────────────
-        if _BIRTHDAY_RE.search(title):
-            await self._save_life_event(
-                user_id=user_id,
-                event_type="birthday",
-                description=title,
-                approximate_date=start_time[:10] if start_time else None,
-            )
-            counts["life_events"] += 1
-
-        elif _ANNIVERSARY_RE.search(title):
-            await self._save_life_event(
-                user_id=user_id,
-                event_type="anniversary",
-                description=title,
-                approximate_date=start_time[:10] if start_time else None,
-            )
-            counts["life_events"] += 1
+        event_type = ("birthday" if _BIRTHDAY_RE.search(title)
+                      else "anniversary" if _ANNIVERSARY_RE.search(title) else None)
+        if event_type:
+            out["life_events"].append({
+                "id": str(uuid.uuid4()),
+                "owner_user_id": user_id,
+                "event_type": event_type,
+                "description": title[:500],
+                "approximate_date": start_time[:10] if start_time else None,
+                "source": "calendar",
+            })
 
         # ── Travel → interest signal ───────────────────────────────────────
         if _TRAVEL_RE.search(title):
-            await self._save_interest_signal(
-                user_id=user_id,
-                category="travel",
-                source="calendar",
-                note=title,
-            )
-            counts["signals"] += 1
+            interest("travel", title)
 
         # ── Health appointment → health signal ────────────────────────────
         if _HEALTH_RE.search(title):
-            await self._increment_capability_signal(
-                user_id=user_id,
-                capability_area="physical",
-                delta=0.05,
-                source=f"calendar: {title[:80]}",
-            )
-            counts["signals"] += 1
+            capability(0.05)
 
         # ── Gym / exercise → physical capability signal ───────────────────
         if _GYM_RE.search(title):
-            await self._increment_capability_signal(
-                user_id=user_id,
-                capability_area="physical",
-                delta=0.1,
-                source=f"calendar: {title[:80]}",
-            )
-            counts["signals"] += 1
+            capability(0.1)
 
         # ── Large social gathering → social signal ────────────────────────
         if len(attendees) > 5:
-            await self._save_interest_signal(
-                user_id=user_id,
-                category="social",
-                source="calendar",
-                note=f"Large event: {title[:80]} ({len(attendees)} attendees)",
-            )
-            counts["signals"] += 1
+            interest("social", f"Large event: {title[:80]} ({len(attendees)} attendees)")
 
-        return counts
+        return out
 
-    async def _save_life_event(
-        self,
-        user_id: str,
-        event_type: str,
-        description: str,
-        approximate_date: str | None,
-    ) -> None:
-        """Upsert a life_events record (best-effort)."""
-        try:
-            db.get_db().table("life_events").insert({
-                "id": str(uuid.uuid4()),
-                "owner_user_id": user_id,
-                "event_type": event_type,
-                "description": description[:500],
-                "approximate_date": approximate_date,
-                "source": "calendar",
-            }).execute()
-        except Exception as exc:
-            logger.debug(f"life_events insert skipped (may be duplicate): {exc}")
+    def _write_life_signals(self, user_id: str, events: list[dict]) -> dict:
+        """
+        Extract life signals from newly personal events and write them with
+        one insert per table (each best-effort).
+        Returns {"life_events": int, "signals": int} for stats tracking.
+        """
+        rows: dict[str, list[dict]] = {"life_events": [], "interest_signals": [], "capability_signals": []}
+        for event in events:
+            for table, table_rows in self._life_signals(user_id, event).items():
+                rows[table].extend(table_rows)
 
-    async def _save_interest_signal(
-        self,
-        user_id: str,
-        category: str,
-        source: str,
-        note: str,
-    ) -> None:
-        """Add an interest signal to the user's profile (best-effort)."""
-        try:
-            db.get_db().table("interest_signals").insert({
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "category": category,
-                "source": source,
-                "note": note[:500],
-            }).execute()
-        except Exception as exc:
-            logger.debug(f"interest_signals insert skipped: {exc}")
+        for table, table_rows in rows.items():
+            if not table_rows:
+                continue
+            try:
+                db.get_db().table(table).insert(table_rows).execute()
+            except Exception as exc:
+                logger.debug(f"{table} insert skipped: {exc}")
 
-    async def _increment_capability_signal(
-        self,
-        user_id: str,
-        capability_area: str,
-        delta: float,
-        source: str,
-    ) -> None:
-        """Increment a capability signal for the user (best-effort)."""
-        try:
-            db.get_db().table("capability_signals").insert({
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "capability_area": capability_area,
-                "delta": delta,
-                "source": source[:500],
-            }).execute()
-        except Exception as exc:
-            logger.debug(f"capability_signals insert skipped: {exc}")
+        return {
+            "life_events": len(rows["life_events"]),
+            "signals": len(rows["interest_signals"]) + len(rows["capability_signals"]),
+        }
 
 
 # ── Router endpoint ───────────────────────────────────────────────────────────
@@ -303,6 +367,8 @@ if _FASTAPI_AVAILABLE:
     async def calendar_sync(body: CalendarSyncRequest) -> dict:
         """
         iOS sends all calendar events here after the user selects which calendars to share.
+        Only events new or changed since the last sync are processed; events
+        missing from the payload are removed.
         Returns a summary of what was processed, filtered, and discovered.
         """
         if not body.user_id:
@@ -321,6 +387,8 @@ if _FASTAPI_AVAILABLE:
             "ok": True,
             "processed": result["processed"],
             "filtered": result["filtered"],
+            "unchanged": result["unchanged"],
+            "deleted": result["deleted"],
             "life_events_found": result["life_events_found"],
             "signals_extracted": result["signals_extracted"],
             "message": f"Genie read {result['processed']} personal events and found {result['life_events_found']} important moments.",
@@ -5,12 +5,12 @@ Sits between raw iMessage import (routers/messages.py) and the intelligence laye
 Every conversation passes through WorkFilter before any analysis.
 
 Pipeline per conversation:
-  1. WorkFilter.classify each message
+  1. WorkFilter.classify_many over each conversation's messages
   2. Drop work / ambiguous messages
   3. If personal messages remain → analyze_imessage_conversation (intelligence.py)
-  4. Run signal_extractor.extract_signals_from_message on each personal message
+  4. Queue the personal messages for signal_extractor (batched per conversation)
   5. Store phone_hash on the person record for cross-user matching
-  6. Broadcast progress via POST /ingestion/progress/{session_id} if session_id given
+  6. Broadcast progress on the ingestion bus if session_id given
 
 Privacy:
   - Raw message text is never stored by this layer (handled inside intelligence.py)
@@ -19,36 +19,20 @@ Privacy:
 from __future__ import annotations
 
 import asyncio
-import hashlib
 import logging
 from typing import Any
 
-import httpx
-
 from config import get_settings
 from core.ingestion.work_filter import WorkFilter, Label
+from core import person_index
+from core.person_index import hash_phone
+from core.world_model import invalidate_world_model
 import database as db
+from services.ingestion_bus import broadcast_async
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# ── Phone hashing ─────────────────────────────────────────────────────────────
-
-_DIGIT_STRIP = str.maketrans("", "", " ()-+.")
-
-
-def hash_phone(phone: str) -> str:
-    """
-    Normalise a phone number (digits only) then SHA-256 hash it.
-    Used to cross-match people across different Genie users without exposing raw numbers.
-
-    Examples:
-        hash_phone("+1 (415) 555-1234") == hash_phone("14155551234")
-    """
-    normalized = phone.translate(_DIGIT_STRIP)
-    return hashlib.sha256(normalized.encode()).hexdigest()
-
-
 # ── Progress broadcaster (fire-and-forget) ────────────────────────────────────
 
 async def _broadcast(
@@ -62,29 +46,13 @@ async def _broadcast(
     user_id: str | None = None,
 ) -> None:
     """
-    POST a progress event to the ingestion router so all WebSocket clients receive it.
-    Runs as a fire-and-forget coroutine — never raises.
+    Publish a progress event to every WebSocket watching the session.
+    Never raises.
     """
     if not session_id:
         return
-    try:
-        payload: dict[str, Any] = {
-            "source": source,
-            "stage": stage,
-            "progress": progress,
-            "message": message,
-            "insight": insight,
-            "people_found": people_found,
-            "user_id": user_id,
-        }
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                f"{settings.backend_url}/ingestion/progress/{session_id}",
-                json=payload,
-                timeout=5.0,
-            )
-    except Exception as exc:
-        logger.debug(f"Progress broadcast failed (non-fatal): {exc}")
+    await broadcast_async(session_id, source, stage, progress, message,
+                          insight=insight, people_found=people_found, user_id=user_id)
 
 
 # ── IMessageProcessor ─────────────────────────────────────────────────────────
@@ -225,23 +193,25 @@ class IMessageProcessor:
         filtered_work = 0
         filtered_ambiguous = 0
 
-        for msg in messages:
-            text = (msg.get("text") or "").strip()
-            if not text:
-                continue
-
-            classify_content = {
-                "sender_name": contact_name,
-                "text_snippet": text[:300],
-                "group_name": group_name,
-            }
-
-            fr = await self._work_filter.classify(
+        # Classify the whole conversation in one batch — fast path, cache, then Claude
+        texted = [(msg, (msg.get("text") or "").strip()) for msg in messages]
+        texted = [(msg, text) for msg, text in texted if text]
+        verdicts = []
+        if texted:
+            verdicts = await self._work_filter.classify_many(
                 content_type="imessage",
-                content=classify_content,
+                contents=[
+                    {
+                        "sender_name": contact_name,
+                        "text_snippet": text[:300],
+                        "group_name": group_name,
+                    }
+                    for _, text in texted
+                ],
                 user_id=user_id,
             )
 
+        for (msg, _), fr in zip(texted, verdicts):
             if fr.label == Label.PERSONAL:
                 personal_messages.append(msg)
             elif fr.label == Label.WORK:
@@ -273,7 +243,8 @@ class IMessageProcessor:
         # ── Intelligence analysis ──────────────────────────────────────────
         try:
             from services.intelligence import analyze_imessage_conversation
-            analysis = analyze_imessage_conversation(
+            analysis = await asyncio.to_thread(
+                analyze_imessage_conversation,
                 user_id=user_id,
                 contact_name=contact_name,
                 contact_identifier=contact_identifier,
@@ -288,39 +259,29 @@ class IMessageProcessor:
         if contact_identifier:
             try:
                 phone_hash = hash_phone(contact_identifier)
-                people = db.get_people_for_user(user_id)
-                person = next(
-                    (
-                        p for p in people
-                        if contact_name.lower() in p["name"].lower()
-                        or p["name"].lower() in contact_name.lower()
-                        or contact_identifier in (p.get("phone") or "")
-                    ),
-                    None,
+                person = person_index.get_index(user_id).resolve(
+                    name=contact_name, phone=contact_identifier, fuzzy=False
                 )
-                if person:
+                if person and person.get("phone_hash") != phone_hash:
                     db.get_db().table("people").update(
                         {"phone_hash": phone_hash}
                     ).eq("id", person["id"]).execute()
+                    person_index.index_person(user_id, {"id": person["id"], "phone_hash": phone_hash})
+                    invalidate_world_model(user_id, "people")
             except Exception as exc:
                 logger.warning(f"phone_hash update failed for {contact_name}: {exc}")
 
-        # ── Signal extraction (fire-and-forget) ───────────────────────────
+        # ── Signal extraction (in process, batched per conversation) ──────
+        # iMessage text is never stored, so it can't go on the job queue by id
         try:
-            from services.signal_extractor import extract_signals_from_message
+            from services.signal_extractor import extract_signals
             user_row = db.get_user_by_id(user_id)
             user_name = user_row.get("name", "") if user_row else ""
-
-            for msg in personal_messages:
-                text = (msg.get("text") or "").strip()
-                if len(text) > 30:
-                    asyncio.create_task(
-                        extract_signals_from_message(
-                            source_user_id=user_id,
-                            message_text=text,
-                            participants=[user_name, contact_name],
-                        )
-                    )
+            await extract_signals(
+                source_user_id=user_id,
+                texts=[(msg.get("text") or "").strip() for msg in personal_messages],
+                participants=[user_name, contact_name],
+            )
         except Exception as exc:
             logger.warning(f"Signal extraction setup failed for {contact_name}: {exc}")
 
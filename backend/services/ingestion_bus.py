@@ -1,34 +1,410 @@
 """
 services/ingestion_bus.py — Shared ingestion progress bus.
 
-Holds the user_id → session_id mapping (ephemeral, in-memory).
-Used by google_ingestion.py and intelligence.py to broadcast live
-learnings to the iOS app during onboarding without importing from routers.
+Ingestion pipelines (google_ingestion, intelligence, the iMessage and Maps
+importers) publish live progress here, and routers/ingestion.py forwards it
+to the iOS app's WebSockets. Publishing is an in-process call, not an HTTP
+post back to this server:
+
+  - Each session keeps its last ingestion_bus_history events in a ring
+    buffer. A WebSocket that (re)connects gets the latest event, or every
+    event after the `seq` it last saw.
+  - Every WebSocket has its own bounded queue, drained by its own sender
+    task, so a slow socket never holds up the others. One that falls
+    ingestion_bus_subscriber_queue events behind is dropped; the client
+    reconnects and catches up from the ring buffer.
+  - Event sequence numbers and the user_id → session_id links producers
+    look up live in a backend. MemoryBackend keeps them in this process
+    (one worker, and tests). SQLiteBackend shares them between the uvicorn
+    workers on a host through a SQLite file, like the job queue: events
+    published in one worker reach sockets held by another within
+    ingestion_bus_poll_seconds.
+
+POST /ingestion/progress/{session_id} stays for producers outside the
+process (the Mac companion); it publishes here too.
+
+Usage:
+    broadcast_sync(session_id, "google", "reading", 40, "Reading your contacts…", user_id=user_id)
+
+    subscriber = ingestion_bus.subscribe(session_id, since=last_seq)   # on the socket's loop
+    while (event := await subscriber.get()) is not None:
+        await websocket.send_json(event)
+    ingestion_bus.unsubscribe(subscriber)
 """
+import asyncio
+import itertools
+import json
 import logging
-import httpx
-from config import get_settings
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
 
-# user_id → active onboarding session_id
-# Ephemeral: only lives for the duration of onboarding. Cleared after 100%.
-_user_sessions: dict[str, str] = {}
+# Called with (session_id, event, user_id, top_insight) for every event
+# published in this process — not for events relayed from other workers.
+Listener = Callable[[str, dict, Optional[str], Optional[str]], None]
+_listeners: list[Listener] = []
+
+
+def add_listener(listener: Listener) -> None:
+    """Run `listener` for each event published in this process (e.g. WhatsApp milestones)."""
+    _listeners.append(listener)
+
+
+# ── Subscribers ───────────────────────────────────────────────────────────────
+
+class Subscriber:
+    """
+    One WebSocket's view of a session: a bounded queue on the loop that
+    created it. offer() is safe from any thread. When the queue is full the
+    subscriber is dropped: its backlog is discarded and get() returns None.
+    """
+
+    def __init__(self, session_id: str, maxsize: int):
+        self.session_id = session_id
+        self.dropped = False
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(max(1, maxsize))
+
+    def offer(self, event: dict) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._offer(event)
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:        # the socket's loop has closed
+            self.dropped = True
+
+    async def get(self) -> Optional[dict]:
+        """The next event, or None once this subscriber has been dropped."""
+        return await self._queue.get()
+
+    def _offer(self, event: dict) -> None:
+        if self.dropped:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class MemoryBackend:
+    """Sequence numbers and user links for a single process."""
+
+    def __init__(self):
+        self._seq = itertools.count(1)
+        self._user_sessions: dict[str, str] = {}
+
+    def start(self, deliver: Callable[[str, dict], None]) -> None:
+        pass
+
+    def publish(self, session_id: str, event: dict) -> int:
+        return next(self._seq)
+
+    def register(self, user_id: str, session_id: str) -> None:
+        self._user_sessions[user_id] = session_id
+
+    def get_session(self, user_id: str) -> Optional[str]:
+        return self._user_sessions.get(user_id)
+
+    def clear(self, user_id: str) -> None:
+        self._user_sessions.pop(user_id, None)
+
+    def close(self) -> None:
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bus_events (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id  TEXT    NOT NULL,
+    origin      TEXT    NOT NULL,       -- publishing process; it has delivered the event itself
+    event       TEXT    NOT NULL,
+    created_at  REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bus_events_created ON bus_events (created_at);
+CREATE TABLE IF NOT EXISTS bus_user_sessions (
+    user_id     TEXT PRIMARY KEY,
+    session_id  TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+"""
+
+
+class SQLiteBackend:
+    """
+    Events and user links in a SQLite file shared by the worker processes on
+    this host. Each process polls for events other processes published and
+    hands them to its own subscribers. Rows older than retention_seconds
+    are pruned.
+    """
+
+    def __init__(self, path: str, poll_seconds: float = 0.1, retention_seconds: float = 3600.0):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self.origin = f"{os.getpid()}:{id(self):x}"
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+        self._last_id = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Callable[[str, dict], None]) -> None:
+        with self._lock:
+            (self._last_id,) = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM bus_events").fetchone()
+        self._thread = threading.Thread(target=self._poll, args=(deliver,), name="ingestion-bus", daemon=True)
+        self._thread.start()
+
+    def publish(self, session_id: str, event: dict) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO bus_events (session_id, origin, event, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, self.origin, json.dumps(event), time.time()),
+            )
+            return cursor.lastrowid
+
+    def register(self, user_id: str, session_id: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO bus_user_sessions (user_id, session_id, updated_at) VALUES (?, ?, ?)",
+                (user_id, session_id, time.time()),
+            )
+
+    def get_session(self, user_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT session_id FROM bus_user_sessions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def clear(self, user_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM bus_user_sessions WHERE user_id = ?", (user_id,))
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        with self._lock:
+            self._db.close()
+
+    def _poll(self, deliver: Callable[[str, dict], None]) -> None:
+        next_prune = 0.0
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                with self._lock:
+                    rows = self._db.execute(
+                        "SELECT id, session_id, origin, event FROM bus_events WHERE id > ? ORDER BY id",
+                        (self._last_id,),
+                    ).fetchall()
+                    if time.monotonic() >= next_prune:
+                        cutoff = time.time() - self.retention_seconds
+                        self._db.execute("DELETE FROM bus_events WHERE created_at < ?", (cutoff,))
+                        self._db.execute("DELETE FROM bus_user_sessions WHERE updated_at < ?", (cutoff,))
+                        next_prune = time.monotonic() + 60
+                for row_id, session_id, origin, body in rows:
+                    self._last_id = row_id
+                    if origin != self.origin:
+                        deliver(session_id, {**json.loads(body), "seq": row_id})
+            except Exception as e:
+                logger.warning(f"Ingestion bus: poll failed: {e}")
+
+
+# ── Bus ───────────────────────────────────────────────────────────────────────
+
+@dataclass
+class _Session:
+    history: deque
+    subscribers: set = field(default_factory=set)
+    touched: float = field(default_factory=time.monotonic)
+
+
+class IngestionBus:
+    """Ring buffers and subscribers per session, over a backend. One per process (get_bus())."""
+
+    def __init__(self, backend=None, history: int = 50, subscriber_queue: int = 64,
+                 session_ttl_seconds: float = 3600.0):
+        self.backend = backend or MemoryBackend()
+        self.history = max(1, history)
+        self.subscriber_queue = subscriber_queue
+        self.session_ttl_seconds = session_ttl_seconds
+        self.published = 0
+        self.dropped = 0
+        self._sessions: dict[str, _Session] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.backend.start(self._deliver)
+
+    def publish(self, session_id: str, event: dict, user_id: Optional[str] = None,
+                top_insight: Optional[str] = None) -> dict:
+        """Record the event, fan it out and run the listeners. Returns it with its seq."""
+        event = {**event, "seq": self.backend.publish(session_id, event)}
+        with self._lock:
+            self.published += 1
+        self._deliver(session_id, event)
+        for listener in _listeners:
+            try:
+                listener(session_id, event, user_id, top_insight)
+            except Exception as e:
+                logger.warning(f"Ingestion bus: listener failed for session {session_id}: {e}")
+        return event
+
+    def open(self, session_id: str) -> None:
+        with self._lock:
+            self._session(session_id)
+
+    def subscribe(self, session_id: str, since: Optional[int] = None) -> Subscriber:
+        """
+        Watch a session from the running event loop. Starts with the latest
+        event, or with every buffered event after `since`.
+        """
+        subscriber = Subscriber(session_id, self.subscriber_queue)
+        with self._lock:
+            session = self._session(session_id)
+            session.subscribers.add(subscriber)
+            if since is None:
+                backlog = list(session.history)[-1:]
+            else:
+                backlog = [e for e in session.history if e["seq"] > since]
+        for event in backlog:
+            subscriber.offer(event)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            session = self._sessions.get(subscriber.session_id)
+            if session is not None and subscriber in session.subscribers:
+                session.subscribers.discard(subscriber)
+                if subscriber.dropped:
+                    self.dropped += 1
+
+    def latest(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.history[-1] if session is not None and session.history else None
+
+    def subscriber_count(self, session_id: str) -> int:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return len(session.subscribers) if session is not None else 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "sessions": len(self._sessions),
+                "subscribers": sum(len(s.subscribers) for s in self._sessions.values()),
+                "published": self.published,
+                "dropped_subscribers": self.dropped,
+            }
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def _deliver(self, session_id: str, event: dict) -> None:
+        with self._lock:
+            session = self._session(session_id)
+            session.history.append(event)
+            subscribers = list(session.subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(event)
+
+    def _session(self, session_id: str) -> _Session:
+        """Get or create a session's state, forgetting idle ones now and then. Caller holds _lock."""
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._next_sweep = now + 60
+            for sid in [sid for sid, s in self._sessions.items()
+                        if not s.subscribers and now - s.touched > self.session_ttl_seconds]:
+                del self._sessions[sid]
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(deque(maxlen=self.history))
+        session.touched = now
+        return session
+
+
+# ── Process-wide bus ──────────────────────────────────────────────────────────
+
+_bus: Optional[IngestionBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_bus() -> IngestionBus:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                # read at call time so settings reloads apply
+                from config import get_settings
+                s = get_settings()
+                if s.ingestion_bus_backend == "sqlite":
+                    backend = SQLiteBackend(s.ingestion_bus_path, s.ingestion_bus_poll_seconds,
+                                            s.ingestion_bus_session_ttl_seconds)
+                else:
+                    backend = MemoryBackend()
+                _bus = IngestionBus(backend, s.ingestion_bus_history, s.ingestion_bus_subscriber_queue,
+                                    s.ingestion_bus_session_ttl_seconds)
+    return _bus
+
+
+def close() -> None:
+    """Stop the process-wide bus (app shutdown)."""
+    global _bus
+    with _bus_lock:
+        bus, _bus = _bus, None
+    if bus is not None:
+        bus.close()
 
 
 def register(user_id: str, session_id: str) -> None:
     """Called when iOS links its onboarding session to a user."""
-    _user_sessions[user_id] = session_id
+    get_bus().backend.register(user_id, session_id)
+    get_bus().open(session_id)
     logger.info(f"Ingestion bus: registered session {session_id[:8]}… for user {user_id}")
 
 
 def get_session(user_id: str) -> str | None:
-    return _user_sessions.get(user_id)
+    return get_bus().backend.get_session(user_id)
 
 
 def clear(user_id: str) -> None:
-    _user_sessions.pop(user_id, None)
+    get_bus().backend.clear(user_id)
+
+
+def publish(session_id: str, event: dict, user_id: Optional[str] = None,
+            top_insight: Optional[str] = None) -> dict:
+    return get_bus().publish(session_id, event, user_id=user_id, top_insight=top_insight)
+
+
+def subscribe(session_id: str, since: Optional[int] = None) -> Subscriber:
+    return get_bus().subscribe(session_id, since)
+
+
+def unsubscribe(subscriber: Subscriber) -> None:
+    get_bus().unsubscribe(subscriber)
 
 
 def broadcast_sync(
@@ -42,26 +418,20 @@ def broadcast_sync(
     user_id: str | None = None,
 ) -> None:
     """
-    Synchronous fire-and-forget broadcast.
-    Safe to call from sync functions (e.g. build_people_graph).
-    Never raises — failures are logged at DEBUG level only.
+    Fire-and-forget broadcast, safe to call from sync functions and worker
+    threads (e.g. build_people_graph). Never raises.
     """
     try:
-        with httpx.Client(timeout=3.0) as client:
-            client.post(
-                f"{settings.backend_url}/ingestion/progress/{session_id}",
-                json={
-                    "source":       source,
-                    "stage":        stage,
-                    "progress":     progress,
-                    "message":      message,
-                    "insight":      insight,
-                    "people_found": people_found,
-                    "user_id":      user_id,
-                },
-            )
+        publish(session_id, {
+            "source":       source,
+            "stage":        stage,
+            "progress":     progress,
+            "message":      message,
+            "insight":      insight,
+            "people_found": people_found,
+        }, user_id=user_id)
     except Exception as exc:
-        logger.debug(f"Ingestion broadcast (sync) non-fatal: {exc}")
+        logger.warning(f"Ingestion broadcast non-fatal: {exc}")
 
 
 async def broadcast_async(
@@ -75,22 +445,8 @@ async def broadcast_async(
     user_id: str | None = None,
 ) -> None:
     """
-    Async broadcast. Use from async ingestion functions.
-    Never raises.
+    broadcast_sync() for async ingestion functions. Publishing never waits
+    on a socket, so this doesn't either. Never raises.
     """
-    try:
-        async with httpx.AsyncClient(timeout=3.0) as client:
-            await client.post(
-                f"{settings.backend_url}/ingestion/progress/{session_id}",
-                json={
-                    "source":       source,
-                    "stage":        stage,
-                    "progress":     progress,
-                    "message":      message,
-                    "insight":      insight,
-                    "people_found": people_found,
-                    "user_id":      user_id,
-                },
-            )
-    except Exception as exc:
-        logger.debug(f"Ingestion broadcast (async) non-fatal: {exc}")
+    broadcast_sync(session_id, source, stage, progress, message,
+                   insight=insight, people_found=people_found, user_id=user_id)
@@ -8,9 +8,11 @@ Claude never cites its sources — it simply knows, like a wise friend.
 import json
 import logging
 import re
-from anthropic import Anthropic
 from config import get_settings
 import database as db
+from core import person_index
+from core.json_stream import JSONArrayStream
+from services import llm_gateway
 
 
 def _safe_date(value) -> None:
@@ -34,32 +36,32 @@ def _safe_date(value) -> None:
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# One Anthropic client, reused for all calls
-_client = Anthropic(api_key=settings.anthropic_api_key)
-
-
-def _call_claude(system_prompt: str, user_message: str) -> str:
+def _call_claude(system_prompt: str, user_message: str, feature: str = "intelligence") -> str:
     """
     Make a single Claude API call and return the text response.
-    All Claude calls in this file go through here.
+    All Claude calls in this file go through here; other sync callers pass
+    their own feature name so the gateway limits and reports them separately.
     """
-    response = _client.messages.create(
-        model=settings.claude_model,
-        max_tokens=8192,
-        system=system_prompt,
-        messages=[{"role": "user", "content": user_message}]
-    )
-    return response.content[0].text
+    return llm_gateway.complete_sync(feature, system_prompt, user_message, max_tokens=8192)
+
 
+def _stream_claude(system_prompt: str, user_message: str, feature: str = "intelligence"):
+    """_call_claude(), but yields the response text as Claude generates it."""
+    return llm_gateway.stream_sync(feature, system_prompt, user_message, max_tokens=8192)
 
-def build_people_graph(user_id: str, ingestion_data: dict, session_id: str | None = None) -> list:
+
+def build_people_graph(user_id: str, ingestion_data: dict, session_id: str | None = None,
+                       stream: bool = True) -> list:
     """
     Take everything from Google ingestion and build a complete People Graph.
 
     Sends Photos + Gmail + Contacts to Claude and gets back structured
     relationship data: closeness scores, memories, moment suggestions.
+    With stream=True (the default) each person is saved and their insight
+    broadcast while Claude is still writing the rest of the array; with
+    stream=False everyone is saved once the whole reply is in.
 
-    Returns a list of person records ready to save to Supabase.
+    Returns the saved person records, each with its insight_line.
     """
 
     system_prompt = """You are the relationship intelligence engine for PersonalGenie.
@@ -176,64 +178,78 @@ Build the People Graph now."""
 
     _emit(75, "Reading your relationships…")
 
-    try:
-        response_text = _call_claude(system_prompt, user_message)
+    saved_people: list = []
+    user = None
 
-        # Parse JSON response — Claude returns a clean JSON array
-        # Handle case where Claude wraps in ```json ... ```
-        if "```" in response_text:
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-
-        people = json.loads(response_text.strip())
-        total = len(people)
-        _emit(78, f"Genie found {total} people who matter to you.", people_found=total)
-
-        # Save each person to Supabase — broadcast their insight as we go
-        saved_people = []
-        for i, person in enumerate(people):
-            saved = db.upsert_person(user_id, {
+    def _save(people: list) -> None:
+        """Persist people as they arrive, then broadcast their insights."""
+        saved_rows = db.upsert_people_bulk(user_id, [
+            {
                 "name":             person.get("name", ""),
                 "relationship_type": person.get("relationship_type", ""),
                 "closeness_score":  person.get("closeness_score", 0.5),
                 "topics":           person.get("topics", []),
                 "memories":         person.get("memories", []),
                 "suggested_moments": person.get("suggested_moments", []),
-            })
+            }
+            for person in people
+        ])
 
-            # Also save top moment to moments table for the feed
-            moments = person.get("suggested_moments", [])
-            if moments and saved:
-                db.create_moment(
-                    user_id=user_id,
-                    person_id=saved["id"],
-                    suggestion=moments[0]["suggestion"],
-                    triggered_by="google_ingestion"
-                )
-
-            # Broadcast this person's insight to the iOS live feed
+        # Broadcast each person's insight to the iOS live feed. The total isn't
+        # known until the stream ends, so progress creeps from 80% towards 98%.
+        for person, saved in zip(people, saved_rows):
             insight_line = person.get("insight_line", "").strip()
             if insight_line and active_session:
-                progress_pct = 80 + int((i / max(total, 1)) * 18)  # 80–98%
+                progress_pct = 80 + int(18 * (1 - 0.96 ** len(saved_people)))
                 _emit(
                     progress_pct,
                     person.get("name", "Someone close to you"),
                     insight=insight_line,
-                    people_found=i + 1,
+                    people_found=len(saved_people) + 1,
                 )
-
             saved_people.append({**saved, "insight_line": insight_line})
 
-        # Final broadcast — 100%
-        _emit(100, "Your People Graph is ready.", people_found=total)
-
-        logger.info(f"Built People Graph for user {user_id}: {len(saved_people)} people")
-        return saved_people
-
+        # Also save top moments to the moments table for the feed
+        try:
+            db.create_moments_bulk(user_id, [
+                {
+                    "person_id": saved["id"],
+                    "suggestion": person["suggested_moments"][0]["suggestion"],
+                    "triggered_by": "google_ingestion",
+                }
+                for person, saved in zip(people, saved_rows)
+                if person.get("suggested_moments") and saved
+            ], user=user)
+        except Exception as e:
+            logger.error(f"Could not save People Graph moments for user {user_id}: {e}")
+
+    # Claude returns a JSON array (sometimes inside ```json fences). Each person
+    # is saved and broadcast as soon as its object is complete; people that
+    # finish while the previous ones are being saved are saved together.
+    parser = JSONArrayStream()
+    try:
+        user = db.get_user_by_id(user_id)
+        if stream:
+            for text in _stream_claude(system_prompt, user_message):
+                people = [p for p in parser.feed(text) if isinstance(p, dict)]
+                if people:
+                    _save(people)
+        else:
+            people = [p for p in parser.feed(_call_claude(system_prompt, user_message)) if isinstance(p, dict)]
+            if people:
+                _save(people)
     except Exception as e:
         logger.error(f"Error building People Graph: {e}")
-        return []
+        if not saved_people:
+            return []
+
+    # Final broadcast — 100%
+    total = len(saved_people)
+    _emit(100, "Your People Graph is ready.", people_found=total)
+
+    logger.info(f"Built People Graph for user {user_id}: {total} people"
+                + ("" if parser.done else " (reply incomplete)"))
+    return saved_people
 
 
 def get_first_magic_moment(user_id: str, user_name: str) -> str:
@@ -334,12 +350,10 @@ Rules:
         extracted = json.loads(response_text.strip())
 
         # Update people records with new data
-        people = db.get_people_for_user(user_id)
-        people_by_name = {p["name"].lower(): p for p in people}
+        people = person_index.get_index(user_id)
 
         for update in extracted.get("people_updates", []):
-            person_name = update.get("person_name", "").lower()
-            person = people_by_name.get(person_name)
+            person = people.match_name(update.get("person_name", ""))
             if not person:
                 continue
 
@@ -517,12 +531,8 @@ Rules:
         return {}
 
     # Find or create the person in the People Graph
-    people = db.get_people_for_user(user_id)
-    person = next(
-        (p for p in people if contact_name.lower() in p["name"].lower()
-         or p["name"].lower() in contact_name.lower()
-         or contact_identifier in (p.get("phone") or "") + (p.get("email") or "")),
-        None
+    person = person_index.get_index(user_id).resolve(
+        name=contact_name, phone=contact_identifier, fuzzy=False
     )
 
     memories = extracted.get("memories", [])
@@ -602,7 +612,7 @@ def generate_evening_digest(user_id: str) -> tuple:
     Moments are already ranked by priority (life_event > drift > message > general).
     The digest takes the top-ranked moment and generates a warm insight for it.
     """
-    moments = db.get_moments_for_user(user_id)
+    moments = db.get_moments_for_user(user_id, limit=1)
     if not moments:
         return "", "", "", None
 
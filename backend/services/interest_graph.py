@@ -24,6 +24,8 @@ import uuid
 from datetime import datetime, timezone
 from typing import Optional
 
+from core.world_model import invalidate_world_model
+
 logger = logging.getLogger(__name__)
 
 # ── Interest categories ────────────────────────────────────────────────────────
@@ -292,7 +294,7 @@ class InterestGraph:
     async def _extract_with_claude(self, text: str, source: str) -> list[dict]:
         """Use Claude to extract structured interest signals from text."""
         try:
-            from services.intelligence import _call_claude
+            from services import llm_gateway
 
             system = f"""Extract interest signals from this text. Return a JSON array.
 Each item must have:
@@ -304,7 +306,7 @@ Each item must have:
 If nothing worth capturing, return [].
 Return ONLY valid JSON. No explanation."""
 
-            response = _call_claude(system, text[:2000])
+            response = await llm_gateway.complete("interest_graph", system, text[:2000], max_tokens=8192)
             response = re.sub(r"```json|```", "", response).strip()
             items = json.loads(response)
             if not isinstance(items, list):
@@ -405,6 +407,8 @@ Return ONLY valid JSON. No explanation."""
         except Exception as exc:
             logger.error("_upsert_signals failed for user %s: %s", user_id, exc)
 
+        if results:
+            invalidate_world_model(user_id, "user_interests")
         return results
 
     async def _load_rows(self, user_id: str) -> list[dict]:
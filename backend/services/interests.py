@@ -12,6 +12,7 @@ import logging
 import uuid
 from typing import Optional
 import database as db
+from core.world_model import invalidate_world_model
 from services.intelligence import _call_claude
 
 logger = logging.getLogger(__name__)
@@ -52,7 +53,7 @@ If nothing worth capturing, return [].
 Return only valid JSON. No explanation."""
 
     try:
-        response = _call_claude(system_prompt, f"Message: {message}")
+        response = _call_claude(system_prompt, f"Message: {message}", feature="interests")
         if "```" in response:
             response = response.split("```")[1]
             if response.startswith("json"):
@@ -86,6 +87,7 @@ Return only valid JSON. No explanation."""
             logger.error(f"Could not save interest '{title}': {e}")
 
     if saved:
+        invalidate_world_model(user_id, "interests")
         logger.info(f"Saved {len(saved)} interests for user {user_id}: {saved}")
     return saved
 
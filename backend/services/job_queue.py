@@ -0,0 +1,605 @@
+"""
+services/job_queue.py — Durable queue for work that runs after the request returns.
+
+Post-request work (the ingestion pipeline, graph rebuilds, iMessage imports,
+WhatsApp sends, interest and signal extraction) used to ride on FastAPI
+BackgroundTasks or a bare asyncio.create_task: lost on restart, never
+retried, and stuck in whichever worker process took the request. Here it is
+a row in an embedded SQLite table instead, which every worker process on the
+host shares:
+
+  - Handlers are plain functions (sync or async) registered by name with
+    @handler. enqueue() checks the payload against the handler's signature
+    and that it serialises, so a bad call fails in the request, not later.
+  - Delivery is at-least-once. A claimed job is invisible to other workers
+    for job_queue_visibility_seconds, extended by a heartbeat while the
+    handler runs; if the process dies, the job is claimed again once that
+    lapses. Handlers must be safe to run twice.
+  - Each queue has its own concurrency. Jobs carry a priority, and jobs
+    below PRIORITY_NORMAL (backfills) can never occupy a queue's last slot,
+    so a conversation reply never waits behind an import.
+  - Failures are retried with exponential backoff up to max_attempts, then
+    kept as "dead" for inspection and retry_dead() for
+    job_queue_dead_retention_seconds, payload and all, then deleted.
+    Payloads of finished jobs are cleared and the rows pruned after
+    job_queue_retention_seconds. Payloads sit on local disk in plaintext:
+    pass ids of stored rows, never message text or tokens.
+  - close() waits for worker threads still running — including those of
+    handlers stop() gave up on — before closing the database.
+
+Usage:
+    @job_queue.handler("people.rebuild", queue="ingestion", priority=job_queue.PRIORITY_BACKFILL)
+    async def rebuild(user_id: str) -> None: ...
+
+    job_queue.enqueue("people.rebuild", user_id=user_id)
+
+Workers start with the app (start() / stop()); GET /jobs/queue serves stats().
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 10          # conversation replies and anything a user is waiting on
+PRIORITY_NORMAL = 0
+PRIORITY_BACKFILL = -10     # imports, rebuilds — never take a queue's last slot
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue         TEXT    NOT NULL,
+    name          TEXT    NOT NULL,
+    payload       TEXT    NOT NULL,
+    priority      INTEGER NOT NULL DEFAULT 0,
+    status        TEXT    NOT NULL DEFAULT 'ready',   -- ready | running | done | dead
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    dedupe_key    TEXT,
+    run_at        REAL    NOT NULL,
+    locked_until  REAL,
+    locked_by     TEXT,
+    last_error    TEXT,
+    created_at    REAL    NOT NULL,
+    started_at    REAL,
+    finished_at   REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (queue, status, priority DESC, run_at);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (status, finished_at);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key) WHERE dedupe_key IS NOT NULL;
+"""
+
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+@dataclass
+class JobHandler:
+    name: str
+    fn: Callable
+    queue: str
+    priority: int
+    max_attempts: Optional[int]
+    signature: inspect.Signature = field(repr=False)
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.fn)
+
+
+@dataclass
+class QueueConfig:
+    concurrency: int = 4
+    max_backlog: int = 0        # ready backfill jobs allowed before enqueue drops them; 0 = unbounded
+
+
+@dataclass
+class Job:
+    id: int
+    queue: str
+    name: str
+    payload: dict
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_at: float
+
+
+_handlers: dict[str, JobHandler] = {}
+_queues: dict[str, QueueConfig] = {}
+
+
+def handler(
+    name: str,
+    *,
+    queue: str = "default",
+    priority: int = PRIORITY_NORMAL,
+    max_attempts: Optional[int] = None,
+) -> Callable:
+    """Register fn as the handler for jobs called `name`. Returns fn unchanged."""
+    def register(fn: Callable) -> Callable:
+        _handlers[name] = JobHandler(name, fn, queue, priority, max_attempts, inspect.signature(fn))
+        return fn
+    return register
+
+
+def define_queue(name: str, concurrency: int, max_backlog: int = 0) -> None:
+    """Set a queue's concurrency (and backfill limit). Call before start()."""
+    _queues[name] = QueueConfig(max(1, concurrency), max_backlog)
+
+
+# ── Queue ─────────────────────────────────────────────────────────────────────
+
+class JobQueue:
+    """
+    One per process (get_queue()). enqueue() is thread-safe and cheap; the
+    worker loops run on the app's event loop and do all database work in
+    worker threads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        poll_seconds: float = 1.0,
+        visibility_seconds: float = 300.0,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 10.0,
+        retry_max_seconds: float = 1800.0,
+        retention_seconds: float = 86400.0,
+        dead_retention_seconds: float = 7 * 86400.0,
+        default_concurrency: int = 4,
+    ):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.visibility_seconds = visibility_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.retention_seconds = retention_seconds
+        self.dead_retention_seconds = dead_retention_seconds
+        self.default_concurrency = default_concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+
+        # Metrics since this process started — the rest of stats() comes from the table
+        self.dropped: dict[str, int] = {}
+        self.retried: dict[str, int] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: dict[str, asyncio.Event] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+        # Worker threads in flight, so close() never pulls the database out from under one
+        self._active = 0
+        self._idle = threading.Condition()
+        self._closed = False
+
+    # ── Producing ─────────────────────────────────────────────────────────────
+
+    def enqueue(
+        self,
+        name: str,
+        /,
+        *,
+        priority: Optional[int] = None,
+        delay_seconds: float = 0.0,
+        dedupe_key: Optional[str] = None,
+        **payload: Any,
+    ) -> Optional[int]:
+        """
+        Store a job for handler `name`. Returns the job id, or None when the
+        dedupe_key was already used or a backfill was dropped because its
+        queue's backlog is full. Raises TypeError if the payload doesn't fit
+        the handler. priority, delay_seconds and dedupe_key are reserved;
+        every other keyword is payload.
+        """
+        h = _handlers.get(name)
+        if h is None:
+            raise KeyError(f"No job handler registered for {name!r}")
+        h.signature.bind(**payload)
+        body = json.dumps(payload)
+        priority = h.priority if priority is None else priority
+        now = time.time()
+
+        with self._lock:
+            limit = self._config(h.queue).max_backlog
+            if limit and priority < PRIORITY_NORMAL:
+                (backlog,) = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE queue = ? AND status = 'ready'", (h.queue,)
+                ).fetchone()
+                if backlog >= limit:
+                    self.dropped[h.queue] = self.dropped.get(h.queue, 0) + 1
+                    return None
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO jobs (queue, name, payload, priority, max_attempts, dedupe_key, run_at, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (h.queue, name, body, priority, h.max_attempts or self.max_attempts, dedupe_key,
+                 now + delay_seconds, now),
+            )
+            job_id = cursor.lastrowid if cursor.rowcount else None
+
+        if job_id is not None:
+            self._notify(h.queue)
+        return job_id
+
+    # ── Consuming ─────────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Start one worker loop per known queue on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        for queue in self._queue_names():
+            self._wake[queue] = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._worker(queue), name=f"job-queue:{queue}"))
+        self._tasks.append(asyncio.create_task(self._maintenance(), name="job-queue:maintenance"))
+        logger.info(f"Job queue started: {', '.join(self._queue_names())} ({self.path})")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop claiming, give running handlers `timeout` seconds to finish, then
+        cancel them. Anything unfinished is picked up again after its
+        visibility timeout.
+        """
+        self._stopping = True
+        for event in self._wake.values():
+            event.set()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks.clear()
+
+    async def drain(self, queue: Optional[str] = None) -> int:
+        """
+        Run every job that is due now (in `queue`, or all queues) and return
+        how many ran. For tests and one-off scripts; the app uses start().
+        """
+        ran = 0
+        while True:
+            jobs = []
+            for name in ([queue] if queue else self._queue_names()):
+                jobs += await self._in_thread(self._claim, name, self._config(name).concurrency, None)
+            if not jobs:
+                return ran
+            await asyncio.gather(*(self._execute(job) for job in jobs))
+            ran += len(jobs)
+
+    def close(self, timeout: float = 30.0) -> None:
+        """
+        Close the database once no worker thread is using it. Threads of
+        handlers that stop() cancelled keep running; if they are still going
+        after `timeout` seconds the connection is left open for them.
+        """
+        with self._idle:
+            if self._closed:
+                return
+            if not self._idle.wait_for(lambda: self._active == 0, timeout):
+                logger.warning(f"Job queue: {self._active} worker thread(s) still running — database left open")
+                return
+            self._closed = True
+        with self._lock:
+            self._db.close()
+
+    # ── Admin ─────────────────────────────────────────────────────────────────
+
+    def stats(self, window_seconds: float = 3600.0) -> dict:
+        """Per-queue depth, lag and throughput for GET /jobs/queue."""
+        now = time.time()
+        since = now - window_seconds
+        with self._lock:
+            counts = self._db.execute(
+                "SELECT queue, status, COUNT(*) AS n FROM jobs GROUP BY queue, status"
+            ).fetchall()
+            lag = self._db.execute(
+                "SELECT queue, MIN(run_at) AS oldest, SUM(attempts > 0) AS retrying FROM jobs"
+                " WHERE status = 'ready' AND run_at <= ? GROUP BY queue", (now,)
+            ).fetchall()
+            done = self._db.execute(
+                "SELECT queue, COUNT(*) AS n, AVG(started_at - created_at) AS wait,"
+                " AVG(finished_at - started_at) AS run FROM jobs"
+                " WHERE status = 'done' AND finished_at >= ? GROUP BY queue", (since,)
+            ).fetchall()
+
+        queues: dict[str, dict] = {
+            name: {
+                "concurrency": self._config(name).concurrency,
+                "ready": 0, "running": 0, "dead": 0, "done": 0,
+                "lag_seconds": 0.0, "retrying": 0,
+                "completed_per_minute": 0.0, "avg_wait_seconds": 0.0, "avg_run_seconds": 0.0,
+                "dropped": self.dropped.get(name, 0), "retried": self.retried.get(name, 0),
+            }
+            for name in self._queue_names() | {r["queue"] for r in counts}
+        }
+        for r in counts:
+            queues[r["queue"]][r["status"]] = r["n"]
+        for r in lag:
+            queues[r["queue"]]["lag_seconds"] = round(now - r["oldest"], 1)
+            queues[r["queue"]]["retrying"] = r["retrying"] or 0
+        for r in done:
+            q = queues[r["queue"]]
+            q["completed_per_minute"] = round(r["n"] / (window_seconds / 60), 2)
+            q["avg_wait_seconds"] = round(r["wait"] or 0.0, 2)
+            q["avg_run_seconds"] = round(r["run"] or 0.0, 2)
+        return {"worker": self.worker_id, "running": bool(self._tasks), "queues": dict(sorted(queues.items()))}
+
+    def dead_jobs(self, limit: int = 50) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, queue, name, attempts, last_error, finished_at FROM jobs"
+                " WHERE status = 'dead' ORDER BY finished_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def retry_dead(self, job_id: int) -> bool:
+        """Put a dead job back on its queue with a fresh attempt budget."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'ready', attempts = 0, run_at = ?, locked_until = NULL,"
+                " locked_by = NULL WHERE id = ? AND status = 'dead'", (time.time(), job_id)
+            )
+            row = self._db.execute("SELECT queue FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if cursor.rowcount and row:
+            self._notify(row["queue"])
+        return bool(cursor.rowcount)
+
+    # ── Workers ───────────────────────────────────────────────────────────────
+
+    async def _worker(self, queue: str) -> None:
+        config = self._config(queue)
+        # Backfills may hold every slot but one (unless there is only one)
+        backfill_slots = max(1, config.concurrency - 1)
+        running: dict[asyncio.Task, Job] = {}
+        wake = self._wake[queue]
+
+        def finished(task: asyncio.Task) -> None:
+            running.pop(task, None)
+            wake.set()
+
+        while not self._stopping:
+            wake.clear()
+            free = config.concurrency - len(running)
+            if free > 0:
+                backfills = sum(job.priority < PRIORITY_NORMAL for job in running.values())
+                try:
+                    jobs = await self._in_thread(self._claim, queue, free, backfill_slots - backfills)
+                except Exception as e:
+                    logger.error(f"Job queue: claim on {queue} failed: {e}")
+                    jobs = []
+                for job in jobs:
+                    task = asyncio.create_task(self._execute(job))
+                    running[task] = job
+                    task.add_done_callback(finished)
+                if jobs:
+                    continue
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def _execute(self, job: Job) -> None:
+        h = _handlers.get(job.name)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            if h is None:
+                raise LookupError(f"no handler registered for {job.name!r} in this process")
+            if h.is_async:
+                await h.fn(**job.payload)
+            else:
+                await self._in_thread(h.fn, **job.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Job queue: {job.name} #{job.id} attempt {job.attempts} failed: {e}")
+            await self._in_thread(self._fail, job, f"{e.__class__.__name__}: {e}")
+        else:
+            await self._in_thread(self._complete, job)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job: Job) -> None:
+        """Keep a long-running job invisible to other workers while it is still alive."""
+        while True:
+            await asyncio.sleep(self.visibility_seconds / 3)
+            await self._in_thread(self._extend, job)
+
+    async def _maintenance(self) -> None:
+        while not self._stopping:
+            try:
+                await self._in_thread(self._prune)
+            except Exception as e:
+                logger.warning(f"Job queue: prune failed: {e}")
+            for _ in range(60):
+                if self._stopping:
+                    return
+                await asyncio.sleep(1)
+
+    async def _in_thread(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Any:
+        """asyncio.to_thread, counted in _active while the thread runs."""
+        def run() -> Any:
+            with self._idle:
+                if self._closed:
+                    raise RuntimeError("job queue is closed")
+                self._active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._idle:
+                    self._active -= 1
+                    self._idle.notify_all()
+        return await asyncio.to_thread(run)
+
+    # ── Storage ───────────────────────────────────────────────────────────────
+
+    def _claim(self, queue: str, limit: int, backfill_room: Optional[int]) -> list[Job]:
+        """
+        Atomically take up to `limit` due jobs (highest priority first), including
+        running jobs whose visibility timeout has lapsed. backfill_room caps how
+        many low-priority jobs may be taken; None means no cap.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, queue, name, payload, priority, attempts, max_attempts, run_at FROM jobs"
+                    " WHERE queue = ? AND ((status = 'ready' AND run_at <= ?)"
+                    "   OR (status = 'running' AND locked_until < ?))"
+                    " ORDER BY priority DESC, run_at, id LIMIT ?",
+                    (queue, now, now, limit),
+                ).fetchall()
+                if backfill_room is not None:
+                    kept, room = [], backfill_room
+                    for r in rows:
+                        if r["priority"] >= PRIORITY_NORMAL:
+                            kept.append(r)
+                        elif room > 0:
+                            kept.append(r)
+                            room -= 1
+                    rows = kept
+                self._db.executemany(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_until = ?,"
+                    " locked_by = ?, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    [(now + self.visibility_seconds, self.worker_id, now, r["id"]) for r in rows],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return [
+            Job(r["id"], r["queue"], r["name"], json.loads(r["payload"]), r["priority"],
+                r["attempts"] + 1, r["max_attempts"], r["run_at"])
+            for r in rows
+        ]
+
+    def _complete(self, job: Job) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'done', payload = '{}', finished_at = ?, locked_until = NULL,"
+                " last_error = NULL WHERE id = ? AND locked_by = ?",
+                (time.time(), job.id, self.worker_id),
+            )
+
+    def _fail(self, job: Job, error: str) -> None:
+        now = time.time()
+        with self._lock:
+            if job.attempts >= job.max_attempts:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'dead', last_error = ?, finished_at = ?, locked_until = NULL"
+                    " WHERE id = ? AND locked_by = ?",
+                    (error[:2000], now, job.id, self.worker_id),
+                )
+                logger.error(f"Job queue: {job.name} #{job.id} dead after {job.attempts} attempts: {error}")
+                return
+            # Full jitter on an exponential ceiling
+            ceiling = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (job.attempts - 1))
+            self._db.execute(
+                "UPDATE jobs SET status = 'ready', last_error = ?, run_at = ?, locked_until = NULL,"
+                " locked_by = NULL WHERE id = ? AND locked_by = ?",
+                (error[:2000], now + random.uniform(ceiling / 2, ceiling), job.id, self.worker_id),
+            )
+            self.retried[job.queue] = self.retried.get(job.queue, 0) + 1
+
+    def _extend(self, job: Job) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET locked_until = ? WHERE id = ? AND status = 'running' AND locked_by = ?",
+                (time.time() + self.visibility_seconds, job.id, self.worker_id),
+            )
+
+    def _prune(self) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM jobs WHERE (status = 'done' AND finished_at < ?) OR (status = 'dead' AND finished_at < ?)",
+                (now - self.retention_seconds, now - self.dead_retention_seconds),
+            )
+
+    # ── Helpers ───────────────────────────────────────────────────────────────
+
+    def _config(self, queue: str) -> QueueConfig:
+        return _queues.get(queue) or QueueConfig(self.default_concurrency)
+
+    def _queue_names(self) -> set[str]:
+        return set(_queues) | {h.queue for h in _handlers.values()}
+
+    def _notify(self, queue: str) -> None:
+        event, loop = self._wake.get(queue), self._loop
+        if event is None or loop is None or loop.is_closed():
+            return
+        try:
+            if asyncio.get_running_loop() is loop:
+                event.set()
+                return
+        except RuntimeError:
+            pass
+        loop.call_soon_threadsafe(event.set)
+
+
+# ── Process-wide queue ────────────────────────────────────────────────────────
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                from config import get_settings
+                s = get_settings()
+                _queue = JobQueue(
+                    s.job_queue_path,
+                    poll_seconds=s.job_queue_poll_seconds,
+                    visibility_seconds=s.job_queue_visibility_seconds,
+                    max_attempts=s.job_queue_max_attempts,
+                    retry_base_seconds=s.job_queue_retry_base_seconds,
+                    retry_max_seconds=s.job_queue_retry_max_seconds,
+                    retention_seconds=s.job_queue_retention_seconds,
+                    dead_retention_seconds=s.job_queue_dead_retention_seconds,
+                    default_concurrency=s.job_queue_default_concurrency,
+                )
+    return _queue
+
+
+def enqueue(name: str, /, **kwargs: Any) -> Optional[int]:
+    return get_queue().enqueue(name, **kwargs)
+
+
+async def start() -> None:
+    await get_queue().start()
+
+
+async def stop() -> None:
+    """Stop the workers and close the database (app shutdown)."""
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        await queue.stop()
+        await asyncio.to_thread(queue.close)
+
+
+def stats() -> dict:
+    return get_queue().stats()
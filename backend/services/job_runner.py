@@ -0,0 +1,212 @@
+"""
+services/job_runner.py — Shared per-user fan-out for scheduler jobs.
+
+The rule engine, capability lifecycle, nightly conversations, life events,
+drift detection and message batch jobs all do the same thing: load every
+eligible user, then run one unit of work per user. run_for_users() does that
+fan-out for all of them:
+
+  - At most job_concurrency users run at once. Per-user work is mostly
+    blocking Supabase / Claude calls, so each user runs on a thread of its
+    own; async per-user coroutines get their own event loop there. A fixed
+    pool would let timed-out threads keep their slots and starve the users
+    queued behind them, so a timed-out user frees its slot right away.
+  - Each user gets job_user_timeout_seconds. A user that times out or raises
+    is counted and logged, never stops the rest of the run.
+  - A job that is still running when its next trigger fires is skipped, not
+    stacked — the 15-minute rule cycle can never pile up on itself. Sync
+    work that timed out can't be interrupted, so the job stays marked as
+    running until those abandoned workers have actually returned.
+  - Every run records throughput and p50/p95 per-user latency (job_stats()).
+
+Usage:
+    run = await run_for_users("rule_engine", users, lambda u: engine.evaluate_for_user(u["id"], u["phone"]))
+    if run is None:
+        ...  # previous run still in progress
+    for user, result in run.results:
+        ...
+"""
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_running: set[str] = set()
+_running_lock = threading.Lock()
+_last_runs: dict[str, dict] = {}
+_skipped_overlaps: dict[str, int] = {}
+
+
+@dataclass
+class JobRun:
+    """Outcome of one fan-out: per-user results plus timing."""
+    job: str
+    users: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    duration_seconds: float = 0.0
+    latencies_ms: list[float] = field(default_factory=list, repr=False)
+    results: list[tuple[dict, Any]] = field(default_factory=list, repr=False)   # successes only
+
+    @property
+    def errors(self) -> int:
+        return self.failed + self.timed_out
+
+    @property
+    def throughput(self) -> float:
+        """Users completed per second of wall-clock time."""
+        return self.users / self.duration_seconds if self.duration_seconds else 0.0
+
+    def percentile_ms(self, pct: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        rank = int(round(pct / 100 * len(ordered))) - 1
+        return ordered[min(len(ordered) - 1, max(0, rank))]
+
+    def summary(self) -> dict:
+        return {
+            "users": self.users,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "users_per_second": round(self.throughput, 2),
+            "p50_user_ms": round(self.percentile_ms(50), 1),
+            "p95_user_ms": round(self.percentile_ms(95), 1),
+        }
+
+
+async def run_for_users(
+    job: str,
+    users: list[dict],
+    worker: Callable[[dict], Any],
+    concurrency: Optional[int] = None,
+    timeout_seconds: Optional[float] = None,
+) -> Optional[JobRun]:
+    """
+    Run worker(user) for every user with bounded concurrency and a per-user
+    timeout. worker may be sync or return a coroutine. Returns None if a run
+    of the same job is already in progress.
+    """
+    from config import get_settings  # read at call time so settings reloads apply
+    settings = get_settings()
+    concurrency = max(1, concurrency or settings.job_concurrency)
+    timeout_seconds = timeout_seconds or settings.job_user_timeout_seconds
+
+    with _running_lock:
+        if job in _running:
+            _skipped_overlaps[job] = _skipped_overlaps.get(job, 0) + 1
+            logger.warning(f"JobRunner: {job} still running from the previous trigger — skipping this run")
+            return None
+        _running.add(job)
+
+    run = JobRun(job=job, users=len(users))
+    loop = asyncio.get_running_loop()
+    gate = asyncio.Semaphore(concurrency)
+
+    def call(user: dict) -> Any:
+        result = worker(user)
+        if inspect.isawaitable(result):
+            # Async per-user work gets its own loop in the worker thread
+            return asyncio.run(asyncio.wait_for(result, timeout_seconds))
+        return result
+
+    submitted: list[Future] = []
+
+    def start_thread(user: dict) -> Future:
+        """call(user) on a fresh thread, so the timeout starts when the work does."""
+        future: Future = Future()
+
+        def target() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(call(user))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=target, name=f"job-{job}-{len(submitted)}").start()
+        submitted.append(future)
+        return future
+
+    async def one(user: dict) -> None:
+        async with gate:
+            start = time.perf_counter()
+            try:
+                future = start_thread(user)
+                result = await asyncio.wait_for(asyncio.wrap_future(future, loop=loop), timeout_seconds)
+                run.succeeded += 1
+                run.results.append((user, result))
+            except asyncio.TimeoutError:
+                run.timed_out += 1
+                logger.error(f"JobRunner: {job} timed out after {timeout_seconds}s for user {user.get('id')}")
+            except Exception as e:
+                run.failed += 1
+                logger.error(f"JobRunner: {job} failed for user {user.get('id')}: {e}")
+            finally:
+                run.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(user) for user in users))
+    finally:
+        # Timed-out sync work can't be interrupted; don't hold the scheduler for it
+        run.duration_seconds = time.perf_counter() - started
+        _last_runs[job] = {
+            "finished_at": time.time(),
+            "concurrency": concurrency,
+            **run.summary(),
+        }
+        _release_when_done(job, [f for f in submitted if not f.done()])
+
+    logger.info(f"JobRunner: {job} {_last_runs[job]}")
+    return run
+
+
+def _release_when_done(job: str, abandoned: list[Future]) -> None:
+    """
+    Clear the job's running mark once every abandoned (timed-out) worker has
+    returned, so the next trigger can't start the same users alongside them.
+    """
+    if not abandoned:
+        with _running_lock:
+            _running.discard(job)
+        return
+    logger.warning(f"JobRunner: {job} keeps running until {len(abandoned)} timed-out worker(s) return")
+    remaining = [len(abandoned)]
+    lock = threading.Lock()
+
+    def finished(_future: Future) -> None:
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            with _running_lock:
+                _running.discard(job)
+            logger.info(f"JobRunner: {job} timed-out workers finished — job released")
+
+    for future in abandoned:
+        future.add_done_callback(finished)
+
+
+def job_stats() -> dict:
+    """Last-run metrics per job, plus how often each job skipped an overlapping run."""
+    with _running_lock:
+        running = set(_running)
+    jobs = set(_last_runs) | set(_skipped_overlaps) | running
+    return {
+        job: {
+            "running": job in running,
+            "skipped_overlaps": _skipped_overlaps.get(job, 0),
+            "last_run": _last_runs.get(job),
+        }
+        for job in sorted(jobs)
+    }
@@ -8,8 +8,9 @@ Runs in two contexts:
 Plain English: Genie knows when people's birthdays are coming up and makes
 sure you never forget what matters.
 """
+import asyncio
 import logging
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from typing import Optional
 import database as db
 
@@ -20,6 +21,9 @@ BIRTHDAY_LEAD_DAYS = 3
 # How many days ahead to surface an anniversary reminder
 ANNIVERSARY_LEAD_DAYS = 5
 
+_PAGE = 1000        # PostgREST's default max rows per response
+_IN_CHUNK = 200     # ids per acknowledgement update, to keep the URL short
+
 
 def extract_life_events_for_user(user_id: str) -> int:
     """
@@ -131,100 +135,114 @@ def extract_from_contacts(user_id: str, contacts: list) -> int:
     return extracted
 
 
-def check_upcoming_events(user_id: str) -> list:
+def due_life_events(today: Optional[date] = None, user_id: Optional[str] = None) -> list:
+    """
+    Every life event inside its lead window (BIRTHDAY_LEAD_DAYS for
+    birthdays, ANNIVERSARY_LEAD_DAYS otherwise) whose person has no
+    life_event moment in the last 7 days — across all users, or one.
+
+    One call to due_life_events() (schema_migration_v10g), which matches
+    annual events on their indexed month/day columns and anti-joins
+    moments, so the cost follows the events due, not users × events.
+    Read in id order, one request per _PAGE rows.
+    Rows: id, owner_user_id, person_id, event_type, title, days_away.
     """
-    Find all life events happening in the next BIRTHDAY_LEAD_DAYS days.
-    Creates a moment for each one with urgency=high.
+    today = today or date.today()
+    params = {
+        "p_today": today.isoformat(),
+        "p_birthday_lead": BIRTHDAY_LEAD_DAYS,
+        "p_other_lead": ANNIVERSARY_LEAD_DAYS,
+    }
+    if user_id:
+        params["p_user_id"] = user_id
+    events, offset = [], 0
+    while True:
+        page = (
+            db.get_db().rpc("due_life_events", params)
+            .order("id")
+            .range(offset, offset + _PAGE - 1)
+            .execute()
+        ).data or []
+        events += page
+        if len(page) < _PAGE:
+            return events
+        offset += _PAGE
+
 
-    Called daily by the scheduler. Returns list of moments created.
+def create_moments_for_due_events(events: list) -> list:
     """
-    supabase = db.get_db()
-    today = date.today()
+    Turn due events into urgent moments: one per person (the nearest
+    event wins), saved with one bulk insert per user, then every event used
+    marked acknowledged with one update per _IN_CHUNK events. Returns the
+    moments created.
+    """
+    by_user: dict[str, dict[str, dict]] = {}
+    for event in sorted(events, key=lambda e: e["days_away"]):
+        by_user.setdefault(event["owner_user_id"], {}).setdefault(event["person_id"], event)
+
     moments_created = []
+    acknowledged = []
+    for user_id, per_person in by_user.items():
+        chosen = list(per_person.values())
+        try:
+            saved = db.create_moments_bulk(user_id, [{
+                "person_id": event["person_id"],
+                "suggestion": _build_suggestion(event, event["days_away"]),
+                "triggered_by": "life_event",
+            } for event in chosen])
+        except Exception as e:
+            logger.error(f"Failed to create life event moments for user {user_id}: {e}")
+            continue
+        saved_people = {m.get("person_id") for m in saved}
+        acknowledged += [event["id"] for event in chosen if event["person_id"] in saved_people]
+        moments_created += saved
+        logger.info(f"Created {len(saved)} life event moments for user {user_id}")
+
+    acknowledged_at = datetime.utcnow().isoformat()
+    for i in range(0, len(acknowledged), _IN_CHUNK):
+        chunk = acknowledged[i:i + _IN_CHUNK]
+        try:
+            db.get_db().table("life_events").update({
+                "last_acknowledged_at": acknowledged_at
+            }).in_("id", chunk).execute()
+        except Exception as e:
+            logger.error(f"Could not mark {len(chunk)} life events acknowledged: {e}")
 
-    try:
-        result = (
-            supabase.table("life_events")
-            .select("*")
-            .eq("owner_user_id", user_id)
-            .execute()
-        )
-        events = result.data
-    except Exception as e:
-        logger.error(f"Could not load life events for user {user_id}: {e}")
-        return []
+    return moments_created
 
-    for event in events:
-        event_date = _parse_date(event.get("date", ""))
-        if not event_date:
-            continue
 
-        is_annual = event.get("is_annual", False)
-        lead_days = BIRTHDAY_LEAD_DAYS if event.get("event_type") == "birthday" else ANNIVERSARY_LEAD_DAYS
-
-        # For annual events, compare month/day against today's year
-        if is_annual:
-            this_year_date = event_date.replace(year=today.year)
-            # If it already passed this year, check next year
-            if this_year_date < today:
-                this_year_date = this_year_date.replace(year=today.year + 1)
-            days_away = (this_year_date - today).days
-        else:
-            days_away = (event_date - today).days
-
-        if 0 <= days_away <= lead_days:
-            # Check if we already created a moment for this event recently
-            already_created = _moment_exists_for_event(supabase, user_id, event)
-            if already_created:
-                continue
-
-            suggestion = _build_suggestion(event, days_away)
-            try:
-                moment = db.create_moment(
-                    user_id=user_id,
-                    person_id=event["person_id"],
-                    suggestion=suggestion,
-                    triggered_by="life_event",
-                )
-                # Mark event as acknowledged
-                supabase.table("life_events").update({
-                    "last_acknowledged_at": datetime.utcnow().isoformat()
-                }).eq("id", event["id"]).execute()
-
-                moments_created.append(moment)
-                logger.info(
-                    f"Created moment for {event.get('title')} "
-                    f"({days_away} days away) for user {user_id}"
-                )
-            except Exception as e:
-                logger.error(f"Failed to create moment for event {event.get('id')}: {e}")
+def check_upcoming_events(user_id: str) -> list:
+    """
+    Find the user's life events happening within their lead window and
+    create a moment for each one with urgency=high.
 
-    return moments_created
+    Returns list of moments created.
+    """
+    try:
+        events = due_life_events(user_id=user_id)
+    except Exception as e:
+        logger.error(f"Could not load upcoming life events for user {user_id}: {e}")
+        return []
+    return create_moments_for_due_events(events)
 
 
-def run_life_events_check_for_all_users() -> int:
+async def run_life_events_check_for_all_users() -> int:
     """
     Called by the daily scheduler (2am UTC = 6pm PT).
-    Checks upcoming events for every user and creates urgent moments.
+    Finds every due event across all users with one query and creates
+    their urgent moments in bulk — work grows with the events due that
+    day, not with the number of users or events stored.
     Returns total moments created.
     """
     try:
-        result = db.get_db().table("users").select("id").execute()
-        users = result.data
+        events = await asyncio.to_thread(due_life_events)
     except Exception as e:
-        logger.error(f"Could not load users for life events check: {e}")
+        logger.error(f"Could not load due life events: {e}")
         return 0
 
-    total = 0
-    for user in users:
-        try:
-            moments = check_upcoming_events(user["id"])
-            total += len(moments)
-        except Exception as e:
-            logger.error(f"Life events check failed for user {user['id']}: {e}")
-
-    logger.info(f"Life events check complete: {total} moments created across {len(users)} users")
-    return total
+    moments = await asyncio.to_thread(create_moments_for_due_events, events)
+    logger.info(f"Life events check complete: {len(moments)} moments created from {len(events)} due events")
+    return len(moments)
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -292,24 +310,6 @@ def _upsert_life_event(supabase, user_id: str, person_id: str, event_data: dict)
         logger.error(f"Could not upsert life event: {e}")
 
 
-def _moment_exists_for_event(supabase, user_id: str, event: dict) -> bool:
-    """Check if we already created a moment for this event in the last 7 days."""
-    try:
-        cutoff = (datetime.utcnow() - timedelta(days=7)).isoformat()
-        result = (
-            supabase.table("moments")
-            .select("id")
-            .eq("owner_user_id", user_id)
-            .eq("person_id", event["person_id"])
-            .eq("triggered_by", "life_event")
-            .gte("created_at", cutoff)
-            .execute()
-        )
-        return bool(result.data)
-    except Exception:
-        return False
-
-
 def _build_suggestion(event: dict, days_away: int) -> str:
     """Generate a warm, specific suggestion for an upcoming life event."""
     title = event.get("title", "")
@@ -0,0 +1,511 @@
+"""
+services/llm_gateway.py — The one path from this process to Claude.
+
+Every feature that talks to Anthropic goes through here, so bursts from the
+message router, the scheduler jobs and ingestion share one set of limits
+instead of each opening its own client and hitting rate limits together:
+
+  - A global semaphore (llm_max_concurrency) and one per feature
+    (llm_feature_concurrency) bound how many calls are in flight.
+  - A token bucket paces requests to llm_requests_per_minute, allowing
+    bursts of llm_request_burst.
+  - 429 / 529 / 5xx / connection errors are retried with jittered
+    exponential backoff, honouring Retry-After when Anthropic sends it.
+  - Callers with deterministic prompts can opt into a content-addressed
+    response cache: an in-memory LRU in front of a directory of JSON files.
+  - Latency, retries, cache hits and token usage are recorded per feature
+    (stats(), served on GET /llm/stats).
+
+All calls run on the gateway's own event loop thread, so the limits hold no
+matter which loop or worker thread the caller is on, and sync callers in job
+runner threads never need a loop of their own.
+
+Usage:
+    text = await llm_gateway.complete("communication_dna", system, prompt)
+    text = llm_gateway.complete_sync("emotional_state", system, prompt)
+    for text in llm_gateway.stream_sync("intelligence", system, prompt): ...
+
+    # Drop-in for anthropic.Anthropic() / AsyncAnthropic() at existing call sites
+    _anthropic = llm_gateway.client("nutrition")
+    response = _anthropic.messages.create(model=..., max_tokens=..., messages=[...])
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import anthropic
+from anthropic.types import Message
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+_END_OF_STREAM = object()
+
+
+# ── Rate limiting ─────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """
+    `rate` tokens per second, holding at most `capacity`. Only touched from
+    the gateway loop, so it needs no lock.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until `amount` tokens are available and take them. Returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return waited
+            delay = (amount - self._tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+# ── Response cache ────────────────────────────────────────────────────────────
+
+class ResponseCache:
+    """
+    Claude responses keyed by a hash of the full request. Memory LRU first,
+    then `directory` (one JSON file per response) if configured. Disk entries
+    older than ttl_seconds are treated as misses.
+    """
+
+    def __init__(self, size: int = 2000, directory: str = "", ttl_seconds: int = 7 * 86400):
+        self.size = size
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._memory: OrderedDict[str, Message] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(params: dict) -> str:
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Message]:
+        with self._lock:
+            message = self._memory.get(key)
+            if message is not None:
+                self._memory.move_to_end(key)
+                return message
+        path = self._path(key)
+        if not path:
+            return None
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            with open(path, encoding="utf-8") as f:
+                message = Message.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"LLM gateway: unreadable cache entry {path}: {e}")
+            return None
+        self._remember(key, message)
+        return message
+
+    def put(self, key: str, message: Message) -> None:
+        self._remember(key, message)
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(message.model_dump_json())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"LLM gateway: could not write cache entry {path}: {e}")
+
+    def _remember(self, key: str, message: Message) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._memory[key] = message
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.size:
+                self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class FeatureMetrics:
+    """Running counters for one feature, reported by stats()."""
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    throttled_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=500), repr=False)
+
+    def percentile_ms(self, pct: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        rank = int(round(pct / 100 * len(ordered))) - 1
+        return ordered[min(len(ordered) - 1, max(0, rank))]
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "throttled_seconds": round(self.throttled_seconds, 2),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "p50_ms": round(self.percentile_ms(50), 1),
+            "p95_ms": round(self.percentile_ms(95), 1),
+        }
+
+
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, (anthropic.APIConnectionError, anthropic.RateLimitError, anthropic.InternalServerError)):
+        return True
+    return getattr(exc, "status_code", None) in _RETRYABLE_STATUS
+
+
+def _retry_after(exc: Exception) -> float:
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 0)) if response is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# ── Gateway ───────────────────────────────────────────────────────────────────
+
+class LLMGateway:
+    """
+    Owns the AsyncAnthropic client, the limits and the cache. One per process
+    (get_gateway()); tests and benchmarks build their own.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: str = "",
+        max_concurrency: int = 16,
+        feature_concurrency: int = 4,
+        requests_per_minute: int = 300,
+        burst: int = 20,
+        max_retries: int = 4,
+        timeout_seconds: float = 120.0,
+        cache_size: int = 2000,
+        cache_dir: str = "",
+        cache_ttl_seconds: int = 7 * 86400,
+        retry_base_seconds: float = 0.5,
+        retry_max_seconds: float = 30.0,
+    ):
+        self.model = model
+        self.max_retries = max_retries
+        self.feature_concurrency = max(1, feature_concurrency)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.cache = ResponseCache(cache_size, cache_dir, cache_ttl_seconds)
+        self.metrics: dict[str, FeatureMetrics] = {}
+
+        self._client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            base_url=base_url or None,
+            max_retries=0,              # retries happen here, under the limits
+            timeout=timeout_seconds,
+        )
+        self._global = asyncio.Semaphore(max(1, max_concurrency))
+        self._features: dict[str, asyncio.Semaphore] = {}
+        self._bucket = TokenBucket(requests_per_minute / 60.0, burst) if requests_per_minute > 0 else None
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_settings(cls) -> "LLMGateway":
+        from config import get_settings
+        s = get_settings()
+        return cls(
+            api_key=s.anthropic_api_key,
+            model=s.claude_model,
+            base_url=s.anthropic_base_url,
+            max_concurrency=s.llm_max_concurrency,
+            feature_concurrency=s.llm_feature_concurrency,
+            requests_per_minute=s.llm_requests_per_minute,
+            burst=s.llm_request_burst,
+            max_retries=s.llm_max_retries,
+            timeout_seconds=s.llm_timeout_seconds,
+            cache_size=s.llm_cache_size,
+            cache_dir=s.llm_cache_dir,
+            cache_ttl_seconds=s.llm_cache_ttl_seconds,
+        )
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    async def create(self, feature: str, *, cache: bool = False, **params) -> Message:
+        """
+        messages.create(**params) under the gateway's limits. `model` defaults
+        to settings.claude_model. cache=True serves identical requests from
+        the response cache — only for prompts whose answer may be reused.
+        """
+        coro = self._create(feature, cache, params)
+        try:
+            if asyncio.get_running_loop() is self._loop:
+                return await coro
+        except RuntimeError:
+            pass
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    def create_sync(self, feature: str, *, cache: bool = False, **params) -> Message:
+        """Blocking create() for sync code running in worker threads."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("create_sync() called from the gateway loop; use await create()")
+        return asyncio.run_coroutine_threadsafe(self._create(feature, cache, params), self._loop).result()
+
+    async def complete(
+        self, feature: str, system: str, user_message: str,
+        *, max_tokens: int = 1024, model: Optional[str] = None, cache: bool = False,
+    ) -> str:
+        """One system + user turn; returns the reply text."""
+        response = await self.create(feature, cache=cache, **self._turn(system, user_message, max_tokens, model))
+        return response.content[0].text
+
+    def complete_sync(
+        self, feature: str, system: str, user_message: str,
+        *, max_tokens: int = 1024, model: Optional[str] = None, cache: bool = False,
+    ) -> str:
+        response = self.create_sync(feature, cache=cache, **self._turn(system, user_message, max_tokens, model))
+        return response.content[0].text
+
+    def stream_sync(
+        self, feature: str, system: str, user_message: str,
+        *, max_tokens: int = 1024, model: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        complete_sync(), but yields the reply text as it is generated. Text
+        that arrived while the caller was busy comes out joined into one
+        piece. Same limits and metrics as create(); never cached. Errors
+        raise from the generator; a stream is only retried before its first
+        text, so the caller never sees text twice. Closing the generator
+        early cancels the request.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("stream_sync() called from the gateway loop")
+        pieces: queue.Queue = queue.Queue()
+        params = self._turn(system, user_message, max_tokens, model)
+        future = asyncio.run_coroutine_threadsafe(self._create(feature, False, params, pieces.put), self._loop)
+        future.add_done_callback(lambda _: pieces.put(_END_OF_STREAM))
+        try:
+            ended = False
+            while not ended:
+                text = [pieces.get()]
+                while True:
+                    try:
+                        text.append(pieces.get_nowait())
+                    except queue.Empty:
+                        break
+                if text[-1] is _END_OF_STREAM:
+                    ended = True
+                    text.pop()
+                if text:
+                    yield "".join(text)
+            future.result()
+        finally:
+            future.cancel()
+
+    def stats(self) -> dict:
+        return {feature: m.summary() for feature, m in sorted(self.metrics.items())}
+
+    def close(self) -> None:
+        """Close the HTTP client and stop the loop thread."""
+        if not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _turn(system: str, user_message: str, max_tokens: int, model: Optional[str]) -> dict:
+        params = {"max_tokens": max_tokens, "messages": [{"role": "user", "content": user_message}]}
+        if system:
+            params["system"] = system
+        if model:
+            params["model"] = model
+        return params
+
+    async def _create(
+        self, feature: str, cache: bool, params: dict, on_text: Optional[Callable[[str], None]] = None,
+    ) -> Message:
+        params.setdefault("model", self.model)
+        metrics = self.metrics.setdefault(feature, FeatureMetrics())
+        metrics.calls += 1
+
+        key = ResponseCache.key(params) if cache else None
+        if key:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                metrics.cache_hits += 1
+                return cached
+
+        gate = self._features.setdefault(feature, asyncio.Semaphore(self.feature_concurrency))
+        start = time.perf_counter()
+        try:
+            async with gate, self._global:
+                message = await self._send(feature, params, metrics, on_text)
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            metrics.input_tokens += usage.input_tokens or 0
+            metrics.output_tokens += usage.output_tokens or 0
+        if key:
+            await asyncio.to_thread(self.cache.put, key, message)
+        return message
+
+    async def _send(
+        self, feature: str, params: dict, metrics: FeatureMetrics,
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> Message:
+        attempt = 0
+        streamed = False
+        while True:
+            if self._bucket is not None:
+                metrics.throttled_seconds += await self._bucket.acquire()
+            try:
+                if on_text is None:
+                    return await self._client.messages.create(**params)
+                async with self._client.messages.stream(**params) as stream:
+                    async for text in stream.text_stream:
+                        streamed = True
+                        on_text(text)
+                    return await stream.get_final_message()
+            except Exception as e:
+                # Text already handed to the caller can't be taken back
+                if streamed or attempt >= self.max_retries or not _retryable(e):
+                    raise
+                # Full jitter, but never sooner than the server asked for
+                backoff = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+                delay = max(backoff, _retry_after(e))
+                attempt += 1
+                metrics.retries += 1
+                logger.warning(f"LLM gateway: {feature} attempt {attempt} failed ({e.__class__.__name__}) — retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+
+# ── Process-wide gateway and drop-in clients ──────────────────────────────────
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway.from_settings()
+    return _gateway
+
+
+async def create(feature: str, *, cache: bool = False, **params) -> Message:
+    return await get_gateway().create(feature, cache=cache, **params)
+
+
+def create_sync(feature: str, *, cache: bool = False, **params) -> Message:
+    return get_gateway().create_sync(feature, cache=cache, **params)
+
+
+async def complete(feature: str, system: str, user_message: str, **kwargs) -> str:
+    return await get_gateway().complete(feature, system, user_message, **kwargs)
+
+
+def complete_sync(feature: str, system: str, user_message: str, **kwargs) -> str:
+    return get_gateway().complete_sync(feature, system, user_message, **kwargs)
+
+
+def stream_sync(feature: str, system: str, user_message: str, **kwargs) -> Iterator[str]:
+    return get_gateway().stream_sync(feature, system, user_message, **kwargs)
+
+
+def stats() -> dict:
+    """Per-feature metrics, or {} if nothing has called Claude yet."""
+    return _gateway.stats() if _gateway is not None else {}
+
+
+def close() -> None:
+    """Shut the process-wide gateway down (app shutdown)."""
+    global _gateway
+    with _gateway_lock:
+        gateway, _gateway = _gateway, None
+    if gateway is not None:
+        gateway.close()
+
+
+class _Messages:
+    def __init__(self, feature: str, cache: bool, is_async: bool):
+        self._feature = feature
+        self._cache = cache
+        self._is_async = is_async
+
+    def create(self, **params):
+        if self._is_async:
+            return create(self._feature, cache=self._cache, **params)
+        return create_sync(self._feature, cache=self._cache, **params)
+
+
+class GatewayClient:
+    """
+    Stands in for anthropic.Anthropic / AsyncAnthropic where code only uses
+    client.messages.create(...). The gateway is resolved per call, so these
+    can be built at import time.
+    """
+
+    def __init__(self, feature: str, cache: bool = False, is_async: bool = False):
+        self.feature = feature
+        self.messages = _Messages(feature, cache, is_async)
+
+
+def client(feature: str, cache: bool = False) -> GatewayClient:
+    """Sync drop-in: client(feature).messages.create(...) returns a Message."""
+    return GatewayClient(feature, cache)
+
+
+def async_client(feature: str, cache: bool = False) -> GatewayClient:
+    """Async drop-in: await async_client(feature).messages.create(...)."""
+    return GatewayClient(feature, cache, is_async=True)
@@ -8,11 +8,15 @@ Google Takeout location history reveals patterns:
   - Airports / hotels in other cities → travel interest
   - Concert venues / theatres / museums → cultural interests
 
-Pipeline per place visit:
-  1. WorkFilter.classify(content_type="maps", ...)
-  2. If personal → extract interest signals and save to place_visits
-  3. Aggregate repeat visits: gym 12×  → strong physical signal
-  4. Broadcast progress via session_id if provided
+Pipeline (process_timeline / import_takeout):
+  1. Stream visits in — monthly Takeout files are parsed incrementally, so
+     memory holds the per-place totals, never the whole timeline
+  2. Aggregate per place: visit count, dwell time, first / last visit and
+     the lat/lng centroid
+  3. WorkFilter.classify_many(content_type="maps", ...) once per distinct place
+  4. One bulk upsert into place_visits, one batched interest / capability
+     signal write: gym 12× → strong physical signal
+  5. Broadcast progress via session_id if provided
 
 Expected Google Takeout format (simplified):
   [
@@ -33,6 +37,10 @@ Expected Google Takeout format (simplified):
     ...
   ]
 
+Takeout's monthly Semantic Location History files (2024_MARCH.json, …)
+wrap the same entries as {"timelineObjects": [...]}; import_takeout reads
+those directly, skipping the activitySegment entries between visits.
+
 We also accept a flat format for testing / iOS upload:
   [
     {
@@ -48,17 +56,19 @@ We also accept a flat format for testing / iOS upload:
 from __future__ import annotations
 
 import asyncio
+import io
 import logging
+import os
 import re
 import uuid
 from datetime import datetime, timezone
-from typing import Any
-
-import httpx
+from typing import IO, Iterable, Iterator
 
 from config import get_settings
 from core.ingestion.work_filter import WorkFilter, Label
+from core.json_stream import JSONArrayStream
 import database as db
+from services.ingestion_bus import broadcast_async
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -98,24 +108,7 @@ async def _broadcast(
 ) -> None:
     if not session_id:
         return
-    try:
-        payload: dict[str, Any] = {
-            "source": "maps",
-            "stage": stage,
-            "progress": progress,
-            "message": message,
-            "insight": insight,
-            "people_found": 0,
-            "user_id": user_id,
-        }
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                f"{settings.backend_url}/ingestion/progress/{session_id}",
-                json=payload,
-                timeout=5.0,
-            )
-    except Exception as exc:
-        logger.debug(f"Maps progress broadcast failed (non-fatal): {exc}")
+    await broadcast_async(session_id, "maps", stage, progress, message, insight=insight, user_id=user_id)
 
 
 # ── Normalise Google Takeout entry ────────────────────────────────────────────
@@ -161,6 +154,117 @@ def _normalise(entry: dict) -> dict | None:
     return None
 
 
+# ── Streaming Takeout reader ──────────────────────────────────────────────────
+
+_READ_CHUNK = 1 << 16               # characters read from a Takeout file at a time
+
+
+def iter_takeout(source: str | os.PathLike | IO[str]) -> Iterator[dict]:
+    """
+    Yield the entries of one Takeout timeline file — a monthly
+    {"timelineObjects": [...]} file or a bare list — as they are parsed,
+    reading _READ_CHUNK characters at a time. `source` is a path or an open
+    text file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            yield from iter_takeout(f)
+        return
+    parser = JSONArrayStream()
+    while not parser.done:
+        chunk = source.read(_READ_CHUNK)
+        if not chunk:
+            break
+        yield from parser.feed(chunk)
+    if parser.skipped:
+        logger.warning(f"Takeout import: skipped {parser.skipped} malformed timeline entries")
+
+
+def _visit_time(value: str | None) -> datetime | None:
+    """A visit timestamp as a datetime — strings don't sort once fractional seconds vary."""
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+class _PlaceTally:
+    """Running totals for one place, fed one normalised visit at a time."""
+
+    __slots__ = ("place_name", "address", "visits", "dwell_minutes", "first", "last",
+                 "_located", "_lat_sum", "_lng_sum")
+
+    def __init__(self, place_name: str):
+        self.place_name = place_name
+        self.address = ""
+        self.visits = 0
+        self.dwell_minutes = 0
+        self.first: tuple[datetime, str] | None = None
+        self.last: tuple[datetime, str] | None = None
+        self._located = 0
+        self._lat_sum = 0.0
+        self._lng_sum = 0.0
+
+    def add(self, entry: dict) -> None:
+        self.visits += 1
+        self.dwell_minutes += int(entry.get("duration_minutes") or 0)
+        self.address = self.address or entry.get("address") or ""
+        raw = entry.get("visit_time")
+        when = _visit_time(raw)
+        if when is not None:
+            if self.first is None or when < self.first[0]:
+                self.first = (when, raw)
+            if self.last is None or when > self.last[0]:
+                self.last = (when, raw)
+        if entry.get("lat") is not None and entry.get("lng") is not None:
+            self._located += 1
+            self._lat_sum += float(entry["lat"])
+            self._lng_sum += float(entry["lng"])
+
+    def classify_content(self) -> dict:
+        """What WorkFilter sees for this place: the average visit stands in for any one visit."""
+        return {
+            "place_name": self.place_name,
+            "address": self.address,
+            "duration_minutes": round(self.dwell_minutes / self.visits) if self.visits else 0,
+        }
+
+    def row(self, user_id: str, place_type: str) -> dict:
+        """The place_visits row for these totals."""
+        return {
+            "user_id": user_id,
+            "place_name": self.place_name,
+            "address": self.address,
+            "place_type": place_type,
+            "visit_count": self.visits,
+            "dwell_minutes": self.dwell_minutes,
+            "first_visited": self.first[1] if self.first else None,
+            "last_visited": self.last[1] if self.last else None,
+            "lat": round(self._lat_sum / self._located, 7) if self._located else None,
+            "lng": round(self._lng_sum / self._located, 7) if self._located else None,
+        }
+
+
+def _aggregate(entries: Iterable[dict]) -> tuple[dict[str, _PlaceTally], int]:
+    """Fold raw timeline entries into per-place totals. Returns (places, visits read)."""
+    places: dict[str, _PlaceTally] = {}
+    visits = 0
+    for raw_entry in entries:
+        entry = _normalise(raw_entry)
+        if entry is None:
+            continue
+        place_name = entry.get("place_name", "")
+        if not place_name:
+            continue
+        visits += 1
+        tally = places.get(place_name)
+        if tally is None:
+            tally = places[place_name] = _PlaceTally(place_name)
+        tally.add(entry)
+    return places, visits
+
+
 # ── MapsProcessor ─────────────────────────────────────────────────────────────
 
 class MapsProcessor:
@@ -176,123 +280,127 @@ class MapsProcessor:
     async def process_timeline(
         self,
         user_id: str,
-        timeline_data: list[dict],
+        timeline_data: Iterable[dict],
         session_id: str | None = None,
     ) -> dict:
         """
-        Process a list of Google Takeout place visit entries.
+        Process Google Takeout place visit entries (any iterable, so a
+        generator works as well as a list).
+
+        Visits are folded into per-place totals, each distinct place is
+        classified once, and the results are written with one place_visits
+        upsert plus one batched insert per signal table. A place's row
+        holds the totals of this import, so send a user's whole history in
+        one call rather than month by month.
 
         Returns:
           {
-            "places_analyzed": int,
-            "work_filtered": int,
+            "visits_read": int,
+            "places_analyzed": int,       # distinct personal places
+            "work_filtered": int,         # distinct places filtered out
             "interests_extracted": int,
             "places_saved": int,
           }
         """
+        await _broadcast(
+            session_id, "starting", 0,
+            "Reading your Maps history — looking for the places that define you.",
+            user_id=user_id,
+        )
+        places, visits = _aggregate(timeline_data)
+        return await self._save_places(user_id, places, visits, session_id)
+
+    async def import_takeout(
+        self,
+        user_id: str,
+        sources: Iterable[str | os.PathLike | IO[str]],
+        session_id: str | None = None,
+    ) -> dict:
+        """
+        Stream a Takeout export — typically every monthly Semantic Location
+        History file — into place_visits. Files are parsed incrementally off
+        the event loop, so memory grows with the number of distinct places,
+        not visits. Same result shape as process_timeline.
+        """
+        await _broadcast(
+            session_id, "starting", 0,
+            "Reading your Maps history — looking for the places that define you.",
+            user_id=user_id,
+        )
+        entries = (entry for source in sources for entry in iter_takeout(source))
+        places, visits = await asyncio.to_thread(_aggregate, entries)
+        return await self._save_places(user_id, places, visits, session_id)
+
+    # ── Private helpers ───────────────────────────────────────────────────────
+
+    async def _save_places(
+        self,
+        user_id: str,
+        places: dict[str, _PlaceTally],
+        visits: int,
+        session_id: str | None,
+    ) -> dict:
         stats = {
+            "visits_read": visits,
             "places_analyzed": 0,
             "work_filtered": 0,
             "interests_extracted": 0,
             "places_saved": 0,
         }
-
-        total = len(timeline_data)
-        if total == 0:
+        if not places:
             return stats
 
         await _broadcast(
-            session_id, "starting", 0,
-            "Reading your Maps history — looking for the places that define you.",
+            session_id, "reading", 40,
+            f"Reading through the {len(places)} places you've been",
             user_id=user_id,
         )
 
-        # Running tally: place_name → visit_count (for aggregate signals)
-        visit_counts: dict[str, int] = {}
-
-        for idx, raw_entry in enumerate(timeline_data):
-            entry = _normalise(raw_entry)
-            if entry is None:
-                continue
-
-            place_name = entry.get("place_name", "")
-            if not place_name:
-                continue
-
-            # Progress broadcast roughly every 20%
-            pct = 5 + int((idx / total) * 85)
-            if idx % max(1, total // 5) == 0:
-                await _broadcast(
-                    session_id, "reading", pct,
-                    f"Reading through the places you've been",
-                    user_id=user_id,
-                )
-
-            # ── WorkFilter ─────────────────────────────────────────────────
-            fr = await self._work_filter.classify(
-                content_type="maps",
-                content={
-                    "place_name": place_name,
-                    "address": entry.get("address", ""),
-                    "visit_time": entry.get("visit_time", ""),
-                    "duration_minutes": entry.get("duration_minutes", 0),
-                },
-                user_id=user_id,
-            )
-
-            if not fr.passes:
-                stats["work_filtered"] += 1
-                continue
-
-            stats["places_analyzed"] += 1
-            visit_counts[place_name] = visit_counts.get(place_name, 0) + 1
-
-            # ── Save to place_visits (upsert by (user_id, place_name)) ─────
-            try:
-                self._upsert_place_visit(user_id, entry, visit_counts[place_name])
-                stats["places_saved"] += 1
-            except Exception as exc:
-                logger.warning(f"Failed to save place visit '{place_name}': {exc}")
-
-            # ── Extract interest signals ───────────────────────────────────
-            signals_added = await self._extract_signals(user_id, entry, visit_counts[place_name])
-            stats["interests_extracted"] += signals_added
+        # ── WorkFilter, once per distinct place ────────────────────────────
+        tallies = list(places.values())
+        verdicts = await self._work_filter.classify_many(
+            "maps", [t.classify_content() for t in tallies], user_id=user_id,
+        )
+        personal = [t for t, fr in zip(tallies, verdicts) if fr.passes]
+        stats["work_filtered"] = len(tallies) - len(personal)
+        stats["places_analyzed"] = len(personal)
 
         await _broadcast(
-            session_id, "analyzing", 92,
+            session_id, "analyzing", 80,
             "Connecting the dots between your favourite places",
             user_id=user_id,
         )
 
+        # ── Save to place_visits (upsert by (user_id, place_name)) ─────────
+        if personal:
+            try:
+                await asyncio.to_thread(self._upsert_place_visits, user_id, personal)
+                stats["places_saved"] = len(personal)
+            except Exception as exc:
+                logger.warning(f"Failed to save {len(personal)} place visits for user {user_id}: {exc}")
+
+        # ── Extract interest signals ───────────────────────────────────────
+        stats["interests_extracted"] = await asyncio.to_thread(self._write_signals, user_id, personal)
+
         await _broadcast(
             session_id, "complete", 100,
             "Your world is taking shape",
             insight=f"Genie explored {stats['places_analyzed']} places from your history",
             user_id=user_id,
         )
-
+        logger.info(
+            f"Maps import for user {user_id}: {visits} visits, {len(tallies)} places, "
+            f"{stats['work_filtered']} filtered, {stats['interests_extracted']} signals"
+        )
         return stats
 
-    # ── Private helpers ───────────────────────────────────────────────────────
-
-    def _upsert_place_visit(self, user_id: str, entry: dict, visit_count: int) -> None:
+    def _upsert_place_visits(self, user_id: str, tallies: list[_PlaceTally]) -> None:
         """
-        Upsert a place_visits record.
-        On conflict (user_id, place_name), update visit_count and last_visited.
+        Upsert every place in one request.
+        On conflict (user_id, place_name), the stored totals are replaced.
         """
-        db.get_db().table("place_visits").upsert(
-            {
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "place_name": entry.get("place_name", ""),
-                "place_type": self._infer_place_type(entry.get("place_name", "")),
-                "visit_count": visit_count,
-                "last_visited": entry.get("visit_time") or None,
-                "lat": entry.get("lat"),
-                "lng": entry.get("lng"),
-            },
-            on_conflict="user_id,place_name",
-        ).execute()
+        rows = [t.row(user_id, self._infer_place_type(t.place_name)) for t in tallies]
+        db.get_db().table("place_visits").upsert(rows, on_conflict="user_id,place_name").execute()
 
     def _infer_place_type(self, place_name: str) -> str:
         """Return a simple category for a place based on its name."""
@@ -301,56 +409,57 @@ class MapsProcessor:
                 return category
         return "other"
 
-    async def _extract_signals(
-        self,
-        user_id: str,
-        entry: dict,
-        visit_count: int,
-    ) -> int:
-        """
-        Extract interest / capability signals for one place visit.
-        Returns count of signals written.
-        """
-        place_name = entry.get("place_name", "")
-        address = entry.get("address", "")
-        combined = f"{place_name} {address}"
-        signals_written = 0
-
+    def _signals_for(self, user_id: str, tally: _PlaceTally) -> tuple[dict | None, dict | None]:
+        """The interest signal and capability signal (either may be None) for one place."""
+        place_name = tally.place_name
+        combined = f"{place_name} {tally.address}"
         for pattern, interest_category, capability_area, base_delta in _PLACE_SIGNALS:
             if not pattern.search(combined):
                 continue
 
-            # ── Interest signal ────────────────────────────────────────────
-            try:
-                db.get_db().table("interest_signals").insert({
-                    "id": str(uuid.uuid4()),
-                    "user_id": user_id,
-                    "category": interest_category,
-                    "source": "maps",
-                    "note": f"Visited {place_name} (×{visit_count})",
-                }).execute()
-                signals_written += 1
-            except Exception as exc:
-                logger.debug(f"interest_signals insert skipped: {exc}")
-
-            # ── Capability signal (if applicable) ─────────────────────────
+            interest = {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "category": interest_category,
+                "source": "maps",
+                "note": f"Visited {place_name} (×{tally.visits})",
+            }
+            capability = None
             if capability_area and base_delta > 0:
                 # Stronger signal for repeat visits
-                delta = base_delta + min(0.1 * (visit_count - 1), 0.3)
-                try:
-                    db.get_db().table("capability_signals").insert({
-                        "id": str(uuid.uuid4()),
-                        "user_id": user_id,
-                        "capability_area": capability_area,
-                        "delta": round(delta, 3),
-                        "source": f"maps: {place_name[:80]} (visit #{visit_count})",
-                    }).execute()
-                    signals_written += 1
-                except Exception as exc:
-                    logger.debug(f"capability_signals insert skipped: {exc}")
-
-            break  # one signal per place visit is enough
+                delta = base_delta + min(0.1 * (tally.visits - 1), 0.3)
+                capability = {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "capability_area": capability_area,
+                    "delta": round(delta, 3),
+                    "source": f"maps: {place_name[:80]} ({tally.visits} visits)",
+                }
+            return interest, capability  # one signal per place is enough
+        return None, None
+
+    def _write_signals(self, user_id: str, tallies: list[_PlaceTally]) -> int:
+        """
+        Write interest / capability signals for every place with one insert
+        per table. Returns count of signals written.
+        """
+        interests, capabilities = [], []
+        for tally in tallies:
+            interest, capability = self._signals_for(user_id, tally)
+            if interest:
+                interests.append(interest)
+            if capability:
+                capabilities.append(capability)
 
+        signals_written = 0
+        for table, rows in (("interest_signals", interests), ("capability_signals", capabilities)):
+            if not rows:
+                continue
+            try:
+                db.get_db().table(table).insert(rows).execute()
+                signals_written += len(rows)
+            except Exception as exc:
+                logger.debug(f"{table} insert skipped: {exc}")
         return signals_written
 
 
@@ -358,6 +467,7 @@ class MapsProcessor:
 
 try:
     from fastapi import APIRouter as _APIRouter, HTTPException as _HTTPException
+    from fastapi import File as _File, Form as _Form, UploadFile as _UploadFile
     from pydantic import BaseModel as _BaseModel
     _FASTAPI_AVAILABLE = True
 except ImportError:
@@ -383,6 +493,8 @@ if _FASTAPI_AVAILABLE:
         """
         iOS sends Google Takeout location history here.
         Accepts both the nested placeVisit format and the flat format.
+        The whole body is parsed into memory — send full Takeout exports
+        to /maps/takeout instead.
         """
         if not body.user_id:
             raise _HTTPException(status_code=400, detail="user_id is required")
@@ -401,3 +513,33 @@ if _FASTAPI_AVAILABLE:
                 f"{result['interests_extracted']} interest signals."
             ),
         }
+
+    @maps_router.post("/maps/takeout")
+    async def maps_takeout(
+        files: list[_UploadFile] = _File(...),
+        user_id: str = _Form(...),
+        session_id: str | None = _Form(None),
+    ) -> dict:
+        """
+        Upload a Takeout export as multipart files — typically every monthly
+        Semantic Location History file. Uploads are spooled to disk by the
+        server and streamed through import_takeout, so memory grows with the
+        number of distinct places, not the size of the export.
+        """
+        if not user_id:
+            raise _HTTPException(status_code=400, detail="user_id is required")
+
+        result = await _processor.import_takeout(
+            user_id=user_id,
+            sources=[io.TextIOWrapper(f.file, encoding="utf-8") for f in files],
+            session_id=session_id,
+        )
+
+        return {
+            "ok": True,
+            **result,
+            "message": (
+                f"Genie explored {result['places_analyzed']} places and found "
+                f"{result['interests_extracted']} interest signals."
+            ),
+        }
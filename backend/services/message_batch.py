@@ -0,0 +1,234 @@
+"""
+services/message_batch.py — Drain each user's unprocessed message backlog.
+
+The 30-minute message batch job used to take the newest 50 unprocessed
+messages per user and run the analysis stages one after another, so anyone
+receiving more than 50 messages between runs built a backlog that never
+drained. process_backlog() instead:
+
+  - Pages through every unprocessed message, oldest first, with keyset
+    pagination on (timestamp, id). The next page is fetched while the
+    current batches are analysed.
+  - Packs messages into batches by estimated prompt tokens
+    (message_batch_max_tokens), so a batch of long emails and a batch of
+    one-word replies cost Claude about the same.
+  - Runs the independent stages — relationship intelligence, emotional
+    state, group chat profiles, signal queueing — concurrently per batch.
+  - Marks each batch processed as soon as its stages finish, so a crash
+    repeats only the batch in flight. A batch with a failed stage is left
+    unprocessed for the next run and the pass moves on past it; the stages
+    that did succeed are recorded on its messages (messages.stages_done,
+    schema_migration_v10l) and are not re-run on them next time.
+  - Stops at message_batch_user_budget_seconds; the rest drains next run.
+
+Every run records backlog depth and messages/sec (stats(), served on
+GET /messages/batch/stats).
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+import database as db
+from config import get_settings
+from services import signal_extractor
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt cost of a message: ~4 characters per token plus its timestamp/name prefix
+_CHARS_PER_TOKEN = 4
+_TOKENS_PER_MESSAGE_OVERHEAD = 12
+
+_last_run: dict = {}
+
+
+@dataclass
+class BacklogRun:
+    """One user's pass over their backlog."""
+    user_id: str
+    backlog: int = 0                 # unprocessed messages when the pass started
+    processed: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    signals_queued: int = 0
+    stopped_early: bool = False      # hit the time budget with messages left
+    duration_seconds: float = 0.0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.backlog - self.processed)
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.processed / self.duration_seconds if self.duration_seconds else 0.0
+
+
+def estimate_tokens(message: dict) -> int:
+    text = message.get("body") or message.get("text") or ""
+    return len(text) // _CHARS_PER_TOKEN + _TOKENS_PER_MESSAGE_OVERHEAD
+
+
+def pack_batches(messages: Iterable[dict], max_tokens: int, max_messages: int) -> Iterator[list[dict]]:
+    """
+    Split messages, in order, into batches of at most max_tokens estimated
+    tokens and max_messages messages. A message bigger than max_tokens gets
+    a batch of its own.
+    """
+    batch: list[dict] = []
+    tokens = 0
+    for message in messages:
+        cost = estimate_tokens(message)
+        if batch and (tokens + cost > max_tokens or len(batch) >= max_messages):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(message)
+        tokens += cost
+    if batch:
+        yield batch
+
+
+def _stages() -> list[tuple[str, Callable[[str, list], object]]]:
+    from services.intelligence import analyze_messages
+    from services.emotional_state import infer_from_messages
+    from services.group_chat import analyze_group_messages
+
+    return [
+        ("intelligence", analyze_messages),           # People Graph updates
+        ("emotional_state", infer_from_messages),     # user's current mood
+        ("group_chat", analyze_group_messages),       # group dynamics
+    ]
+
+
+def _queue_signals(user_id: str, user_name: str, messages: list[dict]) -> int:
+    """Queue third-party signal extraction per conversation (backfill priority: never starves live chat)."""
+    by_sender: dict[str, list[dict]] = {}
+    for msg in messages:
+        if msg.get("body") or msg.get("text"):
+            by_sender.setdefault(msg.get("sender_name", user_name), []).append(msg)
+    return sum(
+        signal_extractor.submit_signals(user_id, sender_messages, [user_name, sender])
+        for sender, sender_messages in by_sender.items()
+    )
+
+
+def _run_batch(pool: ThreadPoolExecutor, user_id: str, user_name: str, batch: list[dict], run: BacklogRun) -> None:
+    stages = _stages() + [("signals", lambda uid, messages: _queue_signals(uid, user_name, messages))]
+    futures = {}
+    for name, fn in stages:
+        # A retried batch skips the stages that already succeeded on its messages
+        pending = [m for m in batch if name not in (m.get("stages_done") or ())]
+        if pending:
+            futures[name] = (pending, pool.submit(fn, user_id, pending))
+
+    failed, succeeded = [], []
+    for name, (pending, future) in futures.items():
+        try:
+            result = future.result()
+        except Exception as e:
+            failed.append(name)
+            logger.error(f"Message batch: {name} failed for user {user_id}: {e}")
+            continue
+        succeeded.append((name, pending))
+        if name == "signals":
+            run.signals_queued += result
+
+    if failed:
+        # Left unprocessed; record what did succeed so the retry doesn't apply it twice
+        for name, pending in succeeded:
+            try:
+                db.mark_messages_stage_done([m["id"] for m in pending], name)
+            except Exception as e:
+                logger.error(f"Message batch: could not record {name} done for user {user_id}: {e}")
+        run.failed_batches += 1
+        return
+
+    db.mark_messages_processed([m["id"] for m in batch])
+    run.batches += 1
+    run.processed += len(batch)
+
+
+def process_backlog(
+    user_id: str,
+    page_size: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    max_messages: Optional[int] = None,
+    budget_seconds: Optional[float] = None,
+) -> BacklogRun:
+    """
+    Analyse a user's unprocessed messages, oldest first, until the backlog
+    is empty or the time budget runs out. Runs in a job runner worker thread.
+    """
+    settings = get_settings()
+    page_size = page_size or settings.message_batch_page_size
+    max_tokens = max_tokens or settings.message_batch_max_tokens
+    max_messages = max_messages or settings.message_batch_max_messages
+    budget_seconds = budget_seconds or settings.message_batch_user_budget_seconds
+
+    run = BacklogRun(user_id=user_id, backlog=db.count_unprocessed_messages(user_id))
+    if not run.backlog:
+        return run
+
+    user_row = db.get_user_by_id(user_id)
+    user_name = user_row.get("name", "") if user_row else ""
+    started = time.perf_counter()
+    deadline = started + budget_seconds
+
+    # One thread per stage plus one for the next page's fetch
+    with ThreadPoolExecutor(max_workers=len(_stages()) + 2, thread_name_prefix="message-batch") as pool:
+        next_page = pool.submit(db.get_unprocessed_messages_after, user_id, None, page_size)
+        carry: list[dict] = []
+        while next_page is not None:
+            page = next_page.result()
+            next_page = None
+            if len(page) == page_size:
+                last = page[-1]
+                next_page = pool.submit(
+                    db.get_unprocessed_messages_after, user_id, (last.get("timestamp"), last["id"]), page_size
+                )
+
+            batches = list(pack_batches(carry + page, max_tokens, max_messages))
+            # A short final batch waits for the next page to fill it up
+            carry = batches.pop() if next_page is not None and batches else []
+
+            for batch in batches:
+                if time.perf_counter() >= deadline:
+                    run.stopped_early = True
+                    break
+                _run_batch(pool, user_id, user_name, batch, run)
+            if run.stopped_early:
+                break
+
+    run.duration_seconds = time.perf_counter() - started
+    logger.info(
+        f"Message batch: user {user_id} processed {run.processed}/{run.backlog} messages in "
+        f"{run.batches} batches ({run.messages_per_second:.1f} msg/s)"
+        + (", stopped at time budget" if run.stopped_early else "")
+    )
+    return run
+
+
+def record_run(runs: list[BacklogRun], duration_seconds: float) -> dict:
+    """Aggregate one scheduler run's per-user passes into the stats() snapshot."""
+    global _last_run
+    processed = sum(r.processed for r in runs)
+    _last_run = {
+        "finished_at": time.time(),
+        "users": len(runs),
+        "backlog": sum(r.backlog for r in runs),
+        "max_user_backlog": max((r.backlog for r in runs), default=0),
+        "processed": processed,
+        "remaining": sum(r.remaining for r in runs),
+        "batches": sum(r.batches for r in runs),
+        "failed_batches": sum(r.failed_batches for r in runs),
+        "signals_queued": sum(r.signals_queued for r in runs),
+        "users_stopped_early": sum(r.stopped_early for r in runs),
+        "duration_seconds": round(duration_seconds, 3),
+        "messages_per_second": round(processed / duration_seconds, 2) if duration_seconds else 0.0,
+    }
+    return _last_run
+
+
+def stats() -> dict:
+    """Backlog depth and throughput of the last message batch run, or {} before the first."""
+    return dict(_last_run)
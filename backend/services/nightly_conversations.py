@@ -26,7 +26,8 @@ from datetime import datetime, timezone, timedelta, date
 from typing import Optional
 
 import database as db
-from services.intelligence import _call_claude
+from services import llm_gateway
+from services.job_runner import run_for_users
 
 logger = logging.getLogger(__name__)
 
@@ -57,10 +58,6 @@ class NightlyConversationEngine:
         Run nightly conversation engine for all eligible users.
         Returns: {users_checked, conversations_sent, skipped}
         """
-        users_checked = 0
-        conversations_sent = 0
-        skipped = 0
-
         try:
             result = db.get_db().table("users").select("id, phone").eq("whatsapp_consented", True).execute()
             users = result.data or []
@@ -68,21 +65,16 @@ class NightlyConversationEngine:
             logger.error(f"NightlyConversations: could not load users: {e}")
             return {"users_checked": 0, "conversations_sent": 0, "skipped": 0}
 
-        for user in users:
-            user_id = user.get("id")
-            phone = user.get("phone", "")
-            if not user_id or not phone:
-                continue
-            users_checked += 1
-            try:
-                sent = await self.run_for_user(user_id, phone)
-                if sent:
-                    conversations_sent += 1
-                else:
-                    skipped += 1
-            except Exception as e:
-                logger.error(f"NightlyConversations: error for user {user_id}: {e}")
-                skipped += 1
+        eligible = [u for u in users if u.get("id") and u.get("phone")]
+        run = await run_for_users(
+            "nightly_conversations", eligible, lambda u: self.run_for_user(u["id"], u["phone"])
+        )
+        if run is None:
+            return {"users_checked": 0, "conversations_sent": 0, "skipped": 0, "overlap_skipped": True}
+
+        users_checked = len(eligible)
+        conversations_sent = sum(1 for _, sent in run.results if sent)
+        skipped = users_checked - conversations_sent   # not sent, errored or timed out
 
         logger.info(
             f"NightlyConversations: checked {users_checked} users, "
@@ -394,7 +386,7 @@ Rules (non-negotiable):
             )
 
         try:
-            opening = _call_claude(system_prompt, user_msg)
+            opening = await llm_gateway.complete("nightly_conversations", system_prompt, user_msg, max_tokens=8192)
             opening = opening.strip().strip('"').strip("'")
             # Truncate to reasonable length — this should be short
             if len(opening) > 500:
@@ -17,14 +17,15 @@ import re
 from datetime import datetime, date, timedelta, timezone
 from typing import Optional
 
-from anthropic import Anthropic
 from config import get_settings
 import database as db
+from services import llm_gateway
+from core.world_model import invalidate_world_model
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-_anthropic = Anthropic(api_key=settings.anthropic_api_key)
+_anthropic = llm_gateway.client("nutrition")
 
 # After this many days logging, switch from always-ack to significance-gated ack
 HABIT_BUILDING_DAYS = 7
@@ -219,6 +220,7 @@ def store_food_log(
         "parsing_confidence": parsed.get("overall_confidence", 1.0),
         "genie_clarified": bool(parsed.get("clarification_question")),
     }).execute()
+    invalidate_world_model(user_id, "nutrition_log")
 
     # Upsert daily summary — increment running totals
     existing = (
@@ -29,9 +29,10 @@ import json
 import logging
 from typing import Optional
 
-import anthropic
-
 from config import get_settings
+from core import person_index
+from core.world_model import invalidate_world_model
+from services import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -309,19 +310,12 @@ async def _save_onboarding_person(user_id: str, data: dict) -> None:
         db = _db_module.get_db()
 
         # Look for an existing record by name (exact or partial match)
-        existing = (
-            db.table("people")
-            .select("id, name, memories, relationship_type")
-            .eq("owner_user_id", user_id)
-            .ilike("name", f"%{person_name}%")
-            .execute()
-        )
+        row = person_index.get_index(user_id).match_name(person_name, fuzzy=False)
 
         memory_entry = {"description": story, "source": "onboarding"} if story else None
         new_memories = [memory_entry] if memory_entry else []
 
-        if existing.data:
-            row = existing.data[0]
+        if row:
             person_id = row["id"]
             existing_memories = row.get("memories") or []
             if isinstance(existing_memories, str):
@@ -362,6 +356,8 @@ async def _save_onboarding_person(user_id: str, data: dict) -> None:
                 if digits and digits in "17049308241":
                     db.table("people").update({"name": person_name}).eq("id", p["id"]).execute()
                     logger.info("Fixed nameless contact %s → %s", p["name"], person_name)
+        person_index.invalidate(user_id)
+        invalidate_world_model(user_id, "people")
 
         logger.info("Saved onboarding person %s for user %s", person_name, user_id)
     except Exception as exc:
@@ -465,7 +461,7 @@ async def _reflect_on_story(user_id: str, phone: str, story: str, data: dict) ->
     user_name = data.get("name", "")
 
     try:
-        client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+        client = llm_gateway.async_client("onboarding")
         prompt = (
             f"You are Genie — a deeply personal AI who genuinely cares about the people who talk to you.\n\n"
             f"{user_name} just shared this with you about someone called {person_name}:\n\n"
@@ -476,7 +472,7 @@ async def _reflect_on_story(user_id: str, phone: str, story: str, data: dict) ->
             f"2-4 sentences max. No bullet points. No corporate language. No emojis. "
             f"After your reflection, on a new line, ask: When do you want to hear from me — *Mornings*, *Evenings*, or only *When it matters*?"
         )
-        msg = client.messages.create(
+        msg = await client.messages.create(
             model=settings.claude_model,
             max_tokens=200,
             messages=[{"role": "user", "content": prompt}],
@@ -9,13 +9,27 @@ Action types: notify_ios, send_whatsapp, send_reminder, play_music, start_conver
 
 Deduplication: rule_executions table tracks fired rules with per-type cooldowns.
 Error isolation: one rule failing never affects others.
+
+Each 15-minute cycle is set-based: all active rules are loaded in one query,
+the inputs their triggers need (health summaries, people, calendar events,
+Spotify connections, recent executions) are bulk-fetched once per trigger type
+and grouped by user (RuleCycleInputs), and triggers are evaluated in memory.
+A cycle reads the database O(trigger types) times instead of O(rules). Each
+firing is still recorded the moment its action succeeds, so a user that
+times out or a run that crashes never loses the cooldown for actions already
+sent. evaluate_for_user() keeps the per-rule queries for one-off,
+single-user evaluation.
 """
+import asyncio
 import logging
 import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta, date
 from typing import Optional
 
 import database as db
+from services.job_runner import run_for_users
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +49,50 @@ DAY_MAP = {
 }
 
 
+# Max ids per in_() filter — keeps PostgREST query strings well under URL limits
+_IN_CHUNK = 200
+
+
+def _select_in(table: str, columns: str, column: str, values, **filters) -> list:
+    """
+    rows = SELECT columns FROM table WHERE column IN values (plus eq/gte/lte/gt
+    filters given as e.g. gte__start_time="..."), chunked to keep URLs short.
+    """
+    values = sorted(set(values))
+    rows: list = []
+    for i in range(0, len(values), _IN_CHUNK):
+        query = db.get_db().table(table).select(columns).in_(column, values[i:i + _IN_CHUNK])
+        for key, value in filters.items():
+            op, _, col = key.partition("__")
+            query = getattr(query, op)(col, value)
+        rows.extend(query.execute().data or [])
+    return rows
+
+
+def _parse_ts(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@dataclass
+class RuleCycleInputs:
+    """
+    Everything one rule cycle's triggers read, loaded set-wise and grouped by
+    user. Built by RuleEngine._load_cycle_inputs(); checks read from here
+    instead of querying per rule.
+    """
+    now: datetime
+    health: dict = field(default_factory=dict)          # (user_id, "YYYY-MM-DD") → health_daily_summary row
+    days_logging: dict = field(default_factory=dict)    # user_id → distinct days with food logged
+    people: dict = field(default_factory=dict)          # user_id → people rows
+    calendar: dict = field(default_factory=dict)        # user_id → upcoming calendar_events rows
+    music_connected: set = field(default_factory=set)   # user_ids with a Spotify connection
+    recent_fires: dict = field(default_factory=dict)    # rule_id → [fired_at datetimes]
+    now_playing: dict = field(default_factory=dict)     # user_id → currently-playing payload (memo)
+
+    def health_row(self, user_id: str, day: date) -> dict:
+        return self.health.get((user_id, day.isoformat()), {})
+
+
 class RuleEngine:
     """
     Evaluates all active genie_rules for all users on a 15-minute cycle.
@@ -46,10 +104,6 @@ class RuleEngine:
         Run rule evaluation for every consented user.
         Returns summary stats: {users_checked, rules_fired, errors}
         """
-        users_checked = 0
-        total_fired = 0
-        total_errors = 0
-
         try:
             result = db.get_db().table("users").select("id, phone").eq("whatsapp_consented", True).execute()
             users = result.data or []
@@ -57,18 +111,34 @@ class RuleEngine:
             logger.error(f"RuleEngine: could not load users: {e}")
             return {"users_checked": 0, "rules_fired": 0, "errors": 1}
 
-        for user in users:
-            user_id = user.get("id")
-            phone = user.get("phone", "")
-            if not user_id or not phone:
-                continue
-            users_checked += 1
-            try:
-                fired = await self.evaluate_for_user(user_id, phone)
-                total_fired += len(fired)
-            except Exception as e:
-                logger.error(f"RuleEngine: error evaluating user {user_id}: {e}")
-                total_errors += 1
+        eligible = [u for u in users if u.get("id") and u.get("phone")]
+        users_checked = len(eligible)
+
+        # One query for every active rule, grouped by user
+        try:
+            result = db.get_db().table("genie_rules").select("*").eq("is_active", True).execute()
+        except Exception as e:
+            logger.error(f"RuleEngine: could not load rules: {e}")
+            return {"users_checked": 0, "rules_fired": 0, "errors": 1}
+        eligible_ids = {u["id"] for u in eligible}
+        rules_by_user: dict[str, list] = defaultdict(list)
+        for rule in (result.data or []):
+            if rule.get("user_id") in eligible_ids:
+                rules_by_user[rule["user_id"]].append(rule)
+
+        inputs = self._load_cycle_inputs(rules_by_user)
+
+        with_rules = [u for u in eligible if u["id"] in rules_by_user]
+        run = await run_for_users(
+            "rule_engine",
+            with_rules,
+            lambda u: self._evaluate_rules(u["id"], u["phone"], rules_by_user[u["id"]], inputs),
+        )
+        if run is None:
+            return {"users_checked": 0, "rules_fired": 0, "errors": 0, "skipped": True}
+
+        total_fired = sum(len(rule_ids) for _, rule_ids in run.results)
+        total_errors = run.errors
 
         logger.info(f"RuleEngine: checked {users_checked} users, fired {total_fired} rules, {total_errors} errors")
         return {"users_checked": users_checked, "rules_fired": total_fired, "errors": total_errors}
@@ -94,22 +164,38 @@ class RuleEngine:
             logger.error(f"RuleEngine: could not load rules for user {user_id}: {e}")
             return fired_ids
 
+        return await self._evaluate_rules(user_id, phone, rules)
+
+    async def _evaluate_rules(
+        self, user_id: str, phone: str, rules: list, inputs: Optional[RuleCycleInputs] = None
+    ) -> list:
+        """
+        Check cooldown + trigger for each rule and run the actions of those that
+        fire, recording each execution as soon as its action succeeds (the
+        action has gone out, so the cooldown must hold even if this user's run
+        is cut short). Returns fired rule IDs. With cycle inputs, every check
+        reads from memory instead of the database.
+        """
+        fired_ids = []
+        planned = (inputs,) if inputs is not None else ()   # per-rule queries when not in a cycle
+
         for rule in rules:
             rule_id = rule.get("id")
             try:
                 # Check cooldown before evaluating trigger
-                if self._is_in_cooldown(rule):
+                if self._is_in_cooldown(rule, *planned):
                     continue
 
-                triggered = await self._check_trigger(rule, user_id)
+                triggered = await self._check_trigger(rule, user_id, *planned)
                 if not triggered:
                     continue
 
                 success = await self._execute_action(rule, user_id, phone)
                 if success:
-                    self._record_execution(rule_id, user_id)
-                    self._update_last_fired(rule_id)
                     fired_ids.append(rule_id)
+                    self._record_executions([(user_id, rule_id)])
+                    if inputs is not None:
+                        inputs.recent_fires.setdefault(rule_id, []).append(datetime.now(timezone.utc))
 
             except Exception as e:
                 logger.error(f"RuleEngine: rule {rule_id} failed for user {user_id}: {e}")
@@ -117,7 +203,111 @@ class RuleEngine:
 
         return fired_ids
 
-    async def _check_trigger(self, rule: dict, user_id: str) -> bool:
+    # ── Cycle planner ─────────────────────────────────────────────────────────
+
+    def _load_cycle_inputs(self, rules_by_user: dict) -> RuleCycleInputs:
+        """
+        Bulk-fetch what this cycle's triggers need — one query per input kind,
+        and only for the kinds some rule actually uses. A failed load leaves
+        that input empty (those triggers simply don't fire this cycle).
+        """
+        now = datetime.now(timezone.utc)
+        inputs = RuleCycleInputs(now=now)
+        all_rules = [r for rules in rules_by_user.values() for r in rules]
+        if not all_rules:
+            return inputs
+
+        def users_where(pred) -> set:
+            return {uid for uid, rules in rules_by_user.items() if any(pred(r) for r in rules)}
+
+        def config(rule) -> dict:
+            return rule.get("trigger_config") or {}
+
+        def habit(rule) -> bool:
+            return (
+                (rule.get("trigger_type") == "time" and config(rule).get("condition") == "habit_at_risk")
+                or (rule.get("trigger_type") == "genie_observation" and config(rule).get("observation") == "habit_at_risk")
+            )
+
+        # Recent executions — one window wide enough for the longest cooldown
+        try:
+            cutoff = (now - timedelta(hours=max(COOLDOWN_HOURS.values()))).isoformat()
+            for row in _select_in("rule_executions", "rule_id, fired_at", "rule_id",
+                                  [r["id"] for r in all_rules], gte__fired_at=cutoff):
+                inputs.recent_fires.setdefault(row["rule_id"], []).append(_parse_ts(row["fired_at"]))
+        except Exception as e:
+            logger.warning(f"RuleEngine: could not preload rule_executions: {e}")
+
+        # Health summaries for today / yesterday
+        health_users = users_where(lambda r: r.get("trigger_type") == "health_metric"
+                                   or (r.get("trigger_type") == "time" and config(r).get("condition"))
+                                   or habit(r))
+        if health_users:
+            try:
+                from services.nutrition import _effective_date
+                days = {date.today(), date.today() - timedelta(days=1), _effective_date()}
+                rows = _select_in("health_daily_summary", "*", "user_id", health_users,
+                                  gte__summary_date=min(days).isoformat(),
+                                  lte__summary_date=max(days).isoformat())
+                for row in rows:
+                    inputs.health[(row["user_id"], str(row["summary_date"])[:10])] = row
+            except Exception as e:
+                logger.warning(f"RuleEngine: could not preload health summaries: {e}")
+
+        # Logging streak length for habit_at_risk — counted in SQL (schema_migration_v10j),
+        # one row per user, rather than reading every logged day
+        habit_users = sorted(users_where(habit))
+        if habit_users:
+            try:
+                counts: dict[str, int] = {}
+                for i in range(0, len(habit_users), _IN_CHUNK):
+                    rows = db.get_db().rpc("food_logging_days", {
+                        "p_user_ids": habit_users[i:i + _IN_CHUNK],
+                    }).execute().data or []
+                    counts.update({row["user_id"]: int(row["days"]) for row in rows})
+                inputs.days_logging = {uid: counts.get(uid, 0) for uid in habit_users}
+            except Exception as e:
+                logger.warning(f"RuleEngine: could not preload logging streaks: {e}")
+
+        # People graph for person-silence observations
+        people_users = users_where(lambda r: r.get("trigger_type") == "genie_observation"
+                                   and config(r).get("person_name"))
+        if people_users:
+            try:
+                for row in _select_in("people", "id, owner_user_id, name, last_meaningful_exchange",
+                                      "owner_user_id", people_users):
+                    inputs.people.setdefault(row["owner_user_id"], []).append(row)
+            except Exception as e:
+                logger.warning(f"RuleEngine: could not preload people: {e}")
+
+        # Upcoming calendar events, up to the widest hours_before window
+        calendar_rules = [r for r in all_rules if r.get("trigger_type") == "calendar_event"]
+        if calendar_rules:
+            try:
+                horizon = max(int(config(r).get("hours_before", 1)) for r in calendar_rules)
+                for row in _select_in("calendar_events", "user_id, title, start_time", "user_id",
+                                      {r["user_id"] for r in calendar_rules},
+                                      eq__work_filtered=False,
+                                      gte__start_time=now.isoformat(),
+                                      lte__start_time=(now + timedelta(hours=horizon)).isoformat()):
+                    inputs.calendar.setdefault(row["user_id"], []).append(row)
+            except Exception as e:
+                logger.warning(f"RuleEngine: could not preload calendar events: {e}")
+
+        # Spotify connections — users without one never hit the Spotify API
+        music_users = users_where(lambda r: r.get("trigger_type") == "music_playing")
+        if music_users:
+            try:
+                rows = _select_in("music_connections", "user_id", "user_id", music_users,
+                                  eq__provider="spotify")
+                inputs.music_connected = {row["user_id"] for row in rows}
+            except Exception as e:
+                logger.warning(f"RuleEngine: could not preload music connections: {e}")
+                inputs.music_connected = set(music_users)   # fall back to asking Spotify
+
+        return inputs
+
+    async def _check_trigger(self, rule: dict, user_id: str, inputs: Optional[RuleCycleInputs] = None) -> bool:
         """
         Evaluate whether a rule's trigger condition is currently met.
         Returns True if the rule should fire.
@@ -127,15 +317,15 @@ class RuleEngine:
 
         try:
             if trigger_type == "time":
-                return await self._check_time_trigger(config, user_id)
+                return await self._check_time_trigger(config, user_id, inputs)
             elif trigger_type == "genie_observation":
-                return await self._check_observation_trigger(config, user_id)
+                return await self._check_observation_trigger(config, user_id, inputs)
             elif trigger_type == "health_metric":
-                return await self._check_health_metric_trigger(config, user_id)
+                return await self._check_health_metric_trigger(config, user_id, inputs)
             elif trigger_type == "music_playing":
-                return await self._check_music_trigger(config, user_id)
+                return await self._check_music_trigger(config, user_id, inputs)
             elif trigger_type == "calendar_event":
-                return await self._check_calendar_trigger(config, user_id)
+                return await self._check_calendar_trigger(config, user_id, inputs)
             else:
                 logger.warning(f"RuleEngine: unknown trigger_type '{trigger_type}' for rule {rule.get('id')}")
                 return False
@@ -143,7 +333,7 @@ class RuleEngine:
             logger.error(f"RuleEngine: trigger check failed for rule {rule.get('id')}: {e}")
             return False
 
-    async def _check_time_trigger(self, config: dict, user_id: str) -> bool:
+    async def _check_time_trigger(self, config: dict, user_id: str, inputs: Optional[RuleCycleInputs] = None) -> bool:
         """
         Fire if current UTC hour matches AND (optionally) today is in the days list
         AND (optionally) the extra condition is met.
@@ -167,41 +357,12 @@ class RuleEngine:
         condition = config.get("condition")
         if condition:
             try:
-                today_str = date.today().isoformat()
-                result = (
-                    db.get_db()
-                    .table("health_daily_summary")
-                    .select("total_calories, nudge_sent")
-                    .eq("user_id", user_id)
-                    .eq("summary_date", today_str)
-                    .execute()
-                )
-                row = result.data[0] if result.data else {}
-
                 if condition == "no_food_logged_today":
+                    row = self._health_row(user_id, date.today(), inputs, "total_calories, nudge_sent")
                     return (row.get("total_calories") or 0) == 0
 
                 elif condition == "habit_at_risk":
-                    # days_logging > 3 AND today no food AND yesterday no food
-                    from services.nutrition import get_days_logging, get_daily_summary
-                    days_logging = get_days_logging(user_id)
-                    if days_logging <= 3:
-                        return False
-                    today_summary = get_daily_summary(user_id)
-                    if (today_summary.get("total_calories") or 0) > 0:
-                        return False
-                    from datetime import timedelta
-                    yesterday = (date.today() - timedelta(days=1)).isoformat()
-                    yesterday_result = (
-                        db.get_db()
-                        .table("health_daily_summary")
-                        .select("total_calories")
-                        .eq("user_id", user_id)
-                        .eq("summary_date", yesterday)
-                        .execute()
-                    )
-                    yesterday_row = yesterday_result.data[0] if yesterday_result.data else {}
-                    return (yesterday_row.get("total_calories") or 0) == 0
+                    return self._habit_at_risk(user_id, inputs)
 
             except Exception as e:
                 logger.warning(f"RuleEngine: time condition '{condition}' check failed: {e}")
@@ -209,7 +370,7 @@ class RuleEngine:
 
         return True
 
-    async def _check_observation_trigger(self, config: dict, user_id: str) -> bool:
+    async def _check_observation_trigger(self, config: dict, user_id: str, inputs: Optional[RuleCycleInputs] = None) -> bool:
         """
         person_name + silence_days: check last_meaningful_exchange.
         observation = "habit_at_risk": logging streak at risk.
@@ -220,7 +381,7 @@ class RuleEngine:
 
         if person_name and silence_days:
             try:
-                people = db.get_people_for_user(user_id)
+                people = inputs.people.get(user_id, []) if inputs else db.get_people_for_user(user_id)
                 person = next(
                     (p for p in people if p.get("name", "").lower() == person_name.lower()),
                     None,
@@ -239,31 +400,47 @@ class RuleEngine:
 
         if observation == "habit_at_risk":
             try:
-                from services.nutrition import get_days_logging, get_daily_summary
-                days_logging = get_days_logging(user_id)
-                if days_logging <= 3:
-                    return False
-                today_summary = get_daily_summary(user_id)
-                if (today_summary.get("total_calories") or 0) > 0:
-                    return False
-                yesterday = (date.today() - timedelta(days=1)).isoformat()
-                result = (
-                    db.get_db()
-                    .table("health_daily_summary")
-                    .select("total_calories")
-                    .eq("user_id", user_id)
-                    .eq("summary_date", yesterday)
-                    .execute()
-                )
-                yesterday_row = result.data[0] if result.data else {}
-                return (yesterday_row.get("total_calories") or 0) == 0
+                return self._habit_at_risk(user_id, inputs)
             except Exception as e:
                 logger.warning(f"RuleEngine: habit_at_risk check failed: {e}")
                 return False
 
         return False
 
-    async def _check_health_metric_trigger(self, config: dict, user_id: str) -> bool:
+    def _health_row(self, user_id: str, day: date, inputs: Optional[RuleCycleInputs], columns: str = "*") -> dict:
+        """One health_daily_summary row — from the cycle preload, or queried."""
+        if inputs:
+            return inputs.health_row(user_id, day)
+        result = (
+            db.get_db()
+            .table("health_daily_summary")
+            .select(columns)
+            .eq("user_id", user_id)
+            .eq("summary_date", day.isoformat())
+            .execute()
+        )
+        return result.data[0] if result.data else {}
+
+    def _habit_at_risk(self, user_id: str, inputs: Optional[RuleCycleInputs] = None) -> bool:
+        """days_logging > 3 AND today no food AND yesterday no food."""
+        from services.nutrition import get_days_logging, get_daily_summary, _effective_date
+        if inputs:
+            days_logging = inputs.days_logging.get(user_id, 0)
+            today_summary = inputs.health_row(user_id, _effective_date())
+        else:
+            days_logging = get_days_logging(user_id)
+            today_summary = None
+        if days_logging <= 3:
+            return False
+        if today_summary is None:
+            today_summary = get_daily_summary(user_id)
+        if (today_summary.get("total_calories") or 0) > 0:
+            return False
+        yesterday = date.today() - timedelta(days=1)
+        yesterday_row = self._health_row(user_id, yesterday, inputs, "total_calories")
+        return (yesterday_row.get("total_calories") or 0) == 0
+
+    async def _check_health_metric_trigger(self, config: dict, user_id: str, inputs: Optional[RuleCycleInputs] = None) -> bool:
         """
         Query today's health_daily_summary and evaluate metric condition.
         metric: "calories" | "protein" | "trained"
@@ -278,16 +455,7 @@ class RuleEngine:
             return False
 
         try:
-            today_str = date.today().isoformat()
-            result = (
-                db.get_db()
-                .table("health_daily_summary")
-                .select("*")
-                .eq("user_id", user_id)
-                .eq("summary_date", today_str)
-                .execute()
-            )
-            row = result.data[0] if result.data else {}
+            row = self._health_row(user_id, date.today(), inputs)
 
             if metric == "calories":
                 actual = row.get("total_calories") or 0
@@ -314,16 +482,25 @@ class RuleEngine:
             logger.warning(f"RuleEngine: health metric check failed: {e}")
             return False
 
-    async def _check_music_trigger(self, config: dict, user_id: str) -> bool:
+    async def _check_music_trigger(self, config: dict, user_id: str, inputs: Optional[RuleCycleInputs] = None) -> bool:
         """
         Check Spotify currently playing. Skip gracefully if no Spotify connection.
         mood: loose keyword match against track/artist name
         artist: artist name match
+        In a cycle, Spotify is asked at most once per user, and never for users
+        without a connection.
         """
         try:
-            from services.spotify_client import SpotifyClient
-            client = SpotifyClient(user_id)
-            data = await client.get_currently_playing()
+            if inputs and user_id not in inputs.music_connected:
+                return False
+            if inputs and user_id in inputs.now_playing:
+                data = inputs.now_playing[user_id]
+            else:
+                from services.spotify_client import SpotifyClient
+                client = SpotifyClient(user_id)
+                data = await client.get_currently_playing()
+                if inputs:
+                    inputs.now_playing[user_id] = data
             if not data or not data.get("is_playing") or not data.get("item"):
                 return False
 
@@ -350,7 +527,7 @@ class RuleEngine:
             logger.warning(f"RuleEngine: music trigger check failed (skipping): {e}")
             return False
 
-    async def _check_calendar_trigger(self, config: dict, user_id: str) -> bool:
+    async def _check_calendar_trigger(self, config: dict, user_id: str, inputs: Optional[RuleCycleInputs] = None) -> bool:
         """
         Check calendar_events for events within the next N hours.
         hours_before: int — how many hours ahead to look
@@ -360,19 +537,27 @@ class RuleEngine:
         title_filter = (config.get("title_contains") or "").lower()
 
         try:
-            now = datetime.now(timezone.utc)
-            window_end = now + timedelta(hours=int(hours_before))
-
-            result = (
-                db.get_db()
-                .table("calendar_events")
-                .select("title, start_time")
-                .eq("user_id", user_id)
-                .gte("start_time", now.isoformat())
-                .lte("start_time", window_end.isoformat())
-                .execute()
-            )
-            events = result.data or []
+            if inputs:
+                now = inputs.now
+                window_end = now + timedelta(hours=int(hours_before))
+                events = [
+                    e for e in inputs.calendar.get(user_id, [])
+                    if now <= _parse_ts(e["start_time"]) <= window_end
+                ]
+            else:
+                now = datetime.now(timezone.utc)
+                window_end = now + timedelta(hours=int(hours_before))
+                result = (
+                    db.get_db()
+                    .table("calendar_events")
+                    .select("title, start_time")
+                    .eq("user_id", user_id)
+                    .eq("work_filtered", False)
+                    .gte("start_time", now.isoformat())
+                    .lte("start_time", window_end.isoformat())
+                    .execute()
+                )
+                events = result.data or []
 
             if not events:
                 return False
@@ -474,12 +659,12 @@ class RuleEngine:
             logger.info(f"RuleEngine: conversation with {person_name} too recent, skipping")
             return False
 
-        conv_id = start_conversation(user_id, person_id, "relationship_check", phone)
+        conv_id = await asyncio.to_thread(start_conversation, user_id, person_id, "relationship_check", phone)
         return bool(conv_id)
 
     # ── Deduplication helpers ────────────────────────────────────────────────
 
-    def _is_in_cooldown(self, rule: dict) -> bool:
+    def _is_in_cooldown(self, rule: dict, inputs: Optional[RuleCycleInputs] = None) -> bool:
         """
         Check rule_executions table to see if this rule fired within its cooldown window.
         Returns True if still in cooldown (should NOT fire again).
@@ -487,6 +672,9 @@ class RuleEngine:
         rule_id = rule.get("id")
         trigger_type = rule.get("trigger_type", "time")
         cooldown_hours = COOLDOWN_HOURS.get(trigger_type, 20)
+        if inputs:
+            since = inputs.now - timedelta(hours=cooldown_hours)
+            return any(fired_at >= since for fired_at in inputs.recent_fires.get(rule_id, ()))
         cutoff = (datetime.now(timezone.utc) - timedelta(hours=cooldown_hours)).isoformat()
 
         try:
@@ -503,23 +691,27 @@ class RuleEngine:
             logger.warning(f"RuleEngine: cooldown check failed for rule {rule_id}: {e}")
             return False  # If we can't check, allow it to fire
 
-    def _record_execution(self, rule_id: str, user_id: str) -> None:
-        """Insert a record into rule_executions table after firing."""
+    def _record_executions(self, fired: list) -> None:
+        """
+        Write back (user_id, rule_id) firings: one insert into rule_executions
+        and one last_fired_at update per _IN_CHUNK rules.
+        """
+        if not fired:
+            return
+        now = datetime.now(timezone.utc).isoformat()
         try:
-            db.get_db().table("rule_executions").insert({
-                "id": str(uuid.uuid4()),
-                "rule_id": rule_id,
-                "user_id": user_id,
-                "fired_at": datetime.now(timezone.utc).isoformat(),
-            }).execute()
+            db.get_db().table("rule_executions").insert([
+                {"id": str(uuid.uuid4()), "rule_id": rule_id, "user_id": user_id, "fired_at": now}
+                for user_id, rule_id in fired
+            ]).execute()
         except Exception as e:
-            logger.error(f"RuleEngine: could not record execution for rule {rule_id}: {e}")
+            logger.error(f"RuleEngine: could not record {len(fired)} rule executions: {e}")
 
-    def _update_last_fired(self, rule_id: str) -> None:
-        """Update last_fired_at on the genie_rules record."""
-        try:
-            db.get_db().table("genie_rules").update({
-                "last_fired_at": datetime.now(timezone.utc).isoformat(),
-            }).eq("id", rule_id).execute()
-        except Exception as e:
-            logger.warning(f"RuleEngine: could not update last_fired_at for rule {rule_id}: {e}")
+        rule_ids = sorted({rule_id for _, rule_id in fired})
+        for i in range(0, len(rule_ids), _IN_CHUNK):
+            try:
+                db.get_db().table("genie_rules").update({
+                    "last_fired_at": now,
+                }).in_("id", rule_ids[i:i + _IN_CHUNK]).execute()
+            except Exception as e:
+                logger.warning(f"RuleEngine: could not update last_fired_at for {len(rule_ids)} rules: {e}")
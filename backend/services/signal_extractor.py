@@ -17,6 +17,20 @@ Pipeline:
   5. Cross-user routing: if the mentioned person is a Genie user, queue signal
      for their World Model update (respecting permission level)
 
+Stored messages are not extracted inline. submit_signals() groups rows of
+the messages table into batches of up to signal_batch_size messages from the
+same user and conversation and enqueues each batch's message ids on the
+durable "signals" job queue (services/job_queue.py); the job loads the text
+itself, so no message text is written to the queue. A batch costs one
+Claude prompt, one dedup query on source_message_hash, one people lookup and
+one bulk insert. Live chat is enqueued at high priority and imports at
+backfill priority, so imports can never occupy every signals worker, and
+once signal_max_queue backfill batches are waiting, new ones are dropped and
+counted rather than queued without limit. A batch whose Claude call fails
+goes back on the queue for a later attempt and its messages are counted as
+deferred. Text that is never stored (iMessage imports, in-app chat) goes
+through extract_signals() instead, in process.
+
 Privacy guarantees (never violated):
   - Raw message text is never stored in third_party_signals
   - signal_abstract contains NO verbatim quotes, NO names, NO identifying details
@@ -24,16 +38,18 @@ Privacy guarantees (never violated):
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import logging
 import re
+import threading
 from datetime import datetime, timezone, timedelta
-from typing import Optional
-
-import anthropic
+from typing import Iterable, Optional
 
 from config import get_settings
+from core import person_index
+from services import job_queue, llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -55,18 +71,81 @@ MIN_MESSAGE_LENGTH = 30
 # Signal decay: 90 days by default
 SIGNAL_TTL_DAYS = 90
 
+# Lanes — live chat is extracted ahead of imports and the batch job
+CONVERSATION = "conversation"
+BULK = "bulk"
+_LANE_PRIORITY = {CONVERSATION: job_queue.PRIORITY_HIGH, BULK: job_queue.PRIORITY_BACKFILL}
+
+# Per-message cap on extraction output, scaled by batch size
+_TOKENS_PER_MESSAGE = 800
+_MAX_BATCH_TOKENS = 8000
+
+
+def message_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _text(message: dict) -> str:
+    return (message.get("body") or message.get("text") or "").strip()
+
 
 class SignalExtractor:
     """
     Runs on every processed message. Extracts third-party signals.
     Instantiated once per process (singleton via module-level instance).
+
+    submit() only enqueues; the "signals" job queue workers call
+    process_batch().
     """
 
-    def __init__(self):
+    def __init__(self, batch_size: Optional[int] = None):
         self._settings = get_settings()
-        self._client = anthropic.Anthropic(api_key=self._settings.anthropic_api_key)
-
-    # ── Main entry point ──────────────────────────────────────────────────────
+        self._client = llm_gateway.client("signal_extractor")
+        self.batch_size = max(1, batch_size or self._settings.signal_batch_size)
+        self._lock = threading.Lock()
+
+        # Metrics — served on GET /signals/stats
+        self.submitted = 0
+        self.filtered = 0            # failed the length / name pre-filter
+        self.dropped = 0             # backfill backlog full, or failed outside the queue
+        self.deferred = 0            # handed back to the queue for a later retry
+        self.duplicates = 0          # messages already extracted (skipped before Claude)
+        self.batches = 0
+        self.signals_stored = 0
+        self.failures = 0
+
+    # ── Main entry points ─────────────────────────────────────────────────────
+
+    def submit(
+        self,
+        source_user_id: str,
+        messages: Iterable[dict],
+        participants: list[str],
+        lane: str = BULK,
+    ) -> int:
+        """
+        Enqueue stored messages (rows of the messages table) for extraction,
+        batch_size per job. Only their ids are queued. Returns how many were
+        queued — messages that fail the pre-filter or are dropped by a full
+        backlog are counted, not queued. Never blocks on Claude.
+        """
+        keep = [m["id"] for m in messages if self._worth_extracting(_text(m))]
+        queued = 0
+        for i in range(0, len(keep), self.batch_size):
+            batch = keep[i:i + self.batch_size]
+            job_id = job_queue.enqueue(
+                "signals.extract",
+                priority=_LANE_PRIORITY[lane],
+                source_user_id=source_user_id,
+                participants=list(participants or []),
+                message_ids=batch,
+            )
+            if job_id is not None:
+                queued += len(batch)
+        with self._lock:
+            self.submitted += len(keep)
+            self.dropped += len(keep) - queued
+        return queued
 
     async def extract_and_store(
         self,
@@ -75,115 +154,140 @@ class SignalExtractor:
         participants: list[str],  # names of direct conversation participants (exclude from extraction)
     ) -> int:
         """
-        Extract third-party signals from a message and store them.
-        Returns the number of signals stored.
+        Extract third-party signals from a message and store them, bypassing
+        the queue. Returns the number of signals stored.
 
         participants: list of person names who ARE in the conversation
         (we don't extract signals about them from this message — only about
         people who are *mentioned* but not present)
         """
-        if not message_text or len(message_text.strip()) < MIN_MESSAGE_LENGTH:
+        if not message_text or not self._worth_extracting(message_text.strip()):
             return 0
-
-        # Quick pre-filter: any capitalized names that suggest people mentions?
-        if not self._has_person_mentions(message_text):
+        try:
+            return await asyncio.to_thread(
+                self.process_batch, source_user_id, participants, [message_text.strip()]
+            )
+        except Exception:
             return 0
 
+    def process_batch(self, source_user_id: str, participants: list[str], texts: list[str]) -> int:
+        """
+        Extract and store signals for several messages from one conversation.
+        One dedup query, one Claude call, one people lookup, one bulk insert.
+        Returns the number of signals stored; raises if Claude fails.
+        """
+        from database import get_db
+        db = get_db()
+
+        by_hash = {message_hash(t): t for t in texts}
         try:
-            raw_signals = await self._extract_with_claude(message_text, participants)
+            existing = (
+                db.table("third_party_signals")
+                .select("source_message_hash, signal_type")
+                .eq("source_user_id", source_user_id)
+                .in_("source_message_hash", list(by_hash))
+                .execute()
+            ).data or []
         except Exception as exc:
-            logger.warning("Signal extraction Claude call failed: %s", exc)
+            logger.warning("Signal dedup lookup failed: %s", exc)
+            existing = []
+        seen = {(r.get("source_message_hash"), r.get("signal_type")) for r in existing}
+
+        # Messages that already produced signals were extracted on an earlier pass
+        extracted = {h for h, _ in seen}
+        pending = [(h, t) for h, t in by_hash.items() if h not in extracted]
+        with self._lock:
+            self.batches += 1
+            self.duplicates += len(texts) - len(pending)
+        if not pending:
             return 0
 
+        try:
+            raw_signals = self._extract_with_claude([t for _, t in pending], participants)
+        except Exception as exc:
+            logger.warning("Signal extraction Claude call failed: %s", exc)
+            with self._lock:
+                self.failures += 1
+            raise  # the job queue retries the batch
         if not raw_signals:
             return 0
 
-        stored = 0
-        from db import get_db
-        db = get_db()
-
-        for signal in raw_signals:
-            person_name = signal.get("person_name", "").strip()
-            if not person_name:
-                continue
-
-            # Resolve person to a DB record
-            person_id, phone_hash = self._resolve_person(
-                db, source_user_id, person_name
-            )
+        people = self._resolve_people(
+            source_user_id, {(s.get("person_name") or "").strip() for s, _ in raw_signals}
+        )
 
+        expires_at = (datetime.now(timezone.utc) + timedelta(days=SIGNAL_TTL_DAYS)).isoformat()
+        rows = []
+        for signal, index in raw_signals:
+            person_name = (signal.get("person_name") or "").strip()
+            person_id, phone_hash = people.get(person_name, (None, None))
             if not person_id and not phone_hash:
                 continue  # Can't anchor the signal — skip
 
-            # Build message hash for dedup
-            msg_hash = hashlib.sha256(message_text.encode()).hexdigest()[:16]
-
-            # Check for duplicate (same source, same person, same message)
-            existing = (
-                db.table("third_party_signals")
-                .select("id")
-                .eq("source_user_id", source_user_id)
-                .eq("source_message_hash", msg_hash)
-                .eq("signal_type", signal.get("signal_type", ""))
-                .execute()
-            )
-            if existing.data:
+            msg_hash = pending[index][0]
+            signal_type = signal.get("signal_type", "factual_update")
+            if (msg_hash, signal_type) in seen:
                 continue
+            seen.add((msg_hash, signal_type))
 
-            expires_at = (
-                datetime.now(timezone.utc) + timedelta(days=SIGNAL_TTL_DAYS)
-            ).isoformat()
-
-            row = {
+            rows.append({
                 "source_user_id": source_user_id,
                 "about_person_id": person_id,
                 "about_phone_hash": phone_hash,
-                "signal_type": signal.get("signal_type", "factual_update"),
+                "signal_type": signal_type,
                 "signal_abstract": signal.get("signal_abstract", ""),
                 "signal_valence": signal.get("valence", 0.0),
                 "signal_intensity": signal.get("intensity", 0.5),
                 "confidence": signal.get("confidence", 0.7),
                 "expires_at": expires_at,
                 "source_message_hash": msg_hash,
+            })
+
+        stored = self._insert(db, rows)
+        # If a mentioned person is already a Genie user, their World Model should refresh
+        self._notify_beneficiaries(db, {r["about_phone_hash"] for r in stored if r["about_phone_hash"]})
+        with self._lock:
+            self.signals_stored += len(stored)
+        return len(stored)
+
+    def stats(self) -> dict:
+        """Extraction counters for GET /signals/stats (queue depth lives in the job queue)."""
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "filtered": self.filtered,
+                "dropped": self.dropped,
+                "deferred": self.deferred,
+                "duplicates": self.duplicates,
+                "batches": self.batches,
+                "signals_stored": self.signals_stored,
+                "failures": self.failures,
             }
 
-            try:
-                db.table("third_party_signals").insert(row).execute()
-                stored += 1
-
-                # If the mentioned person is already a Genie user, notify their
-                # World Model to refresh (fire-and-forget)
-                if phone_hash:
-                    await self._notify_beneficiary_if_user(db, phone_hash)
-
-            except Exception as exc:
-                logger.warning("Could not store signal for %s: %s", person_name, exc)
-
-        return stored
-
     # ── Claude extraction ─────────────────────────────────────────────────────
 
-    async def _extract_with_claude(
-        self, message_text: str, participants: list[str]
-    ) -> list[dict]:
+    def _extract_with_claude(self, texts: list[str], participants: list[str]) -> list[tuple[dict, int]]:
         """
-        Ask Claude to identify all third-party person mentions and extract signals.
-        Returns a list of signal dicts.
+        Ask Claude to identify all third-party person mentions and extract
+        signals from a batch of messages. Returns (signal, message index) pairs.
         """
-        participants_str = ", ".join(participants) if participants else "the direct participants"
+        participants_str = ", ".join(p for p in participants if p) or "the direct participants"
         signal_types_str = "\n".join(f"  - {k}: {v}" for k, v in SIGNAL_TYPES.items())
+        messages_str = "\n\n".join(
+            f"Message {i}:\n\"\"\"{text[:800]}\"\"\"" for i, text in enumerate(texts, 1)
+        )
 
-        prompt = f"""You are extracting relationship signals from a private message.
+        prompt = f"""You are extracting relationship signals from private messages.
 
 Participants in this conversation: {participants_str}
 IGNORE signals ABOUT the participants themselves.
 ONLY extract signals about THIRD PARTIES — people mentioned but not present.
 
-Message:
-\"\"\"{message_text[:800]}\"\"\"
+{messages_str}
 
 For each third party mentioned, extract signals using this schema:
 {{
+  "message": the number of the message the signal comes from,
   "person_name": "first name or first+last if clear",
   "signal_type": one of the types below,
   "signal_abstract": "1-2 sentence abstract — NO verbatim quotes, NO identifying details, NO names. Describe the emotional/factual signal in generic terms.",
@@ -206,7 +310,7 @@ Return ONLY the JSON array, nothing else."""
 
         msg = self._client.messages.create(
             model=self._settings.claude_model,
-            max_tokens=800,
+            max_tokens=min(_MAX_BATCH_TOKENS, _TOKENS_PER_MESSAGE * len(texts)),
             messages=[{"role": "user", "content": prompt}],
         )
         raw = msg.content[0].text.strip()
@@ -217,62 +321,103 @@ Return ONLY the JSON array, nothing else."""
 
         try:
             signals = json.loads(raw)
-            return signals if isinstance(signals, list) else []
         except json.JSONDecodeError:
             logger.warning("Signal extractor: could not parse Claude response: %s", raw[:100])
             return []
+        if not isinstance(signals, list):
+            return []
+
+        result = []
+        for signal in signals:
+            if not isinstance(signal, dict):
+                continue
+            try:
+                index = int(signal.get("message", 1 if len(texts) == 1 else 0)) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < len(texts):
+                result.append((signal, index))
+        return result
 
     # ── Person resolution ─────────────────────────────────────────────────────
 
-    def _resolve_person(
-        self, db, source_user_id: str, person_name: str
-    ) -> tuple[Optional[str], Optional[str]]:
+    def _resolve_people(
+        self, source_user_id: str, person_names: set[str]
+    ) -> dict[str, tuple[Optional[str], Optional[str]]]:
         """
-        Try to match person_name to a record in the source user's people graph.
-        Returns (person_id, phone_hash) — either can be None.
+        Match each name to a record in the source user's people graph through
+        the shared PersonIndex. Returns name → (person_id, phone_hash);
+        unmatched names are absent.
         """
+        names = [n for n in person_names if n]
+        if not names:
+            return {}
         try:
-            # Exact name match first
-            result = (
-                db.table("people")
-                .select("id, phone_hash")
-                .eq("user_id", source_user_id)
-                .ilike("name", f"%{person_name}%")
-                .limit(1)
-                .execute()
-            )
-            if result.data:
-                row = result.data[0]
-                return row.get("id"), row.get("phone_hash")
+            index = person_index.get_index(source_user_id)
         except Exception as exc:
-            logger.warning("Person resolution failed for %r: %s", person_name, exc)
+            logger.warning("Person resolution failed for %s: %s", source_user_id, exc)
+            return {}
 
-        return None, None
+        resolved = {}
+        for name in names:
+            match = index.match_name(name)
+            if match:
+                resolved[name] = (match.get("id"), match.get("phone_hash"))
+        return resolved
+
+    # ── Storage ───────────────────────────────────────────────────────────────
+
+    def _insert(self, db, rows: list[dict]) -> list[dict]:
+        """Bulk insert; if the batch is rejected, fall back to row by row so one bad row costs only itself."""
+        if not rows:
+            return []
+        try:
+            db.table("third_party_signals").insert(rows).execute()
+            return rows
+        except Exception as exc:
+            logger.warning("Bulk signal insert failed, retrying row by row: %s", exc)
+        stored = []
+        for row in rows:
+            try:
+                db.table("third_party_signals").insert(row).execute()
+                stored.append(row)
+            except Exception as exc:
+                logger.warning("Could not store %s signal: %s", row["signal_type"], exc)
+        return stored
 
     # ── Cross-user notification ───────────────────────────────────────────────
 
-    async def _notify_beneficiary_if_user(self, db, phone_hash: str) -> None:
+    def _notify_beneficiaries(self, db, phone_hashes: set[str]) -> None:
         """
-        If the mentioned person is a Genie user, mark their World Model as stale
+        If any mentioned person is a Genie user, mark their World Model as stale
         so it refreshes on next interaction.
         """
+        if not phone_hashes:
+            return
         try:
             result = (
                 db.table("users")
                 .select("id")
-                .eq("phone_hash", phone_hash)
+                .in_("phone_hash", list(phone_hashes))
                 .execute()
             )
-            if result.data:
-                beneficiary_user_id = result.data[0]["id"]
+            user_ids = [r["id"] for r in result.data or []]
+            if user_ids:
                 db.table("world_model").update(
                     {"is_stale": True}
-                ).eq("user_id", beneficiary_user_id).execute()
+                ).in_("user_id", user_ids).execute()
         except Exception:
             pass  # Non-blocking
 
     # ── Pre-filter ────────────────────────────────────────────────────────────
 
+    def _worth_extracting(self, text: str) -> bool:
+        if len(text) >= MIN_MESSAGE_LENGTH and self._has_person_mentions(text):
+            return True
+        with self._lock:
+            self.filtered += 1
+        return False
+
     def _has_person_mentions(self, text: str) -> bool:
         """
         Quick heuristic: does the message likely mention a person by name?
@@ -291,26 +436,97 @@ Return ONLY the JSON array, nothing else."""
 # ── Module-level singleton ────────────────────────────────────────────────────
 
 _extractor: SignalExtractor | None = None
+_extractor_lock = threading.Lock()
 
 
 def get_extractor() -> SignalExtractor:
     global _extractor
     if _extractor is None:
-        _extractor = SignalExtractor()
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = SignalExtractor()
     return _extractor
 
 
+def submit_signals(
+    source_user_id: str,
+    messages: Iterable[dict],
+    participants: list[str] | None = None,
+    lane: str = BULK,
+) -> int:
+    """
+    Queue stored messages (dicts with id and body) for third-party signal
+    extraction. Safe from any thread or loop; returns immediately. Use
+    lane=CONVERSATION for live chat.
+    """
+    return get_extractor().submit(source_user_id, messages, participants or [], lane)
+
+
+def _load_texts(source_user_id: str, message_ids: list[str]) -> list[str]:
+    """The source user's messages by id, in the order given; deleted ones are skipped."""
+    from database import get_message_bodies
+    bodies = get_message_bodies(source_user_id, message_ids)
+    return [bodies[i].strip() for i in message_ids if (bodies.get(i) or "").strip()]
+
+
+@job_queue.handler("signals.extract", queue="signals")
+def _extract_job(source_user_id: str, participants: list[str], message_ids: Optional[list[str]] = None,
+                 texts: Optional[list[str]] = None) -> int:
+    # texts: only in jobs queued before payloads carried message ids
+    texts = (texts or []) + (_load_texts(source_user_id, message_ids) if message_ids else [])
+    if not texts:
+        return 0
+    extractor = get_extractor()
+    try:
+        return extractor.process_batch(source_user_id, participants, texts)
+    except Exception:
+        with extractor._lock:
+            extractor.deferred += len(texts)
+        raise  # the job queue runs the batch again after its backoff
+
+
+async def extract_signals(
+    source_user_id: str,
+    texts: Iterable[str],
+    participants: list[str] | None = None,
+) -> int:
+    """
+    Extract and store signals for text that is never saved to the messages
+    table (iMessage imports, in-app chat), batch_size messages per Claude
+    call, bypassing the queue so the text is never written anywhere.
+    Returns the number of signals stored; failures are logged, not raised.
+    """
+    extractor = get_extractor()
+    keep = [t for t in (t.strip() for t in texts if t) if extractor._worth_extracting(t)]
+    stored = 0
+    for i in range(0, len(keep), extractor.batch_size):
+        try:
+            stored += await asyncio.to_thread(
+                extractor.process_batch, source_user_id, participants or [], keep[i:i + extractor.batch_size]
+            )
+        except Exception as exc:
+            logger.warning("Signal extraction failed for %s: %s", source_user_id, exc)
+            with extractor._lock:
+                extractor.dropped += len(keep[i:i + extractor.batch_size])  # nothing to retry from
+    return stored
+
+
 async def extract_signals_from_message(
     source_user_id: str,
     message_text: str,
     participants: list[str] | None = None,
 ) -> int:
     """
-    Module-level convenience function. Wire this into the message processing
-    pipeline after primary handling. Fire-and-forget safe.
+    Extract and store signals for one message right away, bypassing the queue.
+    Returns the number of signals stored.
     """
     return await get_extractor().extract_and_store(
         source_user_id=source_user_id,
         message_text=message_text,
         participants=participants or [],
     )
+
+
+def stats() -> dict:
+    """Extractor counters, or {} if nothing has been submitted yet."""
+    return _extractor.stats() if _extractor is not None else {}
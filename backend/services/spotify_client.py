@@ -113,7 +113,7 @@ class SpotifyClient:
 
     async def _load_tokens_from_db(self) -> None:
         try:
-            from db import get_db
+            from database import get_db
             db = get_db()
             row = (
                 db.table("music_connections")
@@ -157,7 +157,7 @@ class SpotifyClient:
 
     async def _save_tokens_to_db(self) -> None:
         try:
-            from db import get_db
+            from database import get_db
             db = get_db()
             db.table("music_connections").upsert({
                 "user_id": self.user_id,
@@ -23,14 +23,15 @@ import requests
 from datetime import date, datetime, timezone
 from typing import Optional
 
-from anthropic import Anthropic
 from config import get_settings
+from services import llm_gateway
 from services.transcription import transcribe_audio
 import database as db
+from core.world_model import invalidate_world_model
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
-_anthropic = Anthropic(api_key=settings.anthropic_api_key)
+_anthropic = llm_gateway.client("training")
 
 # Confidence below this threshold → ask user to confirm the exercise data
 LOW_CONFIDENCE_THRESHOLD = 0.5
@@ -395,6 +396,7 @@ def store_session(
             "training_session_id": session_id,
         }).execute()
 
+    invalidate_world_model(user_id, "training_sessions")
     return session_row
 
 
@@ -11,12 +11,16 @@ Covers:
 - Intimacy trend detection
 - Callback/inside-reference scoring
 - update_person_dna cache logic
+- Columnar (NumPy) metrics against golden values from the per-message code
+- DNAStats running totals and incremental update_person_dna
+- Callback words stored only as keyed hashes, inside the 90-day window
 
 All tests are pure-unit: no Supabase calls, no Anthropic calls.
 External dependencies mocked via unittest.mock.
 """
 import asyncio
 import json
+import random
 from datetime import datetime, timezone, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
@@ -27,11 +31,19 @@ _MOCK_SETTINGS.claude_model = "claude-sonnet-4-5"
 _MOCK_SETTINGS.anthropic_api_key = "test-key"
 _MOCK_SETTINGS.supabase_url = "https://test.supabase.co"
 _MOCK_SETTINGS.supabase_key = "test-key"
+_MOCK_SETTINGS.jwt_secret = "test-secret"
 
 with patch("config.get_settings", return_value=_MOCK_SETTINGS):
     with patch("database.get_db", return_value=MagicMock()):
         with patch("policy_engine.guard.check", return_value=None):
-            from services.communication_dna import CommunicationDNA, _count_emojis
+            from services.communication_dna import CommunicationDNA, DNAStats, MessageColumns, _count_emojis
+
+
+@pytest.fixture(autouse=True)
+def _settings():
+    """Stored callback words are hashed with a key from settings."""
+    with patch("config.get_settings", return_value=_MOCK_SETTINGS):
+        yield
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -276,3 +288,327 @@ class TestIntimacyTrend:
         msgs = [_msg("hello there how are you doing today", True, i) for i in range(20)]
         trend = dna._compute_intimacy_trend(msgs)
         assert trend == "stable"
+
+
+# ── Test: columnar metrics match the per-message implementation ────────────────
+
+# Synthetic threads: mixed UTC/offset timestamps, a few missing or unparsable
+# ones, None texts, emoji runs and a length shift between the two halves.
+_WORDS = ["hey", "babe", "lol", "omg", "dinner", "tonight", "remember", "pickles", "yesterday",
+          "meeting", "running", "late", "haha", "tbh", "sounds", "great", "mountain", "weekend",
+          "grandma's", "birthday", "okay", "nope", "coffee", "later", "really", "wonderful"]
+_EMOJI = ["😂", "🔥", "❤", "🙏🏼", "✨", "🚀"]
+_OFFSETS = ["Z", "+00:00", "-07:00", "+05:30"]
+_GAPS = [30, 300, 1800, 4 * 3600, 20 * 3600, 5 * 86400]
+
+
+def _thread(n, seed):
+    rng = random.Random(seed)
+    vocab = _WORDS[:rng.randint(6, len(_WORDS))]
+    caps = (rng.randint(2, 30), rng.randint(2, 30))
+    t = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    messages = []
+    for i in range(n):
+        t += timedelta(seconds=rng.choice(_GAPS) * rng.random())
+        words = [rng.choice(vocab) for _ in range(rng.randint(0, caps[i >= n // 2]))]
+        if rng.random() < 0.2:
+            words.append(rng.choice(_EMOJI) * rng.randint(1, 3))
+        offset = rng.choice(_OFFSETS)
+        local = t
+        if offset[0] in "+-" and offset != "+00:00":
+            shift = timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+            local = t + shift if offset[0] == "+" else t - shift
+        msg = {
+            "text": " ".join(words) if words or rng.random() < 0.5 else None,
+            "is_from_me": rng.random() < 0.45,
+            "timestamp": local.strftime("%Y-%m-%dT%H:%M:%S.%f") + offset,
+        }
+        roll = rng.random()
+        if roll < 0.01:
+            del msg["timestamp"]
+        elif roll < 0.02:
+            msg["timestamp"] = "not a timestamp"
+        messages.append(msg)
+    return messages
+
+
+# Captured from the per-message (pre-NumPy) implementation for each (size, seed).
+GOLDEN_METRICS = [
+    ((12, 1), {
+        "linguistic_intimacy": 0.42700000000000005,
+        "avg_response_time": 10.309663204722222,
+        "initiates_ratio": 0.6,
+        "avg_message_length": 13.5,
+        "emoji_frequency": 0.16666666666666666,
+        "peak_hours": [13, 17, 0],
+        "silence_pattern": "typical gap 2-3 days",
+        "intimacy_trend": "stable",
+        "callbacks": 0.0,
+    }),
+    ((60, 2), {
+        "linguistic_intimacy": 0.5046666666666667,
+        "avg_response_time": 5.60446895988889,
+        "initiates_ratio": 0.34782608695652173,
+        "avg_message_length": 2.3333333333333335,
+        "emoji_frequency": 0.18333333333333332,
+        "peak_hours": [9, 3, 23],
+        "silence_pattern": "typical gap 2-4 days",
+        "intimacy_trend": "stable",
+        "callbacks": 0.2,
+    }),
+    ((400, 3), {
+        "linguistic_intimacy": 0.42008,
+        "avg_response_time": 5.750869546546934,
+        "initiates_ratio": 0.44025157232704404,
+        "avg_message_length": 10.04,
+        "emoji_frequency": 0.185,
+        "peak_hours": [12, 20, 15],
+        "silence_pattern": "typical gap 2-5 days",
+        "intimacy_trend": "stable",
+        "callbacks": 0.0,
+    }),
+    ((400, 7), {
+        "linguistic_intimacy": 0.61042,
+        "avg_response_time": 5.281669912830765,
+        "initiates_ratio": 0.48,
+        "avg_message_length": 5.21,
+        "emoji_frequency": 0.2125,
+        "peak_hours": [19, 5, 8],
+        "silence_pattern": "typical gap 2-7 days",
+        "intimacy_trend": "stable",
+        "callbacks": 0.2,
+    }),
+    ((400, 5), {
+        "linguistic_intimacy": 0.61758,
+        "avg_response_time": 5.501392765773927,
+        "initiates_ratio": 0.4276315789473684,
+        "avg_message_length": 8.79,
+        "emoji_frequency": 0.1975,
+        "peak_hours": [18, 10, 13],
+        "silence_pattern": "typical gap 2-5 days",
+        "intimacy_trend": "increasing",
+        "callbacks": 0.2,
+    }),
+    ((2000, 4), {
+        "linguistic_intimacy": 0.6084800000000001,
+        "avg_response_time": 5.3772892457513635,
+        "initiates_ratio": 0.43243243243243246,
+        "avg_message_length": 4.24,
+        "emoji_frequency": 0.189,
+        "peak_hours": [19, 13, 12],
+        "silence_pattern": "typical gap 2-6 days",
+        "intimacy_trend": "stable",
+        "callbacks": 0.2,
+    }),
+    ((2000, 11), {
+        "linguistic_intimacy": 0.42435500000000004,
+        "avg_response_time": 6.013153236492206,
+        "initiates_ratio": 0.46749654218533887,
+        "avg_message_length": 12.1775,
+        "emoji_frequency": 0.197,
+        "peak_hours": [9, 20, 18],
+        "silence_pattern": "typical gap 2-8 days",
+        "intimacy_trend": "declining",
+        "callbacks": 0.0,
+    }),
+]
+
+
+def _metrics(dna, messages) -> dict:
+    return {
+        "linguistic_intimacy": run(dna.compute_linguistic_intimacy(messages)),
+        "avg_response_time": dna._compute_avg_response_time(messages),
+        "initiates_ratio": dna._compute_initiates_ratio(messages),
+        "avg_message_length": dna._compute_avg_message_length(messages),
+        "emoji_frequency": dna._compute_emoji_frequency(messages),
+        "peak_hours": dna._compute_peak_hours(messages),
+        "silence_pattern": dna._compute_silence_pattern(messages),
+        "intimacy_trend": dna._compute_intimacy_trend(messages),
+        "callbacks": dna._score_callbacks(messages),
+    }
+
+
+class TestColumnarGolden:
+    @pytest.mark.parametrize("key,expected", GOLDEN_METRICS, ids=[f"{n}-seed{s}" for (n, s), _ in GOLDEN_METRICS])
+    def test_metrics_match_golden(self, key, expected):
+        dna = CommunicationDNA()
+        for source in (_thread(*key), MessageColumns.from_messages(_thread(*key))):
+            actual = _metrics(dna, source)
+            for name, value in expected.items():
+                if isinstance(value, float):
+                    # NumPy sums pairwise; only the last bit may differ
+                    assert actual[name] == pytest.approx(value, rel=1e-12), name
+                else:
+                    assert actual[name] == value, name
+
+    @pytest.mark.parametrize("key,expected", GOLDEN_METRICS, ids=[f"{n}-seed{s}" for (n, s), _ in GOLDEN_METRICS])
+    def test_profile_matches_golden(self, key, expected):
+        dna = CommunicationDNA()
+        with patch.object(dna, "_analyze_with_claude", new=AsyncMock(return_value=("warm", [], "stable"))):
+            with patch.object(dna, "_save_profile", new=AsyncMock()):
+                profile = run(dna.analyze_relationship("u", "p", _thread(*key)))
+        assert profile["linguistic_intimacy"] == round(expected["linguistic_intimacy"], 2)
+        assert profile["avg_response_time_hours"] == round(expected["avg_response_time"], 1)
+        assert profile["initiates_ratio"] == round(expected["initiates_ratio"], 2)
+        assert profile["message_length_avg"] == round(expected["avg_message_length"], 0)
+        assert profile["emoji_frequency"] == round(expected["emoji_frequency"], 2)
+        assert profile["peak_communication_hours"] == expected["peak_hours"]
+        assert profile["silence_patterns"] == expected["silence_pattern"]
+        assert profile["intimacy_trend"] == expected["intimacy_trend"]
+
+    def test_peak_hour_ties_keep_first_seen_order(self):
+        dna = CommunicationDNA()
+        msgs = [_msg("hi", True, h) for h in (5, 3, 5, 3, 9, 1, 1)]
+        # 17:00, 15:00 and 13:00 UTC each appear twice; 21:00 once
+        assert dna._compute_peak_hours(msgs) == [17, 15, 13]
+
+    def test_missing_sender_counts_as_a_switch(self):
+        dna = CommunicationDNA()
+        msgs = [_msg("hi", True, 0), {"text": "yo", "timestamp": _ts(2)}]
+        assert dna._compute_avg_response_time(msgs) == pytest.approx(2.0)
+
+    def test_none_timestamp_is_skipped(self):
+        dna = CommunicationDNA()
+        msgs = [{"text": "yo", "is_from_me": False, "timestamp": None}, _msg("hi", True, 0), _msg("hey", False, 1)]
+        assert dna._compute_avg_response_time(msgs) == pytest.approx(1.0)
+        assert dna._compute_peak_hours(msgs) == [12, 13]
+
+
+
+# ── Test: incremental DNA (running totals) ────────────────────────────────────
+
+def _utc_thread(n: int, seed: int) -> list[dict]:
+    """Chronological UTC thread, so timestamp-string order is arrival order."""
+    rng = random.Random(seed)
+    offset, messages = 0.0, []
+    for _ in range(n):
+        offset += rng.choice([0.05, 0.5, 2.0, 5.0, 30.0]) * rng.random()
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 20)))
+        messages.append(_msg(words + (" 😂" if rng.random() < 0.2 else ""), rng.random() < 0.5, offset))
+    return messages
+
+
+def _folded(messages: list[dict], batch: int) -> DNAStats:
+    stats = DNAStats()
+    for i in range(0, len(messages), batch):
+        stats.fold(MessageColumns.from_messages(messages[i:i + batch]))
+    return stats
+
+
+class TestDNAStats:
+    @pytest.mark.parametrize("batch", [1, 7, 50, 1000])
+    def test_batches_match_a_full_pass(self, batch):
+        dna = CommunicationDNA()
+        messages = _utc_thread(600, seed=batch)
+        expected = _metrics(dna, messages)
+        actual = _folded(messages, batch).metrics()
+        for name in ("linguistic_intimacy", "avg_response_time", "initiates_ratio",
+                     "avg_message_length", "emoji_frequency"):
+            assert actual[name] == pytest.approx(expected[name], rel=1e-9), name
+        for name in ("peak_hours", "silence_pattern", "intimacy_trend"):
+            assert actual[name] == expected[name], name
+
+    def test_round_trips_through_json(self):
+        stats = _folded(_utc_thread(200, seed=1), 30)
+        restored = DNAStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+        assert restored == stats
+        restored.fold(MessageColumns.from_messages(_utc_thread(5, seed=2)))
+        assert restored.message_count == 205
+
+    def test_missing_stats_is_none(self):
+        assert DNAStats.from_dict(None) is None
+        assert DNAStats.from_dict({}) is None
+
+    def test_callback_words_stored_as_keyed_hashes(self):
+        messages = [_msg("remember pineapple pizza disaster", i % 2 == 0, i) for i in range(10)]
+        stats = _folded(messages, 5)
+        stored = json.dumps(stats.to_dict())
+        for word in ("remember", "pineapple", "disaster"):
+            assert word not in stored
+        assert len(stats.callback_presence) == 3
+        with patch.object(_MOCK_SETTINGS, "jwt_secret", "other-secret"):
+            assert _folded(messages, 5).callback_presence.keys().isdisjoint(stats.callback_presence)
+
+    def test_callback_words_forgotten_after_retention_window(self):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        stats = DNAStats()
+        thread = [_msg("remember pineapple disaster" if i < 3 else "ok", i % 2 == 0, i) for i in range(10)]
+        stats.fold(MessageColumns.from_messages(thread), now=start)
+        assert stats.metrics(now=start)["linguistic_intimacy"] >= 0.2
+        assert stats.metrics(now=start + timedelta(days=30)) == stats.metrics(now=start)
+
+        later = start + timedelta(days=100)
+        assert stats.metrics(now=later)["linguistic_intimacy"] == pytest.approx(
+            stats.metrics(now=start)["linguistic_intimacy"] - 0.2)
+        stats.fold(MessageColumns.from_messages([_msg("ok", True, 3000)]), now=later)
+        assert stats.callback_previous == {} and len(stats.callback_presence) == 0
+
+    def test_plaintext_callback_words_dropped_on_load(self):
+        legacy = {**_folded(_utc_thread(50, seed=5), 10).to_dict(), "callback_presence": {"pineapple": 4}}
+        del legacy["callback_generation"]
+        assert DNAStats.from_dict(legacy).callback_presence == {}
+
+    def test_trend_windows_stay_bounded(self):
+        stats = _folded([_msg("ok", True, i) for i in range(5000)], 999)
+        assert len(stats.trend_buckets) <= 128
+        assert sum(count for count, _ in stats.trend_buckets) == 5000
+        assert sum(words for _, words in stats.trend_buckets) == 5000
+
+
+class TestUpdatePersonDNA:
+    def _stored(self, dna, messages):
+        """Profile as analyze_relationship would have saved it."""
+        with patch.object(dna, "_analyze_with_claude", new=AsyncMock(return_value=("warm", ["hiking"], "stable"))):
+            with patch.object(dna, "_save_profile", new=AsyncMock()):
+                return json.loads(json.dumps(run(dna.analyze_relationship("u", "p", messages))))
+
+    def test_folds_new_messages_into_stored_totals(self):
+        dna = CommunicationDNA()
+        history = _utc_thread(400, seed=3)
+        stored = self._stored(dna, history[:300])
+        claude, save = AsyncMock(return_value=("dry", [], "stable")), AsyncMock()
+        with patch.object(dna, "_load_profile", new=AsyncMock(return_value=stored)), \
+                patch.object(dna, "_analyze_with_claude", new=claude), \
+                patch.object(dna, "_save_profile", new=save):
+            profile = run(dna.update_person_dna("u", "p", history[300:]))
+
+        full = self._stored(dna, history)
+        assert profile["message_count"] == 400
+        for key in ("linguistic_intimacy", "avg_response_time_hours", "initiates_ratio",
+                    "message_length_avg", "emoji_frequency", "peak_communication_hours", "silence_patterns"):
+            assert profile[key] == full[key], key
+        assert save.await_args.args[2]["stats"]["message_count"] == 400
+
+    def test_claude_skipped_while_metrics_are_stable(self):
+        dna = CommunicationDNA()
+        history = _utc_thread(400, seed=4)
+        stored = self._stored(dna, history[:390])
+        claude = AsyncMock(return_value=("dry", [], "stable"))
+        with patch.object(dna, "_load_profile", new=AsyncMock(return_value=stored)), \
+                patch.object(dna, "_analyze_with_claude", new=claude), \
+                patch.object(dna, "_save_profile", new=AsyncMock()):
+            profile = run(dna.update_person_dna("u", "p", history[390:]))
+        claude.assert_not_awaited()
+        assert profile["typical_tone"] == "warm"
+        assert profile["topics_recurring"] == ["hiking"]
+
+    def test_claude_rerun_after_drift(self):
+        dna = CommunicationDNA()
+        stored = self._stored(dna, [_msg("ok", i % 2 == 0, i * 0.1) for i in range(20)])
+        essays = [_msg("a much longer message " * 10, i % 2 == 0, 10 + i * 0.1) for i in range(40)]
+        claude = AsyncMock(return_value=("earnest", ["work"], "getting wordier"))
+        with patch.object(dna, "_load_profile", new=AsyncMock(return_value=stored)), \
+                patch.object(dna, "_analyze_with_claude", new=claude), \
+                patch.object(dna, "_save_profile", new=AsyncMock()):
+            profile = run(dna.update_person_dna("u", "p", essays))
+        claude.assert_awaited_once()
+        assert profile["typical_tone"] == "earnest"
+        assert profile["stats"]["claude_baseline"]["message_length_avg"] == profile["message_length_avg"]
+
+    def test_profile_without_stats_is_rebuilt(self):
+        dna = CommunicationDNA()
+        legacy = {**dna._empty_profile(), "message_count": 50}
+        with patch.object(dna, "_load_profile", new=AsyncMock(return_value=legacy)), \
+                patch.object(dna, "analyze_relationship", new=AsyncMock(return_value={"message_count": 3})) as analyze:
+            run(dna.update_person_dna("u", "p", [_msg("hi", True, i) for i in range(3)]))
+        analyze.assert_awaited_once()
@@ -0,0 +1,302 @@
+"""
+tests/test_database.py — Unit tests for the pooled Supabase client in database.py
+
+Covers:
+- get_db()           — lazy slot creation, round-robin reuse, max-age recycling
+- check_db_health()  — failed clients dropped so the next get_db() reconnects
+- dedicated_client() — outlives pool recycling and health-check drops; closed at shutdown
+- close_db()         — pool emptied and connections closed
+- upsert_people_bulk() / create_moments_bulk() / create_moments_for_users() — one request per batch
+- get_moments_for_user() — ranked by the stored priority_rank, limit and keyset cursor
+- get_google_contacts() — read in resource_name order, one page at a time
+- update_moment_status() — drops the owner's cached moments section
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+import database
+from core import person_index
+from core.person_index import PersonIndex
+from policy_engine.engine import PolicyViolationError
+
+
+@pytest.fixture(autouse=True)
+def _empty_pool():
+    database._pool.clear()
+    database._retired.clear()
+    database._dedicated.clear()
+    yield
+    database._pool.clear()
+    database._retired.clear()
+    database._dedicated.clear()
+
+
+def _settings(pool_size=2, max_age=1800, timeout=10.0):
+    s = MagicMock()
+    s.supabase_pool_size = pool_size
+    s.supabase_client_max_age_seconds = max_age
+    s.supabase_timeout_seconds = timeout
+    return s
+
+
+class TestGetDb:
+    def test_reuses_clients_round_robin(self):
+        with patch.object(database, "settings", _settings(pool_size=2)), \
+             patch.object(database, "_new_client", side_effect=lambda: MagicMock()) as new:
+            clients = [database.get_db() for _ in range(6)]
+        assert new.call_count == 2
+        assert len({id(c) for c in clients}) == 2
+
+    def test_recycles_clients_past_max_age(self):
+        with patch.object(database, "settings", _settings(pool_size=1, max_age=60)), \
+             patch.object(database, "_new_client", side_effect=lambda: MagicMock()), \
+             patch.object(database.time, "monotonic", side_effect=[0.0, 30.0, 100.0]):
+            first = database.get_db()
+            second = database.get_db()
+            third = database.get_db()
+        assert first is second
+        assert third is not first
+
+    def test_replaced_client_closed_after_request_timeout(self):
+        with patch.object(database, "settings", _settings(pool_size=1, max_age=60, timeout=10)), \
+             patch.object(database, "_new_client", side_effect=lambda: MagicMock()), \
+             patch.object(database.time, "monotonic", side_effect=[0.0, 100.0, 105.0, 120.0]):
+            old = database.get_db()
+            database.get_db()                      # recycled; old may still be mid-request
+            database.get_db()
+            assert not old.postgrest.aclose.called
+            database.get_db()                      # past the timeout grace
+        old.postgrest.aclose.assert_called_once()
+        assert database._retired == []
+
+
+class TestDedicatedClient:
+    def test_never_closed_by_recycling(self):
+        with patch.object(database, "settings", _settings(pool_size=1, max_age=10, timeout=5.0)), \
+             patch.object(database, "_new_client", side_effect=lambda: MagicMock()), \
+             patch.object(database.time, "monotonic", side_effect=[0.0, 100.0, 200.0]):
+            held = database.dedicated_client()
+            database.get_db()
+            database.get_db()                      # recycles and closes everything retired
+            database.get_db()
+        assert held not in [client for client, _ in database._pool.values()]
+        assert not held.postgrest.aclose.called
+
+    def test_closed_at_shutdown(self):
+        with patch.object(database, "_new_client", return_value=MagicMock()):
+            held = database.dedicated_client()
+        database.close_db()
+        held.postgrest.aclose.assert_called_once()
+
+
+class TestCheckDbHealth:
+    def test_drops_failing_client(self):
+        good, bad = MagicMock(), MagicMock()
+        bad.table.side_effect = ConnectionError("reset by peer")
+        database._pool.update({0: (good, 0.0), 1: (bad, 0.0)})
+        assert database.check_db_health() is False
+        assert database._pool == {0: (good, 0.0)}
+
+    def test_all_healthy(self):
+        database._pool[0] = (MagicMock(), 0.0)
+        assert database.check_db_health() is True
+        assert 0 in database._pool
+
+
+class TestCloseDb:
+    def test_closes_and_empties_pool(self):
+        client = MagicMock()
+        database._pool[0] = (client, 0.0)
+        database.close_db()
+        client.postgrest.aclose.assert_called_once()
+        assert database._pool == {}
+
+
+# ── Bulk writes ───────────────────────────────────────────────────────────────
+
+def _echo_upsert(client):
+    """Make client.table().upsert(rows).execute() return the rows with ids."""
+    def upsert(rows, on_conflict=None):
+        saved = [{"id": f"id-{r['name']}", **r} for r in rows]
+        return MagicMock(execute=MagicMock(return_value=MagicMock(data=saved)))
+    client.table.return_value.upsert.side_effect = upsert
+
+
+class TestUpsertPeopleBulk:
+    def test_one_upsert_keyed_on_existing_names(self):
+        client = MagicMock()
+        _echo_upsert(client)
+        index = PersonIndex([{"id": "p1", "name": "Sarah Chen"}])
+        with patch.object(database, "get_db", return_value=client), \
+             patch.object(person_index, "get_index", return_value=index), \
+             patch.object(person_index, "index_person") as written:
+            saved = database.upsert_people_bulk("u1", [
+                {"name": "sarah chen", "closeness_score": 0.9},
+                {"name": "Tom", "closeness_score": 0.4},
+                {"name": "Tom", "closeness_score": 0.5},
+            ])
+
+        client.table.return_value.upsert.assert_called_once()
+        rows = client.table.return_value.upsert.call_args.args[0]
+        assert client.table.return_value.upsert.call_args.kwargs["on_conflict"] == "owner_user_id,name"
+        assert [(r["name"], r["closeness_score"]) for r in rows] == [("Sarah Chen", 0.9), ("Tom", 0.5)]
+        assert all(r["owner_user_id"] == "u1" and "id" not in r for r in rows)
+        # Aligned with the input; the repeated name maps to one row
+        assert [r["name"] for r in saved] == ["Sarah Chen", "Tom", "Tom"]
+        assert saved[1] is saved[2]
+        assert written.call_count == 2
+
+    def test_rows_with_different_columns_sent_separately(self):
+        client = MagicMock()
+        _echo_upsert(client)
+        with patch.object(database, "get_db", return_value=client), \
+             patch.object(person_index, "get_index", return_value=PersonIndex()):
+            database.upsert_people_bulk("u1", [{"name": "A", "topics": []}, {"name": "B"}])
+        assert client.table.return_value.upsert.call_count == 2
+
+    def test_falls_back_to_row_by_row(self):
+        client = MagicMock()
+        client.table.return_value.upsert.side_effect = RuntimeError("no unique constraint")
+        with patch.object(database, "get_db", return_value=client), \
+             patch.object(person_index, "get_index", return_value=PersonIndex()), \
+             patch.object(database, "upsert_person", side_effect=lambda u, row: {"id": "x", **row}) as single:
+            saved = database.upsert_people_bulk("u1", [{"name": "A"}, {"name": "B"}])
+        assert single.call_count == 2
+        assert [r["name"] for r in saved] == ["A", "B"]
+
+
+class TestCreateMomentsBulk:
+    def test_one_insert_and_policy_blocked_skipped(self):
+        client = MagicMock()
+        client.table.return_value.select.return_value.in_.return_value.execute.return_value.data = [
+            {"id": "p1", "status": "living"}, {"id": "p2", "status": "deceased"},
+        ]
+        client.table.return_value.insert.side_effect = lambda rows: MagicMock(
+            execute=MagicMock(return_value=MagicMock(data=rows))
+        )
+
+        def check(operation, context):
+            if context["person_is_deceased"]:
+                raise PolicyViolationError("deceased")
+
+        with patch.object(database, "get_db", return_value=client), \
+             patch.object(database, "get_user_by_id", return_value={"id": "u1"}), \
+             patch.object(database.guard, "check", side_effect=check):
+            saved = database.create_moments_bulk("u1", [
+                {"person_id": "p1", "suggestion": "Call", "triggered_by": "google_ingestion"},
+                {"person_id": "p2", "suggestion": "Call", "triggered_by": "google_ingestion"},
+            ])
+        client.table.return_value.insert.assert_called_once()
+        assert [m["person_id"] for m in saved] == ["p1"]
+        assert saved[0]["status"] == "pending"
+        assert saved[0]["priority_rank"] == database.MOMENT_PRIORITY["google_ingestion"]
+
+    def test_across_users_one_insert(self):
+        client = MagicMock()
+        lookups = {
+            "users": [{"id": "u1", "consecutive_dismissals": 0}, {"id": "u2", "consecutive_dismissals": 5}],
+            "people": [{"id": "p1", "status": "living"}, {"id": "p2", "status": "living"}],
+        }
+
+        def table(name):
+            t = MagicMock()
+            t.select.return_value.in_.return_value.execute.return_value.data = lookups.get(name, [])
+            t.insert.side_effect = lambda rows: MagicMock(execute=MagicMock(return_value=MagicMock(data=rows)))
+            return t
+        client.table.side_effect = table
+        contexts = []
+
+        with patch.object(database, "get_db", return_value=client), \
+             patch.object(database.guard, "check", side_effect=lambda op, ctx: contexts.append(ctx)), \
+             patch.object(database, "invalidate_world_model") as invalidate:
+            saved = database.create_moments_for_users([
+                {"owner_user_id": "u1", "person_id": "p1", "suggestion": "Call", "triggered_by": "drift_detection"},
+                {"owner_user_id": "u2", "person_id": "p2", "suggestion": "Call", "triggered_by": "drift_detection"},
+            ])
+        assert [t.args[0] for t in client.table.call_args_list] == ["users", "people", "moments"]
+        assert [(m["owner_user_id"], m["person_id"]) for m in saved] == [("u1", "p1"), ("u2", "p2")]
+        assert [c["consecutive_dismissals"] for c in contexts] == [0, 5]
+        assert sorted(c.args[0] for c in invalidate.call_args_list) == ["u1", "u2"]
+
+
+class TestMomentsFeed:
+    def _client(self, rows):
+        client = MagicMock()
+        query = client.table.return_value.select.return_value.eq.return_value.eq.return_value
+        for method in ("or_", "order", "limit"):
+            getattr(query, method).return_value = query
+        query.execute.return_value.data = rows
+        return client, query
+
+    def test_priority(self):
+        assert database.moment_priority("life_event") == 0
+        assert database.moment_priority("drift_detection") < database.moment_priority("google_ingestion")
+        assert database.moment_priority("something_new") == database.MOMENT_PRIORITY_DEFAULT
+        assert database.moment_priority("life_event", person_is_deceased=True) == database.MOMENT_PRIORITY_DECEASED
+
+    def test_ranked_and_limited_in_the_query(self):
+        client, query = self._client([{"id": "m1"}])
+        with patch.object(database, "get_db", return_value=client):
+            assert database.get_moments_for_user("u1", limit=5) == [{"id": "m1"}]
+        assert [(c.args, c.kwargs) for c in query.order.call_args_list] == [
+            (("priority_rank",), {}), (("created_at",), {"desc": True}), (("id",), {"desc": True}),
+        ]
+        query.limit.assert_called_once_with(5)
+        assert not query.or_.called
+
+    def test_cursor_continues_after_last_moment(self):
+        last = {"id": "5f0c9a52-3c1e-4a57-9a0e-7d1b0c1d2e3f", "priority_rank": 1,
+                "created_at": "2026-10-01T08:00:00.123+00:00"}
+        client, query = self._client([])
+        with patch.object(database, "get_db", return_value=client):
+            database.get_moments_for_user("u1", limit=5, after=database.moment_cursor(last))
+        keyset = query.or_.call_args.args[0]
+        assert keyset.startswith("priority_rank.gt.1,")
+        assert 'created_at.lt."2026-10-01T08:00:00.123000+00:00"' in keyset
+        assert f"id.lt.{last['id']}" in keyset
+
+    def test_bad_cursor(self):
+        with patch.object(database, "get_db", return_value=MagicMock()):
+            with pytest.raises(ValueError):
+                database.get_moments_for_user("u1", after="not-a-cursor")
+
+    def test_cursor_timestamp_cannot_carry_filter_syntax(self):
+        crafted = database.moment_cursor({
+            "id": "5f0c9a52-3c1e-4a57-9a0e-7d1b0c1d2e3f", "priority_rank": 1,
+            "created_at": '2026-10-01T08:00:00"),owner_user_id.neq.(x',
+        })
+        client, query = self._client([])
+        with patch.object(database, "get_db", return_value=client):
+            with pytest.raises(ValueError):
+                database.get_moments_for_user("u1", after=crafted)
+        assert not query.or_.called
+
+
+class TestGoogleContacts:
+    def test_paged_in_stable_order(self):
+        rows = [{"resource_name": f"people/c{n:05d}"} for n in range(2300)]
+        client = MagicMock()
+        query = client.table.return_value.select.return_value.eq.return_value
+        query.order.return_value = query
+
+        def page(start, end):
+            result = MagicMock()
+            result.execute.return_value.data = rows[start:end + 1]
+            return result
+        query.range.side_effect = page
+
+        with patch.object(database, "get_db", return_value=client):
+            assert database.get_google_contacts("u1") == rows
+        query.order.assert_called_with("resource_name")
+        assert [c.args for c in query.range.call_args_list] == [(0, 999), (1000, 1999), (2000, 2999)]
+
+
+class TestMomentStatus:
+    def test_invalidates_owner_moments(self):
+        client = MagicMock()
+        client.table.return_value.update.return_value.eq.return_value.execute.return_value.data = [
+            {"id": "m1", "owner_user_id": "u1"}]
+        with patch.object(database, "get_db", return_value=client), \
+             patch.object(database, "invalidate_world_model") as invalidate:
+            database.update_moment_status("m1", "dismissed")
+        invalidate.assert_called_once_with("u1", "moments")
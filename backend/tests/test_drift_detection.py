@@ -0,0 +1,145 @@
+"""
+tests/test_drift_detection.py — Unit tests for services/drift_detection.py
+
+The drifted_people() database function is mocked; these cover the
+parameters sent to it and what the Python side does with its rows.
+
+Covers:
+- One RPC call; single mode uses one threshold for every tier
+- RPC read in pages until a short page, so max-rows can't truncate it
+- Tiered mode passes the close / distant thresholds
+- Moments for every user saved with one insert
+- A started conversation replaces the moment; a failed one falls back to it
+- Conversations fan out through run_for_users; an overlapping run falls back to moments
+- A failed RPC creates nothing
+"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import services.job_runner as jr
+from services import drift_detection
+from services.drift_detection import drifted_people, handle_drifted, run_drift_detection_for_all_users
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _settings(mode="single"):
+    s = MagicMock()
+    s.drift_mode = mode
+    s.drift_threshold_days = 21
+    s.drift_close_days = 7
+    s.drift_close_min = 0.8
+    s.drift_distant_days = 60
+    s.drift_distant_max = 0.4
+    s.drift_repeat_days = 14
+    s.job_concurrency = 4
+    s.job_user_timeout_seconds = 5.0
+    return s
+
+
+def _row(n, user=None, conversation_due=False, phone="+15550000000"):
+    return {"owner_user_id": user or f"u{n}", "phone": phone, "person_id": f"p{n}", "name": f"Person {n}",
+            "closeness_score": 0.9, "days_silent": 30, "conversation_due": conversation_due}
+
+
+@pytest.fixture
+def mock_db():
+    jr._running.clear()
+    with patch.object(drift_detection, "db") as db, \
+         patch.object(drift_detection, "get_settings", return_value=_settings()), \
+         patch("config.get_settings", return_value=_settings()):
+        db.create_moments_for_users.side_effect = lambda moments: [
+            {"id": f"m-{m['person_id']}", **m} for m in moments
+        ]
+        yield db
+
+
+def _drifted(mock_db, rows):
+    """Serve rows through .order().range() the way PostgREST pages them."""
+    def page(start, end):
+        query = MagicMock()
+        query.execute.return_value = MagicMock(data=rows[start:end + 1])
+        return query
+    mock_db.get_db.return_value.rpc.return_value.order.return_value.range.side_effect = page
+
+
+class TestDriftedPeople:
+    def test_single_mode_one_threshold(self, mock_db):
+        _drifted(mock_db, [])
+        drifted_people()
+        name, params = mock_db.get_db.return_value.rpc.call_args.args
+        assert name == "drifted_people"
+        assert params["p_days"] == params["p_close_days"] == params["p_distant_days"] == 21
+        assert params["p_repeat_days"] == 14
+        assert "p_user_id" not in params
+
+    def test_tiered_mode(self, mock_db):
+        _drifted(mock_db, [])
+        with patch.object(drift_detection, "get_settings", return_value=_settings("tiered")):
+            drifted_people(user_id="u1")
+        params = mock_db.get_db.return_value.rpc.call_args.args[1]
+        assert (params["p_close_days"], params["p_days"], params["p_distant_days"]) == (7, 21, 60)
+        assert params["p_user_id"] == "u1"
+
+    def test_paged_past_max_rows(self, mock_db):
+        _drifted(mock_db, [_row(n) for n in range(2001)])
+        assert len(drifted_people()) == 2001
+        rpc = mock_db.get_db.return_value.rpc.return_value
+        rpc.order.assert_called_with("owner_user_id")
+        assert [c.args for c in rpc.order.return_value.range.call_args_list] == [(0, 999), (1000, 1999), (2000, 2999)]
+
+
+class TestHandleDrifted:
+    def test_moments_saved_in_one_insert(self, mock_db):
+        _drifted(mock_db, [_row(1), _row(2), _row(3)])
+
+        result = run(run_drift_detection_for_all_users())
+
+        assert result == {"drifted": 3, "conversations": 0, "moments": 3}
+        (moments,), = [c.args for c in mock_db.create_moments_for_users.call_args_list]
+        assert [m["owner_user_id"] for m in moments] == ["u1", "u2", "u3"]
+        assert moments[0]["triggered_by"] == "drift_detection"
+        assert moments[0]["suggestion"].startswith("It's been 30 days since you and Person 1")
+
+    def test_conversation_replaces_moment(self, mock_db):
+        with patch("services.genie_conversations.start_conversation",
+                   side_effect=lambda user_id, *a: "c1" if user_id == "u1" else None) as start:
+            result = run(handle_drifted([_row(1, conversation_due=True), _row(2, conversation_due=True), _row(3)]))
+
+        assert start.call_count == 2
+        assert ("u1", "p1", "drift_check", "+15550000000") in [c.args for c in start.call_args_list]
+        assert result == {"conversations": 1, "moments": 2}
+        moments = mock_db.create_moments_for_users.call_args.args[0]
+        assert [m["person_id"] for m in moments] == ["p2", "p3"]
+
+    def test_conversations_run_through_job_runner(self, mock_db):
+        rows = [_row(n, conversation_due=True) for n in range(20)]
+        with patch("services.genie_conversations.start_conversation", side_effect=lambda *a: "c") as start:
+            assert run(handle_drifted(rows)) == {"conversations": 20, "moments": 0}
+        assert start.call_count == 20
+        assert jr.job_stats()["drift_conversations"]["last_run"]["concurrency"] == 4
+
+    def test_overlapping_run_falls_back_to_moments(self, mock_db):
+        jr._running.add("drift_conversations")
+        with patch("services.genie_conversations.start_conversation") as start:
+            result = run(handle_drifted([_row(1, conversation_due=True)]))
+        assert not start.called
+        assert result == {"conversations": 0, "moments": 1}
+
+    def test_nothing_drifted_writes_nothing(self, mock_db):
+        _drifted(mock_db, [])
+        assert run(run_drift_detection_for_all_users()) == {"drifted": 0, "conversations": 0, "moments": 0}
+        assert not mock_db.create_moments_for_users.called
+
+    def test_rpc_failure_creates_nothing(self, mock_db):
+        mock_db.get_db.return_value.rpc.side_effect = RuntimeError("function does not exist")
+        assert run(run_drift_detection_for_all_users())["moments"] == 0
+        assert not mock_db.create_moments_for_users.called
@@ -0,0 +1,301 @@
+"""
+tests/test_google_ingestion.py — Unit tests for services/google_ingestion.py
+
+Runs the Photos fetcher against benchmarks/fake_google_photos.py, and the
+Gmail / Contacts sync against benchmarks/fake_google_api.py with the
+database functions swapped for an in-memory store.
+
+Covers:
+- fetch_photos_data(): every page read, right oldest / newest dates, largest albums first
+- Album fetches bounded by photos_album_concurrency
+- 429s retried; a failing album is skipped; a failed album listing returns nothing
+- _AlbumScan keeps only the oldest and newest items, ordered by time not string
+- sync_gmail() / sync_contacts(): first sync reads everything and stores the cursors
+- Later syncs read only history / sync-token deltas and add onto stored aggregates
+- Expired historyId / syncToken falls back to a full read; API errors keep the cursor
+- Missing tables or failed writes: ingestion carries on with what was just read
+- run_incremental_ingestion() and the rebuild job refresh only changed contacts
+"""
+import asyncio
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.fake_google_api import FakeGoogleAPI
+from benchmarks.fake_google_photos import FakeGooglePhotos
+from services import google_ingestion
+from services.google_ingestion import _AlbumScan, fetch_photos_data, sync_contacts, sync_gmail
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def photos():
+    with FakeGooglePhotos(albums=6, items_per_album=450) as server, \
+         patch.object(google_ingestion.settings, "photos_top_albums", 4), \
+         patch.object(google_ingestion.settings, "photos_album_concurrency", 2):
+        yield server
+
+
+async def _no_sleep(delay):
+    pass
+
+
+def _item(stamp, name="x.jpg"):
+    return {"filename": name, "mediaMetadata": {"creationTime": stamp}}
+
+
+class TestFetchPhotos:
+    def test_reads_every_page(self, photos):
+        result = run(fetch_photos_data("token", base_url=photos.url))
+        albums = result["people_albums"]
+        assert [a["person_name"] for a in albums] == ["Person 000", "Person 001", "Person 002", "Person 003"]
+        for i, album in enumerate(albums):
+            assert (album["oldest_photo_date"], album["newest_photo_date"]) == photos.expected(f"album-{i:03d}")
+            assert len(album["key_photos"]) == 10
+        assert photos.request_count == 1 + 4 * 5          # album list + 5 pages of ≤100 per album
+
+    def test_album_concurrency_bounded(self, photos):
+        photos.latency_ms = 20
+        run(fetch_photos_data("token", base_url=photos.url))
+        assert photos.max_in_flight == 2
+
+    def test_retries_rate_limit(self, photos):
+        photos.fail_next(429, times=2)
+        with patch.object(google_ingestion.asyncio, "sleep", _no_sleep):
+            result = run(fetch_photos_data("token", base_url=photos.url))
+        assert len(result["people_albums"]) == 4
+
+    def test_failed_listing_returns_empty(self, photos):
+        photos.fail_next(401)
+        assert run(fetch_photos_data("token", base_url=photos.url)) == {"people_albums": [], "memories": []}
+
+    def test_failing_album_skipped(self, photos):
+        with patch.object(google_ingestion.settings, "photos_album_concurrency", 1), \
+             patch.object(google_ingestion.settings, "google_api_max_retries", 0):
+            original = photos._handle
+
+            def fail_album_one(method, path, query):
+                if query.get("albumId") == "album-001":
+                    return 403, {"error": {"code": 403}}
+                return original(method, path, query)
+
+            with patch.object(photos, "_handle", side_effect=fail_album_one):
+                result = run(fetch_photos_data("token", base_url=photos.url))
+        assert [a["person_name"] for a in result["people_albums"]] == ["Person 000", "Person 002", "Person 003"]
+
+
+class TestAlbumScan:
+    def test_keeps_oldest_and_newest_only(self):
+        scan = _AlbumScan(keep=2)
+        for day in (15, 3, 28, 9, 1, 22, 30):
+            scan.add(_item(f"2020-01-{day:02d}T00:00:00Z", f"{day}.jpg"))
+        scan.add({"filename": "undated.jpg", "mediaMetadata": {}})
+        summary = scan.summary({"title": "Mom", "mediaItemsCount": "8"})
+        assert [p["filename"] for p in summary["key_photos"]] == ["1.jpg", "3.jpg", "28.jpg", "30.jpg"]
+        assert summary["oldest_photo_date"] == "2020-01-01T00:00:00Z"
+        assert summary["photo_count"] == 8 and scan.dated == 7
+
+    def test_orders_by_time_not_string(self):
+        scan = _AlbumScan(keep=1)
+        scan.add(_item("2020-01-01T12:00:00Z", "later.jpg"))
+        scan.add(_item("2020-01-01T12:00:00.500Z", "latest.jpg"))
+        scan.add(_item("2020-01-01T11:59:59.900Z", "earliest.jpg"))
+        summary = scan.summary({})
+        assert [p["filename"] for p in summary["key_photos"]] == ["earliest.jpg", "latest.jpg"]
+
+
+# ── Gmail / Contacts sync ─────────────────────────────────────────────────────
+
+class _Store:
+    """In-memory google_sync_state / google_contacts / gmail_contact_stats."""
+
+    def __init__(self):
+        self.state: dict = {}
+        self.contacts: dict = {}
+        self.stats: dict = {}
+
+    def get_google_sync_state(self, user_id):
+        return dict(self.state)
+
+    def save_google_sync_state(self, user_id, **cursors):
+        self.state.update(cursors)
+
+    def get_google_contacts(self, user_id, emails=None):
+        rows = list(self.contacts.values())
+        return rows if emails is None else [r for r in rows if set(r["emails"]) & set(emails)]
+
+    def upsert_google_contacts(self, user_id, contacts):
+        self.contacts.update((c["resource_name"], dict(c)) for c in contacts)
+
+    def delete_google_contacts(self, user_id, resource_names=None):
+        for name in list(self.contacts) if resource_names is None else resource_names:
+            self.contacts.pop(name, None)
+
+    def get_gmail_contact_stats(self, user_id, emails=None, limit=None):
+        rows = [r for e, r in self.stats.items() if emails is None or e in emails]
+        return sorted(rows, key=lambda r: -r["email_count"])[:limit]
+
+    def upsert_gmail_contact_stats(self, user_id, rows):
+        self.stats.update((r["email"], dict(r)) for r in rows)
+
+    def delete_gmail_contact_stats(self, user_id):
+        self.stats.clear()
+
+
+@pytest.fixture
+def store():
+    store = _Store()
+    names = [n for n in vars(_Store) if not n.startswith("_")]
+    patches = [patch(f"database.{name}", getattr(store, name)) for name in names]
+    for p in patches:
+        p.start()
+    yield store
+    for p in patches:
+        p.stop()
+
+
+@pytest.fixture
+def google():
+    with FakeGoogleAPI(contacts=150, sent=120) as server:
+        yield server
+
+
+def _counts(server):
+    counts = {}
+    for message in server.messages:
+        counts[message["to"]] = counts.get(message["to"], 0) + 1
+    return counts
+
+
+def _sync_both(server, full=False):
+    return (run(sync_gmail("u1", "token", full=full, base_url=server.gmail_url)),
+            run(sync_contacts("u1", "token", full=full, base_url=server.people_url)))
+
+
+class TestGoogleSync:
+    def test_first_sync_reads_everything(self, google, store):
+        gmail, contacts = _sync_both(google)
+        assert gmail["full"] and contacts["full"]
+        assert {e: r["email_count"] for e, r in store.stats.items()} == _counts(google)
+        assert len(store.contacts) == 150
+        assert store.state["gmail_history_id"] == str(google.history_id)
+        assert store.state["contacts_sync_token"] == str(google.contacts_version)
+
+    def test_later_syncs_read_only_deltas(self, google, store):
+        _sync_both(google)
+        before = store.stats["contact0001@example.com"]["email_count"]
+        google.send_email("Contact0001@Example.com", "Flight to Lisbon")
+        google.send_email("new.friend@example.com", "Nice to meet you")
+        google.update_contact("people/c0003", birthday=(1990, 4, 2))
+        google.delete_contact("people/c0004")
+        new = google.add_contact("Priya Shah", emails=["priya@example.com"])
+        google.reset_counts()
+
+        gmail, contacts = _sync_both(google)
+        assert google.request_count == 1 + 2 + 1      # history, 2 messages, one connections page
+        assert not gmail["full"] and sorted(gmail["emails"]) == ["contact0001@example.com", "new.friend@example.com"]
+        row = store.stats["contact0001@example.com"]
+        assert row["email_count"] == before + 1 and row["recent_subjects"][0] == "Flight to Lisbon"
+        assert {c["resource_name"] for c in contacts["changed"]} == {"people/c0003", new}
+        assert contacts["deleted"] == ["people/c0004"]
+        assert store.contacts["people/c0003"]["birthday"] == "1990-4/2"
+        assert "people/c0004" not in store.contacts and new in store.contacts
+
+        google.reset_counts()
+        gmail, contacts = _sync_both(google)
+        assert gmail["emails"] == [] and contacts["changed"] == [] and google.request_count == 2
+
+    def test_expired_cursors_fall_back_to_full_read(self, google, store):
+        _sync_both(google)
+        google.send_email("contact0002@example.com", "Dinner?")
+        google.delete_contact("people/c0005")
+        google.expire_history()
+        google.expire_sync_tokens()
+        gmail, contacts = _sync_both(google)
+        assert gmail["full"] and contacts["full"]
+        assert {e: r["email_count"] for e, r in store.stats.items()} == _counts(google)   # nothing counted twice
+        assert len(store.contacts) == 149 and contacts["deleted"] == []
+
+    def test_api_error_keeps_cursor(self, google, store):
+        _sync_both(google)
+        cursors = dict(store.state)
+        google.send_email("contact0001@example.com", "Lost?")
+        google.fail_next(403, times=2)
+        with patch.object(google_ingestion.settings, "google_api_max_retries", 0):
+            gmail, contacts = _sync_both(google)
+        assert gmail["emails"] == [] and contacts["changed"] == []
+        assert store.state == cursors
+        gmail, _ = _sync_both(google)
+        assert gmail["emails"] == ["contact0001@example.com"]
+
+
+class TestDatabaseUnavailable:
+    @pytest.fixture
+    def broken(self, store):
+        def missing(*args, **kwargs):
+            raise RuntimeError('relation "google_sync_state" does not exist')
+        names = [n for n in vars(_Store) if not n.startswith("_")]
+        patches = [patch(f"database.{name}", missing) for name in names]
+        for p in patches:
+            p.start()
+        yield
+        for p in patches:
+            p.stop()
+
+    def test_full_ingestion_uses_what_was_read(self, google, broken):
+        with patch.object(google_ingestion, "sync_gmail", partial(sync_gmail, base_url=google.gmail_url)), \
+             patch.object(google_ingestion, "sync_contacts", partial(sync_contacts, base_url=google.people_url)), \
+             patch.object(google_ingestion, "fetch_photos_data", return_value={"people_albums": [], "memories": []}):
+            data = run(google_ingestion.run_full_ingestion("u1", "token", "refresh"))
+        assert len(data["contacts"]["contacts"]) == 150
+        counts = {g["email"]: g["email_count"] for g in data["gmail"]["frequent_contacts"]}
+        assert counts == _counts(google)
+
+    def test_incremental_ingestion_uses_what_was_read(self, google, broken):
+        with patch.object(google_ingestion, "sync_gmail", partial(sync_gmail, base_url=google.gmail_url)), \
+             patch.object(google_ingestion, "sync_contacts", partial(sync_contacts, base_url=google.people_url)):
+            data = run(google_ingestion.run_incremental_ingestion("u1", "token"))
+        assert len(data["contacts"]["contacts"]) == 150
+        assert data["gmail"]["frequent_contacts"]
+
+
+class TestIncrementalRebuild:
+    @pytest.fixture
+    def synced(self, google, store):
+        _sync_both(google)
+        with patch.object(google_ingestion, "sync_gmail", partial(sync_gmail, base_url=google.gmail_url)), \
+             patch.object(google_ingestion, "sync_contacts", partial(sync_contacts, base_url=google.people_url)):
+            yield google
+
+    def test_only_changed_contacts_returned(self, synced):
+        synced.update_contact("people/c0010", name="Maya Patel")
+        synced.send_email("contact0001@example.com", "Trip to Goa")
+        synced.send_email("someone.once@example.com", "Invoice")       # not a top recipient
+        with patch.object(google_ingestion.settings, "gmail_top_contacts", 12):
+            data = run(google_ingestion.run_incremental_ingestion("u1", "token"))
+        assert sorted(c["name"] for c in data["contacts"]["contacts"]) == ["Contact 0001", "Maya Patel"]
+        emails = {g["email"]: g for g in data["gmail"]["frequent_contacts"]}
+        assert "someone.once@example.com" not in emails
+        assert emails["contact0001@example.com"]["has_travel"]
+
+    def test_rebuild_job_skips_graph_when_nothing_changed(self, synced):
+        from routers import people
+
+        with patch("services.google_ingestion.get_valid_google_tokens", return_value=("token", "refresh")), \
+             patch("services.intelligence.build_people_graph", return_value=[]) as build, \
+             patch("services.life_events.extract_from_contacts"), \
+             patch("services.life_events.extract_life_events_for_user"):
+            run(people._do_rebuild("u1"))
+            assert not build.called
+            synced.update_contact("people/c0020", birthday=(1985, 12, 1))
+            run(people._do_rebuild("u1"))
+        contacts = build.call_args[0][1]["contacts"]["contacts"]
+        assert [c["name"] for c in contacts] == ["Contact 0020"]
@@ -4,6 +4,9 @@ test_icalendar_processor.py — Tests for ICalendarProcessor.
 All WorkFilter classify calls are mocked; no Claude API or Supabase needed.
 Tests cover:
   - work events filtered
+  - re-sync: unchanged events skipped without classification or writes,
+    changed events re-classified and upserted, missing events deleted
+  - stable keys: uid + recurrence_id, derived key when uid is missing
   - birthday extraction from event title
   - anniversary extraction
   - travel signal extraction
@@ -61,13 +64,17 @@ def _make_processor_and_db(classify_label: str = "personal"):
     proc = ICalendarProcessor()
     proc._work_filter = MagicMock()
     proc._work_filter.classify = AsyncMock(return_value=fr)
+    proc._work_filter.classify_many = AsyncMock(side_effect=lambda content_type, contents, user_id=None: [fr] * len(contents))
 
     # Build a mock db that silently accepts all table operations
+    # and has no calendar_events stored yet
     mock_db = MagicMock()
     chain = MagicMock()
     chain.execute.return_value = MagicMock(data=[])
-    mock_db.get_db.return_value.table.return_value.insert.return_value = chain
-    mock_db.get_db.return_value.table.return_value.upsert.return_value = chain
+    table = mock_db.get_db.return_value.table.return_value
+    table.insert.return_value = chain
+    table.upsert.return_value = chain
+    table.select.return_value.eq.return_value.order.return_value.range.return_value = chain
 
     return proc, mock_db
 
@@ -264,3 +271,108 @@ def test_calendar_event_default_fields():
     assert ev.description == ""
     assert ev.attendees == []
     assert ev.calendar_name == ""
+
+
+# ── Re-sync ───────────────────────────────────────────────────────────────────
+
+def _synced_db(proc, mock_db, events):
+    """Sync `events` once, then make the mock db return what that sync upserted."""
+    with patch("services.icalendar_processor.db", mock_db):
+        _run(proc.process_events("u1", events))
+    table = mock_db.get_db.return_value.table.return_value
+    rows = [{**row, "id": f"id-{n}"} for n, row in enumerate(table.upsert.call_args.args[0])]
+    table.select.return_value.eq.return_value.order.return_value.range.return_value.execute.return_value = \
+        MagicMock(data=rows)
+    table.reset_mock()
+    proc._work_filter.classify_many.reset_mock()
+    return rows
+
+
+def _calendar(n=20):
+    return [_make_event(uid=f"evt-{i}", title=f"Dinner {i}", start_time=f"2024-06-{i % 28 + 1:02d}T19:00:00Z")
+            for i in range(n)]
+
+
+def test_unchanged_resync_does_no_work():
+    """Same events again → one read, no classification, no writes."""
+    proc, mock_db = _make_processor_and_db("personal")
+    events = _calendar()
+    _synced_db(proc, mock_db, events)
+
+    with patch("services.icalendar_processor.db", mock_db), \
+         patch("services.icalendar_processor.invalidate_world_model") as invalidate:
+        result = _run(proc.process_events("u1", events))
+
+    table = mock_db.get_db.return_value.table.return_value
+    assert result["unchanged"] == 20 and result["processed"] == 0 and result["deleted"] == 0
+    assert not proc._work_filter.classify_many.called
+    assert not table.upsert.called and not table.insert.called and not table.delete.called
+    assert table.select.call_count == 1
+    assert not invalidate.called
+
+
+def test_changed_event_upserted_under_same_key():
+    """An edited event is re-classified alone and upserted on its stable key, not duplicated."""
+    proc, mock_db = _make_processor_and_db("personal")
+    events = _calendar()
+    _synced_db(proc, mock_db, events)
+    events[3] = {**events[3], "title": "Dinner 3 — moved to Saturday"}
+
+    with patch("services.icalendar_processor.db", mock_db):
+        result = _run(proc.process_events("u1", events))
+
+    assert result["processed"] == 1 and result["unchanged"] == 19
+    (contents,) = [c.args[1] for c in proc._work_filter.classify_many.call_args_list]
+    assert [c["title"] for c in contents] == ["Dinner 3 — moved to Saturday"]
+    upsert = mock_db.get_db.return_value.table.return_value.upsert.call_args
+    assert upsert.kwargs == {"on_conflict": "user_id,source_uid,recurrence_id"}
+    assert [(r["source_uid"], r["recurrence_id"]) for r in upsert.args[0]] == [("evt-3", "")]
+
+
+def test_missing_events_deleted():
+    """Events no longer sent are deleted by id, in one request."""
+    proc, mock_db = _make_processor_and_db("personal")
+    events = _calendar()
+    rows = _synced_db(proc, mock_db, events)
+
+    with patch("services.icalendar_processor.db", mock_db):
+        result = _run(proc.process_events("u1", events[2:]))
+
+    assert result["deleted"] == 2
+    delete = mock_db.get_db.return_value.table.return_value.delete.return_value.in_
+    delete.assert_called_once_with("id", [rows[0]["id"], rows[1]["id"]])
+
+
+def test_recurring_instances_are_distinct_events():
+    """Same uid, different recurrence_id → two rows."""
+    proc, mock_db = _make_processor_and_db("personal")
+    events = [_make_event(uid="yoga", recurrence_id=f"2024-06-{d:02d}T07:00:00Z", title="Yoga") for d in (3, 10)]
+
+    with patch("services.icalendar_processor.db", mock_db):
+        result = _run(proc.process_events("u1", events))
+
+    assert result["processed"] == 2
+
+
+def test_work_event_stored_without_content():
+    """Work events keep only key and hash, so they aren't re-classified next sync."""
+    proc, mock_db = _make_processor_and_db("work")
+    events = [_make_event(uid="standup", title="Standup", attendees=["a@corp.com"])]
+    (row,) = _synced_db(proc, mock_db, events)
+    assert row["work_filtered"] and row["title"] == "" and row["attendees"] == []
+
+    with patch("services.icalendar_processor.db", mock_db):
+        result = _run(proc.process_events("u1", events))
+
+    assert result["filtered"] == 1 and result["unchanged"] == 1
+    assert not proc._work_filter.classify_many.called
+
+
+def test_event_without_uid_gets_stable_derived_key():
+    """Older app builds send no uid; the same event maps to the same key each sync."""
+    from services.icalendar_processor import _event_key
+
+    event = _make_event(title="Mom's birthday")
+    assert _event_key(event) == _event_key(dict(event))
+    assert _event_key(event)[0].startswith("derived:")
+    assert _event_key(_make_event(title="Mom's birthday", start_time="2025-06-15T10:00:00Z")) != _event_key(event)
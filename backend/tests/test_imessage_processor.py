@@ -138,7 +138,9 @@ def test_work_message_filtered():
 
     work_result = FilterResult(label=Label.WORK, confidence=0.9, reason="jargon")
     proc._work_filter = MagicMock()
-    proc._work_filter.classify = AsyncMock(return_value=work_result)
+    proc._work_filter.classify_many = AsyncMock(
+        side_effect=lambda content_type, contents, user_id=None: [work_result] * len(contents)
+    )
 
     messages = [
         {"timestamp": "2024-01-01T10:00:00Z", "text": "LGTM, merging the PR", "is_from_me": False},
@@ -165,7 +167,9 @@ def test_personal_message_passes_through():
 
     personal_result = FilterResult(label=Label.PERSONAL, confidence=0.9, reason="personal")
     proc._work_filter = MagicMock()
-    proc._work_filter.classify = AsyncMock(return_value=personal_result)
+    proc._work_filter.classify_many = AsyncMock(
+        side_effect=lambda content_type, contents, user_id=None: [personal_result] * len(contents)
+    )
 
     mock_db.get_people_for_user.return_value = []
     mock_db.get_user_by_id.return_value = {"name": "Abhi", "phone": "+14155551234"}
@@ -203,7 +207,11 @@ def test_mixed_conversation_only_personal_analyzed():
         return FilterResult(label=Label.PERSONAL, confidence=0.9, reason="personal")
 
     proc._work_filter = MagicMock()
-    proc._work_filter.classify = AsyncMock(side_effect=classify_side_effect)
+    proc._work_filter.classify_many = AsyncMock(
+        side_effect=lambda content_type, contents, user_id=None: [
+            classify_side_effect(content_type, c, user_id) for c in contents
+        ]
+    )
 
     mock_db.get_people_for_user.return_value = []
     mock_db.get_user_by_id.return_value = {"name": "Abhi"}
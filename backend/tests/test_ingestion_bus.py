@@ -0,0 +1,157 @@
+"""
+tests/test_ingestion_bus.py — Unit tests for services/ingestion_bus.py
+
+Covers:
+- publish() numbers events, keeps a ring buffer and reaches subscribers
+- New subscribers get the latest event, or everything after `since`
+- A slow subscriber is dropped without holding up the others
+- Publishing from a worker thread reaches subscribers on the loop
+- Listeners run for events published in this process only
+- SQLiteBackend shares events and user links between two buses (workers)
+- The WebSocket route and POST /ingestion/progress fallback over the bus
+"""
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from services import ingestion_bus
+from services.ingestion_bus import IngestionBus, MemoryBackend, SQLiteBackend
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _event(progress, message="…"):
+    return {"source": "google", "stage": "reading", "progress": progress, "message": message}
+
+
+@pytest.fixture
+def bus():
+    bus = IngestionBus(MemoryBackend(), history=5, subscriber_queue=3)
+    with patch.object(ingestion_bus, "_bus", bus):
+        yield bus
+    bus.close()
+
+
+class TestPublish:
+    def test_ring_buffer_and_latest(self, bus):
+        for p in range(8):
+            bus.publish("s1", _event(p))
+        assert bus.latest("s1")["progress"] == 7
+        assert bus.latest("s1")["seq"] == 8
+        assert bus.latest("other") is None
+
+    def test_subscribe_replays_latest_or_since(self, bus):
+        async def scenario():
+            for p in (10, 20, 30):
+                bus.publish("s1", _event(p))
+            latest = bus.subscribe("s1")
+            catch_up = bus.subscribe("s1", since=1)
+            return [await latest.get()], [await catch_up.get(), await catch_up.get()]
+
+        latest, catch_up = run(scenario())
+        assert [e["progress"] for e in latest] == [30]
+        assert [e["progress"] for e in catch_up] == [20, 30]
+
+    def test_slow_subscriber_dropped_others_unaffected(self, bus):
+        async def scenario():
+            slow = bus.subscribe("s1")
+            fast = bus.subscribe("s1")
+            received = []
+            for p in range(6):
+                bus.publish("s1", _event(p))
+                received.append((await fast.get())["progress"])
+            dropped_get = await slow.get()
+            bus.unsubscribe(slow)
+            return received, slow.dropped, dropped_get, fast.dropped
+
+        received, slow_dropped, dropped_get, fast_dropped = run(scenario())
+        assert received == list(range(6))
+        assert slow_dropped and dropped_get is None and not fast_dropped
+        assert bus.stats()["dropped_subscribers"] == 1
+        assert bus.subscriber_count("s1") == 1
+
+    def test_publish_from_worker_thread(self, bus):
+        async def scenario():
+            subscriber = bus.subscribe("s1")
+            worker = threading.Thread(
+                target=ingestion_bus.broadcast_sync, args=("s1", "google", "analyzing", 80, "Sarah"),
+                kwargs={"insight": "She always calls back."},
+            )
+            worker.start()
+            event = await asyncio.wait_for(subscriber.get(), timeout=5)
+            worker.join()
+            return event
+
+        event = run(scenario())
+        assert event["insight"] == "She always calls back." and event["progress"] == 80
+
+    def test_listeners_see_user_and_top_insight(self, bus):
+        seen = []
+        with patch.object(ingestion_bus, "_listeners", [lambda *args: seen.append(args)]):
+            bus.publish("s1", _event(100), user_id="u1", top_insight="Call Mom.")
+        assert seen[0][0] == "s1" and seen[0][2:] == ("u1", "Call Mom.")
+
+    def test_broadcast_never_raises(self, bus):
+        with patch.object(bus.backend, "publish", side_effect=OSError("disk full")):
+            ingestion_bus.broadcast_sync("s1", "google", "reading", 5, "…")
+
+
+class TestSQLiteBackend:
+    def test_events_and_user_links_cross_workers(self, tmp_path):
+        path = str(tmp_path / "bus.sqlite3")
+        worker_a = IngestionBus(SQLiteBackend(path, poll_seconds=0.01))
+        worker_b = IngestionBus(SQLiteBackend(path, poll_seconds=0.01))
+        try:
+            worker_a.backend.register("u1", "s1")
+            assert worker_b.backend.get_session("u1") == "s1"
+
+            async def scenario():
+                subscriber = worker_b.subscribe("s1")
+                published = worker_a.publish("s1", _event(40, "Reading your contacts…"))
+                return published, await asyncio.wait_for(subscriber.get(), timeout=5)
+
+            published, relayed = run(scenario())
+            assert relayed == published
+            assert worker_a.latest("s1") == published
+            worker_a.backend.clear("u1")
+            assert worker_b.backend.get_session("u1") is None
+        finally:
+            worker_a.close()
+            worker_b.close()
+
+
+class TestRoutes:
+    @pytest.fixture
+    def client(self, bus):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from routers import ingestion
+
+        app = FastAPI()
+        app.include_router(ingestion.router)
+        with patch.object(ingestion.job_queue, "enqueue"), TestClient(app) as client:
+            yield client
+
+    def test_websocket_receives_http_pushes_and_catches_up(self, client):
+        session_id = client.post("/ingestion/session").json()["session_id"]
+        with client.websocket_connect(f"/ws/ingestion/{session_id}") as ws:
+            body = {"source": "mac", "stage": "reading", "progress": 10, "message": "Reading your messages…"}
+            pushed = client.post(f"/ingestion/progress/{session_id}", json=body).json()
+            assert pushed["broadcast_to"] == 1
+            assert ws.receive_json()["message"] == "Reading your messages…"
+            client.post(f"/ingestion/progress/{session_id}", json={**body, "progress": 20})
+            assert ws.receive_json()["progress"] == 20
+            ws.send_text("ping")
+            assert ws.receive_text() == "pong"
+
+        with client.websocket_connect(f"/ws/ingestion/{session_id}?since={pushed['seq']}") as ws:
+            assert ws.receive_json()["progress"] == 20
+        assert client.get(f"/ingestion/status/{session_id}").json()["progress"] == 20
@@ -0,0 +1,94 @@
+"""
+tests/test_intelligence.py — Unit tests for services/intelligence.py
+
+Covers:
+- build_people_graph(): saves and broadcasts each person while Claude is still streaming
+- Same result from the whole-reply path (stream=False)
+- A stream that breaks midway keeps the people already saved
+"""
+import json
+from unittest.mock import patch
+
+import pytest
+
+from services import intelligence
+
+PEOPLE = [
+    {
+        "name": f"Person {i}",
+        "relationship_type": "Friend",
+        "closeness_score": 0.9 - i / 10,
+        "suggested_moments": [{"suggestion": f"Call Person {i}"}],
+        "insight_line": f"Person {i} always remembers your birthday.",
+    }
+    for i in range(3)
+]
+REPLY = "```json\n" + json.dumps(PEOPLE) + "\n```"
+
+
+@pytest.fixture
+def graph_db():
+    """Records what build_people_graph saved and broadcast, in order."""
+    events = []
+
+    def upsert(user_id, rows):
+        events.append(("people", [r["name"] for r in rows]))
+        return [{"id": f"id-{r['name']}", "name": r["name"]} for r in rows]
+
+    def moments(user_id, rows, user=None):
+        events.append(("moments", [m["person_id"] for m in rows]))
+        return rows
+
+    def broadcast(session_id, source, stage, progress, message, insight=None, **kwargs):
+        events.append(("broadcast", progress, insight))
+
+    with patch("database.get_user_by_id", return_value={"id": "u1"}), \
+         patch("database.upsert_people_bulk", side_effect=upsert), \
+         patch("database.create_moments_bulk", side_effect=moments), \
+         patch("services.ingestion_bus.broadcast_sync", side_effect=broadcast):
+        yield events
+
+
+def chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestBuildPeopleGraph:
+    def test_each_person_saved_and_broadcast_before_the_reply_ends(self, graph_db):
+        pieces = chunks(REPLY)
+        seen_at_end_of_stream = []
+
+        def stream(system, user_message):
+            yield from pieces
+            seen_at_end_of_stream.extend(graph_db)
+
+        with patch.object(intelligence, "_stream_claude", side_effect=stream):
+            saved = intelligence.build_people_graph("u1", {}, session_id="s1")
+
+        assert [p["name"] for p in saved] == ["Person 0", "Person 1", "Person 2"]
+        assert saved[0]["insight_line"] == PEOPLE[0]["insight_line"]
+        assert ("people", ["Person 2"]) in seen_at_end_of_stream
+        insights = [e for e in graph_db if e[0] == "broadcast" and e[2]]
+        assert [e[2] for e in insights] == [p["insight_line"] for p in PEOPLE]
+        assert [e[1] for e in insights] == sorted(e[1] for e in insights)
+        assert graph_db[-1] == ("broadcast", 100, None)
+        assert graph_db.index(("people", ["Person 0"])) < graph_db.index(insights[0])
+
+    def test_whole_reply_path_saves_in_one_batch(self, graph_db):
+        with patch.object(intelligence, "_call_claude", return_value=REPLY):
+            saved = intelligence.build_people_graph("u1", {}, session_id="s1", stream=False)
+        assert len(saved) == 3
+        assert ("people", ["Person 0", "Person 1", "Person 2"]) in graph_db
+        assert ("moments", ["id-Person 0", "id-Person 1", "id-Person 2"]) in graph_db
+
+    def test_broken_stream_keeps_people_already_saved(self, graph_db):
+        first_two = REPLY[:REPLY.index('{"name": "Person 2"')]
+
+        def stream(system, user_message):
+            yield from chunks(first_two)
+            raise ConnectionError("stream dropped")
+
+        with patch.object(intelligence, "_stream_claude", side_effect=stream):
+            saved = intelligence.build_people_graph("u1", {}, session_id="s1")
+        assert [p["name"] for p in saved] == ["Person 0", "Person 1"]
+        assert graph_db[-1] == ("broadcast", 100, None)
@@ -0,0 +1,300 @@
+"""
+tests/test_job_queue.py — Unit tests for services/job_queue.py
+
+Covers:
+- enqueue() checks the payload against the handler signature
+- Sync and async handlers, priority order
+- Backfills never take a queue's last slot
+- Retry with backoff, dead jobs, retry_dead()
+- Finished and dead jobs pruned after their retention
+- Visibility timeout (at-least-once redelivery) and durability across instances
+- dedupe_key and max_backlog
+- Worker loops started on the event loop, fed from another thread
+- close() waits for handler threads that stop() gave up on
+- stats()
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from services import job_queue
+from services.job_queue import PRIORITY_BACKFILL, PRIORITY_HIGH, PRIORITY_NORMAL, JobQueue
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    with patch.dict(job_queue._handlers, clear=True), patch.dict(job_queue._queues, clear=True):
+        yield
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    made = []
+
+    def make(**kwargs):
+        kwargs.setdefault("retry_base_seconds", 0.0)
+        kwargs.setdefault("poll_seconds", 0.05)
+        q = JobQueue(str(tmp_path / "jobs.sqlite3"), **kwargs)
+        made.append(q)
+        return q
+
+    yield make
+    for q in made:
+        q.close()
+
+
+def _status(q, job_id):
+    return dict(q._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+# ── Enqueue ───────────────────────────────────────────────────────────────────
+
+class TestEnqueue:
+    def test_payload_checked_against_signature(self, make_queue):
+        @job_queue.handler("greet")
+        def greet(name: str, times: int = 1):
+            pass
+
+        q = make_queue()
+        assert q.enqueue("greet", name="Leo") is not None
+        with pytest.raises(TypeError):
+            q.enqueue("greet", nickname="Leo")
+        with pytest.raises(TypeError):
+            q.enqueue("greet", name=object())
+
+    def test_unknown_handler(self, make_queue):
+        with pytest.raises(KeyError):
+            make_queue().enqueue("nope")
+
+    def test_dedupe_key(self, make_queue):
+        job_queue.handler("send")(lambda message: None)
+        q = make_queue()
+        assert q.enqueue("send", dedupe_key="milestone:s1:20", message="a") is not None
+        assert q.enqueue("send", dedupe_key="milestone:s1:20", message="a") is None
+        assert q.enqueue("send", dedupe_key="milestone:s1:80", message="b") is not None
+
+    def test_max_backlog_drops_backfills_only(self, make_queue):
+        job_queue.handler("import", queue="bulk", priority=PRIORITY_BACKFILL)(lambda n: None)
+        job_queue.define_queue("bulk", concurrency=2, max_backlog=2)
+        q = make_queue()
+        ids = [q.enqueue("import", n=i) for i in range(4)]
+        assert ids[2:] == [None, None]
+        assert q.enqueue("import", priority=PRIORITY_HIGH, n=9) is not None
+        assert q.stats()["queues"]["bulk"]["dropped"] == 2
+
+    def test_jobs_survive_a_new_instance(self, make_queue):
+        done = []
+        job_queue.handler("note")(lambda text: done.append(text))
+        make_queue().enqueue("note", text="before restart")
+        assert run(make_queue().drain()) == 1
+        assert done == ["before restart"]
+
+
+# ── Running ───────────────────────────────────────────────────────────────────
+
+class TestRun:
+    def test_sync_and_async_handlers(self, make_queue):
+        seen = []
+
+        @job_queue.handler("sync_job")
+        def sync_job(value: int):
+            seen.append(("sync", value, threading.current_thread() is threading.main_thread()))
+
+        @job_queue.handler("async_job")
+        async def async_job(value: int):
+            seen.append(("async", value))
+
+        q = make_queue()
+        q.enqueue("sync_job", value=1)
+        q.enqueue("async_job", value=2)
+        assert run(q.drain()) == 2
+        assert ("sync", 1, False) in seen       # sync handlers run off the loop thread
+        assert ("async", 2) in seen
+
+    def test_priority_order(self, make_queue):
+        order = []
+        job_queue.handler("work", queue="serial")(lambda tag: order.append(tag))
+        job_queue.define_queue("serial", concurrency=1)
+        q = make_queue()
+        q.enqueue("work", priority=PRIORITY_BACKFILL, tag="backfill")
+        q.enqueue("work", tag="normal")
+        q.enqueue("work", priority=PRIORITY_HIGH, tag="reply")
+        run(q.drain())
+        assert order == ["reply", "normal", "backfill"]
+
+    def test_backfills_leave_a_slot_free(self, make_queue):
+        job_queue.handler("work", queue="q")(lambda n: None)
+        q = make_queue()
+        for i in range(3):
+            q.enqueue("work", priority=PRIORITY_BACKFILL, n=i)
+        jobs = q._claim("q", limit=3, backfill_room=2)
+        assert len(jobs) == 2
+        q.enqueue("work", priority=PRIORITY_NORMAL, n=99)
+        assert [j.payload["n"] for j in q._claim("q", limit=1, backfill_room=0)] == [99]
+
+    def test_reply_not_stuck_behind_imports(self, make_queue):
+        release = threading.Event()
+        replied = threading.Event()
+        job_queue.handler("import", queue="mixed", priority=PRIORITY_BACKFILL)(lambda n: release.wait(5))
+        job_queue.handler("reply", queue="mixed", priority=PRIORITY_HIGH)(lambda: replied.set())
+        job_queue.define_queue("mixed", concurrency=2)
+        q = make_queue()
+
+        async def scenario():
+            await q.start()
+            for i in range(5):
+                q.enqueue("import", n=i)
+            await asyncio.sleep(0.2)
+            q.enqueue("reply")
+            ok = await asyncio.to_thread(replied.wait, 2)
+            release.set()
+            await q.stop()
+            return ok
+
+        assert run(scenario())
+
+    def test_workers_pick_up_jobs_from_other_threads(self, make_queue):
+        done = threading.Event()
+        job_queue.handler("ping")(lambda: done.set())
+        q = make_queue(poll_seconds=30)
+
+        async def scenario():
+            await q.start()
+            await asyncio.to_thread(q.enqueue, "ping")
+            ok = await asyncio.to_thread(done.wait, 2)
+            await q.stop()
+            return ok
+
+        assert run(scenario())
+
+    def test_close_waits_for_abandoned_handler_threads(self, make_queue):
+        started, release = threading.Event(), threading.Event()
+
+        @job_queue.handler("slow")
+        def slow():
+            started.set()
+            release.wait(5)
+
+        q = make_queue()
+
+        async def scenario():
+            await q.start()
+            q.enqueue("slow")
+            await asyncio.to_thread(started.wait, 2)
+            await q.stop(timeout=0.05)          # the handler's thread keeps running
+
+        run(scenario())
+        closer = threading.Thread(target=q.close)
+        closer.start()
+        closer.join(0.2)
+        assert closer.is_alive() and not q._closed
+        release.set()
+        closer.join(2)
+        assert q._closed
+
+
+# ── Failure handling ──────────────────────────────────────────────────────────
+
+class TestFailures:
+    def test_retry_then_dead(self, make_queue):
+        calls = []
+
+        @job_queue.handler("flaky", max_attempts=2)
+        def flaky():
+            calls.append(1)
+            raise RuntimeError("twilio down")
+
+        q = make_queue()
+        job_id = q.enqueue("flaky")
+        run(q.drain())
+        assert len(calls) == 2
+        row = _status(q, job_id)
+        assert row["status"] == "dead" and row["attempts"] == 2
+        assert "twilio down" in row["last_error"]
+        assert q.dead_jobs()[0]["id"] == job_id
+
+        assert q.retry_dead(job_id)
+        assert _status(q, job_id)["status"] == "ready"
+        assert not q.retry_dead(job_id)
+
+    def test_backoff_delays_next_attempt(self, make_queue):
+        job_queue.handler("flaky")(lambda: 1 / 0)
+        q = make_queue(retry_base_seconds=60)
+        job_id = q.enqueue("flaky")
+        assert run(q.drain()) == 1              # the retry isn't due yet
+        row = _status(q, job_id)
+        assert row["status"] == "ready"
+        assert row["run_at"] >= time.time() + 29
+
+    def test_lapsed_visibility_redelivers(self, make_queue):
+        job_queue.handler("long")(lambda: None)
+        q = make_queue(visibility_seconds=0.05)
+        job_id = q.enqueue("long")
+        assert len(q._claim("default", 1, None)) == 1   # worker "dies" holding it
+        assert q._claim("default", 1, None) == []
+        time.sleep(0.1)
+        (again,) = q._claim("default", 1, None)
+        assert again.id == job_id and again.attempts == 2
+
+    def test_missing_handler_is_retried(self, make_queue):
+        job_queue.handler("gone")(lambda: None)
+        q = make_queue()
+        job_id = q.enqueue("gone")
+        del job_queue._handlers["gone"]
+        job_queue.define_queue("default", concurrency=1)
+        run(q.drain())
+        assert "no handler" in _status(q, job_id)["last_error"]
+
+
+# ── Stats ─────────────────────────────────────────────────────────────────────
+
+class TestStats:
+    def test_counts_lag_and_throughput(self, make_queue):
+        job_queue.handler("ok", queue="fast")(lambda: None)
+        job_queue.handler("later", queue="slow")(lambda: None)
+        q = make_queue()
+        for _ in range(3):
+            q.enqueue("ok")
+        q.enqueue("later")
+        q._db.execute("UPDATE jobs SET run_at = run_at - 30 WHERE name = 'later'")
+        run(q.drain("fast"))
+
+        stats = q.stats()["queues"]
+        assert stats["fast"]["done"] == 3
+        assert stats["fast"]["completed_per_minute"] == pytest.approx(3 / 60)
+        assert stats["slow"]["ready"] == 1
+        assert stats["slow"]["lag_seconds"] >= 30
+
+    def test_finished_payloads_cleared_and_pruned(self, make_queue):
+        job_queue.handler("private")(lambda message: None)
+        q = make_queue(retention_seconds=0)
+        job_id = q.enqueue("private", message="call mum about the biopsy")
+        run(q.drain())
+        assert _status(q, job_id)["payload"] == "{}"
+        time.sleep(0.01)
+        q._prune()
+        assert q._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
+
+    def test_dead_jobs_pruned_after_their_retention(self, make_queue):
+        job_queue.handler("broken", max_attempts=1)(lambda message: 1 / 0)
+        q = make_queue(retention_seconds=0, dead_retention_seconds=3600)
+        job_id = q.enqueue("broken", message="call mum about the biopsy")
+        run(q.drain())
+        q._prune()
+        assert _status(q, job_id)["status"] == "dead"          # still there to inspect / retry
+
+        q._db.execute("UPDATE jobs SET finished_at = finished_at - 3601 WHERE id = ?", (job_id,))
+        q._prune()
+        assert q._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
+        assert not q.retry_dead(job_id)
@@ -0,0 +1,170 @@
+"""
+tests/test_job_runner.py — Unit tests for services/job_runner.py
+
+Covers:
+- run_for_users()  — bounded concurrency, sync and async workers, result collection
+- per-user isolation — failures and timeouts are counted, never stop the run
+- hung sync work     — users after it still start and get their full timeout
+- overlap skip     — a second run of the same job while one is active returns None
+- job_stats()      — throughput / p95 recorded per job
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+import services.job_runner as jr
+from services.job_runner import run_for_users, job_stats
+
+
+@pytest.fixture(autouse=True)
+def _reset_runner_state():
+    jr._running.clear()
+    jr._last_runs.clear()
+    jr._skipped_overlaps.clear()
+    yield
+
+
+def _run(coro):
+    """Run on a private loop so the thread's default loop is left alone for other tests."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _users(n):
+    return [{"id": f"u{i}"} for i in range(n)]
+
+
+class TestRunForUsers:
+    def test_sync_worker_results_collected(self):
+        run = _run(run_for_users("t", _users(5), lambda u: u["id"].upper(), concurrency=2))
+        assert run.succeeded == 5
+        assert sorted(r for _, r in run.results) == ["U0", "U1", "U2", "U3", "U4"]
+
+    def test_async_worker_runs_in_own_loop(self):
+        async def work(user):
+            await asyncio.sleep(0.01)
+            return threading.current_thread().name
+
+        run = _run(run_for_users("t", _users(3), work, concurrency=3))
+        assert run.succeeded == 3
+        assert all(name.startswith("job-t") for _, name in run.results)
+
+    def test_concurrency_bounded_and_parallel(self):
+        state = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def work(user):
+            with lock:
+                state["now"] += 1
+                state["peak"] = max(state["peak"], state["now"])
+            time.sleep(0.05)
+            with lock:
+                state["now"] -= 1
+
+        start = time.perf_counter()
+        _run(run_for_users("t", _users(12), work, concurrency=4))
+        elapsed = time.perf_counter() - start
+        assert state["peak"] == 4
+        assert elapsed < 12 * 0.05 / 2   # well under the sequential time
+
+    def test_failures_isolated(self):
+        def work(user):
+            if user["id"] == "u1":
+                raise RuntimeError("boom")
+            return True
+
+        run = _run(run_for_users("t", _users(4), work, concurrency=2))
+        assert run.succeeded == 3
+        assert run.failed == 1
+        assert run.errors == 1
+
+    def test_per_user_timeout(self):
+        async def work(user):
+            await asyncio.sleep(1.0 if user["id"] == "u0" else 0)
+            return user["id"]
+
+        run = _run(run_for_users("t", _users(3), work, concurrency=3, timeout_seconds=0.1))
+        assert run.timed_out == 1
+        assert run.succeeded == 2
+
+
+    def test_hung_sync_users_do_not_starve_the_rest(self):
+        release = threading.Event()
+
+        def work(user):
+            if user["id"] in ("u0", "u1"):
+                release.wait(5)
+            else:
+                time.sleep(0.05)
+            return user["id"]
+
+        try:
+            run = _run(run_for_users("t", _users(8), work, concurrency=2, timeout_seconds=0.2))
+        finally:
+            release.set()
+        assert run.timed_out == 2
+        assert run.succeeded == 6
+
+
+class TestOverlapAndStats:
+    def test_overlapping_run_skipped(self):
+        async def main():
+            async def slow_worker_run():
+                return await run_for_users("t", _users(1), lambda u: time.sleep(0.2), concurrency=1)
+
+            first = asyncio.create_task(slow_worker_run())
+            await asyncio.sleep(0.05)
+            second = await run_for_users("t", _users(1), lambda u: None)
+            return await first, second
+
+        first, second = _run(main())
+        assert first is not None
+        assert second is None
+        assert job_stats()["t"]["skipped_overlaps"] == 1
+
+    def test_different_jobs_do_not_block_each_other(self):
+        async def main():
+            return await asyncio.gather(
+                run_for_users("a", _users(2), lambda u: time.sleep(0.05)),
+                run_for_users("b", _users(2), lambda u: time.sleep(0.05)),
+            )
+
+        a, b = _run(main())
+        assert a is not None and b is not None
+
+    def test_stats_recorded(self):
+        _run(run_for_users("t", _users(20), lambda u: time.sleep(0.001), concurrency=5))
+        last = job_stats()["t"]["last_run"]
+        assert last["users"] == 20
+        assert last["succeeded"] == 20
+        assert last["users_per_second"] > 0
+        assert last["p95_user_ms"] >= last["p50_user_ms"] > 0
+        assert not job_stats()["t"]["running"]
+
+    def test_job_held_until_timed_out_sync_work_returns(self):
+        release = threading.Event()
+
+        def work(user):
+            if user["id"] == "u0":
+                release.wait(2)
+            return user["id"]
+
+        async def main():
+            first = await run_for_users("t", _users(2), work, concurrency=2, timeout_seconds=0.05)
+            again = await run_for_users("t", _users(1), lambda u: None)
+            release.set()
+            for _ in range(100):
+                if not job_stats()["t"]["running"]:
+                    break
+                await asyncio.sleep(0.01)
+            return first, again, await run_for_users("t", _users(1), lambda u: None)
+
+        first, again, after = _run(main())
+        assert first.timed_out == 1
+        assert again is None          # u0 is still being processed by the abandoned worker
+        assert after is not None
@@ -0,0 +1,64 @@
+"""
+tests/test_json_stream.py — Unit tests for core/json_stream.py
+
+Covers:
+- Objects come out as soon as they close, whatever the chunk boundaries
+- Braces, brackets, quotes and escapes inside strings
+- ```json fences and text around the array are ignored
+- Malformed and non-object elements are skipped
+"""
+import json
+import random
+
+from core.json_stream import JSONArrayStream
+
+PEOPLE = [
+    {"name": 'Sarah "Sar" Chen', "topics": ["{braces}", "[brackets]"], "memories": [{"d": "a\\b"}]},
+    {"name": "Zoë O'Brien", "insight_line": 'She still owes you a "rematch"} \\o/'},
+    {"name": "Mom", "suggested_moments": []},
+]
+
+
+def feed_in_pieces(text: str, sizes) -> list:
+    parser, out, i = JSONArrayStream(), [], 0
+    for size in sizes:
+        out.extend(parser.feed(text[i:i + size]))
+        i += size
+    out.extend(parser.feed(text[i:]))
+    return out
+
+
+class TestFeed:
+    def test_any_chunking_gives_the_same_objects(self):
+        text = json.dumps(PEOPLE, indent=2, ensure_ascii=False)
+        rng = random.Random(0)
+        for _ in range(50):
+            assert feed_in_pieces(text, [rng.randint(1, 9) for _ in range(len(text))]) == PEOPLE
+        assert feed_in_pieces(text, [1] * len(text)) == PEOPLE
+
+    def test_object_emitted_when_it_closes(self):
+        parser = JSONArrayStream()
+        assert parser.feed('[{"name": "A"}, {"name": "B"') == [{"name": "A"}]
+        assert parser.feed("}") == [{"name": "B"}]
+        assert not parser.done
+        parser.feed("]")
+        assert parser.done and parser.emitted == 2
+
+    def test_fences_and_surrounding_text_ignored(self):
+        text = 'Here you go:\n```json\n[{"name": "A"}]\n```\nAnything else? {"name": "B"}'
+        assert feed_in_pieces(text, [5] * 20) == [{"name": "A"}]
+
+    def test_bad_and_non_object_elements_skipped(self):
+        parser = JSONArrayStream()
+        out = parser.feed('["a {", 3, {"name": oops}, null, {"name": "B"}]')
+        assert out == [{"name": "B"}]
+        assert parser.skipped == 1
+
+    def test_nested_array_elements_skipped(self):
+        text = '[[1, 2], {"name": "A"}, [[{"x": "]"}]], {"name": "B"}]'
+        for size in (1, 3, len(text)):
+            parser, out = JSONArrayStream(), []
+            for i in range(0, len(text), size):
+                out.extend(parser.feed(text[i:i + size]))
+            assert out == [{"name": "A"}, {"name": "B"}]
+            assert parser.done and parser.skipped == 0
@@ -0,0 +1,127 @@
+"""
+tests/test_life_events.py — Unit tests for the nightly check in services/life_events.py
+
+The due_life_events() database function is mocked; these cover what the
+Python side does with its rows.
+
+Covers:
+- One RPC call for all users, with the lead windows; p_user_id for one user
+- RPC read in pages until a short page, so max-rows can't truncate it
+- One moment per person (nearest event wins), one bulk insert per user
+- Events marked acknowledged in chunked updates, only for moments saved
+- Suggestions worded by days away
+- A failed RPC creates nothing
+"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services import life_events
+from services.life_events import (
+    ANNIVERSARY_LEAD_DAYS, BIRTHDAY_LEAD_DAYS, check_upcoming_events, run_life_events_check_for_all_users,
+)
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _event(n, user="u1", person=None, event_type="birthday", days_away=1):
+    return {"id": f"e{n}", "owner_user_id": user, "person_id": person or f"p{n}",
+            "event_type": event_type, "title": f"Person {n}'s Birthday", "days_away": days_away}
+
+
+@pytest.fixture
+def mock_db():
+    with patch.object(life_events, "db") as db:
+        db.create_moments_bulk.side_effect = lambda user_id, moments: [
+            {"id": f"m-{m['person_id']}", **m} for m in moments
+        ]
+        yield db
+
+
+def _due(mock_db, rows):
+    """Serve rows through .order().range() the way PostgREST pages them."""
+    def page(start, end):
+        query = MagicMock()
+        query.execute.return_value = MagicMock(data=rows[start:end + 1])
+        return query
+    mock_db.get_db.return_value.rpc.return_value.order.return_value.range.side_effect = page
+
+
+class TestNightlyCheck:
+    def test_one_query_and_bulk_writes(self, mock_db):
+        _due(mock_db, [_event(1, "u1"), _event(2, "u1", days_away=0), _event(3, "u2")])
+
+        total = run(run_life_events_check_for_all_users())
+
+        assert total == 3
+        name, params = mock_db.get_db.return_value.rpc.call_args.args
+        assert name == "due_life_events"
+        assert params["p_birthday_lead"] == BIRTHDAY_LEAD_DAYS
+        assert params["p_other_lead"] == ANNIVERSARY_LEAD_DAYS
+        assert "p_user_id" not in params
+        assert sorted(c.args[0] for c in mock_db.create_moments_bulk.call_args_list) == ["u1", "u2"]
+        update = mock_db.get_db.return_value.table.return_value.update.return_value.in_
+        update.assert_called_once()
+        assert sorted(update.call_args.args[1]) == ["e1", "e2", "e3"]
+
+    def test_rpc_paged_past_max_rows(self, mock_db):
+        _due(mock_db, [_event(n, user=f"u{n % 7}") for n in range(2500)])
+        with patch.object(life_events, "_PAGE", 1000):
+            events = life_events.due_life_events()
+
+        assert len(events) == 2500
+        rpc = mock_db.get_db.return_value.rpc.return_value
+        rpc.order.assert_called_with("id")
+        assert [c.args for c in rpc.order.return_value.range.call_args_list] == [(0, 999), (1000, 1999), (2000, 2999)]
+
+    def test_acknowledgements_chunked(self, mock_db):
+        _due(mock_db, [_event(n, user=f"u{n % 3}") for n in range(450)])
+
+        assert run(run_life_events_check_for_all_users()) == 450
+        update = mock_db.get_db.return_value.table.return_value.update.return_value.in_
+        assert [len(c.args[1]) for c in update.call_args_list] == [200, 200, 50]
+
+    def test_one_moment_per_person_nearest_first(self, mock_db):
+        _due(mock_db, [
+            _event(1, person="p1", event_type="anniversary", days_away=4),
+            _event(2, person="p1", event_type="birthday", days_away=0),
+        ])
+
+        run(run_life_events_check_for_all_users())
+
+        (user_id, moments), = [c.args for c in mock_db.create_moments_bulk.call_args_list]
+        assert len(moments) == 1 and moments[0]["suggestion"].startswith("Today is")
+        update = mock_db.get_db.return_value.table.return_value.update.return_value.in_
+        assert update.call_args.args[1] == ["e2"]
+
+    def test_blocked_moments_not_acknowledged(self, mock_db):
+        _due(mock_db, [_event(1), _event(2)])
+        mock_db.create_moments_bulk.side_effect = lambda user_id, moments: [{"id": "m1", **moments[0]}]
+
+        assert run(run_life_events_check_for_all_users()) == 1
+        update = mock_db.get_db.return_value.table.return_value.update.return_value.in_
+        assert update.call_args.args[1] == ["e1"]
+
+    def test_nothing_due_writes_nothing(self, mock_db):
+        _due(mock_db, [])
+        assert run(run_life_events_check_for_all_users()) == 0
+        assert not mock_db.create_moments_bulk.called
+        assert not mock_db.get_db.return_value.table.called
+
+    def test_rpc_failure_returns_zero(self, mock_db):
+        mock_db.get_db.return_value.rpc.side_effect = RuntimeError("function does not exist")
+        assert run(run_life_events_check_for_all_users()) == 0
+        assert not mock_db.create_moments_bulk.called
+
+    def test_single_user_check(self, mock_db):
+        _due(mock_db, [_event(1, days_away=3)])
+        moments = check_upcoming_events("u1")
+        assert mock_db.get_db.return_value.rpc.call_args.args[1]["p_user_id"] == "u1"
+        assert moments[0]["suggestion"] == "Person 1's Birthday is in 3 days. You have time to make it feel personal."
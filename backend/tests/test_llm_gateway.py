@@ -0,0 +1,271 @@
+"""
+tests/test_llm_gateway.py — Unit tests for services/llm_gateway.py
+
+Runs the gateway against benchmarks/fake_anthropic.py, a local stand-in for
+the Messages API, so retries, limits and the cache see real HTTP responses.
+
+Covers:
+- complete() / complete_sync() reply text and per-feature metrics
+- Retry on 429 / 529 (honouring Retry-After), giving up after max_retries
+- No retry on 4xx request errors
+- Global and per-feature concurrency limits
+- Token bucket pacing
+- Memory and disk response cache
+- stream_sync() text pieces, retry before the first text, errors, early close
+- client() / async_client() drop-ins
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import anthropic
+import pytest
+
+from benchmarks.fake_anthropic import FakeAnthropic
+from services import llm_gateway
+from services.llm_gateway import LLMGateway, TokenBucket
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def server():
+    with FakeAnthropic() as fake:
+        yield fake
+
+
+@pytest.fixture
+def make_gateway(server):
+    gateways = []
+
+    def make(**kwargs):
+        kwargs.setdefault("retry_base_seconds", 0.01)
+        kwargs.setdefault("requests_per_minute", 0)
+        gateway = LLMGateway(api_key="test", model="claude-test", base_url=server.url, **kwargs)
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    for gateway in gateways:
+        gateway.close()
+
+
+# ── Calls and metrics ─────────────────────────────────────────────────────────
+
+class TestComplete:
+    def test_returns_reply_text(self, server, make_gateway):
+        server.reply = lambda payload: f"echo: {payload['messages'][0]['content']}"
+        gateway = make_gateway()
+        assert run(gateway.complete("dna", "be brief", "hello")) == "echo: hello"
+        assert server.payloads[0]["system"] == "be brief"
+        assert server.payloads[0]["model"] == "claude-test"
+
+    def test_sync_call_from_worker_thread(self, server, make_gateway):
+        gateway = make_gateway()
+        result = {}
+        worker = threading.Thread(target=lambda: result.update(text=gateway.complete_sync("jobs", "", "hi")))
+        worker.start()
+        worker.join(timeout=10)
+        assert result["text"] == "ok"
+
+    def test_metrics_per_feature(self, server, make_gateway):
+        gateway = make_gateway()
+        run(gateway.complete("nutrition", "", "eggs and toast"))
+        run(gateway.complete("nutrition", "", "a banana"))
+        run(gateway.complete("training", "", "3x5 squat"))
+        stats = gateway.stats()
+        assert stats["nutrition"]["calls"] == 2
+        assert stats["training"]["calls"] == 1
+        assert stats["nutrition"]["input_tokens"] > 0
+        assert stats["nutrition"]["output_tokens"] > 0
+        assert stats["nutrition"]["p95_ms"] > 0
+
+
+# ── Retries ───────────────────────────────────────────────────────────────────
+
+class TestRetries:
+    def test_retries_rate_limit_then_succeeds(self, server, make_gateway):
+        server.fail_next(429, times=2)
+        gateway = make_gateway(max_retries=3)
+        assert run(gateway.complete("f", "", "hi")) == "ok"
+        assert server.request_count == 3
+        assert gateway.stats()["f"]["retries"] == 2
+        assert gateway.stats()["f"]["errors"] == 0
+
+    def test_retries_overloaded(self, server, make_gateway):
+        server.fail_next(529)
+        gateway = make_gateway()
+        assert run(gateway.complete("f", "", "hi")) == "ok"
+        assert server.request_count == 2
+
+    def test_honours_retry_after(self, server, make_gateway):
+        server.fail_next(429, retry_after=0.3)
+        gateway = make_gateway()
+        start = time.perf_counter()
+        run(gateway.complete("f", "", "hi"))
+        assert time.perf_counter() - start >= 0.3
+
+    def test_gives_up_after_max_retries(self, server, make_gateway):
+        server.fail_next(429, times=10)
+        gateway = make_gateway(max_retries=2)
+        with pytest.raises(anthropic.RateLimitError):
+            run(gateway.complete("f", "", "hi"))
+        assert server.request_count == 3
+        assert gateway.stats()["f"]["errors"] == 1
+
+    def test_bad_request_not_retried(self, server, make_gateway):
+        server.fail_next(400)
+        gateway = make_gateway()
+        with pytest.raises(anthropic.BadRequestError):
+            run(gateway.complete("f", "", "hi"))
+        assert server.request_count == 1
+
+
+# ── Limits ────────────────────────────────────────────────────────────────────
+
+class TestLimits:
+    def test_feature_concurrency_cap(self, server, make_gateway):
+        server.latency_ms = 30
+        gateway = make_gateway(feature_concurrency=3, max_concurrency=16)
+
+        async def burst():
+            await asyncio.gather(*(gateway.complete("burst", "", f"q{i}") for i in range(12)))
+
+        run(burst())
+        assert server.request_count == 12
+        assert server.max_in_flight == 3
+
+    def test_global_concurrency_cap_across_features(self, server, make_gateway):
+        server.latency_ms = 30
+        gateway = make_gateway(feature_concurrency=3, max_concurrency=4)
+
+        async def burst():
+            await asyncio.gather(*(gateway.complete(f"feature-{i % 3}", "", f"q{i}") for i in range(18)))
+
+        run(burst())
+        assert server.max_in_flight == 4
+
+    def test_calls_from_many_loops_share_limits(self, server, make_gateway):
+        server.latency_ms = 30
+        gateway = make_gateway(feature_concurrency=2)
+        threads = [threading.Thread(target=lambda: run(gateway.complete("shared", "", "hi"))) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+        assert server.request_count == 6
+        assert server.max_in_flight == 2
+
+    def test_token_bucket_paces_after_burst(self):
+        bucket = TokenBucket(rate=20.0, capacity=2)
+
+        async def take(n):
+            return [await bucket.acquire() for _ in range(n)]
+
+        start = time.perf_counter()
+        waits = run(take(6))
+        assert waits[:2] == [0.0, 0.0]
+        assert time.perf_counter() - start >= 4 / 20.0 * 0.9
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+class TestCache:
+    def test_identical_request_served_from_memory(self, server, make_gateway):
+        gateway = make_gateway()
+        run(gateway.complete("policy", "compile", "no sharing at night", cache=True))
+        run(gateway.complete("policy", "compile", "no sharing at night", cache=True))
+        run(gateway.complete("policy", "compile", "something else", cache=True))
+        assert server.request_count == 2
+        assert gateway.stats()["policy"]["cache_hits"] == 1
+
+    def test_uncached_calls_always_hit_the_api(self, server, make_gateway):
+        gateway = make_gateway()
+        run(gateway.complete("chat", "", "hi"))
+        run(gateway.complete("chat", "", "hi"))
+        assert server.request_count == 2
+
+    def test_disk_tier_survives_a_new_gateway(self, server, make_gateway, tmp_path):
+        server.reply = lambda payload: "def evaluate(operation, context): ..."
+        first = make_gateway(cache_dir=str(tmp_path))
+        run(first.complete("policy", "compile", "rule", cache=True))
+        second = make_gateway(cache_dir=str(tmp_path))
+        assert run(second.complete("policy", "compile", "rule", cache=True)) == "def evaluate(operation, context): ..."
+        assert server.request_count == 1
+
+    def test_expired_disk_entries_ignored(self, server, make_gateway, tmp_path):
+        first = make_gateway(cache_dir=str(tmp_path))
+        run(first.complete("policy", "compile", "rule", cache=True))
+        second = make_gateway(cache_dir=str(tmp_path), cache_ttl_seconds=-1)
+        run(second.complete("policy", "compile", "rule", cache=True))
+        assert server.request_count == 2
+
+
+# ── Streaming ─────────────────────────────────────────────────────────────────
+
+class TestStreaming:
+    def test_yields_reply_in_pieces(self, server, make_gateway):
+        server.reply = lambda payload: "0123456789" * 20
+        server.stream_chunk_chars = 10
+        server.output_chars_per_second = 5000
+        gateway = make_gateway()
+        pieces = list(gateway.stream_sync("intelligence", "sys", "hi", max_tokens=50))
+        assert "".join(pieces) == "0123456789" * 20
+        assert len(pieces) > 1
+        assert server.payloads[0]["stream"] is True
+        stats = gateway.stats()["intelligence"]
+        assert stats["calls"] == 1 and stats["output_tokens"] > 0
+
+    def test_retries_before_first_text(self, server, make_gateway):
+        server.fail_next(429)
+        gateway = make_gateway()
+        assert "".join(gateway.stream_sync("intelligence", "", "hi")) == "ok"
+        assert server.request_count == 2
+        assert gateway.stats()["intelligence"]["retries"] == 1
+
+    def test_errors_raise_from_the_generator(self, server, make_gateway):
+        server.fail_next(400)
+        gateway = make_gateway()
+        with pytest.raises(anthropic.BadRequestError):
+            list(gateway.stream_sync("intelligence", "", "hi"))
+        assert gateway.stats()["intelligence"]["errors"] == 1
+
+    def test_closing_early_cancels_the_request(self, server, make_gateway):
+        server.reply = lambda payload: "x" * 2000
+        server.output_chars_per_second = 2000
+        gateway = make_gateway()
+        stream = gateway.stream_sync("intelligence", "", "hi")
+        start = time.perf_counter()
+        assert next(stream)
+        stream.close()
+        assert time.perf_counter() - start < 0.5
+        assert "".join(gateway.stream_sync("intelligence", "", "again"))   # gateway still usable
+
+
+# ── Drop-in clients ───────────────────────────────────────────────────────────
+
+class TestDropInClients:
+    def test_sync_client_returns_message(self, server, make_gateway):
+        gateway = make_gateway()
+        with patch.object(llm_gateway, "_gateway", gateway):
+            response = llm_gateway.client("nutrition").messages.create(
+                model="claude-test", max_tokens=10, messages=[{"role": "user", "content": "hi"}],
+            )
+        assert response.content[0].text == "ok"
+        assert gateway.stats()["nutrition"]["calls"] == 1
+
+    def test_async_client_returns_message(self, server, make_gateway):
+        gateway = make_gateway()
+        with patch.object(llm_gateway, "_gateway", gateway):
+            response = run(llm_gateway.async_client("work_filter").messages.create(
+                max_tokens=10, messages=[{"role": "user", "content": "hi"}],
+            ))
+        assert response.content[0].text == "ok"
+        assert server.payloads[0]["model"] == "claude-test"
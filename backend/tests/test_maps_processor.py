@@ -0,0 +1,167 @@
+"""
+tests/test_maps_processor.py — Unit tests for services/maps_processor.py
+
+WorkFilter.classify_many and the database are mocked; no Claude API or
+Supabase needed.
+
+Covers:
+- iter_takeout(): monthly {"timelineObjects": [...]} files and bare lists, any chunk size
+- Per-place totals: visit count, dwell time, first / last visit, centroid
+- One classify_many call with one item per distinct place
+- One place_visits upsert and one insert per signal table
+- Work places skipped; nothing written for an empty timeline
+- POST /maps/takeout streams multipart uploads through import_takeout
+"""
+import asyncio
+import io
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.ingestion.work_filter import FilterResult, Label
+from services import maps_processor
+from services.maps_processor import MapsProcessor, _aggregate, iter_takeout
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _visit(name: str, start: str, minutes: int, lat: float = 37.77, lng: float = -122.42,
+           address: str = "1 Market St, SF") -> dict:
+    hour, minute = int(start[11:13]), int(start[14:16]) + minutes
+    end = f"{start[:11]}{hour + minute // 60:02d}:{minute % 60:02d}{start[16:]}"
+    return {"placeVisit": {
+        "location": {"name": name, "address": address,
+                     "latitudeE7": int(lat * 1e7), "longitudeE7": int(lng * 1e7)},
+        "duration": {"startTimestamp": start, "endTimestamp": end},
+    }}
+
+
+_TRIP = {"activitySegment": {"activityType": "WALKING", "waypointPath": {"waypoints": [{"latE7": 1}]}}}
+
+
+def _month_file(entries: list[dict]) -> io.StringIO:
+    return io.StringIO(json.dumps({"timelineObjects": entries}, indent=1))
+
+
+def _processor(work_places: tuple = ()) -> MapsProcessor:
+    processor = MapsProcessor()
+
+    async def classify_many(content_type, contents, user_id=None):
+        return [FilterResult(label=Label.WORK if c["place_name"] in work_places else Label.PERSONAL,
+                             confidence=0.9, reason="mocked") for c in contents]
+
+    processor._work_filter = MagicMock()
+    processor._work_filter.classify_many = AsyncMock(side_effect=classify_many)
+    return processor
+
+
+@pytest.fixture
+def mock_db():
+    with patch.object(maps_processor, "db") as db:
+        yield db
+
+
+class TestIterTakeout:
+    def test_monthly_file_parsed_across_chunk_boundaries(self):
+        entries = [_visit("Equinox SF", "2024-03-01T14:00:00Z", 90), _TRIP,
+                   _visit("Blue Bottle Coffee", "2024-03-02T08:00:00Z", 20)]
+        with patch.object(maps_processor, "_READ_CHUNK", 7):
+            parsed = list(iter_takeout(_month_file(entries)))
+        assert parsed == entries
+
+    def test_bare_list_and_path(self, tmp_path):
+        entries = [{"place_name": "City Lights Bookstore", "visit_time": "2024-01-01T10:00:00Z"}]
+        path = tmp_path / "2024_JANUARY.json"
+        path.write_text(json.dumps(entries))
+        assert list(iter_takeout(path)) == entries
+        assert list(iter_takeout(str(path))) == entries
+
+
+class TestAggregate:
+    def test_totals_per_place(self):
+        entries = [
+            _visit("Equinox SF", "2024-03-05T18:00:00Z", 60, lat=37.0, lng=-122.0),
+            _TRIP,
+            _visit("Equinox SF", "2024-03-01T07:00:00.250Z", 45, lat=38.0, lng=-123.0),
+            _visit("Equinox SF", "2024-03-09T07:00:00Z", 30, lat=37.5, lng=-122.5),
+            _visit("Tartine Bakery", "2024-03-02T09:00:00Z", 15),
+        ]
+        places, visits = _aggregate(entries)
+        assert visits == 4 and set(places) == {"Equinox SF", "Tartine Bakery"}
+        row = places["Equinox SF"].row("u1", "fitness")
+        assert row["visit_count"] == 3 and row["dwell_minutes"] == 135
+        assert row["first_visited"] == "2024-03-01T07:00:00.250Z"
+        assert row["last_visited"] == "2024-03-09T07:00:00Z"
+        assert row["lat"] == pytest.approx(37.5) and row["lng"] == pytest.approx(-122.5)
+
+    def test_unnamed_and_unknown_entries_ignored(self):
+        places, visits = _aggregate([_visit("", "2024-03-01T10:00:00Z", 10), {"foo": 1}, _TRIP])
+        assert places == {} and visits == 0
+
+
+class TestProcessTimeline:
+    def test_one_classification_and_one_write_per_table(self, mock_db):
+        timeline = [_visit("Equinox SF Gym", f"2024-03-{d:02d}T07:00:00Z", 60) for d in range(1, 21)]
+        timeline += [_visit("Blue Bottle Coffee", f"2024-04-{d:02d}T08:00:00Z", 15) for d in range(1, 11)]
+        timeline += [_visit("Acme Corp HQ", f"2024-05-{d:02d}T09:00:00Z", 480) for d in range(1, 28)]
+        processor = _processor(work_places=("Acme Corp HQ",))
+
+        stats = run(processor.process_timeline("u1", iter(timeline)))
+
+        assert stats == {"visits_read": 57, "places_analyzed": 2, "work_filtered": 1,
+                         "interests_extracted": 3, "places_saved": 2}
+        assert processor._work_filter.classify_many.await_count == 1
+        contents = processor._work_filter.classify_many.await_args.args[1]
+        assert sorted(c["place_name"] for c in contents) == ["Acme Corp HQ", "Blue Bottle Coffee", "Equinox SF Gym"]
+
+        tables = [c.args[0] for c in mock_db.get_db.return_value.table.call_args_list]
+        assert sorted(tables) == ["capability_signals", "interest_signals", "place_visits"]
+        upserted = mock_db.get_db.return_value.table.return_value.upsert.call_args
+        assert upserted.kwargs == {"on_conflict": "user_id,place_name"}
+        rows = {r["place_name"]: r for r in upserted.args[0]}
+        assert rows["Equinox SF Gym"]["visit_count"] == 20 and rows["Equinox SF Gym"]["place_type"] == "fitness"
+        inserts = [c.args[0] for c in mock_db.get_db.return_value.table.return_value.insert.call_args_list]
+        capability = next(rows for rows in inserts if "capability_area" in rows[0])
+        assert capability[0]["delta"] == pytest.approx(0.5)     # 0.2 base + repeat-visit bonus, capped
+
+    def test_import_takeout_reads_every_month(self, mock_db):
+        months = [_month_file([_visit("Golden Gate Park", f"2024-{m:02d}-01T12:00:00Z", 90), _TRIP])
+                  for m in range(1, 13)]
+        stats = run(_processor().import_takeout("u1", months))
+        assert stats["visits_read"] == 12 and stats["places_saved"] == 1
+        row = mock_db.get_db.return_value.table.return_value.upsert.call_args.args[0][0]
+        assert row["first_visited"].startswith("2024-01") and row["last_visited"].startswith("2024-12")
+
+    def test_empty_timeline_writes_nothing(self, mock_db):
+        processor = _processor()
+        stats = run(processor.process_timeline("u1", []))
+        assert stats["places_saved"] == 0
+        assert not processor._work_filter.classify_many.called
+        assert not mock_db.get_db.called
+
+
+class TestTakeoutRoute:
+    def test_uploaded_months_streamed_through_import_takeout(self, mock_db):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        app = FastAPI()
+        app.include_router(maps_processor.maps_router)
+        files = [("files", (f"2024_{m:02d}.json",
+                            _month_file([_visit("Golden Gate Park", f"2024-{m:02d}-01T12:00:00Z", 90)]).getvalue(),
+                            "application/json")) for m in range(1, 4)]
+        with patch.object(maps_processor, "_processor", _processor()), TestClient(app) as client:
+            response = client.post("/maps/takeout", data={"user_id": "u1"}, files=files)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["ok"] and body["visits_read"] == 3 and body["places_saved"] == 1
+        row = mock_db.get_db.return_value.table.return_value.upsert.call_args.args[0][0]
+        assert row["first_visited"].startswith("2024-01") and row["last_visited"].startswith("2024-03")
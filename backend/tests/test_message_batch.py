@@ -0,0 +1,221 @@
+"""
+tests/test_message_batch.py — Unit tests for services/message_batch.py
+
+Covers:
+- pack_batches(): token budget, message cap, oversized messages
+- process_backlog(): drains the whole backlog across keyset pages, oldest first
+- Stages run concurrently; each batch is marked processed on its own
+- A failed stage leaves its batch unprocessed without stalling the pass
+- The retry re-runs only the failed stage; the others are recorded as done
+- Time budget stops the pass early
+- record_run() / stats()
+"""
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import database
+from services import message_batch
+from services.message_batch import BacklogRun, pack_batches, process_backlog
+
+
+def _msg(i, body="hello there", **extra):
+    return {"id": f"m{i:04d}", "timestamp": f"2026-01-01T00:{i // 60:02d}:{i % 60:02d}+00:00", "body": body, **extra}
+
+
+class _Store:
+    """Unprocessed messages for one user, served with the same keyset contract as database.py."""
+
+    def __init__(self, messages):
+        self.messages = {m["id"]: dict(m, processed=False) for m in messages}
+        self.pages = []
+        self.marked = []
+
+    def count(self, user_id):
+        return sum(not m["processed"] for m in self.messages.values())
+
+    def page(self, user_id, after, limit):
+        self.pages.append(after)
+        rows = sorted(
+            (m for m in self.messages.values() if not m["processed"]),
+            key=lambda m: (m["timestamp"], m["id"]),
+        )
+        if after is not None:
+            rows = [m for m in rows if (m["timestamp"], m["id"]) > after]
+        return [dict(m) for m in rows[:limit]]
+
+    def mark(self, ids):
+        self.marked.append(list(ids))
+        for i in ids:
+            self.messages[i]["processed"] = True
+
+    def stage_done(self, ids, stage):
+        for i in ids:
+            done = self.messages[i].setdefault("stages_done", [])
+            if stage not in done:
+                done.append(stage)
+
+
+@pytest.fixture
+def store():
+    installed = []
+
+    def install(messages, stages=None):
+        s = _Store(messages)
+        s.calls = []
+        lock = threading.Lock()
+
+        def recorder(name):
+            def stage(user_id, batch):
+                with lock:
+                    s.calls.append((name, [m["id"] for m in batch]))
+            return stage
+
+        stage_list = stages or [(n, recorder(n)) for n in ("intelligence", "emotional_state", "group_chat")]
+        patches = [
+            patch.object(message_batch.db, "count_unprocessed_messages", s.count),
+            patch.object(message_batch.db, "get_unprocessed_messages_after", s.page),
+            patch.object(message_batch.db, "mark_messages_processed", s.mark),
+            patch.object(message_batch.db, "mark_messages_stage_done", s.stage_done),
+            patch.object(message_batch.db, "get_user_by_id", return_value={"name": "Maya"}),
+            patch.object(message_batch, "_stages", return_value=stage_list),
+            patch.object(message_batch.signal_extractor, "submit_signals", side_effect=lambda u, texts, p: len(texts)),
+        ]
+        for p in patches:
+            p.start()
+        installed.extend(patches)
+        return s
+
+    yield install
+    for p in installed:
+        p.stop()
+
+
+# ── Packing ───────────────────────────────────────────────────────────────────
+
+class TestPackBatches:
+    def test_token_budget(self):
+        messages = [_msg(i, body="x" * 400) for i in range(10)]    # ~112 tokens each
+        batches = list(pack_batches(messages, max_tokens=300, max_messages=100))
+        assert [len(b) for b in batches] == [2, 2, 2, 2, 2]
+
+    def test_message_cap(self):
+        batches = list(pack_batches([_msg(i, body="ok") for i in range(25)], max_tokens=10_000, max_messages=10))
+        assert [len(b) for b in batches] == [10, 10, 5]
+
+    def test_oversized_message_alone(self):
+        messages = [_msg(0), _msg(1, body="x" * 40_000), _msg(2)]
+        assert [len(b) for b in pack_batches(messages, max_tokens=500, max_messages=100)] == [1, 1, 1]
+
+
+# ── Draining ──────────────────────────────────────────────────────────────────
+
+class TestProcessBacklog:
+    def test_drains_backlog_across_pages(self, store):
+        s = store([_msg(i) for i in range(130)])
+        run = process_backlog("u1", page_size=50, max_tokens=10_000, max_messages=20)
+
+        assert run.backlog == 130 and run.processed == 130 and run.remaining == 0
+        assert all(m["processed"] for m in s.messages.values())
+        # Each batch committed on its own, oldest first
+        assert all(len(ids) <= 20 for ids in s.marked)
+        assert [i for ids in s.marked for i in ids] == sorted(s.messages)
+        assert run.batches == len(s.marked)
+        assert run.signals_queued == 130
+        # Keyset cursor follows the last row of each page
+        assert s.pages[0] is None and s.pages[1] == (_msg(49)["timestamp"], "m0049")
+
+    def test_empty_backlog_skips_everything(self, store):
+        s = store([])
+        run = process_backlog("u1")
+        assert run.processed == 0 and s.pages == []
+
+    def test_stages_run_concurrently(self, store):
+        barrier = threading.Barrier(3, timeout=2)
+
+        def stage(user_id, batch):
+            barrier.wait()      # raises if the three stages don't overlap
+
+        s = store([_msg(i) for i in range(5)], stages=[("a", stage), ("b", stage), ("c", stage)])
+        run = process_backlog("u1", page_size=50)
+        assert run.failed_batches == 0 and run.processed == 5
+
+    def test_failed_stage_leaves_batch_unprocessed(self, store):
+        def flaky(user_id, batch):
+            if batch[0]["id"] == "m0010":
+                raise RuntimeError("claude overloaded")
+
+        s = store([_msg(i) for i in range(30)], stages=[("intelligence", flaky)])
+        run = process_backlog("u1", page_size=10, max_tokens=10_000, max_messages=10)
+
+        assert run.failed_batches == 1
+        assert run.processed == 20 and run.remaining == 10
+        assert not s.messages["m0010"]["processed"]
+        assert s.messages["m0029"]["processed"]
+
+    def test_retry_reruns_only_the_failed_stage(self, store):
+        calls = []
+        fail = {"emotional_state"}
+
+        def stage(name):
+            def fn(user_id, batch):
+                calls.append((name, [m["id"] for m in batch]))
+                if name in fail:
+                    raise RuntimeError("claude overloaded")
+            return fn
+
+        s = store([_msg(i) for i in range(5)],
+                  stages=[(n, stage(n)) for n in ("intelligence", "emotional_state", "group_chat")])
+        first = process_backlog("u1", page_size=50)
+        assert first.failed_batches == 1 and first.signals_queued == 5
+        assert sorted(s.messages["m0000"]["stages_done"]) == ["group_chat", "intelligence", "signals"]
+
+        calls.clear()
+        fail.clear()
+        with patch.object(message_batch.signal_extractor, "submit_signals") as submit:
+            second = process_backlog("u1", page_size=50)
+        assert [name for name, _ in calls] == ["emotional_state"]
+        assert not submit.called
+        assert second.processed == 5 and s.messages["m0004"]["processed"]
+
+    def test_time_budget_stops_early(self, store):
+        s = store(
+            [_msg(i) for i in range(40)],
+            stages=[("slow", lambda user_id, batch: time.sleep(0.05))],
+        )
+        run = process_backlog("u1", page_size=10, max_tokens=10_000, max_messages=10, budget_seconds=0.01)
+        assert run.stopped_early
+        assert 0 < run.processed < 40
+        assert run.remaining == 40 - run.processed
+
+
+# ── Stats ─────────────────────────────────────────────────────────────────────
+
+class TestStats:
+    def test_record_run(self):
+        runs = [
+            BacklogRun("u1", backlog=500, processed=300, batches=6, stopped_early=True),
+            BacklogRun("u2", backlog=20, processed=20, batches=1),
+        ]
+        with patch.object(message_batch, "_last_run", {}):
+            summary = message_batch.record_run(runs, duration_seconds=4.0)
+            assert message_batch.stats() == summary
+        assert summary["backlog"] == 520 and summary["max_user_backlog"] == 500
+        assert summary["remaining"] == 200
+        assert summary["users_stopped_early"] == 1
+        assert summary["messages_per_second"] == 80.0
+
+
+class TestKeysetQuery:
+    def test_cursor_filters_on_timestamp_then_id(self):
+        client = MagicMock()
+        query = client.table.return_value.select.return_value.eq.return_value.eq.return_value
+        with patch.object(database, "get_db", return_value=client):
+            database.get_unprocessed_messages_after("u1", ("2026-01-01T00:00:00+00:00", "m7"), limit=5)
+        query.or_.assert_called_once_with(
+            'timestamp.gt."2026-01-01T00:00:00+00:00",'
+            'and(timestamp.eq."2026-01-01T00:00:00+00:00",id.gt.m7)'
+        )
+        query.or_.return_value.order.assert_called_once_with("timestamp")
@@ -0,0 +1,120 @@
+"""
+tests/test_person_index.py — Unit tests for core/person_index.py
+
+Covers:
+- normalize_name() / normalize_phone()
+- PersonIndex lookups: exact, alias, token containment, fuzzy, phone, phone_hash, email
+- Closeness order breaks ties
+- with_person() copies; the cached index is written through and invalidated
+- upsert_person() matches through the index
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import database
+from core import person_index
+from core.person_index import PersonIndex, hash_phone, normalize_name, normalize_phone
+
+PEOPLE = [
+    {"id": "p1", "name": "Sarah Chen", "phone": "+1 (415) 555-1234", "closeness_score": 0.9},
+    {"id": "p2", "name": "Mom", "aliases": ["Mum", "Linda Patel"], "closeness_score": 0.8},
+    {"id": "p3", "name": "John Smith", "email": "John.Smith@icloud.com", "closeness_score": 0.6},
+    {"id": "p4", "name": "Sarah Okafor", "phone_hash": "abc123", "closeness_score": 0.4},
+    {"id": "p5", "name": "Zoë O'Brien", "phone": "07700 900123", "closeness_score": 0.3},
+]
+
+
+@pytest.fixture
+def index():
+    return PersonIndex(PEOPLE)
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    person_index.invalidate()
+    yield
+    person_index.invalidate()
+
+
+class TestNormalize:
+    def test_name(self):
+        assert normalize_name("  Zoë  O'Brien-Smith ") == "zoe obrien smith"
+        assert normalize_name(None) == ""
+
+    def test_phone(self):
+        assert normalize_phone("(415) 555-1234") == "+14155551234"
+        assert normalize_phone("+44 7700 900123") == "+447700900123"
+        assert normalize_phone("0044 7700 900123") == "+447700900123"
+        assert normalize_phone("tom@example.com") is None
+        assert normalize_phone("12345") is None
+
+
+class TestLookups:
+    def test_exact_and_alias(self, index):
+        assert index.match_name("sarah  chen")["id"] == "p1"
+        assert index.match_name("Mum")["id"] == "p2"
+        assert index.match_name("Zoe OBrien")["id"] == "p5"
+
+    def test_token_containment_both_ways(self, index):
+        assert index.match_name("Smith")["id"] == "p3"
+        assert index.match_name("Mom Cell")["id"] == "p2"
+
+    def test_ties_go_to_closest(self, index):
+        assert index.match_name("Sarah")["id"] == "p1"
+
+    def test_fuzzy(self, index):
+        assert index.match_name("Sara Chen")["id"] == "p1"
+        assert index.match_name("Jon")["id"] == "p3"
+        assert index.match_name("Jon", fuzzy=False) is None
+        assert index.match_name("Priya") is None
+
+    def test_phone_hash_and_email(self, index):
+        assert index.by_phone("415.555.1234")["id"] == "p1"
+        assert index.by_phone("07700 900123")["id"] == "p5"
+        assert index.by_phone_hash("abc123")["id"] == "p4"
+        assert index.by_phone_hash(hash_phone("+14155551234"))["id"] == "p1"
+        assert index.resolve(name="Nobody", phone="john.smith@ICLOUD.com")["id"] == "p3"
+
+    def test_resolve_prefers_phone_over_name(self, index):
+        assert index.resolve(name="Sarah Okafor", phone="(415) 555-1234")["id"] == "p1"
+        assert index.resolve(name="Sarah Okafor", phone="+1 999 000 0000")["id"] == "p4"
+
+    def test_by_name_is_exact_only(self, index):
+        assert index.by_name("SARAH CHEN")["id"] == "p1"
+        assert index.by_name("Sarah") is None
+
+    def test_with_person_copies(self, index):
+        updated = index.with_person({"id": "p4", "name": "Sarah Okafor-Reid"})
+        assert updated.match_name("Okafor Reid")["id"] == "p4"
+        assert updated.get("p4")["phone_hash"] == "abc123"       # merged over the old row
+        assert index.match_name("Okafor Reid") is None
+        assert len(updated.with_person({"id": "p9", "name": "Ana"})) == 6
+
+
+class TestCache:
+    def test_loads_once_and_writes_through(self):
+        with patch("database.get_people_for_user", return_value=list(PEOPLE)) as load:
+            first = person_index.get_index("u1")
+            assert person_index.get_index("u1") is first
+            person_index.index_person("u1", {"id": "p9", "name": "Priya Shah"})
+            assert person_index.get_index("u1").match_name("Priya")["id"] == "p9"
+            person_index.invalidate("u1")
+            person_index.get_index("u1")
+        assert load.call_count == 2
+
+    def test_write_through_skips_uncached_users(self):
+        person_index.index_person("u2", {"id": "p9", "name": "Priya Shah"})
+        assert "u2" not in person_index._cache
+
+    def test_upsert_person_matches_through_index(self):
+        client = MagicMock()
+        client.table.return_value.update.return_value.eq.return_value.execute.return_value.data = [
+            {"id": "p1", "name": "Sarah Chen", "closeness_score": 0.95},
+        ]
+        with patch("database.get_people_for_user", return_value=list(PEOPLE)), \
+             patch.object(database, "get_db", return_value=client):
+            saved = database.upsert_person("u1", {"name": "sarah chen", "closeness_score": 0.95})
+            assert saved["id"] == "p1"
+            client.table.return_value.select.assert_not_called()   # no select-by-name round trip
+            assert person_index.get_index("u1").get("p1")["closeness_score"] == 0.95
@@ -0,0 +1,157 @@
+"""
+tests/test_policy_audit.py — Unit tests for policy_engine/audit.py
+
+Covers:
+- enqueue() / flush()   — one bulk insert per table, action rows linked by id
+- DB outage             — failed batch spilled to disk, replayed on next flush
+- replay                — entries spilled mid-replay kept; actions idempotent on retry
+- queue overflow        — oldest entries spilled instead of blocking callers
+- close()               — stops the flusher and writes what is still queued
+- PolicyEngine          — _log_decision queues instead of inserting inline
+"""
+import json
+from unittest.mock import MagicMock
+
+from policy_engine.audit import AuditLogWriter
+from policy_engine.engine import PolicyDecision, PolicyEngine
+
+
+def _writer(tmp_path, db=None, **kwargs):
+    return AuditLogWriter(
+        db or MagicMock(),
+        spill_path=str(tmp_path / "spill.jsonl"),
+        start=False,
+        **kwargs,
+    )
+
+
+def _tables_db():
+    """Mock client with one builder per table, so calls can be told apart."""
+    db, builders = MagicMock(), {}
+    db.table.side_effect = lambda name: builders.setdefault(name, MagicMock())
+    return db, builders
+
+
+def _row(operation="store_message"):
+    return {"operation": operation, "context": {"user_id": "u1"}, "decision": True, "reason": "ok"}
+
+
+class TestFlush:
+    def test_bulk_inserts_decisions_and_actions(self, tmp_path):
+        db, tables = _tables_db()
+        writer = _writer(tmp_path, db)
+        writer.enqueue(_row(), ["notify_user"])
+        writer.enqueue(_row(), [])
+        writer.enqueue(_row(), ["a", "b"])
+
+        assert writer.flush() == 3
+
+        assert tables["policy_decisions"].upsert.call_count == 1
+        assert tables["policy_actions_log"].upsert.call_count == 1
+        decisions = tables["policy_decisions"].upsert.call_args.args[0]
+        actions = tables["policy_actions_log"].upsert.call_args.args[0]
+        assert len(decisions) == 3
+        assert [a["action"] for a in actions] == ["notify_user", "a", "b"]
+        assert actions[0]["decision_id"] == decisions[0]["id"]
+        assert actions[2]["decision_id"] == decisions[2]["id"]
+        assert writer.stats()["queue_depth"] == 0
+
+    def test_respects_batch_size(self, tmp_path):
+        db = MagicMock()
+        writer = _writer(tmp_path, db, batch_size=2)
+        for _ in range(5):
+            writer.enqueue(_row(), [])
+        writer.flush()
+        assert db.table.return_value.upsert.call_count == 3
+
+    def test_no_actions_skips_action_insert(self, tmp_path):
+        db, tables = _tables_db()
+        writer = _writer(tmp_path, db)
+        writer.enqueue(_row(), [])
+        writer.flush()
+        assert "policy_actions_log" not in tables
+
+
+class TestSpill:
+    def test_failed_batch_spilled_then_replayed(self, tmp_path):
+        db = MagicMock()
+        db.table.return_value.upsert.return_value.execute.side_effect = ConnectionError("down")
+        writer = _writer(tmp_path, db)
+        writer.enqueue(_row("first"), ["x"])
+
+        assert writer.flush() == 0
+        spill = tmp_path / "spill.jsonl"
+        assert spill.exists()
+        assert json.loads(spill.read_text().splitlines()[0])["decision"]["operation"] == "first"
+        assert writer.stats()["spilled_decisions"] == 1
+
+        db.table.return_value.upsert.return_value.execute.side_effect = None
+        writer.enqueue(_row("second"), [])
+        assert writer.flush() == 2
+        assert not spill.exists()
+
+    def test_spilled_during_replay_not_deleted(self, tmp_path):
+        db, tables = _tables_db()
+        writer = _writer(tmp_path, db, max_queue=1)
+        writer._spill([{"decision": {"id": "5f0c9a52-3c1e-4a57-9a0e-7d1b0c1d2e3f", "operation": "old"},
+                        "actions": []}])
+
+        def overflow_mid_replay(rows, **kwargs):
+            writer.enqueue(_row("during-1"), [])
+            writer.enqueue(_row("during-2"), [])     # pushes during-1 out to the spill file
+            return MagicMock()
+        tables.setdefault("policy_decisions", MagicMock()).upsert.side_effect = overflow_mid_replay
+
+        assert writer._replay_spill() == 1
+        spilled = (tmp_path / "spill.jsonl").read_text().splitlines()
+        assert [json.loads(line)["decision"]["operation"] for line in spilled] == ["during-1"]
+
+    def test_replayed_actions_keep_their_ids(self, tmp_path):
+        db, tables = _tables_db()
+        tables.setdefault("policy_actions_log", MagicMock()).upsert.return_value.execute.side_effect = [ConnectionError("down"), None]
+        writer = _writer(tmp_path, db)
+        writer.enqueue(_row(), ["notify_user", "notify_user"])
+
+        assert writer.flush() == 0             # decision landed, actions failed
+        assert writer.flush() == 1
+        first, second = (c.args[0] for c in tables["policy_actions_log"].upsert.call_args_list)
+        assert [a["id"] for a in first] == [a["id"] for a in second]
+        assert len({a["id"] for a in first}) == 2
+        assert tables["policy_actions_log"].upsert.call_args.kwargs == {"ignore_duplicates": True}
+
+    def test_overflow_spills_oldest(self, tmp_path):
+        writer = _writer(tmp_path, max_queue=2)
+        for op in ("a", "b", "c"):
+            writer.enqueue(_row(op), [])
+        spilled = (tmp_path / "spill.jsonl").read_text().splitlines()
+        assert [json.loads(line)["decision"]["operation"] for line in spilled] == ["a"]
+        assert writer.stats()["queue_depth"] == 2
+
+
+class TestClose:
+    def test_close_flushes_remaining(self, tmp_path):
+        db = MagicMock()
+        writer = AuditLogWriter(db, flush_interval_seconds=60, spill_path=str(tmp_path / "s.jsonl"))
+        writer.enqueue(_row(), [])
+        writer.close()
+        assert writer.stats()["flushed_decisions"] == 1
+        assert not writer._thread.is_alive()
+
+
+class TestPolicyEngineLogging:
+    def test_log_decision_enqueues_without_db_write(self):
+        db = MagicMock()
+        db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = []
+        audit = MagicMock()
+        engine = PolicyEngine(supabase=db, claude=MagicMock(), audit=audit)
+        db.reset_mock()
+
+        decision = PolicyDecision(allowed=True, reason="ok", required_actions=["notify"])
+        engine._log_decision("store_message", {"user_id": "u1", "transcript": "secret"}, decision)
+
+        audit.enqueue.assert_called_once()
+        row, actions = audit.enqueue.call_args.args
+        assert row["operation"] == "store_message"
+        assert "transcript" not in row["context"]
+        assert actions == ["notify"]
+        db.table.assert_not_called()
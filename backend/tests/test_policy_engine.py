@@ -0,0 +1,170 @@
+"""
+tests/test_policy_engine.py — Unit tests for routing and decision caching in
+policy_engine/engine.py
+
+Covers:
+- _context_fields_read()      — static analysis of which context keys a policy reads
+- _find_applicable_policies() — precomputed routes match the documented ordering
+- evaluate() decision cache   — repeat checks skip policy execution, still audited
+- reload_policies()           — cache and routes invalidated; new set built
+                                before it is swapped in
+"""
+import threading
+from unittest.mock import MagicMock
+
+from policy_engine.engine import PolicyEngine, _context_fields_read
+
+_BLOCK_MINORS = '''
+def evaluate(operation: str, context: dict) -> dict:
+    if context.get("user_is_minor"):
+        return {"allowed": False, "reason": "Minor.", "required_actions": []}
+    return {"allowed": True, "reason": "ok", "required_actions": ["log_access"]}
+'''
+
+_ALLOW_ALL = '''
+def evaluate(operation, context):
+    return {"allowed": True, "reason": "ok", "required_actions": []}
+'''
+
+_READS_CLOCK = '''
+def evaluate(operation, context):
+    import datetime
+    return {"allowed": datetime.datetime.now().hour < 25, "reason": "ok", "required_actions": []}
+'''
+
+
+def _engine(policies: dict) -> PolicyEngine:
+    db = MagicMock()
+    db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+        {"name": name, "content": "", "compiled_function": src} for name, src in policies.items()
+    ]
+    return PolicyEngine(supabase=db, claude=MagicMock(), audit=MagicMock())
+
+
+class TestContextFieldsRead:
+    def test_literal_gets_and_subscripts(self):
+        src = '''
+def evaluate(operation, ctx):
+    return {"allowed": ctx.get("a") and ctx["b"], "reason": "", "required_actions": []}
+'''
+        assert _context_fields_read(src) == frozenset({"a", "b"})
+
+    def test_dynamic_access_is_uncacheable(self):
+        src = '''
+def evaluate(operation, context):
+    key = "a"
+    return {"allowed": bool(context.get(key)), "reason": "", "required_actions": []}
+'''
+        assert _context_fields_read(src) is None
+
+    def test_passing_context_is_uncacheable(self):
+        src = '''
+def evaluate(operation, context):
+    return helper(context)
+'''
+        assert _context_fields_read(src) is None
+
+    def test_clock_is_uncacheable(self):
+        assert _context_fields_read(_READS_CLOCK) is None
+
+
+class TestRouting:
+    def test_baseline_and_operation_policies_in_order(self):
+        engine = _engine({})
+        assert engine._find_applicable_policies("process_voice_note", {}) == [
+            "gdpr_consent_requirements",
+            "gdpr_data_minimization",
+            "safety_minor_protection",
+            "security_access_control",
+        ]
+
+    def test_jurisdiction_and_flags(self):
+        engine = _engine({})
+        applicable = engine._find_applicable_policies("delete_user", {
+            "user_location": "EU-DE",
+            "person_is_deceased": True,
+            "emotional_state": "grieving",
+        })
+        assert applicable[:3] == ["gdpr_right_to_erasure", "gdpr_consent_requirements", "gdpr_data_retention"]
+        assert applicable.count("gdpr_right_to_erasure") == 1
+        assert applicable[-2:] == ["safety_deceased_persons", "safety_emotional_sensitivity"]
+
+    def test_unknown_operation_gets_baseline(self):
+        engine = _engine({})
+        assert engine._find_applicable_policies("something_new", {"jurisdiction": "CCPA"}) == [
+            "ccpa_california_rights",
+            "ccpa_opt_out_rights",
+            "safety_minor_protection",
+            "security_access_control",
+        ]
+
+
+class TestDecisionCache:
+    def test_repeat_check_served_from_cache(self):
+        engine = _engine({"safety_minor_protection": _BLOCK_MINORS})
+        calls = []
+        original = engine.compiled_policies["safety_minor_protection"]
+        engine.compiled_policies["safety_minor_protection"] = lambda op, ctx: calls.append(1) or original(op, ctx)
+
+        first = engine.evaluate("store_message", {"user_id": "u1", "user_is_minor": False})
+        # user_id isn't read by any policy, so a different user shares the entry
+        second = engine.evaluate("store_message", {"user_id": "u2", "user_is_minor": False})
+
+        assert first.allowed and second.allowed
+        assert second.required_actions == ["log_access"]
+        assert len(calls) == 1
+        assert engine.audit.enqueue.call_count == 2   # every decision still audited
+
+    def test_read_field_change_misses_cache(self):
+        engine = _engine({"safety_minor_protection": _BLOCK_MINORS})
+        assert engine.evaluate("store_message", {"user_is_minor": False}).allowed
+        assert not engine.evaluate("store_message", {"user_is_minor": True}).allowed
+
+    def test_uncacheable_policy_always_runs(self):
+        engine = _engine({"security_access_control": _READS_CLOCK})
+        engine.evaluate("store_message", {})
+        engine.evaluate("store_message", {})
+        assert engine._decision_cache.stats()["size"] == 0
+
+    def test_reload_invalidates(self):
+        engine = _engine({"safety_minor_protection": _BLOCK_MINORS})
+        assert not engine.evaluate("store_message", {"user_is_minor": True}).allowed
+
+        engine.db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+            {"name": "safety_minor_protection", "content": "", "compiled_function": _ALLOW_ALL}
+        ]
+        engine.reload_policies()
+        assert engine.evaluate("store_message", {"user_is_minor": True}).allowed
+
+    def test_checks_during_reload_use_the_old_set(self):
+        engine = _engine({"safety_minor_protection": _BLOCK_MINORS})
+        db_result = engine.db.table.return_value.select.return_value.eq.return_value.execute
+        loading, release = threading.Event(), threading.Event()
+
+        def slow_load():
+            loading.set()
+            release.wait(5)
+            return MagicMock(data=[
+                {"name": "safety_minor_protection", "content": "", "compiled_function": _ALLOW_ALL}
+            ])
+
+        db_result.side_effect = slow_load
+        reloader = threading.Thread(target=engine.reload_policies)
+        reloader.start()
+        assert loading.wait(5)
+
+        # Mid-reload: the old policy is still enforced, not an empty set
+        assert not engine.evaluate("store_message", {"user_is_minor": True}).allowed
+
+        release.set()
+        reloader.join(5)
+        # The decision cached mid-reload went with the old set
+        assert engine._decision_cache.stats()["size"] == 0
+        assert engine.evaluate("store_message", {"user_is_minor": True}).allowed
+
+    def test_failed_reload_keeps_current_policies(self):
+        engine = _engine({"safety_minor_protection": _BLOCK_MINORS})
+        engine.db.table.return_value.select.return_value.eq.return_value.execute.side_effect = RuntimeError("down")
+        engine.reload_policies()
+        assert "safety_minor_protection" in engine.compiled_policies
+        assert not engine.evaluate("store_message", {"user_is_minor": True}).allowed
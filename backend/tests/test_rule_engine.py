@@ -495,3 +495,164 @@ class TestEdgeCases:
 
         assert result["users_checked"] == 0
         assert result["errors"] >= 1
+
+
+# ── Set-based cycle ───────────────────────────────────────────────────────────
+
+class _CycleDB:
+    """Chainable fake Supabase client: returns canned rows per table, records every query."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.queries = []     # (table, method) per execute()
+        self.inserts = []
+        self.updates = []
+        self.rpcs = []
+
+    def rpc(self, fn, params):
+        self.rpcs.append((fn, params))
+        rows = self.tables.get(f"rpc/{fn}", [])
+        return MagicMock(execute=lambda: MagicMock(data=rows))
+
+    def table(self, name):
+        db = self
+
+        class Query:
+            def __init__(self):
+                self.method = "select"
+
+            def __getattr__(self, attr):
+                return lambda *a, **k: self
+
+            def insert(self, rows):
+                self.method = "insert"
+                db.inserts.append((name, rows))
+                return self
+
+            def update(self, values):
+                self.method = "update"
+                db.updates.append((name, values))
+                return self
+
+            def execute(self):
+                db.queries.append((name, self.method))
+                return MagicMock(data=db.tables.get(name, []) if self.method == "select" else [])
+
+        return Query()
+
+
+def _cycle_fixture(n_users, music_connected=()):
+    today = date.today().isoformat()
+    users = [{"id": f"u{i}", "phone": f"+1555000{i:04d}"} for i in range(n_users)]
+    rules = []
+    for u in users:
+        rules.append(_make_rule("health_metric", {"metric": "calories", "operator": "lt", "value": 500},
+                                rule_id=f"{u['id']}-health", user_id=u["id"]))
+        rules.append(_make_rule("calendar_event", {"hours_before": 2},
+                                rule_id=f"{u['id']}-cal", user_id=u["id"]))
+        rules.append(_make_rule("music_playing", {"artist": "nina"},
+                                rule_id=f"{u['id']}-music", user_id=u["id"]))
+    return _CycleDB({
+        "users": users,
+        "genie_rules": rules,
+        "health_daily_summary": [{"user_id": u["id"], "summary_date": today, "total_calories": 200} for u in users],
+        "calendar_events": [],
+        "music_connections": [{"user_id": uid} for uid in music_connected],
+        "rule_executions": [],
+    })
+
+
+def _run_cycle(cycle_db, spotify=None):
+    engine = sut.RuleEngine()
+    spotify = spotify or MagicMock()
+    loop = asyncio.new_event_loop()
+    try:
+        with patch("services.rule_engine.db.get_db", return_value=cycle_db), \
+             patch("services.whatsapp.send_message"), \
+             patch("services.spotify_client.SpotifyClient", spotify):
+            return loop.run_until_complete(engine.evaluate_all_users())
+    finally:
+        loop.close()
+
+
+class TestRuleCycle:
+    def test_read_count_independent_of_user_count(self):
+        small, large = _cycle_fixture(2), _cycle_fixture(40)
+        _run_cycle(small)
+        _run_cycle(large)
+        reads = [[q for q in db.queries if q[1] == "select"] for db in (small, large)]
+        assert len(reads[0]) == len(reads[1])
+        # users, rules, executions, health, calendar, music
+        assert len(reads[1]) <= 6
+
+    def test_each_firing_recorded_as_it_happens(self):
+        cycle_db = _cycle_fixture(5)
+        result = _run_cycle(cycle_db)
+        assert result["rules_fired"] == 5          # every user's calorie rule
+        assert result["users_checked"] == 5
+        assert [t for t, _ in cycle_db.inserts] == ["rule_executions"] * 5
+        assert sorted(rows[0]["rule_id"] for _, rows in cycle_db.inserts) == [f"u{i}-health" for i in range(5)]
+        assert [t for t, _ in cycle_db.updates] == ["genie_rules"] * 5
+
+    def test_firing_recorded_even_if_a_later_rule_hangs(self):
+        cycle_db = _cycle_fixture(1)
+        engine = sut.RuleEngine()
+        original = engine._check_trigger
+
+        async def check(rule, user_id, inputs=None):
+            if rule["trigger_type"] == "calendar_event":
+                raise asyncio.CancelledError()    # the user's run is cut short after the first firing
+            return await original(rule, user_id, inputs)
+        engine._check_trigger = check
+        loop = asyncio.new_event_loop()
+        try:
+            with patch("services.rule_engine.db.get_db", return_value=cycle_db), \
+                 patch("services.whatsapp.send_message"):
+                rules = cycle_db.tables["genie_rules"]
+                inputs = engine._load_cycle_inputs({"u0": rules})
+                with pytest.raises(asyncio.CancelledError):
+                    loop.run_until_complete(engine._evaluate_rules("u0", "+1", rules, inputs))
+        finally:
+            loop.close()
+        assert [rows[0]["rule_id"] for _, rows in cycle_db.inserts] == ["u0-health"]
+
+    def test_habit_streak_counted_in_sql(self):
+        cycle_db = _cycle_fixture(0)
+        cycle_db.tables["rpc/food_logging_days"] = [{"user_id": "u1", "days": 12}]
+        engine = sut.RuleEngine()
+        rules = {uid: [_make_rule("time", {"condition": "habit_at_risk"}, rule_id=f"{uid}-h", user_id=uid)]
+                 for uid in ("u1", "u2")}
+        with patch("services.rule_engine.db.get_db", return_value=cycle_db):
+            inputs = engine._load_cycle_inputs(rules)
+        assert cycle_db.rpcs == [("food_logging_days", {"p_user_ids": ["u1", "u2"]})]
+        assert inputs.days_logging == {"u1": 12, "u2": 0}
+
+    def test_cooldown_read_from_preloaded_executions(self):
+        cycle_db = _cycle_fixture(3)
+        cycle_db.tables["rule_executions"] = [
+            {"rule_id": "u0-health", "fired_at": datetime.now(timezone.utc).isoformat()},
+        ]
+        result = _run_cycle(cycle_db)
+        assert result["rules_fired"] == 2
+
+    def test_music_only_checked_for_connected_users(self):
+        cycle_db = _cycle_fixture(4, music_connected=["u1"])
+        spotify = MagicMock()
+        spotify.return_value.get_currently_playing = AsyncMock(return_value=None)
+        _run_cycle(cycle_db, spotify=spotify)
+        spotify.assert_called_once_with("u1")
+
+    def test_calendar_window_filtered_in_memory(self):
+        engine = sut.RuleEngine()
+        now = datetime.now(timezone.utc)
+        inputs = sut.RuleCycleInputs(now=now, calendar={"u1": [
+            {"title": "Dinner with Maya", "start_time": (now + timedelta(minutes=90)).isoformat()},
+        ]})
+        loop = asyncio.new_event_loop()
+        try:
+            run = loop.run_until_complete
+            assert run(engine._check_calendar_trigger({"hours_before": 2}, "u1", inputs)) is True
+            assert run(engine._check_calendar_trigger({"hours_before": 1}, "u1", inputs)) is False
+            assert run(engine._check_calendar_trigger({"hours_before": 2, "title_contains": "gym"}, "u1", inputs)) is False
+        finally:
+            loop.close()
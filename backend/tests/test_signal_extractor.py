@@ -0,0 +1,322 @@
+"""
+tests/test_signal_extractor.py — Unit tests for services/signal_extractor.py
+
+Covers:
+- submit(): pre-filter, one job per batch_size messages, lane priority, dropped backfills
+- Jobs carry message ids, never text; the job loads the text and skips deleted messages
+- process_batch: one dedup query, one Claude call, one PersonIndex lookup, one bulk insert
+- Row-by-row fallback when the bulk insert fails
+- Beneficiary World Models marked stale in bulk
+- The signals.extract job end to end; extract_signals() for text that is never stored
+- A failed batch is counted as deferred when the queue takes it back, dropped when nothing can retry it
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.person_index import PersonIndex
+from services import job_queue
+from services import signal_extractor as se
+from services.job_queue import PRIORITY_BACKFILL, PRIORITY_HIGH, JobQueue
+from services.signal_extractor import BULK, CONVERSATION, SignalExtractor, message_hash
+
+MENTION = "I had lunch with my friend Sarah and she seems really stressed about work"
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class _Query:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.op = "select"
+        self.payload = None
+        self.filters = []
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = "update", payload
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(("eq", column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(("in", column, list(values)))
+        return self
+
+    def execute(self):
+        self.db.calls.append(self)
+        if self.op == "insert" and self.db.fail_bulk_insert and isinstance(self.payload, list):
+            raise RuntimeError("bulk insert rejected")
+        if self.op == "insert":
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            self.db.tables.setdefault(self.table, []).extend(rows)
+            return SimpleNamespace(data=rows)
+        if self.op == "update":
+            return SimpleNamespace(data=[])
+        rows = self.db.tables.get(self.table, [])
+        for kind, column, value in self.filters:
+            if kind == "eq":
+                rows = [r for r in rows if r.get(column) == value]
+            else:
+                rows = [r for r in rows if r.get(column) in value]
+        return SimpleNamespace(data=rows)
+
+
+class _FakeDB:
+    def __init__(self):
+        self.tables = {
+            "people": [
+                {"id": "p-sarah", "owner_user_id": "u1", "name": "Sarah Chen", "phone_hash": "h-sarah"},
+                {"id": "p-tom", "owner_user_id": "u1", "name": "Tom", "phone_hash": None},
+            ],
+            "users": [{"id": "u-sarah", "phone_hash": "h-sarah"}],
+        }
+        self.calls = []
+        self.fail_bulk_insert = False
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def ops(self, table, op=None):
+        return [c for c in self.calls if c.table == table and (op is None or c.op == op)]
+
+
+def _stored(texts, user="u1"):
+    """Rows of the messages table for texts."""
+    return [{"id": f"m{i}", "owner_user_id": user, "body": t} for i, t in enumerate(texts)]
+
+
+def _reply(signals):
+    return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(signals))])
+
+
+@pytest.fixture
+def fake_db():
+    db = _FakeDB()
+    index = lambda user_id: PersonIndex(p for p in db.tables["people"] if p["owner_user_id"] == user_id)
+    with patch("database.get_db", return_value=db), \
+         patch.object(se.person_index, "get_index", side_effect=index) as get_index:
+        db.get_index = get_index
+        yield db
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    with patch.object(job_queue, "_queue", q), patch.dict(job_queue._queues, clear=True):
+        yield q
+    q.close()
+
+
+@pytest.fixture
+def make_extractor():
+    def make(**kwargs):
+        with patch("services.signal_extractor.get_settings") as mock_settings:
+            mock_settings.return_value.claude_model = "claude-test"
+            mock_settings.return_value.signal_batch_size = 3
+            extractor = SignalExtractor(**kwargs)
+        extractor._client = MagicMock()
+        extractor._client.messages.create.return_value = _reply([])
+        return extractor
+    return make
+
+
+def _queued(queue):
+    rows = queue._db.execute("SELECT name, payload, priority FROM jobs WHERE status = 'ready' ORDER BY id").fetchall()
+    return [(r["name"], json.loads(r["payload"]), r["priority"]) for r in rows]
+
+
+# ── Queueing ──────────────────────────────────────────────────────────────────
+
+class TestSubmit:
+    def test_prefilter_short_and_nameless_messages(self, make_extractor, queue):
+        ex = make_extractor()
+        queued = ex.submit("u1", _stored(["ok", "see you there at the usual place later tonight", MENTION]), ["Leo"])
+        assert queued == 1
+        assert ex.stats()["filtered"] == 2
+        assert len(_queued(queue)) == 1
+
+    def test_one_job_per_batch(self, make_extractor, queue):
+        ex = make_extractor()
+        assert ex.submit("u1", _stored([f"{MENTION} {i}" for i in range(7)]), ["Leo", "Ana"]) == 7
+        jobs = _queued(queue)
+        assert [payload["message_ids"] for _, payload, _ in jobs] == [["m0", "m1", "m2"], ["m3", "m4", "m5"], ["m6"]]
+        assert not any(MENTION in json.dumps(payload) for _, payload, _ in jobs)
+        assert all(name == "signals.extract" for name, _, _ in jobs)
+        assert jobs[0][1]["participants"] == ["Leo", "Ana"]
+
+    def test_lane_sets_priority(self, make_extractor, queue):
+        ex = make_extractor()
+        ex.submit("u1", _stored([MENTION]), [], lane=BULK)
+        ex.submit("u1", _stored([MENTION]), [], lane=CONVERSATION)
+        assert [priority for _, _, priority in _queued(queue)] == [PRIORITY_BACKFILL, PRIORITY_HIGH]
+
+    def test_full_backlog_drops_imports_not_chat(self, make_extractor, queue):
+        job_queue.define_queue("signals", concurrency=2, max_backlog=2)
+        ex = make_extractor(batch_size=1)
+        assert ex.submit("u1", _stored([f"{MENTION} {i}" for i in range(4)]), []) == 2
+        assert ex.stats()["dropped"] == 2
+        assert ex.submit("u1", _stored([MENTION]), [], lane=CONVERSATION) == 1
+
+
+# ── Batch processing ──────────────────────────────────────────────────────────
+
+class TestProcessBatch:
+    def test_one_round_trip_per_stage(self, make_extractor, fake_db):
+        ex = make_extractor()
+        texts = [f"{MENTION} {i}" for i in range(3)]
+        ex._client.messages.create.return_value = _reply([
+            {"message": 1, "person_name": "Sarah", "signal_type": "emotional_concern", "signal_abstract": "a"},
+            {"message": 3, "person_name": "Tom", "signal_type": "factual_update", "signal_abstract": "b"},
+            {"message": 3, "person_name": "Nobody", "signal_type": "factual_update"},
+            {"message": 9, "person_name": "Sarah", "signal_type": "factual_update"},
+        ])
+
+        assert ex.process_batch("u1", ["Leo"], texts) == 2
+
+        assert ex._client.messages.create.call_count == 1
+        prompt = ex._client.messages.create.call_args.kwargs["messages"][0]["content"]
+        assert "Message 3:" in prompt and "Leo" in prompt
+
+        dedup = fake_db.ops("third_party_signals", "select")
+        assert len(dedup) == 1
+        assert ("in", "source_message_hash", [message_hash(t) for t in texts]) in dedup[0].filters
+        assert fake_db.get_index.call_count == 1
+
+        inserts = fake_db.ops("third_party_signals", "insert")
+        assert len(inserts) == 1
+        rows = inserts[0].payload
+        assert [(r["about_person_id"], r["source_message_hash"]) for r in rows] == [
+            ("p-sarah", message_hash(texts[0])),
+            ("p-tom", message_hash(texts[2])),
+        ]
+
+    def test_already_extracted_messages_skip_claude(self, make_extractor, fake_db):
+        ex = make_extractor()
+        fake_db.tables["third_party_signals"] = [
+            {"source_user_id": "u1", "source_message_hash": message_hash(MENTION), "signal_type": "x"},
+        ]
+        assert ex.process_batch("u1", [], [MENTION]) == 0
+        ex._client.messages.create.assert_not_called()
+        assert ex.stats()["duplicates"] == 1
+
+    def test_duplicate_signal_in_batch_stored_once(self, make_extractor, fake_db):
+        ex = make_extractor()
+        ex._client.messages.create.return_value = _reply([
+            {"person_name": "Sarah", "signal_type": "positive_regard"},
+            {"person_name": "Sarah Chen", "signal_type": "positive_regard"},
+        ])
+        assert ex.process_batch("u1", [], [MENTION]) == 1
+
+    def test_bulk_insert_failure_falls_back_to_rows(self, make_extractor, fake_db):
+        ex = make_extractor()
+        fake_db.fail_bulk_insert = True
+        ex._client.messages.create.return_value = _reply([
+            {"person_name": "Sarah", "signal_type": "positive_regard"},
+            {"person_name": "Tom", "signal_type": "factual_update"},
+        ])
+        assert ex.process_batch("u1", [], [MENTION]) == 2
+        assert len(fake_db.tables["third_party_signals"]) == 2
+
+    def test_beneficiaries_marked_stale_in_one_update(self, make_extractor, fake_db):
+        ex = make_extractor()
+        ex._client.messages.create.return_value = _reply([
+            {"message": i, "person_name": "Sarah", "signal_type": "positive_regard"} for i in (1, 2)
+        ])
+        ex.process_batch("u1", [], [MENTION, MENTION + " again"])
+        assert len(fake_db.ops("users")) == 1
+        updates = fake_db.ops("world_model", "update")
+        assert len(updates) == 1
+        assert updates[0].filters == [("in", "user_id", ["u-sarah"])]
+
+    def test_claude_failure_counted_and_raised(self, make_extractor, fake_db):
+        ex = make_extractor()
+        ex._client.messages.create.side_effect = RuntimeError("overloaded")
+        with pytest.raises(RuntimeError):
+            ex.process_batch("u1", [], [MENTION])
+        assert ex.stats()["failures"] == 1
+        assert not fake_db.ops("third_party_signals", "insert")
+
+
+# ── Job ───────────────────────────────────────────────────────────────────────
+
+class TestJob:
+    def test_queued_batches_processed_by_job_workers(self, make_extractor, fake_db, queue):
+        ex = make_extractor()
+        ex._client.messages.create.return_value = _reply([{"message": 1, "person_name": "Sarah", "signal_type": "positive_regard"}])
+        messages = _stored([f"{MENTION} {i}" for i in range(7)])
+        fake_db.tables["messages"] = messages
+        with patch.object(se, "_extractor", ex):
+            se.submit_signals("u1", messages, ["Leo"])
+            assert run(queue.drain("signals")) == 3
+        stats = ex.stats()
+        assert stats["batches"] == 3
+        assert stats["signals_stored"] == 3
+        assert queue.stats()["queues"]["signals"]["done"] == 3
+
+    def test_claude_failure_retried_by_queue(self, make_extractor, fake_db, queue):
+        ex = make_extractor()
+        ex._client.messages.create.side_effect = RuntimeError("overloaded")
+        fake_db.tables["messages"] = _stored([MENTION])
+        with patch.object(se, "_extractor", ex):
+            se.submit_signals("u1", fake_db.tables["messages"], [])
+            run(queue.drain("signals"))
+        signals = queue.stats()["queues"]["signals"]
+        assert signals["ready"] == 1 and signals["retried"] == 1
+        assert ex.stats()["deferred"] == 1 and ex.stats()["dropped"] == 0
+
+    def test_failure_outside_queue_counted_as_dropped(self, make_extractor, fake_db, queue):
+        ex = make_extractor()
+        ex._client.messages.create.side_effect = RuntimeError("overloaded")
+        with patch.object(se, "_extractor", ex):
+            assert run(se.extract_signals("u1", [MENTION, MENTION + " again"], [])) == 0
+        assert ex.stats()["dropped"] == 2 and ex.stats()["deferred"] == 0
+
+    def test_extract_and_store_bypasses_queue(self, make_extractor, fake_db, queue):
+        ex = make_extractor()
+        ex._client.messages.create.return_value = _reply([{"person_name": "Tom", "signal_type": "factual_update"}])
+        assert run(ex.extract_and_store("u1", MENTION, ["Leo"])) == 1
+        assert run(ex.extract_and_store("u1", "short", ["Leo"])) == 0
+        assert _queued(queue) == []
+
+    def test_job_loads_text_and_skips_deleted_messages(self, make_extractor, fake_db, queue):
+        ex = make_extractor()
+        messages = _stored([f"{MENTION} {i}" for i in range(3)])
+        fake_db.tables["messages"] = messages + _stored(["Someone else's message about Sarah"], user="u2")
+        with patch.object(se, "_extractor", ex):
+            se.submit_signals("u1", messages, ["Leo"])
+            fake_db.tables["messages"].remove(messages[1])          # deleted before the job ran
+            run(queue.drain("signals"))
+        prompt = ex._client.messages.create.call_args.kwargs["messages"][0]["content"]
+        assert f"{MENTION} 0" in prompt and f"{MENTION} 2" in prompt
+        assert f"{MENTION} 1" not in prompt
+
+    def test_extract_signals_bypasses_queue(self, make_extractor, fake_db, queue):
+        ex = make_extractor()
+        ex._client.messages.create.return_value = _reply([{"person_name": "Tom", "signal_type": "factual_update"}])
+        with patch.object(se, "_extractor", ex):
+            assert run(se.extract_signals("u1", [MENTION, "short"], ["Leo"])) == 1
+        assert _queued(queue) == []
+
+    def test_module_stats_empty_before_first_submit(self):
+        with patch.object(se, "_extractor", None):
+            assert se.stats() == {}
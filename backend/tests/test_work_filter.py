@@ -1,16 +1,19 @@
 """
 test_work_filter.py — 50-example test suite for WorkFilter.
 
-Tests the fast-path (rule-based) classification only.
-Claude calls are tested separately via integration tests.
+Tests the fast-path (rule-based) classification, plus classify_many batching
+and the verdict cache against a stubbed Claude client.
+Real Claude calls are tested separately via integration tests.
 """
+import asyncio
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Adjust sys.path so we can import from backend root
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import core.ingestion.work_filter as work_filter_mod
 from core.ingestion.work_filter import WorkFilter, Label
 
 
@@ -19,9 +22,19 @@ def wf():
     with patch("core.ingestion.work_filter.get_settings") as mock_settings:
         mock_settings.return_value.anthropic_api_key = "test"
         mock_settings.return_value.claude_model = "claude-sonnet-4-5"
+        mock_settings.return_value.work_filter_batch_size = 3
+        mock_settings.return_value.work_filter_concurrency = 2
         return WorkFilter()
 
 
+@pytest.fixture(autouse=True)
+def _clear_verdict_cache():
+    work_filter_mod._verdict_cache.clear()
+    with patch.object(work_filter_mod._verdict_cache, "maxsize", 1000):
+        yield
+    work_filter_mod._verdict_cache.clear()
+
+
 # ── Email: work ────────────────────────────────────────────────────────────────
 
 def test_email_work_domain_workday(wf):
@@ -232,3 +245,108 @@ def test_safe_preview_format(wf):
 def test_unknown_type_returns_none(wf):
     result = wf._fast_path("reddit", {"text": "hello"})
     assert result is None
+
+
+# ── classify_many: batching, cache, bulk logging ─────────────────────────────
+
+def _stub_claude(wf, label="personal", fail=False):
+    """Claude stub that answers every numbered item with `label` and tracks concurrency."""
+    state = {"calls": 0, "in_flight": 0, "peak": 0, "prompts": []}
+
+    async def create(model, max_tokens, messages):
+        state["calls"] += 1
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        prompt = messages[0]["content"]
+        state["prompts"].append(prompt)
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        if fail:
+            raise RuntimeError("overloaded")
+        n = prompt.count("\n[")
+        text = "\n".join(f"{i}: {label}" for i in range(1, n + 1)) if n else label
+        return MagicMock(content=[MagicMock(text=text)])
+
+    wf._client = MagicMock()
+    wf._client.messages.create = create
+    return state
+
+
+def _msg(text, sender="Alice"):
+    return {"sender_name": sender, "text_snippet": text, "group_name": ""}
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        # A stand-in database module, so these tests need no Supabase settings
+        database = MagicMock()
+        with patch.dict(sys.modules, {"database": database}):
+            return loop.run_until_complete(coro), database.get_db.return_value
+    finally:
+        loop.close()
+
+
+def test_classify_many_fast_path_skips_claude(wf):
+    state = _stub_claude(wf)
+    results, _ = _run(wf.classify_many("imessage", [_msg("LGTM, merging the PR"), _msg("Sprint retro")]))
+    assert [r.label for r in results] == [Label.WORK, Label.WORK]
+    assert state["calls"] == 0
+
+
+def test_classify_many_packs_leftovers_into_batches(wf):
+    state = _stub_claude(wf)
+    texts = [f"hey are we still on for tonight {i}" for i in range(7)]
+    results, _ = _run(wf.classify_many("imessage", [_msg(t) for t in texts]))
+    assert all(r.label == Label.PERSONAL for r in results)
+    assert state["calls"] == 3          # 7 items, batch size 3
+    assert state["peak"] <= 2           # concurrency bound
+
+
+def test_classify_many_preserves_order_with_mixed_paths(wf):
+    _stub_claude(wf, label="personal")
+    results, _ = _run(wf.classify_many("imessage", [
+        _msg("miss you, call me later"), _msg("deploy is blocked"), _msg("see you sunday then"),
+    ]))
+    assert [r.label for r in results] == [Label.PERSONAL, Label.WORK, Label.PERSONAL]
+
+
+def test_classify_many_dedupes_and_caches_by_normalized_content(wf):
+    state = _stub_claude(wf)
+    batch = [_msg("Dinner at 8?"), _msg("dinner   at 8?"), _msg("Dinner at 8?", sender="Bob")]
+    _run(wf.classify_many("imessage", batch))
+    assert state["calls"] == 1
+    assert state["prompts"][0].count("\n[") == 2   # Alice's two variants collapse to one item
+
+    _run(wf.classify_many("imessage", batch))
+    _run(wf.classify("imessage", _msg("DINNER AT 8?")))
+    assert state["calls"] == 1                      # every repeat served from cache
+
+
+def test_classify_many_outage_defaults_not_cached(wf):
+    state = _stub_claude(wf, fail=True)
+    results, _ = _run(wf.classify_many("imessage", [_msg("hmm ok then see you"), _msg("maybe tomorrow?")]))
+    assert all(r.label == Label.AMBIGUOUS and not r.passes for r in results)
+    _run(wf.classify_many("imessage", [_msg("hmm ok then see you")]))
+    assert state["calls"] == 2
+
+
+def test_classify_many_missing_reply_line_is_ambiguous(wf):
+    async def create(model, max_tokens, messages):
+        return MagicMock(content=[MagicMock(text="1: personal")])
+    wf._client = MagicMock()
+    wf._client.messages.create = create
+    results, _ = _run(wf.classify_many("imessage", [_msg("see you at the park"), _msg("ok cool")]))
+    assert results[0].label == Label.PERSONAL
+    assert results[1].label == Label.AMBIGUOUS
+
+
+def test_classify_many_logs_exclusions_in_one_insert(wf):
+    _stub_claude(wf, label="work")
+    results, db = _run(wf.classify_many("imessage", [
+        _msg("LGTM"), _msg("can you send the numbers"), _msg("call me after"),
+    ]))
+    db.table.assert_called_once_with("work_filter_log")
+    rows = db.table.return_value.insert.call_args.args[0]
+    assert len(rows) == 3
+    assert {r["label"] for r in rows} == {"work"}
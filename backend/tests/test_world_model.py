@@ -0,0 +1,231 @@
+"""
+tests/test_world_model.py — Unit tests for World Model assembly in core/world_model.py
+
+Covers:
+- assemble()                 — sections load concurrently, cross-user sections get the phone
+- section cache              — repeat assembly served from cache, failures not cached, copies handed out
+- invalidate_world_model()   — writes to a table drop only the sections it feeds
+- cross-user loaders         — one permission query, one people query, one usage RPC
+"""
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import core.world_model as wm_mod
+from core.world_model import WorldModelAssembler, invalidate_world_model
+
+_SECTIONS = [
+    "user", "people", "health", "emotional", "music", "moments",
+    "calendar", "interests", "third_party_signals", "prior_perspectives",
+]
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    wm_mod._section_cache.clear()
+    yield
+    wm_mod._section_cache.clear()
+
+
+def _assembler(delay=0.0, calls=None):
+    """Assembler whose fetchers sleep `delay` seconds and record their calls."""
+    calls = calls if calls is not None else []
+    a = WorldModelAssembler()
+
+    def fake(name, value):
+        def fetch(db, user_id, *args):
+            calls.append((name, args))
+            time.sleep(delay)
+            return value
+        return fetch
+
+    a._fetch_user = fake("user", {"id": "u1", "phone": "+14155550100"})
+    a._fetch_people = fake("people", [{"name": "Maya"}])
+    a._fetch_health = fake("health", {"days_logging": 3})
+    a._fetch_emotional = fake("emotional", {"state": "calm"})
+    a._fetch_music = fake("music", {"summary": "jazz"})
+    a._fetch_moments = fake("moments", [{"suggestion": "call Maya"}])
+    a._fetch_calendar = fake("calendar", [])
+    a._fetch_interests = fake("interests", ["climbing"])
+    a._fetch_third_party_signals = fake("third_party_signals", [])
+    a._fetch_prior_perspectives = fake("prior_perspectives", {})
+    a._persist = MagicMock()
+    return a, calls
+
+
+def _assemble(assembler, user_id="u1"):
+    async def run():
+        wm = await assembler.assemble(user_id)
+        await asyncio.gather(*wm_mod._background_tasks)  # snapshot + usage writes
+        return wm
+    loop = asyncio.new_event_loop()   # leave the thread's default loop alone for other tests
+    try:
+        with patch("database.get_db", return_value=MagicMock()):
+            return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+class TestAssemble:
+    def test_sections_populated(self):
+        assembler, _ = _assembler()
+        wm = _assemble(assembler)
+        assert wm.user["phone"] == "+14155550100"
+        assert wm.people == [{"name": "Maya"}]
+        assert wm.music == {"summary": "jazz"}
+        assert wm.interests == ["climbing"]
+
+    def test_cross_user_sections_receive_phone(self):
+        assembler, calls = _assembler()
+        _assemble(assembler)
+        args = dict(calls)
+        assert args["third_party_signals"] == ("+14155550100",)
+        assert args["prior_perspectives"] == ("+14155550100",)
+
+    def test_loaders_run_concurrently(self):
+        assembler, _ = _assembler(delay=0.1)
+        start = time.perf_counter()
+        _assemble(assembler)
+        elapsed = time.perf_counter() - start
+        # Sequential would be ~1.0s; user → cross-user is the longest chain (~0.2s)
+        assert elapsed < 0.6
+
+    def test_failed_section_isolated(self):
+        assembler, _ = _assembler()
+        assembler._fetch_health = MagicMock(side_effect=RuntimeError("db down"))
+        wm = _assemble(assembler)
+        assert wm.health == {}
+        assert wm.people == [{"name": "Maya"}]
+
+
+class TestSectionCache:
+    def test_second_assembly_served_from_cache(self):
+        assembler, calls = _assembler()
+        _assemble(assembler)
+        first = len(calls)
+        _assemble(assembler)
+        assert first == len(_SECTIONS)
+        assert len(calls) == first
+
+    def test_callers_cannot_mutate_the_cache(self):
+        assembler, _ = _assembler()
+        first = _assemble(assembler)
+        first.people[0]["name"] = "changed"
+        first.moments.append({"suggestion": "injected"})
+        second = _assemble(assembler)
+        assert second.people == [{"name": "Maya"}]
+        assert second.moments == [{"suggestion": "call Maya"}]
+
+    def test_failures_not_cached(self):
+        assembler, _ = _assembler()
+        assembler._fetch_health = MagicMock(side_effect=RuntimeError("db down"))
+        _assemble(assembler)
+        _assemble(assembler)
+        assert assembler._fetch_health.call_count == 2
+
+    def test_expired_section_reloaded(self):
+        assembler, calls = _assembler()
+        with patch.dict(wm_mod.SECTION_TTLS, {"music": -1}):
+            _assemble(assembler)
+            _assemble(assembler)
+        assert [name for name, _ in calls].count("music") == 2
+
+
+class TestInvalidate:
+    def test_table_write_drops_only_its_sections(self):
+        assembler, calls = _assembler()
+        _assemble(assembler)
+        calls.clear()
+        invalidate_world_model("u1", "calendar_events")
+        _assemble(assembler)
+        assert [name for name, _ in calls] == ["calendar"]
+
+    def test_no_tables_drops_everything_for_user(self):
+        assembler, calls = _assembler()
+        _assemble(assembler)
+        _assemble(assembler, user_id="u2")
+        calls.clear()
+        invalidate_world_model("u1")
+        _assemble(assembler)
+        _assemble(assembler, user_id="u2")
+        assert len(calls) == len(_SECTIONS)
+
+
+def _table_db(tables: dict):
+    """MagicMock db whose table(name)...execute() returns tables[name] and records calls."""
+    db = MagicMock()
+    calls = []
+
+    def table(name):
+        calls.append(name)
+        q = MagicMock()
+        for m in ("select", "eq", "gt", "in_", "order", "limit"):
+            getattr(q, m).return_value = q
+        q.execute.return_value = MagicMock(data=tables.get(name, []))
+        return q
+
+    db.table.side_effect = table
+    db.calls = calls
+    return db
+
+
+def _signal(i, source):
+    return {
+        "id": f"sig-{i}", "source_user_id": source, "signal_type": "positive_regard",
+        "signal_abstract": "warm", "signal_valence": 0.5, "signal_intensity": 0.5,
+        "confidence": 0.8, "extracted_at": "2026-10-01T00:00:00+00:00",
+    }
+
+
+class TestCrossUserLoaders:
+    def test_permissions_resolved_in_one_query(self):
+        db = _table_db({
+            "third_party_signals": [_signal(i, f"src-{i % 3}") for i in range(9)],
+            "cross_user_permissions": [
+                {"granting_user_id": "src-1", "permission_level": 2, "revoked_at": None},
+                {"granting_user_id": "src-2", "permission_level": 1, "revoked_at": "2026-10-02"},
+            ],
+        })
+        signals = WorldModelAssembler()._fetch_third_party_signals(db, "u1", "+14155550100")
+        assert db.calls.count("cross_user_permissions") == 1
+        # src-2 revoked; src-0 has no record (default silent use)
+        assert {s["signal_id"] for s in signals} == {f"sig-{i}" for i in range(9) if i % 3 != 2}
+        assert all("source_user_id" not in s for s in signals)
+
+    def test_no_per_signal_updates(self):
+        db = _table_db({"third_party_signals": [_signal(i, "src-0") for i in range(5)]})
+        WorldModelAssembler()._fetch_third_party_signals(db, "u1", "+14155550100")
+        assert db.calls == ["third_party_signals", "cross_user_permissions"]
+
+    def test_prior_perspectives_one_people_query(self):
+        db = _table_db({
+            "third_party_signals": [{"source_user_id": f"src-{i}"} for i in range(20)],
+            "people": [
+                {"user_id": f"src-{i}", "closeness_score": 0.5,
+                 "memories": [{"description": "Hiked with Maya"}]}
+                for i in range(20)
+            ],
+        })
+        pp = WorldModelAssembler()._fetch_prior_perspectives(db, "u1", "+14155550100")
+        assert db.calls.count("people") == 1
+        assert pp["perspective_count"] == 20
+        assert pp["aggregate_closeness"] == pytest.approx(0.5)
+        assert "Maya" in pp["known_entities"]
+
+    def test_usage_recorded_with_single_rpc(self):
+        db = MagicMock()
+        WorldModelAssembler()._record_signal_usage(db, ["sig-1", "sig-2"])
+        db.rpc.assert_called_once()
+        name, params = db.rpc.call_args.args
+        assert name == "increment_signal_usage"
+        assert params["signal_ids"] == ["sig-1", "sig-2"]
+
+    def test_usage_recorded_on_every_assembly(self):
+        assembler, _ = _assembler()
+        assembler._fetch_third_party_signals = lambda db, uid, phone: [{"signal_id": "sig-1"}]
+        assembler._record_signal_usage = MagicMock()
+        _assemble(assembler)
+        _assemble(assembler)  # third_party served from cache, still counted
+        assert assembler._record_signal_usage.call_count == 2